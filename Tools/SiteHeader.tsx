@@ -14,8 +14,8 @@ export default function SiteHeader() {
     <header className="w-full border-b border-neutral-200 bg-white/95 backdrop-blur supports-[backdrop-filter]:bg-white/70">
       <div className="mx-auto max-w-6xl px-4 sm:px-6">
         <div className="flex h-16 items-center justify-between gap-3">
-          {/* Lente (solo icona, non attiva) */}
-          <button
+          {/* Lente: porta alla pagina di ricerca (PL-8) */}
+          <Link href={`/${locale || "it"}/search`}
             aria-label="Cerca"
             className="inline-flex h-9 w-9 items-center justify-center rounded-md border border-neutral-200 hover:bg-neutral-50"
           >
@@ -26,7 +26,7 @@ export default function SiteHeader() {
                 d="m21.53 20.47l-4.7-4.7a7.5 7.5 0 1 0-1.06 1.06l4.7 4.7a.75.75 0 0 0 1.06-1.06M4.5 10.5a6 6 0 1 1 12 0a6 6 0 0 1-12 0"
               />
             </svg>
-          </button>
+          </Link>
 
           {/* Logo */}
           <Link href={`/${locale}`} className="flex items-center gap-2">
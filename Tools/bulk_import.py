@@ -0,0 +1,364 @@
+# -*- coding: utf-8 -*-
+"""
+bulk_import.py
+Import massivo (upsert) di news/articles da NDJSON, CSV o Markdown.
+- Sorgenti: file .ndjson/.jsonl (un oggetto per riga), .csv (con intestazione),
+  .md con front matter "chiave: valore" (slug di default = nome del file)
+- Validazione a batch: campi obbligatori, lingua, formato slug, colonne note, date
+- Chiave naturale (slug, lang): duplicati nella sorgente risolti con "vince l'ultimo"
+- Backend rest: PostgREST on_conflict=slug,lang + resolution=merge-duplicates
+- Backend copy: psycopg2 COPY in tabella temporanea + INSERT … ON CONFLICT DO UPDATE
+- Batch in parallelo (--concurrency), report finale con righe/s
+
+Richiede gli indici unici (slug, lang) della migrazione 0004.
+
+Uso:
+  python Tools/bulk_import.py news archivio/news.ndjson
+  python Tools/bulk_import.py articles contenuti/articoli/ --backend copy --batch-size 2000
+  python Tools/bulk_import.py news export.csv --dry-run      # solo validazione
+Opzioni:
+  --backend rest|copy   rest: NEXT_PUBLIC_SUPABASE_URL + SUPABASE_SERVICE_ROLE_KEY (webapp/.env.local)
+                        copy: SUPABASE_DB_URL (webapp/.env.db) o --db-url
+  --batch-size N        righe per richiesta/COPY (default 500)
+  --concurrency N       batch in parallelo (default 4)
+  --render              solo articles: dopo l'import renderizza il Markdown dei corpi nuovi o
+                        modificati in article_renders (md_render.py, richiede SUPABASE_DB_URL)
+Exit codes: 0 OK, 1 righe scartate in validazione, 2 errore I/O/HTTP/DB.
+"""
+from __future__ import annotations
+import argparse
+import csv
+import io
+import json
+import re
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from supabase_rest import SupabaseRest, RestError, load_env
+
+LOCALES = ("it", "en", "fr", "es", "de")   # come ensure_next_intl_config.py
+SLUG_RX = re.compile(r"^[a-z0-9]+(?:-[a-z0-9]+)*$")
+SOURCE_EXTS = {".ndjson", ".jsonl", ".csv", ".md"}
+CONFLICT_KEY = ("slug", "lang")
+MAX_ERRORS_SHOWN = 20
+
+@dataclass(frozen=True)
+class TableSpec:
+    columns: Tuple[str, ...]
+    markdown_column: str                  # dove finisce il corpo dei file .md
+    dates: Tuple[str, ...] = ("source_date",)
+    timestamps: Tuple[str, ...] = ("published_at", "created_at", "updated_at")
+
+TABLES: Dict[str, TableSpec] = {
+    "news": TableSpec(
+        ("slug", "lang", "title", "summary", "body", "category", "cover_url", "image_url",
+         "source", "source_url", "source_date", "published", "published_at", "created_at", "updated_at"),
+        markdown_column="body",
+    ),
+    "articles": TableSpec(
+        ("slug", "lang", "title", "subtitle", "excerpt", "body", "body_md", "content", "category",
+         "cover_url", "image_url", "published", "published_at", "created_at", "updated_at"),
+        markdown_column="body_md",
+    ),
+}
+REQUIRED = ("slug", "lang", "title")
+TRUE_VALUES = {"true", "1", "yes", "y", "si", "sì"}
+FALSE_VALUES = {"false", "0", "no", "n"}
+
+# -------------------- lettura sorgenti --------------------
+
+Raw = Tuple[str, Dict[str, Any]]   # (origine "file:riga", campi)
+
+def parse_front_matter(text: str) -> Tuple[Dict[str, Any], str]:
+    if not text.startswith("---"):
+        return {}, text
+    end = text.find("\n---", 3)
+    if end == -1:
+        return {}, text
+    meta: Dict[str, Any] = {}
+    for line in text[3:end].splitlines():
+        if ":" not in line or line.lstrip().startswith("#"):
+            continue
+        k, v = line.split(":", 1)
+        v = v.strip()
+        if len(v) >= 2 and v[0] == v[-1] and v[0] in "\"'":
+            v = v[1:-1]
+        meta[k.strip()] = v
+    body = text[end + 4:]
+    return meta, body[1:] if body.startswith("\n") else body
+
+def read_source(path: Path, spec: TableSpec) -> Iterator[Raw]:
+    rel = path.as_posix()
+    ext = path.suffix.lower()
+    if ext in (".ndjson", ".jsonl"):
+        with path.open("r", encoding="utf-8-sig") as f:
+            for n, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                try:
+                    obj = json.loads(line)
+                except json.JSONDecodeError as e:
+                    yield f"{rel}:{n}", {"__error__": f"JSON non valido ({e.msg})"}
+                    continue
+                yield f"{rel}:{n}", obj if isinstance(obj, dict) else {"__error__": "riga non è un oggetto"}
+    elif ext == ".csv":
+        with path.open("r", encoding="utf-8-sig", newline="") as f:
+            for n, rec in enumerate(csv.DictReader(f), 2):
+                # CSV non distingue vuoto da NULL: le celle vuote non sovrascrivono i valori esistenti
+                yield f"{rel}:{n}", {k: v for k, v in rec.items() if k and v not in ("", None)}
+    elif ext == ".md":
+        meta, body = parse_front_matter(path.read_text(encoding="utf-8-sig"))
+        meta.setdefault("slug", path.stem)
+        if body.strip():
+            meta.setdefault(spec.markdown_column, body)
+        yield rel, meta
+
+def iter_sources(paths: Iterable[Path], spec: TableSpec) -> Iterator[Raw]:
+    for p in paths:
+        if p.is_dir():
+            files = sorted(f for f in p.rglob("*") if f.is_file() and f.suffix.lower() in SOURCE_EXTS)
+        else:
+            files = [p]
+        for f in files:
+            yield from read_source(f, spec)
+
+# -------------------- validazione --------------------
+
+def validate_row(row: Dict[str, Any], spec: TableSpec) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+    if "__error__" in row:
+        return None, row["__error__"]
+    unknown = sorted(set(row) - set(spec.columns))
+    if unknown:
+        return None, f"colonne sconosciute: {', '.join(unknown)}"
+    out = {k: (v.strip() if isinstance(v, str) and k in ("slug", "lang", "title") else v) for k, v in row.items()}
+    for k in REQUIRED:
+        if not out.get(k):
+            return None, f"campo obbligatorio mancante: {k}"
+    if out["lang"] not in LOCALES:
+        return None, f"lingua non supportata: {out['lang']}"
+    if not SLUG_RX.match(out["slug"]):
+        return None, f"slug non valido: {out['slug']!r}"
+    if "published" in out and not isinstance(out["published"], bool):
+        v = str(out["published"]).strip().lower()
+        if v in TRUE_VALUES:
+            out["published"] = True
+        elif v in FALSE_VALUES:
+            out["published"] = False
+        else:
+            return None, f"published non booleano: {out['published']!r}"
+    try:
+        for k in spec.dates:
+            if out.get(k):
+                out[k] = date.fromisoformat(str(out[k])).isoformat()
+        for k in spec.timestamps:
+            if out.get(k):
+                out[k] = datetime.fromisoformat(str(out[k])).isoformat()
+    except ValueError as e:
+        return None, f"data non valida: {e}"
+    return out, None
+
+@dataclass
+class ImportStats:
+    read: int = 0
+    invalid: int = 0
+    duplicates: int = 0
+    upserted: int = 0
+    batches: int = 0
+    failed_batches: int = 0
+    errors: List[str] = field(default_factory=list)
+
+def validate_all(raws: Iterator[Raw], spec: TableSpec, batch_size: int,
+                 stats: ImportStats) -> Dict[Tuple[str, str], Dict[str, Any]]:
+    """Valida a blocchi di `batch_size`; ritorna le righe valide per chiave (slug, lang)."""
+    rows: Dict[Tuple[str, str], Dict[str, Any]] = {}
+    while True:
+        chunk = [r for _, r in zip(range(batch_size), raws)]
+        if not chunk:
+            break
+        stats.read += len(chunk)
+        for origin, raw in chunk:
+            row, err = validate_row(raw, spec)
+            if err:
+                stats.invalid += 1
+                stats.errors.append(f"{origin}: {err}")
+                continue
+            key = (row["slug"], row["lang"])
+            if key in rows:
+                stats.duplicates += 1
+                del rows[key]   # reinserita in coda: l'ordine resta quello dell'ultima occorrenza
+            rows[key] = row
+    return rows
+
+def make_batches(rows: Iterable[Dict[str, Any]], batch_size: int) -> List[List[Dict[str, Any]]]:
+    """Batch omogenei per insieme di colonne: una colonna assente non deve diventare NULL nel merge."""
+    groups: Dict[Tuple[str, ...], List[Dict[str, Any]]] = {}
+    for r in rows:
+        groups.setdefault(tuple(sorted(r)), []).append(r)
+    out = []
+    for group in groups.values():
+        out.extend(group[i:i + batch_size] for i in range(0, len(group), batch_size))
+    return out
+
+# -------------------- backend --------------------
+
+class RestBackend:
+    name = "rest"
+
+    def __init__(self, table: str, workers: int):
+        env = load_env()
+        self.table = table
+        self.rest = SupabaseRest.from_env(env, service=True, pool_size=workers, timeout=60)
+
+    def upsert(self, batch: List[Dict[str, Any]]) -> None:
+        self.rest.insert(self.table, batch, on_conflict=",".join(CONFLICT_KEY), merge=True, returning=False)
+
+    def close(self) -> None:
+        self.rest.close()
+
+class CopyBackend:
+    name = "copy"
+
+    def __init__(self, table: str, db_url: Optional[str]):
+        import migrate   # psycopg2 serve solo a questo backend
+        self._connect = migrate.connect
+        self.db_url = migrate.load_db_url(db_url)
+        self.table = table
+        self.staging = f"_import_{table}"
+        self._local = threading.local()
+        self._conns: list = []
+        self._lock = threading.Lock()
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._connect(self.db_url)
+            conn.autocommit = False
+            self._local.conn = conn
+            with self._lock:
+                self._conns.append(conn)
+        return conn
+
+    def upsert(self, batch: List[Dict[str, Any]]) -> None:
+        cols = list(batch[0])
+        buf = io.StringIO()
+        w = csv.writer(buf)
+        for r in batch:
+            w.writerow(["\\N" if r[c] is None else r[c] for c in cols])
+        buf.seek(0)
+        col_list = ", ".join(cols)
+        updates = ", ".join(f"{c} = excluded.{c}" for c in cols if c not in CONFLICT_KEY)
+        conn = self._conn()
+        try:
+            with conn.cursor() as cur:
+                cur.execute(f"create temp table if not exists {self.staging} "
+                            f"(like public.{self.table} including defaults) on commit delete rows")
+                cur.copy_expert(f"copy {self.staging} ({col_list}) from stdin with (format csv, null '\\N')", buf)
+                cur.execute(
+                    f"insert into public.{self.table} ({col_list}) select {col_list} from {self.staging} "
+                    f"on conflict ({', '.join(CONFLICT_KEY)}) do "
+                    + (f"update set {updates}" if updates else "nothing")
+                )
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+
+    def close(self) -> None:
+        for c in self._conns:
+            c.close()
+
+def describe_error(e: Exception) -> str:
+    if isinstance(e, RestError):
+        return f"{e.status} {e.reason} -> {e.body.decode('utf-8', errors='ignore')[:300]}"
+    return str(e).strip()
+
+def run_import(backend, batches: List[List[Dict[str, Any]]], workers: int, stats: ImportStats) -> None:
+    def job(batch):
+        backend.upsert(batch)
+        return len(batch)
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        futures = {pool.submit(job, b): b for b in batches}
+        for fut in as_completed(futures):
+            stats.batches += 1
+            try:
+                stats.upserted += fut.result()
+            except Exception as e:
+                stats.failed_batches += 1
+                b = futures[fut]
+                stats.errors.append(f"batch {b[0]['lang']}:{b[0]['slug']}… ({len(b)} righe): {describe_error(e)}")
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description="Upsert massivo di news/articles da NDJSON, CSV o Markdown")
+    ap.add_argument("table", choices=sorted(TABLES))
+    ap.add_argument("sources", nargs="+", type=Path, help="File o cartelle (.ndjson, .jsonl, .csv, .md)")
+    ap.add_argument("--backend", choices=("rest", "copy"), default="rest")
+    ap.add_argument("--batch-size", type=int, default=500)
+    ap.add_argument("--concurrency", type=int, default=4)
+    ap.add_argument("--db-url", help="Solo backend copy (default: SUPABASE_DB_URL / webapp/.env.db)")
+    ap.add_argument("--dry-run", action="store_true", help="Valida senza scrivere")
+    ap.add_argument("--render", action="store_true", help="Render Markdown dopo l'import (solo articles)")
+    args = ap.parse_args(argv)
+
+    spec = TABLES[args.table]
+    missing = [p for p in args.sources if not p.exists()]
+    if missing:
+        print(f"[ERROR] Sorgenti non trovate: {', '.join(map(str, missing))}")
+        return 2
+
+    stats = ImportStats()
+    t0 = time.perf_counter()
+    try:
+        rows = validate_all(iter_sources(args.sources, spec), spec, args.batch_size, stats)
+    except (OSError, UnicodeDecodeError, csv.Error) as e:
+        print(f"[ERROR] Lettura sorgenti: {e}")
+        return 2
+    t_valid = time.perf_counter() - t0
+    batches = make_batches(rows.values(), args.batch_size)
+
+    t1 = time.perf_counter()
+    if not args.dry_run and batches:
+        backend = RestBackend(args.table, args.concurrency) if args.backend == "rest" \
+            else CopyBackend(args.table, args.db_url)
+        try:
+            run_import(backend, batches, args.concurrency, stats)
+        finally:
+            backend.close()
+    t_write = time.perf_counter() - t1
+    total = time.perf_counter() - t0
+
+    print(f"=== bulk_import {args.table} ({'dry-run' if args.dry_run else args.backend}) ===")
+    for e in stats.errors[:MAX_ERRORS_SHOWN]:
+        print(f"[WARN] {e}")
+    if len(stats.errors) > MAX_ERRORS_SHOWN:
+        print(f"[WARN] … altri {len(stats.errors) - MAX_ERRORS_SHOWN} errori")
+    print(f"[IMPORT] letti: {stats.read} | validi: {len(rows)} | scartati: {stats.invalid} | "
+          f"duplicati: {stats.duplicates} | upsert: {stats.upserted} | "
+          f"batch: {stats.batches}/{len(batches)} (falliti: {stats.failed_batches})")
+    print(f"[TEMPI] validazione: {t_valid*1000:.0f} ms ({stats.read / max(t_valid, 1e-9):.0f} righe/s) | "
+          f"scrittura: {t_write*1000:.0f} ms ({stats.upserted / max(t_write, 1e-9):.0f} righe/s) | "
+          f"totale: {total*1000:.0f} ms | batch-size: {args.batch_size} | concurrency: {args.concurrency}")
+    if stats.failed_batches:
+        return 2
+    if args.render and args.table == "articles" and not args.dry_run and stats.upserted:
+        import md_render, migrate
+        conn = migrate.connect(migrate.load_db_url(args.db_url))
+        try:
+            t2 = time.perf_counter()
+            st = md_render.backfill(conn, workers=args.concurrency)
+        finally:
+            conn.close()
+        print(f"[RENDER] renderizzati: {st.rendered} | scritti: {st.written} | errori: {len(st.errors)} | "
+              f"{(time.perf_counter()-t2)*1000:.0f} ms")
+        if st.errors:
+            return 2
+    return 1 if stats.invalid else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,121 @@
+# -*- coding: utf-8 -*-
+"""
+check_cache.py
+Cache dei risultati dei check (preflight, verify_stack_readiness) in reports/.
+- Ogni check dichiara i file da cui dipende
+- L'impronta degli input è (path, mtime, size, sha256 del contenuto)
+- Se mtime e size non cambiano lo sha256 salvato viene riusato (niente rilettura)
+- Se l'impronta coincide con quella salvata, il verdetto precedente viene riusato
+- Con `index` (project_index.ProjectIndex) stat e letture passano dallo snapshot condiviso
+
+Uso:
+  cache = CheckCache(ROOT / "reports" / "preflight_cache.json", force=args.force)
+  hit = cache.get("i18n", inputs)
+  if hit is None:
+      result = run(); cache.put("i18n", inputs, result)
+  cache.save()
+"""
+from __future__ import annotations
+import hashlib
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional
+
+CACHE_VERSION = 1
+
+def sha256_file(p: Path) -> str:
+    h = hashlib.sha256()
+    with p.open("rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+class CheckCache:
+    def __init__(self, path: Path, *, force: bool = False, root: Optional[Path] = None, index=None):
+        self.path = path
+        self.index = index
+        self.force = force
+        self.root = root or path.parent.parent
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.data: Dict[str, Any] = {"version": CACHE_VERSION, "files": {}, "checks": {}}
+        if path.exists():
+            try:
+                loaded = json.loads(path.read_text(encoding="utf-8"))
+                if loaded.get("version") == CACHE_VERSION:
+                    self.data = loaded
+            except Exception:
+                pass  # cache corrotta: si riparte da zero
+
+    def _key(self, p: Path) -> str:
+        try:
+            return p.resolve().relative_to(self.root.resolve()).as_posix()
+        except ValueError:
+            return p.resolve().as_posix()
+
+    def file_sig(self, p: Path) -> str:
+        """Firma di un file: 'missing' oppure size:sha256 (hash riusato se mtime e size sono invariati)."""
+        key = self._key(p)
+        if self.index is not None:
+            e = self.index.stat(p)
+            if e is None:
+                return "missing"
+            is_dir, size, mtime_ns = e.is_dir, e.size, e.mtime_ns
+        else:
+            try:
+                st = os.stat(p)
+            except OSError:
+                return "missing"
+            is_dir, size, mtime_ns = not os.path.isfile(p), st.st_size, st.st_mtime_ns
+        if is_dir:
+            return f"dir:{mtime_ns}"
+        with self._lock:
+            prev = self.data["files"].get(key)
+        if prev and prev["mtime_ns"] == mtime_ns and prev["size"] == size:
+            digest = prev["sha256"]
+        else:
+            if self.index is not None:
+                digest = hashlib.sha256(self.index.read_bytes(p) or b"").hexdigest()
+            else:
+                digest = sha256_file(p)
+            with self._lock:
+                self.data["files"][key] = {"mtime_ns": mtime_ns, "size": size, "sha256": digest}
+        # il verdetto dipende dal contenuto: un touch senza modifiche resta un hit
+        return f"{size}:{digest}"
+
+    def fingerprint(self, inputs: Iterable[Path]) -> str:
+        h = hashlib.sha256()
+        for p in sorted({self._key(Path(p)): Path(p) for p in inputs}.items()):
+            h.update(f"{p[0]}={self.file_sig(p[1])}\n".encode("utf-8"))
+        return h.hexdigest()
+
+    def get(self, name: str, inputs: Iterable[Path]) -> Optional[Any]:
+        """Verdetto in cache se gli input non sono cambiati; None se assente, scaduto o --force."""
+        if self.force:
+            with self._lock:
+                self.misses += 1
+            return None
+        fp = self.fingerprint(inputs)
+        with self._lock:
+            entry = self.data["checks"].get(name)
+            if entry and entry.get("fp") == fp:
+                self.hits += 1
+                return entry["result"]
+            self.misses += 1
+        return None
+
+    def put(self, name: str, inputs: Iterable[Path], result: Any) -> None:
+        # impronta calcolata DOPO il check: se il check ha patchato un input, vale lo stato finale
+        fp = self.fingerprint(inputs)
+        with self._lock:
+            self.data["checks"][name] = {"fp": fp, "result": result}
+
+    def save(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(self.path.suffix + ".tmp")
+        with self._lock:
+            tmp.write_text(json.dumps(self.data, ensure_ascii=False), encoding="utf-8")
+        os.replace(tmp, self.path)
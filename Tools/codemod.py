@@ -0,0 +1,246 @@
+# -*- coding: utf-8 -*-
+"""
+codemod.py
+Runner riutilizzabile per i fixer regex su file TS/TSX (final_fix_supabase_imports,
+diagnose_and_fix_supabase_browser, …).
+- Walk unico con os.scandir, potato: node_modules, .next, .git + regole .gitignore
+  (quelle di ogni cartella visitata, incluse negazioni "!" e pattern "**")
+- Ogni file viene letto una sola volta, dentro il worker
+- Trasformazioni distribuite su un process pool (inline sotto una soglia di file)
+- Report: file scansionati/modificati, match, throughput (file/s, MB/s)
+
+La trasformazione è una funzione top-level (picklable):
+  def transform(path: str, text: str) -> tuple[str, list[str], int]
+      # -> (nuovo testo, righe di log, numero di match)
+"""
+from __future__ import annotations
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Iterable, List, Optional, Sequence, Tuple
+
+PRUNE_DIRS = {"node_modules", ".next", ".git"}
+INLINE_THRESHOLD = 64   # sotto questa soglia l'avvio del pool costa più del lavoro
+
+Transform = Callable[[str, str], Tuple[str, List[str], int]]
+
+# -------------------- .gitignore --------------------
+
+def _glob_to_regex(pat: str) -> str:
+    i, out = 0, []
+    while i < len(pat):
+        c = pat[i]
+        if pat.startswith("**/", i):
+            out.append("(?:.*/)?"); i += 3; continue
+        if pat.startswith("/**", i) and i + 3 == len(pat):
+            out.append("/.*"); i += 3; continue
+        if pat.startswith("**", i):
+            out.append(".*"); i += 2; continue
+        if c == "*":
+            out.append("[^/]*")
+        elif c == "?":
+            out.append("[^/]")
+        elif c == "[":
+            j = pat.find("]", i + 1)
+            if j == -1:
+                out.append(re.escape(c))
+            else:
+                cls = pat[i + 1:j].replace("\\", "\\\\")
+                out.append(f"[{'^' + cls[1:] if cls.startswith('!') else cls}]")
+                i = j
+        else:
+            out.append(re.escape(c))
+        i += 1
+    return "".join(out)
+
+@dataclass
+class IgnoreRule:
+    regex: re.Pattern
+    negate: bool
+    dir_only: bool
+
+def parse_gitignore(text: str) -> List[IgnoreRule]:
+    rules: List[IgnoreRule] = []
+    for raw in text.splitlines():
+        line = raw.rstrip()
+        if not line or line.startswith("#"):
+            continue
+        negate = line.startswith("!")
+        if negate:
+            line = line[1:]
+        dir_only = line.endswith("/")
+        line = line.rstrip("/")
+        anchored = "/" in line
+        line = line.lstrip("/")
+        if not line:
+            continue
+        rx = _glob_to_regex(line)
+        if not anchored:
+            rx = "(?:.*/)?" + rx
+        rules.append(IgnoreRule(re.compile(rx + r"\Z"), negate, dir_only))
+    return rules
+
+def read_gitignore(path: Path) -> List[IgnoreRule]:
+    try:
+        data = path.read_bytes()
+    except OSError:
+        return []
+    # alcuni .gitignore generati da PowerShell sono UTF-16 con BOM
+    if data.startswith((b"\xff\xfe", b"\xfe\xff")):
+        text = data.decode("utf-16", errors="replace")
+    else:
+        text = data.decode("utf-8-sig", errors="replace")
+    return parse_gitignore(text)
+
+def is_ignored(layers: Sequence[Tuple[str, List[IgnoreRule]]], rel: str, is_dir: bool) -> bool:
+    """`layers`: (prefisso relativo della cartella del .gitignore, regole). Vince l'ultima regola che matcha."""
+    ignored = False
+    for prefix, rules in layers:
+        if prefix:
+            if not rel.startswith(prefix + "/"):
+                continue
+            sub = rel[len(prefix) + 1:]
+        else:
+            sub = rel
+        for r in rules:
+            if r.dir_only and not is_dir:
+                continue
+            if r.regex.match(sub):
+                ignored = not r.negate
+    return ignored
+
+# -------------------- walk --------------------
+
+def iter_source_files(base: Path, exts: Iterable[str] = (".ts", ".tsx"), *,
+                      root: Optional[Path] = None, prune: Iterable[str] = PRUNE_DIRS,
+                      gitignore: bool = True) -> List[Path]:
+    """File sotto `base` con le estensioni date, potando `prune` e i path ignorati da git."""
+    base = Path(base).resolve()
+    root = Path(root).resolve() if root else base
+    exts = tuple(exts)
+    prune = set(prune)
+    layers: List[Tuple[str, List[IgnoreRule]]] = []
+    if gitignore and base != root:
+        # .gitignore delle cartelle da root fino a base esclusa (quello di base si legge nel walk)
+        d = root
+        for part in ("",) + base.relative_to(root).parts[:-1]:
+            d = d / part if part else d
+            rules = read_gitignore(d / ".gitignore")
+            if rules:
+                layers.append(("" if d == root else d.relative_to(root).as_posix(), rules))
+    out: List[Path] = []
+    stack = [(base, list(layers))]
+    while stack:
+        d, lay = stack.pop()
+        rel_d = d.relative_to(root).as_posix()
+        rel_d = "" if rel_d == "." else rel_d
+        if gitignore:
+            rules = read_gitignore(d / ".gitignore")
+            if rules:
+                lay = lay + [(rel_d, rules)]
+        try:
+            it = os.scandir(d)
+        except OSError:
+            continue
+        with it:
+            for de in it:
+                rel = f"{rel_d}/{de.name}" if rel_d else de.name
+                try:
+                    is_dir = de.is_dir(follow_symlinks=False)
+                except OSError:
+                    continue
+                if is_dir:
+                    if de.name in prune or (gitignore and is_ignored(lay, rel, True)):
+                        continue
+                    stack.append((Path(de.path), lay))
+                elif de.name.endswith(exts) and not (gitignore and is_ignored(lay, rel, False)):
+                    out.append(Path(de.path))
+    out.sort()
+    return out
+
+# -------------------- esecuzione --------------------
+
+@dataclass
+class FileResult:
+    path: str
+    size: int = 0
+    matches: int = 0
+    new_text: Optional[str] = None      # valorizzato solo se il file cambia
+    logs: List[str] = field(default_factory=list)
+    error: Optional[str] = None
+
+@dataclass
+class CodemodReport:
+    results: List[FileResult]
+    seconds: float
+    workers: int
+
+    @property
+    def changed(self) -> List[FileResult]:
+        return [r for r in self.results if r.new_text is not None]
+
+    @property
+    def matches(self) -> int:
+        return sum(r.matches for r in self.results)
+
+    def summary(self) -> str:
+        n = len(self.results)
+        mb = sum(r.size for r in self.results) / (1024 * 1024)
+        secs = max(self.seconds, 1e-9)
+        return (f"[CODEMOD] file: {n} | modificati: {len(self.changed)} | match: {self.matches} | "
+                f"{self.seconds*1000:.0f} ms | {n/secs:.0f} file/s | {mb/secs:.2f} MB/s | worker: {self.workers}")
+
+def _apply(transform: Transform, path: str) -> FileResult:
+    res = FileResult(path)
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+        res.size = len(data)
+        text = data.decode("utf-8")
+    except Exception as e:
+        res.error = f"read: {e}"
+        return res
+    try:
+        new_text, logs, matches = transform(path, text)
+    except Exception as e:
+        res.error = f"transform: {e}"
+        return res
+    res.logs = logs
+    res.matches = matches
+    if new_text != text:
+        res.new_text = new_text
+    return res
+
+def _apply_batch(transform: Transform, paths: List[str]) -> List[FileResult]:
+    return [_apply(transform, p) for p in paths]
+
+def run_codemod(files: Sequence[Path], transform: Transform, *, workers: Optional[int] = None,
+                write: bool = True) -> CodemodReport:
+    """Applica `transform` ai file; scrive (nel processo principale) solo quelli cambiati."""
+    t0 = time.perf_counter()
+    paths = [str(p) for p in files]
+    workers = workers or os.cpu_count() or 1
+    if workers <= 1 or len(paths) < INLINE_THRESHOLD:
+        workers = 1
+        results = _apply_batch(transform, paths)
+    else:
+        # batch per worker: meno round-trip di pickling rispetto a un file per task
+        size = max(1, len(paths) // (workers * 4))
+        batches = [paths[i:i + size] for i in range(0, len(paths), size)]
+        results = []
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for chunk in pool.map(_apply_batch, [transform] * len(batches), batches):
+                results.extend(chunk)
+    if write:
+        for r in results:
+            if r.new_text is None:
+                continue
+            try:
+                with open(r.path, "w", encoding="utf-8", newline="") as f:
+                    f.write(r.new_text)
+            except Exception as e:
+                r.error = f"write: {e}"
+    return CodemodReport(results, time.perf_counter() - t0, workers)
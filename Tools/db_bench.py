@@ -0,0 +1,257 @@
+# -*- coding: utf-8 -*-
+"""
+db_bench.py
+Benchmark di carico delle query del sito su un Postgres locale (dati di synth_data.py).
+- Riproduce le forme di query dei template: lista, count, dettaglio per slug,
+  vista per categoria, sitemap, ricerca full-text
+- Parametri variati a ogni richiesta (lingua, pagina, slug, categoria) da un campione reale
+- N richieste per forma distribuite su --concurrency connessioni (ruolo anon, come il sito)
+- Latenze p50/p95/p99, richieste/s e righe/s per forma, salvate in JSON in reports/
+- Soglie p95 per forma (ricerca full-text: 50 ms): exit 1 se superate
+
+Uso:
+  python Tools/synth_data.py --news 100000 --articles 20000
+  python Tools/db_bench.py --concurrency 8 --requests 500
+  python Tools/db_bench.py --only news_list news_by_slug
+  python Tools/synth_data.py --news 100000 && python Tools/db_bench.py --only search_news search_all
+Opzioni:
+  --db-url        default: env DATABASE_URL oppure il Postgres di `supabase start`
+  --role          ruolo delle connessioni (default anon; "" = utente della connessione)
+  --warmup N      richieste di riscaldamento per forma, escluse dalle statistiche (default 20)
+Report: reports/bench_<timestamp>.json + reports/bench_latest.json
+"""
+from __future__ import annotations
+import argparse
+import json
+import math
+import os
+import random
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+import migrate
+from synth_data import LOCALES, LOCAL_DB_URL, WORDS
+
+ROOT = Path(__file__).resolve().parents[1]
+REPORTS = ROOT / "reports"
+PAGE_SIZE = 8
+
+@dataclass
+class Sample:
+    news_slugs: List[Tuple[str, str]]
+    article_slugs: List[Tuple[str, str]]
+    categories: List[str]
+
+@dataclass(frozen=True)
+class BenchShape:
+    name: str
+    origin: str
+    sql: str
+    params: Callable[[random.Random, Sample], tuple]
+    slo_p95_ms: Optional[float] = None   # soglia verificata a fine run (exit 1 se superata)
+
+def search_terms(r: random.Random, lang: str) -> str:
+    """1-2 parole del lessico della lingua, l'ultima troncata (ricerca mentre si scrive)."""
+    words = [w for w in WORDS[lang] if len(w) > 3]
+    picked = [r.choice(words) for _ in range(r.randint(1, 2))]
+    picked[-1] = picked[-1][:r.randint(3, len(picked[-1]))]
+    return " ".join(picked)
+
+def search_params(kind: str) -> Callable[[random.Random, Sample], tuple]:
+    def make(r: random.Random, s: Sample) -> tuple:
+        lang = r.choice(LOCALES)
+        return (search_terms(r, lang), lang, kind)
+    return make
+
+def slug_cursor(r: random.Random, slugs: List[Tuple[str, str]]) -> tuple:
+    """(lingua, slug) come cursore di un blocco di shard a metà sitemap."""
+    if not slugs:
+        return ("it", "")
+    slug, lang = r.choice(slugs)
+    return (lang, slug)
+
+SHAPES = [
+    BenchShape("news_list", "pl6f PAGE_TSX (offset)",
+               "select id, slug, title, summary, lang from public.news "
+               "where lang = %s order by created_at desc limit " + str(PAGE_SIZE) + " offset %s",
+               lambda r, s: (r.choice(LOCALES), r.randrange(0, 50) * PAGE_SIZE)),
+    BenchShape("news_count", "pl6f PAGE_TSX (RPC content_count)",
+               "select public.content_count('news', %s)",
+               lambda r, s: (r.choice(LOCALES),)),
+    BenchShape("news_by_slug", "news/[slug]",
+               "select * from public.news where slug = %s and lang = %s",
+               lambda r, s: r.choice(s.news_slugs) if s.news_slugs else ("missing", "it")),
+    BenchShape("articles_by_slug", "pl3 articles/[slug]",
+               "select id, title, excerpt, content, cover_url, slug, published_at "
+               "from public.articles where slug = %s and lang = %s",
+               lambda r, s: r.choice(s.article_slugs) if s.article_slugs else ("missing", "it")),
+    BenchShape("category_view", "pl7 blog/category/[slug] (vista materializzata, migrazione 0007)",
+               "select slug, title, summary, cover_url, published_at from public.posts_by_category_view "
+               "where locale = %s and category_slug = %s order by published_at desc",
+               lambda r, s: (r.choice(LOCALES), r.choice(s.categories) if s.categories else "")),
+    BenchShape("sitemap", "pl6a sitemap sharded (blocco da 1000 dopo un cursore slug)",
+               "select slug, updated_at from public.news where lang = %s and slug > %s "
+               "order by slug limit 1000",
+               lambda r, s: slug_cursor(r, s.news_slugs)),
+    BenchShape("search_news", "pl8 search (RPC search_content)",
+               "select * from public.search_content(%s, %s, %s, 10, 0)",
+               search_params("news"), slo_p95_ms=50),
+    BenchShape("search_articles", "pl8 search (RPC search_content)",
+               "select * from public.search_content(%s, %s, %s, 10, 0)",
+               search_params("articles"), slo_p95_ms=50),
+    BenchShape("search_all", "pl8 search (RPC search_content)",
+               "select * from public.search_content(%s, %s, %s, 10, 0)",
+               search_params(None), slo_p95_ms=50),
+]
+
+def percentile(sorted_vals: List[float], p: float) -> float:
+    """Nearest-rank su valori già ordinati."""
+    if not sorted_vals:
+        return 0.0
+    k = max(0, min(len(sorted_vals) - 1, math.ceil(p / 100 * len(sorted_vals)) - 1))
+    return sorted_vals[k]
+
+def load_sample(conn, size: int = 2000) -> Sample:
+    with conn.cursor() as cur:
+        cur.execute("select slug, lang from public.news where published and slug is not null "
+                    "order by random() limit %s", (size,))
+        news = cur.fetchall()
+        cur.execute("select slug, lang from public.articles where published and slug is not null "
+                    "order by random() limit %s", (size,))
+        arts = cur.fetchall()
+        cur.execute("select distinct category from public.articles where category is not null")
+        cats = [r[0] for r in cur.fetchall()]
+    return Sample(news, arts, cats)
+
+class Runner:
+    def __init__(self, db_url: str, role: str, sample: Sample, seed: int):
+        self.db_url = db_url
+        self.role = role
+        self.sample = sample
+        self.seed = seed
+        self._local = threading.local()
+        self._conns: list = []
+        self._lock = threading.Lock()
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = migrate.connect(self.db_url)
+            if self.role:
+                with conn.cursor() as cur:
+                    cur.execute(f'set role "{self.role}"')
+            self._local.conn = conn
+            self._local.rng = random.Random(f"{self.seed}:{threading.get_ident()}")
+            with self._lock:
+                self._conns.append(conn)
+        return conn
+
+    def one(self, shape: BenchShape) -> Tuple[float, int]:
+        conn = self._conn()
+        params = shape.params(self._local.rng, self.sample)
+        t0 = time.perf_counter()
+        with conn.cursor() as cur:
+            cur.execute(shape.sql, params)
+            rows = len(cur.fetchall())
+        return (time.perf_counter() - t0) * 1000, rows
+
+    def run(self, shape: BenchShape, requests: int, concurrency: int) -> Dict:
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            t0 = time.perf_counter()
+            results = list(pool.map(lambda _: self.one(shape), range(requests)))
+            wall = time.perf_counter() - t0
+        lat = sorted(ms for ms, _ in results)
+        rows = sum(n for _, n in results)
+        return {
+            "name": shape.name,
+            "origin": shape.origin,
+            "requests": requests,
+            "concurrency": concurrency,
+            "p50_ms": round(percentile(lat, 50), 3),
+            "p95_ms": round(percentile(lat, 95), 3),
+            "p99_ms": round(percentile(lat, 99), 3),
+            "max_ms": round(lat[-1], 3) if lat else 0.0,
+            "mean_ms": round(sum(lat) / len(lat), 3) if lat else 0.0,
+            "req_per_s": round(requests / max(wall, 1e-9), 1),
+            "rows_per_s": round(rows / max(wall, 1e-9), 1),
+            "rows_per_req": round(rows / max(requests, 1), 1),
+            "wall_s": round(wall, 3),
+            "slo_p95_ms": shape.slo_p95_ms,
+            "slo_ok": None if shape.slo_p95_ms is None else percentile(lat, 95) <= shape.slo_p95_ms,
+        }
+
+    def close(self) -> None:
+        for c in self._conns:
+            c.close()
+
+def table_counts(conn) -> Dict[str, int]:
+    with conn.cursor() as cur:
+        out = {}
+        for t in ("news", "articles"):
+            cur.execute(f"select count(*) from public.{t}")
+            out[t] = cur.fetchone()[0]
+        cur.execute("show server_version")
+        out["server_version"] = cur.fetchone()[0]
+    return out
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description="Benchmark di carico delle query news/articles")
+    ap.add_argument("--db-url", default=os.environ.get("DATABASE_URL", LOCAL_DB_URL))
+    ap.add_argument("--concurrency", type=int, default=4)
+    ap.add_argument("--requests", type=int, default=200, help="Richieste misurate per forma")
+    ap.add_argument("--warmup", type=int, default=20)
+    ap.add_argument("--role", default="anon")
+    ap.add_argument("--seed", type=int, default=42)
+    ap.add_argument("--only", nargs="*", help="Solo le forme indicate")
+    args = ap.parse_args(argv)
+
+    conn = migrate.connect(args.db_url)
+    try:
+        env = table_counts(conn)
+        sample = load_sample(conn)
+    finally:
+        conn.close()
+    print(f"[INFO] news: {env['news']} | articles: {env['articles']} | Postgres {env['server_version']} | "
+          f"concurrency: {args.concurrency} | richieste/forma: {args.requests}")
+
+    runner = Runner(args.db_url, args.role, sample, args.seed)
+    results = []
+    try:
+        for shape in SHAPES:
+            if args.only and shape.name not in args.only:
+                continue
+            if args.warmup:
+                runner.run(shape, args.warmup, args.concurrency)
+            r = runner.run(shape, args.requests, args.concurrency)
+            results.append(r)
+            slo = "" if r["slo_ok"] is None else (" | SLO OK" if r["slo_ok"] else f" | SLO KO (p95 > {shape.slo_p95_ms:g} ms)")
+            print(f"[BENCH] {r['name']:<17} p50 {r['p50_ms']:>8.2f} | p95 {r['p95_ms']:>8.2f} | "
+                  f"p99 {r['p99_ms']:>8.2f} ms | {r['req_per_s']:>8.1f} req/s | {r['rows_per_s']:>10.1f} righe/s{slo}")
+    except Exception as e:
+        print(f"[ERR] {e}")
+        return 2
+    finally:
+        runner.close()
+
+    stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+    report = {"created": stamp, "env": env, "role": args.role, "concurrency": args.concurrency,
+              "requests": args.requests, "queries": results}
+    REPORTS.mkdir(parents=True, exist_ok=True)
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    (REPORTS / f"bench_{stamp}.json").write_text(text, encoding="utf-8")
+    (REPORTS / "bench_latest.json").write_text(text, encoding="utf-8")
+    print(f"[INFO] report: reports/bench_{stamp}.json")
+    failed = [r["name"] for r in results if r["slo_ok"] is False]
+    if failed:
+        print(f"[WARN] SLO non rispettati: {', '.join(failed)}")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,174 @@
+# -*- coding: utf-8 -*-
+"""
+db_explain.py
+EXPLAIN (ANALYZE, BUFFERS) delle query che il sito fa davvero su news/articles,
+contro un Postgres locale popolato con dati sintetici.
+- Applica le migrazioni (db/migrations) se richiesto
+- Popola news/articles con N righe sintetiche (synth_data.py, rimovibili con --cleanup)
+- Esegue ogni forma di query come ruolo anon (stessa RLS delle pagine pubbliche)
+- Segnala i Seq Scan su news/articles dove ci si aspetta un indice
+- Salva il dettaglio in reports/explain_report.json
+
+Uso:
+  supabase start   # Postgres locale con ruoli anon/authenticated e schema storage
+  python Tools/db_explain.py --migrate --rows 50000
+  python Tools/db_explain.py --cleanup
+Opzioni:
+  --db-url   default: env DATABASE_URL oppure il Postgres di `supabase start`
+  --role     ruolo per le query (default anon; "" = utente della connessione)
+Exit codes: 0 nessun Seq Scan inatteso, 1 Seq Scan segnalati, 2 errore.
+"""
+from __future__ import annotations
+import argparse
+import json
+import os
+import sys
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+import migrate
+import synth_data
+from synth_data import BENCH_PREFIX, LOCAL_DB_URL
+
+ROOT = Path(__file__).resolve().parents[1]
+REPORT = ROOT / "reports" / "explain_report.json"
+WATCHED = {"news", "articles"}
+
+@dataclass(frozen=True)
+class Shape:
+    name: str
+    origin: str          # generatore/template che emette la query
+    sql: str
+    params: tuple = ()
+    allow_seq: bool = False   # letture che per natura scorrono tutta la tabella
+
+# Equivalenti SQL delle richieste PostgREST/supabase-js dei template generati
+SHAPES = [
+    Shape("news_index_page0", "pl6f PAGE_TSX",
+          "select id, slug, title, summary, lang from public.news "
+          "where lang = %s order by created_at desc limit 8 offset 0", ("it",)),
+    Shape("news_index_page100", "pl6f PAGE_TSX (pagina profonda)",
+          "select id, slug, title, summary, lang from public.news "
+          "where lang = %s order by created_at desc limit 8 offset 800", ("it",)),
+    Shape("news_index_count", "pl6f PAGE_TSX (count)",
+          "select count(*) from public.news where lang = %s", ("it",)),
+    Shape("news_latest", "phase4 home",
+          "select * from public.news order by published_at desc limit 20"),
+    Shape("news_scaffold_list", "create_pages_scaffold",
+          "select * from public.news where lang = %s and published = true "
+          "order by source_date desc limit 25", ("it",)),
+    Shape("news_by_slug", "pl4 news/[slug]",
+          "select * from public.news where slug = %s", (f"{BENCH_PREFIX}101",)),
+    Shape("news_by_slug_lang", "pl2/pl6g slug+lang",
+          "select * from public.news where slug = %s and lang = %s", (f"{BENCH_PREFIX}101", "it")),
+    Shape("news_sitemap", "pl6a sitemap",
+          "select slug, lang from public.news", allow_seq=True),
+    Shape("articles_index_page0", "create_pages_scaffold",
+          "select * from public.articles where lang = %s and published = true "
+          "order by created_at desc limit 25", ("it",)),
+    Shape("news_search_candidates", "search_content (migrazione 0005)",
+          "select id from public.news where published and lang = %s "
+          "and search_tsv @@ public.ica_prefix_tsquery(public.ica_ts_config(%s), %s) "
+          "order by published_at desc limit 500", ("it", "it", "rispar")),
+    Shape("articles_by_slug", "pl3 articles/[slug]",
+          "select id, title, excerpt, content, cover_url, slug, published_at "
+          "from public.articles where slug = %s", (f"{BENCH_PREFIX}101",)),
+]
+
+def cleanup(conn) -> None:
+    for table in ("news", "articles"):
+        print(f"[OK]  {table}: rimosse {synth_data.reset(conn, table)} righe sintetiche")
+
+def walk_plan(node: dict, depth: int = 0):
+    yield depth, node
+    for child in node.get("Plans", []):
+        yield from walk_plan(child, depth + 1)
+
+def explain(conn, shape: Shape, role: str) -> dict:
+    with conn.cursor() as cur:
+        cur.execute("begin")
+        try:
+            if role:
+                cur.execute(f'set local role "{role}"')
+            cur.execute("explain (analyze, buffers, format json) " + shape.sql, shape.params)
+            plan = cur.fetchone()[0][0]
+        finally:
+            cur.execute("rollback")
+    nodes, seq = [], []
+    for depth, n in walk_plan(plan["Plan"]):
+        label = n["Node Type"]
+        if n.get("Index Name"):
+            label += f" using {n['Index Name']}"
+        if n.get("Relation Name"):
+            label += f" on {n['Relation Name']}"
+        nodes.append("  " * depth + label)
+        if n["Node Type"] == "Seq Scan" and n.get("Relation Name") in WATCHED:
+            seq.append(n["Relation Name"])
+    root = plan["Plan"]
+    return {
+        "name": shape.name,
+        "origin": shape.origin,
+        "sql": shape.sql,
+        "execution_ms": plan.get("Execution Time"),
+        "planning_ms": plan.get("Planning Time"),
+        "rows": root.get("Actual Rows"),
+        "shared_hit": root.get("Shared Hit Blocks", 0),
+        "shared_read": root.get("Shared Read Blocks", 0),
+        "nodes": nodes,
+        "seq_scans": seq,
+        "flagged": bool(seq) and not shape.allow_seq,
+    }
+
+def main(argv: list[str] | None = None) -> int:
+    ap = argparse.ArgumentParser(description="EXPLAIN (ANALYZE, BUFFERS) delle query di news/articles")
+    ap.add_argument("--db-url", default=os.environ.get("DATABASE_URL", LOCAL_DB_URL))
+    ap.add_argument("--migrate", action="store_true", help="Applica prima le migrazioni pendenti")
+    ap.add_argument("--rows", type=int, default=50_000, help="Righe sintetiche per tabella (0 = non popolare)")
+    ap.add_argument("--role", default="anon", help="Ruolo con cui eseguire le query")
+    ap.add_argument("--only", nargs="*", help="Solo le forme indicate")
+    ap.add_argument("--cleanup", action="store_true", help="Rimuove le righe sintetiche ed esce")
+    args = ap.parse_args(argv)
+
+    if args.migrate and migrate.main(["--db-url", args.db_url, "up"]) != 0:
+        return 2
+    conn = migrate.connect(args.db_url)
+    try:
+        if args.cleanup:
+            cleanup(conn)
+            return 0
+        t0 = time.perf_counter()
+        counts = synth_data.generate(conn, synth_data.Synth(), {"news": args.rows, "articles": args.rows}) \
+            if args.rows > 0 else {}
+        if counts:
+            print(f"[INFO] dati sintetici: {counts} ({(time.perf_counter()-t0)*1000:.0f} ms)")
+
+        results = []
+        for shape in SHAPES:
+            if args.only and shape.name not in args.only:
+                continue
+            try:
+                r = explain(conn, shape, args.role)
+            except Exception as e:
+                print(f"[ERR] {shape.name}: {e}")
+                return 2
+            results.append(r)
+            tag = "SEQ!" if r["flagged"] else ("seq" if r["seq_scans"] else "OK")
+            print(f"[{tag:<4}] {shape.name:<22} {r['execution_ms']:>8.2f} ms  "
+                  f"buf hit/read {r['shared_hit']}/{r['shared_read']}  ({shape.origin})")
+            for line in r["nodes"]:
+                print(f"         {line}")
+    finally:
+        conn.close()
+
+    REPORT.parent.mkdir(parents=True, exist_ok=True)
+    REPORT.write_text(json.dumps({"rows": counts, "role": args.role, "queries": results},
+                                 ensure_ascii=False, indent=2), encoding="utf-8")
+    flagged = [r["name"] for r in results if r["flagged"]]
+    if flagged:
+        print(f"[WARN] Seq Scan inattesi: {', '.join(flagged)}")
+    print(f"[INFO] report: {REPORT.relative_to(ROOT)}")
+    return 1 if flagged else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
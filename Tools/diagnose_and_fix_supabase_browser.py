@@ -10,6 +10,7 @@ from __future__ import annotations
 import re
 from pathlib import Path
 import sys
+from codemod import iter_source_files, run_codemod
 
 ROOT = Path(".").resolve()
 WEBAPP = ROOT / "webapp"
@@ -67,39 +68,34 @@ def fix_calls(text: str) -> tuple[str, int]:
     new_text, n = re.subn(pattern, "supabaseBrowser()", text)
     return new_text, n
 
-def process_tsx_file(p: Path) -> list[str]:
+def fix_text(path: str, txt: str) -> tuple[str, list[str], int]:
+    """Trasformazione per codemod.run_codemod (gira nei worker: niente I/O qui)."""
     logs = []
-    try:
-        txt = p.read_text(encoding="utf-8")
-    except Exception as e:
-        return [f"ERR   {p.relative_to(ROOT)}: {e}"]
-
+    rel = Path(path).relative_to(ROOT) if Path(path).is_relative_to(ROOT) else Path(path)
     touched = False
+    matches = 0
     if "supabaseBrowser" in txt or "useEffect(" in txt:
         if "useEffect(" in txt and "use client" not in txt:
             txt, added = add_use_client(txt)
             if added:
-                logs.append(f"ADD   use client -> {p.relative_to(ROOT)}")
+                logs.append(f"ADD   use client -> {rel}")
                 touched = True
+                matches += 1
         if "supabaseBrowser" in txt and IMPORT_LINE not in txt:
             txt, _ = ensure_import(txt)
-            logs.append(f"ADD   import supabaseBrowser -> {p.relative_to(ROOT)}")
+            logs.append(f"ADD   import supabaseBrowser -> {rel}")
             touched = True
+            matches += 1
         txt2, n = fix_calls(txt)
         if n > 0:
-            logs.append(f"PATCH {p.relative_to(ROOT)} supabaseBrowser() x{n}")
+            logs.append(f"PATCH {rel} supabaseBrowser() x{n}")
             txt = txt2
             touched = True
+            matches += n
 
-    if touched:
-        try:
-            p.write_text(txt, encoding="utf-8")
-        except Exception as e:
-            return [f"ERR   write {p.relative_to(ROOT)}: {e}"]
-    else:
-        if "supabaseBrowser" in txt:
-            logs.append(f"OK    {p.relative_to(ROOT)} (già corretto)")
-    return logs
+    if not touched and "supabaseBrowser" in txt:
+        logs.append(f"OK    {rel} (già corretto)")
+    return txt, logs, matches
 
 def main() -> int:
     overall = []
@@ -107,12 +103,16 @@ def main() -> int:
 
     overall.extend(ensure_lib())
 
-    for p in WEBAPP.rglob("*.tsx"):
-        overall.extend(process_tsx_file(p))
-    for p in WEBAPP.rglob("*.ts"):
-        if p.name.endswith(".d.ts") or "lib" in p.parts:
-            continue
-        overall.extend(process_tsx_file(p))
+    # un solo walk (tsx + ts), potato su node_modules/.next/.gitignore
+    files = [
+        p for p in iter_source_files(WEBAPP, (".tsx", ".ts"), root=ROOT)
+        if p.suffix == ".tsx" or not (p.name.endswith(".d.ts") or "lib" in p.relative_to(ROOT).parts)
+    ]
+    report = run_codemod(files, fix_text)
+    for r in report.results:
+        if r.error:
+            overall.append(f"ERR   {Path(r.path).relative_to(ROOT)}: {r.error}")
+        overall.extend(r.logs)
 
     print("=== diagnose_and_fix_supabase_browser ===")
     for line in overall:
@@ -120,6 +120,7 @@ def main() -> int:
         if line.startswith(("CREATE","ADD","PATCH")):
             changed = True
 
+    print(report.summary())
     print(f"\n[END] Status: {'WARNING (patched)' if changed else 'OK'}")
     return 1 if changed else 0
 
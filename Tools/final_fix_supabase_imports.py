@@ -15,6 +15,7 @@ from __future__ import annotations
 import re
 import sys
 from pathlib import Path
+from codemod import iter_source_files, run_codemod
 
 ROOT = Path(".").resolve()
 WEBAPP = ROOT / "webapp"
@@ -80,58 +81,51 @@ def ensure_calls_have_parens(text: str) -> tuple[str, int]:
     new_text, n = pattern.subn("supabaseBrowser()", text)
     return new_text, n
 
-def process_file(p: Path) -> list[str]:
-    logs = []
-    try:
-        txt = p.read_text(encoding="utf-8")
-    except Exception as e:
-        return [f"ERR read {p}: {e}"]
-
+def fix_text(path: str, txt: str) -> tuple[str, list[str], int]:
+    """Trasformazione per codemod.run_codemod (gira nei worker: niente I/O qui)."""
     touched = False
+    matches = 0
 
     if "useEffect(" in txt:
         txt2, added = add_use_client(txt)
         if added:
-            logs.append(f"ADD use client -> {p}")
             txt = txt2
             touched = True
+            matches += 1
 
     if "supabaseBrowser" in txt:
         txt2, nimp = normalize_imports(txt)
         if nimp:
-            logs.append(f"FIX import -> {p}")
             txt = txt2
             touched = True
+            matches += nimp
         txt3, ncalls = ensure_calls_have_parens(txt)
         if ncalls:
-            logs.append(f"FIX calls ({ncalls}) -> {p}")
             txt = txt3
             touched = True
+            matches += ncalls
 
-    if touched:
-        try:
-            p.write_text(txt, encoding="utf-8")
-        except Exception as e:
-            return [f"ERR write {p}: {e}"]
-
-    if touched:
-        return ["PATCH " + str(p)]
-    return []
+    return txt, (["PATCH " + path] if touched else []), matches
 
 def main() -> int:
     changes = []
     changes.append(ensure_lib())
-    for ext in ("*.tsx", "*.ts"):
-        for p in WEBAPP.rglob(ext):
-            if p.name.endswith(".d.ts"):
-                continue
-            if "lib" in p.parts and p.name == "supabaseBrowser.ts":
-                continue
-            changes.extend(process_file(p))
+    # un solo walk (ts + tsx), potato su node_modules/.next/.gitignore
+    files = [
+        p for p in iter_source_files(WEBAPP, (".ts", ".tsx"), root=ROOT)
+        if not p.name.endswith(".d.ts")
+        and not ("lib" in p.parts and p.name == "supabaseBrowser.ts")
+    ]
+    report = run_codemod(files, fix_text)
+    for r in report.results:
+        if r.error:
+            changes.append(f"ERR {r.path}: {r.error}")
+        changes.extend(r.logs)
 
     print("=== final_fix_supabase_imports ===")
     for line in changes:
         print(line)
+    print(report.summary())
     any_patch = any(line.startswith(("PATCH", "CREATE", "FIX", "ADD")) for line in changes)
     return 1 if any_patch else 0
 
@@ -73,7 +73,7 @@ git commit -m $commitMsg
 # Push
 git push origin main
 
-# Mostra totale aggiornato
+# Mostra totale aggiornato (dal sidecar dei totali, senza rileggere worklog.md mentre
+# altre fasi possono scriverlo: le scritture passano tutte dal lock di worklog_model)
 Write-Host "=== Totale aggiornato ===" -ForegroundColor Green
-$lastTotal = (Get-Content worklog.md -Raw) -split "`n" | Where-Object { $_ -match '^\s*⏱ ' } | Select-Object -Last 1
-Write-Host $lastTotal
+& $py Tools\ica_toolchain.py sum
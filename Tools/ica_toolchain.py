@@ -1,9 +1,11 @@
 # Tools/ica_toolchain.py
-# ICA Toolchain v1 – unico entrypoint per layout, i18n, worklog, sum, status
+# ICA Toolchain v1 – unico entrypoint per layout, i18n, worklog, sum, stats, status
 from __future__ import annotations
-import argparse, re
+import argparse, time
 from datetime import datetime
 from pathlib import Path
+from project_index import get_index
+import worklog_model
 
 VERSION = "ICA Toolchain v1"
 
@@ -16,22 +18,12 @@ def write(p: Path, content: str):
     p.write_text(content, encoding="utf-8")
     print("✓", p.relative_to(ROOT))
 
-def human(minutes: int) -> str:
-    h, m = minutes // 60, minutes % 60
-    if h and m: return f"{h}h {m}m"
-    if h: return f"{h}h"
-    return f"{m}m"
+human = worklog_model.fmt_minutes
 
 def parse_duration(s: str) -> int:
-    s = s.strip().lower()
-    m = re.match(r"^\s*(\d{1,2}):(\d{2})\s*$", s)
-    if m: return int(m.group(1))*60 + int(m.group(2))
-    hours = re.search(r"(\d+)\s*h", s)
-    mins  = re.search(r"(\d+)\s*m", s)
-    if hours or mins:
-        return (int(hours.group(1)) if hours else 0)*60 + (int(mins.group(1)) if mins else 0)
-    if s.isdigit(): return int(s)
-    raise ValueError(f"Durata non riconosciuta: {s}")
+    mins = worklog_model.parse_minutes(s)
+    if mins is None: raise ValueError(f"Durata non riconosciuta: {s}")
+    return mins
 
 # -------------------- layout (design + pagine base) --------------------
 def cmd_layout():
@@ -148,56 +140,77 @@ export default function ContactPage(){return(<><PageHeader title="Contatti" kick
 
 # -------------------- Worklog: append e sum --------------------
 WORKLOG = ROOT/"worklog.md"
-HEADER = "# Worklog – ICA Next.js + Supabase"
 TOTAL  = "## Totale ore registrate:"
 
-def ensure_worklog(text: str) -> str:
-    if HEADER in text: return text
-    return "\n".join([HEADER, f"{TOTAL} 0h", "", "---", ""]) + text
-
-def recalc_total(text: str) -> str:
-    total = 0
-    for line in text.splitlines():
-        if line.strip().startswith("⏱"):
-            m = re.search(r"(\d{1,2}):(\d{2})", line)
-            if m: total += int(m.group(1))*60 + int(m.group(2)); continue
-            m2 = re.search(r"(\d+)\s*h(?:\s*(\d+)\s*m)?", line.lower())
-            if m2: total += int(m2.group(1))*60 + int(m2.group(2) or 0); continue
-            m3 = re.search(r"(\d+)\s*m\b", line.lower())
-            if m3: total += int(m3.group(1)); continue
-    new_total = human(total)
-    lines = text.splitlines()
-    for i,l in enumerate(lines):
-        if l.startswith(TOTAL):
-            lines[i] = f"{TOTAL} {new_total}"
-            break
-    else:
-        lines.insert(1, f"{TOTAL} {new_total}")
-    return "\n".join(lines), total
+def recalc_total(wl: worklog_model.Worklog, total: int|None = None) -> int:
+    """Riscrive '## Totale ore registrate:' (di default con la somma delle sezioni, blocchi 'Totale' esclusi)."""
+    total = wl.total_minutes() if total is None else total
+    wl.set_line(TOTAL, f"{TOTAL} {human(total)}")
+    return total
 
-def cmd_log(task: str, duration: str|None, hours: int, minutes: int, notes: str, date: str|None):
+def cmd_log(task: str, duration: str|None, hours: int, minutes: int, notes: str, date: str|None,
+            estimate: str|None = None):
     mins = parse_duration(duration) if duration else (hours*60+minutes)
     if mins<=0: raise SystemExit("Durata mancante: usa --duration '1h 20m' oppure --hours/--minutes")
-    text = WORKLOG.read_text(encoding="utf-8") if WORKLOG.exists() else ""
-    text = ensure_worklog(text)
     date_iso = date or datetime.now().strftime("%Y-%m-%d")
-    entry = ["", f"### 📌 {date_iso} – {task}"]
-    if notes:
-        for r in [r.strip() for r in notes.split("\n") if r.strip()]:
-            entry.append(f"- {r}")
-    entry.append(f"⏱ {human(mins)}")
-    entry.append("")
-    text += "\n".join(entry)
-    text, total = recalc_total(text)
-    WORKLOG.write_text(text, encoding="utf-8")
-    print(f"✅ Sessione registrata ({human(mins)}). Totale: {human(total)}")
-
-def cmd_sum():
+    bullets = [r.strip() for r in notes.split("\n") if r.strip()] if notes else []
+    if estimate:   # letta da `stats --estimates`
+        bullets.append(f"stima: {human(parse_duration(estimate))}")
+    # stessa data/fase/titolo che darebbe il parse della riga '### 📌 {data} – {task}'
+    d, phase, title = worklog_model.parse_header(f"{date_iso}{worklog_model.SEP}{task}")
+    # solo append in coda + totali nel sidecar: l'intestazione si aggiorna con `sum --header`
+    totals = worklog_model.append_entry(WORKLOG, worklog_model.Entry(d, phase, title, bullets, mins))
+    print(f"✅ Sessione registrata ({human(mins)}). Totale: {human(totals.minutes)}")
+
+def cmd_sum(by_phase: bool = False, header: bool = False):
+    if not WORKLOG.exists():
+        print("❌ Nessun worklog.md trovato."); return
+    totals = worklog_model.load_totals(WORKLOG)   # O(1) con il sidecar allineato
+    print("📊 Totale ore registrate:", human(totals.minutes))
+    if by_phase:
+        for phase, mins in sorted(totals.phases.items(), key=lambda kv: -kv[1]):
+            print(f"   {phase or '(senza fase)'}: {human(mins)}")
+    if header:
+        with worklog_model.edit(WORKLOG) as wl:   # lock + rename atomico, sidecar riallineato
+            recalc_total(wl, totals.minutes)
+        print(f"✓ {TOTAL} {human(totals.minutes)}")
+
+def cmd_stats(by: str|None, keyword: str|None, velocity: bool, estimates: bool, since: str, full: bool):
+    import worklog_analytics as wa
     if not WORKLOG.exists():
         print("❌ Nessun worklog.md trovato."); return
-    text = WORKLOG.read_text(encoding="utf-8")
-    _, total = recalc_total(text)
-    print("📊 Totale ore registrate:", human(total))
+    conn = wa.connect()
+    try:
+        s = wa.sync(conn, WORKLOG, full=full)
+        print(f"🔄 Sync {s['mode']}: {s['rows']} sezioni importate ({s['ms']:.0f} ms)")
+        t0 = time.perf_counter()
+        if by:
+            rows = wa.by(conn, by, since)
+            for key, n, mins in rows:
+                print(f"   {key or '(n/d)':<28} {human(mins):>9}  ({n} sezioni)")
+        if keyword:
+            n, mins, rows = wa.keyword(conn, keyword)
+            print(f"🔎 '{keyword}': {n} sezioni, {human(mins)}")
+            for day, phase, title, m in rows:
+                print(f"   {day or '—'}  {phase or '—':<10} {title[:60]:<60} {human(m):>8}")
+        if velocity:
+            for week, mins, avg in wa.velocity(conn):
+                print(f"   {week}  {human(mins):>9}   media 4 sett.: {human(round(avg)):>9}")
+        if estimates:
+            (n, est, real), rows = wa.estimates(conn)
+            if not n:
+                print("   Nessuna sezione con stima (usa log --estimate)")
+            else:
+                print(f"📐 {n} sezioni stimate: stimato {human(est)} | reale {human(real)} | "
+                      f"rapporto {real / max(est, 1):.2f}")
+                for day, phase, title, e, m in rows:
+                    print(f"   {day or '—'}  {phase or '—':<10} {title[:50]:<50} {human(e):>8} → {human(m):>8}")
+        if not (by or keyword or velocity or estimates):
+            for key, n, mins in wa.by(conn, "month", since)[-6:]:
+                print(f"   {key or '(n/d)':<10} {human(mins):>9}  ({n} sezioni)")
+        print(f"   query: {(time.perf_counter() - t0) * 1000:.1f} ms")
+    finally:
+        conn.close()
 
 # -------------------- status & version --------------------
 def cmd_status():
@@ -208,8 +221,9 @@ def cmd_status():
         ("[locale]/layout", APP/"app"/"[locale]"/"layout.tsx"),
         ("worklog.md",  WORKLOG),
     ]
+    idx = get_index(ROOT)  # stesso snapshot di webapp/ usato dai verificatori
     for name, path in checks:
-        print(("✓" if path.exists() else "✖"), name, "-", path.relative_to(ROOT))
+        print(("✓" if idx.exists(path) else "✖"), name, "-", path.relative_to(ROOT))
 
 def main():
     ap = argparse.ArgumentParser(description="ICA Toolchain – unico entrypoint")
@@ -224,15 +238,26 @@ def main():
     p_log.add_argument("--minutes", type=int, default=0)
     p_log.add_argument("--notes", default="")
     p_log.add_argument("--date")
-    sub.add_parser("sum", help="Mostra totale ore")
+    p_log.add_argument("--estimate", help="Tempo stimato (es. '1h 30m'), per stats --estimates")
+    p_sum = sub.add_parser("sum", help="Mostra totale ore")
+    p_sum.add_argument("--by-phase", action="store_true", help="Subtotali per fase")
+    p_sum.add_argument("--header", action="store_true", help="Riscrive '## Totale ore registrate:' nel worklog")
+    p_st = sub.add_parser("stats", help="Statistiche dal worklog sincronizzato in SQLite")
+    p_st.add_argument("--by", choices=("phase", "week", "month", "day"), help="Ore per fase/settimana/mese/giorno")
+    p_st.add_argument("--keyword", help="Ore delle sezioni che contengono la parola")
+    p_st.add_argument("--velocity", action="store_true", help="Ore per settimana con media mobile")
+    p_st.add_argument("--estimates", action="store_true", help="Stimato contro reale")
+    p_st.add_argument("--since", default="", help="Solo sezioni da questa data (YYYY-MM-DD)")
+    p_st.add_argument("--full", action="store_true", help="Reimporta tutto il worklog")
     sub.add_parser("status", help="Controlla file chiave")
     sub.add_parser("version", help="Mostra versione toolkit")
 
     args = ap.parse_args()
     if args.cmd=="layout": cmd_layout()
     elif args.cmd=="i18n": cmd_i18n()
-    elif args.cmd=="log":   cmd_log(args.task, args.duration, args.hours, args.minutes, args.notes, args.date)
-    elif args.cmd=="sum":   cmd_sum()
+    elif args.cmd=="log":   cmd_log(args.task, args.duration, args.hours, args.minutes, args.notes, args.date, args.estimate)
+    elif args.cmd=="sum":   cmd_sum(args.by_phase, args.header)
+    elif args.cmd=="stats": cmd_stats(args.by, args.keyword, args.velocity, args.estimates, args.since, args.full)
     elif args.cmd=="status":cmd_status()
     elif args.cmd=="version": print(VERSION)
     else:
@@ -0,0 +1,133 @@
+# -*- coding: utf-8 -*-
+"""
+matview_refresh.py
+Refresh e stato di posts_by_category_view (vista materializzata, migrazione 0007).
+- status   ultimo refresh, durata, modifiche non ancora incluse e da quanto la vista è indietro
+- refresh  un giro di refresh con debounce (o --force), come il job pg_cron
+- watch    ciclo di refresh per gli ambienti senza pg_cron (es. `supabase start` in locale)
+
+Uso:
+  python Tools/matview_refresh.py status
+  python Tools/matview_refresh.py status --max-stale 300   # exit 1 se indietro da più di 5 min
+  python Tools/matview_refresh.py refresh --force
+  python Tools/matview_refresh.py watch --interval 5
+Opzioni:
+  --db-url   default: SUPABASE_DB_URL / webapp/.env.db (come migrate.py)
+  --quiet    secondi senza scritture prima del refresh (default 10)
+  --max-delay  ritardo massimo di una modifica, anche con scritture continue (default 120)
+"""
+from __future__ import annotations
+import argparse
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Optional
+
+import migrate
+
+VIEW = "posts_by_category_view"
+
+def fetch_state(conn) -> Optional[dict]:
+    with conn.cursor() as cur:
+        cur.execute(
+            "select changes, refreshed_changes, dirty_since, last_change_at, last_refresh_at, "
+            "last_refresh_ms, now() from public.matview_refresh_state where view_name = %s",
+            (VIEW,),
+        )
+        row = cur.fetchone()
+    if row is None:
+        return None
+    keys = ("changes", "refreshed_changes", "dirty_since", "last_change_at",
+            "last_refresh_at", "last_refresh_ms", "now")
+    return dict(zip(keys, row))
+
+def staleness_s(state: dict) -> float:
+    """Secondi da cui la vista non riflette articles (0 se allineata)."""
+    if state["changes"] == state["refreshed_changes"] or state["dirty_since"] is None:
+        return 0.0
+    return max(0.0, (state["now"] - state["dirty_since"]).total_seconds())
+
+def fmt_age(ts: Optional[datetime], now: datetime) -> str:
+    if ts is None:
+        return "mai"
+    s = int((now - ts).total_seconds())
+    if s < 120:
+        return f"{s} s fa"
+    if s < 7200:
+        return f"{s // 60} min fa"
+    return f"{s // 3600} h fa"
+
+def refresh(conn, quiet: float, max_delay: float, force: bool) -> str:
+    with conn.cursor() as cur:
+        cur.execute(
+            "select public.refresh_posts_by_category_view(make_interval(secs => %s), "
+            "make_interval(secs => %s), %s)",
+            (quiet, max_delay, force),
+        )
+        return cur.fetchone()[0]
+
+def cmd_status(conn, max_stale: Optional[float]) -> int:
+    st = fetch_state(conn)
+    if st is None:
+        print(f"[ERR] {VIEW}: stato assente (migrazione 0007 non applicata?)")
+        return 2
+    now = st["now"]
+    pending = st["changes"] - st["refreshed_changes"]
+    stale = staleness_s(st)
+    ms = f"{st['last_refresh_ms']:.0f} ms" if st["last_refresh_ms"] is not None else "-"
+    print(f"[INFO] {VIEW}: ultimo refresh {fmt_age(st['last_refresh_at'], now)} "
+          f"({st['last_refresh_at'] or '-'}) | durata {ms}")
+    if pending:
+        print(f"[WARN] indietro di {stale:.0f} s | statement non inclusi: {pending} | "
+              f"ultima scrittura {fmt_age(st['last_change_at'], now)}")
+    else:
+        print("[OK] vista allineata ad articles")
+    if max_stale is not None and stale > max_stale:
+        print(f"[ERR] ritardo {stale:.0f} s oltre la soglia di {max_stale:g} s")
+        return 1
+    return 0
+
+def main(argv: list[str] | None = None) -> int:
+    ap = argparse.ArgumentParser(description=f"Refresh e stato di {VIEW}")
+    ap.add_argument("--db-url", help="Connessione Postgres (default: SUPABASE_DB_URL / webapp/.env.db)")
+    ap.add_argument("--quiet", type=float, default=10.0, help="Secondi senza scritture prima del refresh")
+    ap.add_argument("--max-delay", type=float, default=120.0, help="Ritardo massimo di una modifica (s)")
+    sub = ap.add_subparsers(dest="cmd")
+    p_st = sub.add_parser("status", help="Ultimo refresh e ritardo della vista")
+    p_st.add_argument("--max-stale", type=float, help="Exit 1 se la vista è indietro da più di N secondi")
+    p_rf = sub.add_parser("refresh", help="Un giro di refresh (con debounce)")
+    p_rf.add_argument("--force", action="store_true", help="Ignora debounce e stato pulito")
+    p_w = sub.add_parser("watch", help="Refresh periodico (senza pg_cron)")
+    p_w.add_argument("--interval", type=float, default=5.0, help="Secondi tra due controlli")
+    args = ap.parse_args(argv)
+
+    if args.cmd not in ("status", "refresh", "watch"):
+        ap.print_help(); return 2
+
+    conn = migrate.connect(migrate.load_db_url(args.db_url))
+    try:
+        if args.cmd == "status":
+            return cmd_status(conn, args.max_stale)
+        if args.cmd == "refresh":
+            t0 = time.perf_counter()
+            result = refresh(conn, args.quiet, args.max_delay, args.force)
+            print(f"[OK] {VIEW}: {result} ({(time.perf_counter()-t0)*1000:.0f} ms)")
+            return 0
+        print(f"[INFO] watch {VIEW} ogni {args.interval:g} s (Ctrl+C per uscire)")
+        while True:
+            t0 = time.perf_counter()
+            result = refresh(conn, args.quiet, args.max_delay, False)
+            if result == "refreshed":
+                stamp = datetime.now(timezone.utc).strftime("%H:%M:%S")
+                print(f"[OK] {stamp} refresh in {(time.perf_counter()-t0)*1000:.0f} ms")
+            time.sleep(args.interval)
+    except KeyboardInterrupt:
+        return 0
+    except Exception as e:
+        print(f"[ERR] {e}")
+        return 2
+    finally:
+        conn.close()
+
+if __name__ == "__main__":
+    sys.exit(main())
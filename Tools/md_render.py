@@ -0,0 +1,281 @@
+# -*- coding: utf-8 -*-
+"""
+md_render.py
+Render del Markdown degli articoli in article_renders (migrazione 0008): HTML
+sanificato, indice dei titoli, minuti di lettura ed estratto. La pagina articolo
+(pl3_articles_markdown.py) legge l'HTML pronto invece di usare marked/jsdom a ogni richiesta.
+- Unico renderer di article_renders: lo stesso sorgente dà sempre lo stesso HTML
+- Alla pubblicazione: il trigger della migrazione 0009 accoda il render (canale
+  article_render) quando le API admin o bulk_import cambiano un sorgente, `watch` lo esegue
+- Sorgente: coalesce(content, body_md, body) come articles.source_hash
+- Solo gli articoli con render assente o di un sorgente diverso (hash): un corpo
+  invariato non viene mai renderizzato due volte
+- Render in parallelo su più processi, scrittura a batch (l'hash del sorgente è
+  ricontrollato in scrittura: un articolo modificato nel frattempo resta da fare)
+
+Uso:
+  python Tools/md_render.py status
+  python Tools/md_render.py backfill --workers 8
+  python Tools/md_render.py backfill --force          # rirenderizza tutto (es. nuove regole)
+  python Tools/md_render.py watch --workers 2         # worker: render alla pubblicazione
+  python Tools/md_render.py render articolo.md        # anteprima su stdout, senza DB
+Opzioni:
+  --db-url   default: SUPABASE_DB_URL / webapp/.env.db (come migrate.py)
+Richiede: pip install markdown nh3
+"""
+from __future__ import annotations
+import argparse
+import hashlib
+import html as htmllib
+import json
+import math
+import re
+import select
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import migrate
+
+# come ALLOWED_TAGS di webapp/lib/sanitize.ts, più id sui titoli per i link dell'indice
+ALLOWED_TAGS = {
+    "a", "abbr", "b", "blockquote", "br", "code", "em", "i", "img", "li", "ol", "p", "pre", "strong", "ul",
+    "h1", "h2", "h3", "h4", "h5", "h6", "hr", "table", "thead", "tbody", "tr", "th", "td",
+}
+ALLOWED_ATTRS = {
+    "a": {"href", "title", "target"},
+    "img": {"src", "alt", "title"},
+    "abbr": {"title"},
+    **{f"h{i}": {"id"} for i in range(1, 7)},
+}
+WORDS_PER_MINUTE = 200
+EXCERPT_CHARS = 200
+TOC_DEPTH = "2-4"
+
+CHANNEL = "article_render"     # notifiche del trigger di 0009
+SOURCE_SQL = "coalesce(a.content, a.body_md, a.body, '')"
+TAG_RX = re.compile(r"<[^>]+>")
+PARA_RX = re.compile(r"<p>(.*?)</p>", re.S)
+WS_RX = re.compile(r"\s+")
+
+@dataclass(frozen=True)
+class Rendered:
+    html: str
+    toc: List[Dict[str, object]]
+    reading_minutes: int
+    excerpt: Optional[str]
+
+def source_hash(text: str) -> str:
+    """Come md5(...) di Postgres su un database UTF8."""
+    return hashlib.md5(text.encode("utf-8")).hexdigest()
+
+_md = None
+
+def _markdown():
+    """Un'istanza per processo (creare le estensioni costa più del render di un articolo)."""
+    global _md
+    if _md is None:
+        try:
+            import markdown
+        except ImportError:
+            raise SystemExit("[ERR] markdown non installato: pip install markdown nh3")
+        _md = markdown.Markdown(extensions=["extra", "sane_lists", "toc"],
+                                extension_configs={"toc": {"toc_depth": TOC_DEPTH}})
+    _md.reset()
+    return _md
+
+def sanitize(html: str) -> str:
+    try:
+        import nh3
+    except ImportError:
+        raise SystemExit("[ERR] nh3 non installato: pip install markdown nh3")
+    return nh3.clean(html, tags=ALLOWED_TAGS, attributes=ALLOWED_ATTRS,
+                     link_rel="noopener noreferrer", url_schemes={"http", "https", "mailto"})
+
+def plain_text(html: str) -> str:
+    return WS_RX.sub(" ", htmllib.unescape(TAG_RX.sub(" ", html))).strip()
+
+def flatten_toc(tokens: list) -> List[Dict[str, object]]:
+    out: List[Dict[str, object]] = []
+    for t in tokens:
+        out.append({"level": t["level"], "id": t["id"], "text": htmllib.unescape(t["name"])})
+        out.extend(flatten_toc(t.get("children") or []))
+    return out
+
+def make_excerpt(html: str) -> Optional[str]:
+    for m in PARA_RX.finditer(html):
+        text = plain_text(m.group(1))
+        if text:
+            if len(text) <= EXCERPT_CHARS:
+                return text
+            cut = text[:EXCERPT_CHARS].rsplit(" ", 1)[0]
+            return cut.rstrip(" ,;:.") + "…"
+    return None
+
+def render(md_text: str) -> Rendered:
+    md = _markdown()
+    html = sanitize(md.convert(md_text))
+    words = len(plain_text(html).split())
+    return Rendered(
+        html=html,
+        toc=flatten_toc(getattr(md, "toc_tokens", [])),
+        reading_minutes=max(1, math.ceil(words / WORDS_PER_MINUTE)),
+        excerpt=make_excerpt(html),
+    )
+
+def render_job(item: Tuple[str, str, str]) -> Tuple[str, str, str, str, int, Optional[str]]:
+    """(id, sorgente, hash) -> riga per article_renders; eseguito nei processi worker."""
+    article_id, src, h = item
+    r = render(src)
+    return article_id, h, r.html, json.dumps(r.toc, ensure_ascii=False), r.reading_minutes, r.excerpt
+
+# -------------------- database --------------------
+
+UPSERT_SQL = """
+insert into public.article_renders (article_id, source_hash, html, toc, reading_minutes, excerpt, rendered_at)
+select v.id::uuid, v.h, v.html, v.toc::jsonb, v.rm, v.ex, now()
+from (values %s) as v(id, h, html, toc, rm, ex)
+join public.articles a on a.id = v.id::uuid and a.source_hash = v.h
+on conflict (article_id) do update set
+  source_hash = excluded.source_hash, html = excluded.html, toc = excluded.toc,
+  reading_minutes = excluded.reading_minutes, excerpt = excluded.excerpt, rendered_at = excluded.rendered_at
+"""
+
+def fetch_pending(conn, after: str, limit: int, force: bool) -> List[Tuple[str, str, str]]:
+    stale = "" if force else "and r.source_hash is distinct from a.source_hash"
+    with conn.cursor() as cur:
+        cur.execute(
+            f"select a.id::text, {SOURCE_SQL}, a.source_hash from public.articles a "
+            f"left join public.article_renders r on r.article_id = a.id "
+            f"where a.id > %s::uuid {stale} order by a.id limit %s",
+            (after, limit),
+        )
+        return cur.fetchall()
+
+def write_renders(conn, rows: list) -> int:
+    from psycopg2.extras import execute_values
+    with conn.cursor() as cur:
+        execute_values(cur, UPSERT_SQL, rows, page_size=len(rows) or 1)
+        return cur.rowcount
+
+@dataclass
+class BackfillStats:
+    rendered: int = 0
+    written: int = 0
+    skipped: int = 0        # sorgente cambiato durante il render: resta da fare
+    errors: List[str] = field(default_factory=list)
+
+def backfill(conn, workers: int = 4, batch_size: int = 200, force: bool = False,
+             limit: Optional[int] = None, dry_run: bool = False) -> BackfillStats:
+    stats = BackfillStats()
+    render("")   # dipendenze mancanti: errore subito, non in ogni worker
+    after = "00000000-0000-0000-0000-000000000000"
+    with ProcessPoolExecutor(max_workers=max(1, workers)) as pool:
+        while limit is None or stats.rendered < limit:
+            n = batch_size if limit is None else min(batch_size, limit - stats.rendered)
+            pending = fetch_pending(conn, after, n, force)
+            if not pending:
+                break
+            after = pending[-1][0]
+            rows = []
+            for item, fut in [(it, pool.submit(render_job, it)) for it in pending]:
+                try:
+                    rows.append(fut.result())
+                except Exception as e:
+                    stats.errors.append(f"{item[0]}: {e}")
+            stats.rendered += len(rows)
+            if rows and not dry_run:
+                w = write_renders(conn, rows)
+                stats.written += w
+                stats.skipped += len(rows) - w
+    return stats
+
+def report(st: BackfillStats, dt: float) -> None:
+    for e in st.errors[:20]:
+        print(f"[WARN] {e}")
+    print(f"[OK] renderizzati: {st.rendered} | scritti: {st.written} | sorgente cambiato: {st.skipped} | "
+          f"errori: {len(st.errors)} | {dt*1000:.0f} ms ({st.rendered / max(dt, 1e-9):.0f} articoli/s)")
+
+def watch(conn, workers: int, batch_size: int, interval: float) -> None:
+    """Render alla notifica del trigger (articoli pubblicati o modificati); ogni `interval`
+    secondi comunque un giro, come rete di sicurezza. Le notifiche non dicono quali
+    articoli: quelli da fare li trova backfill dagli hash."""
+    with conn.cursor() as cur:
+        cur.execute(f"listen {CHANNEL}")
+    while True:
+        t0 = time.perf_counter()
+        st = backfill(conn, workers, batch_size)
+        if st.rendered or st.errors:
+            report(st, time.perf_counter() - t0)
+        if conn.notifies:            # arrivate durante il giro: subito un altro
+            conn.notifies.clear()
+            continue
+        if select.select([conn], [], [], interval) != ([], [], []):
+            conn.poll()
+            conn.notifies.clear()
+
+def status(conn) -> Dict[str, int]:
+    with conn.cursor() as cur:
+        cur.execute(
+            "select count(*), count(r.article_id), "
+            "count(*) filter (where r.source_hash is distinct from a.source_hash) "
+            "from public.articles a left join public.article_renders r on r.article_id = a.id"
+        )
+        total, with_render, pending = cur.fetchone()
+    return {"articles": total, "renders": with_render, "pending": pending}
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description="Render Markdown degli articoli in article_renders")
+    ap.add_argument("--db-url", help="Connessione Postgres (default: SUPABASE_DB_URL / webapp/.env.db)")
+    sub = ap.add_subparsers(dest="cmd")
+    sub.add_parser("status", help="Articoli con render aggiornato / da fare")
+    p_bf = sub.add_parser("backfill", help="Renderizza gli articoli con sorgente nuovo o modificato")
+    p_bf.add_argument("--workers", type=int, default=4, help="Processi di render")
+    p_bf.add_argument("--batch-size", type=int, default=200)
+    p_bf.add_argument("--limit", type=int, help="Al massimo N articoli")
+    p_bf.add_argument("--force", action="store_true", help="Rirenderizza anche i render aggiornati")
+    p_bf.add_argument("--dry-run", action="store_true", help="Renderizza senza scrivere")
+    p_w = sub.add_parser("watch", help="Worker: render degli articoli accodati dal trigger di 0009")
+    p_w.add_argument("--workers", type=int, default=2, help="Processi di render")
+    p_w.add_argument("--batch-size", type=int, default=200)
+    p_w.add_argument("--interval", type=float, default=60.0, help="Secondi massimi tra due giri")
+    p_r = sub.add_parser("render", help="Render di un file Markdown su stdout (senza DB)")
+    p_r.add_argument("file", type=Path)
+    args = ap.parse_args(argv)
+
+    if args.cmd == "render":
+        r = render(args.file.read_text(encoding="utf-8-sig"))
+        print(json.dumps({"reading_minutes": r.reading_minutes, "excerpt": r.excerpt, "toc": r.toc},
+                         ensure_ascii=False, indent=2))
+        print(r.html)
+        return 0
+    if args.cmd not in ("status", "backfill", "watch"):
+        ap.print_help(); return 2
+
+    conn = migrate.connect(migrate.load_db_url(args.db_url))
+    try:
+        if args.cmd == "status":
+            s = status(conn)
+            print(f"[INFO] articoli: {s['articles']} | con render: {s['renders']} | da renderizzare: {s['pending']}")
+            return 0
+        if args.cmd == "watch":
+            print(f"[INFO] watch: render degli articoli accodati su '{CHANNEL}' (Ctrl+C per uscire)")
+            watch(conn, args.workers, args.batch_size, args.interval)
+        t0 = time.perf_counter()
+        st = backfill(conn, args.workers, args.batch_size, args.force, args.limit, args.dry_run)
+        dt = time.perf_counter() - t0
+    except KeyboardInterrupt:
+        return 0
+    except Exception as e:
+        print(f"[ERR] {e}")
+        return 2
+    finally:
+        conn.close()
+    report(st, dt)
+    return 2 if st.errors else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,268 @@
+# -*- coding: utf-8 -*-
+"""
+migrate.py
+Migrazioni versionate per lo schema Supabase/Postgres.
+- File numerati in db/migrations/NNNN_nome.sql, applicati in ordine
+- Tabella public.schema_migrations con versione, nome, checksum, durata
+- Ogni migrazione gira in una transazione (salvo header "-- migrate: no-transaction",
+  necessario per es. a CREATE INDEX CONCURRENTLY)
+- Solo le migrazioni pendenti vengono eseguite: a schema aggiornato il deploy
+  costa una SELECT sulla tabella schema_migrations
+- pg_advisory_lock: due deploy concorrenti non applicano la stessa migrazione
+- Checksum: una migrazione già applicata e poi modificata viene segnalata (drift)
+
+Uso:
+  python Tools/migrate.py status
+  python Tools/migrate.py up [--to 3] [--dry-run]
+  python Tools/migrate.py verify          # exit 1 se ci sono pendenti o drift
+  python Tools/migrate.py new add_search  # crea db/migrations/000N_add_search.sql
+Opzioni comuni:
+  --db-url postgresql://...  (default: env SUPABASE_DB_URL oppure webapp/.env.db)
+Exit codes: 0 OK, 1 pendenti/drift (verify), 2 errore.
+"""
+from __future__ import annotations
+import argparse
+import hashlib
+import os
+import re
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+ENV_DB = ROOT / "webapp" / ".env.db"
+MIGRATIONS_DIR = ROOT / "db" / "migrations"
+
+FILE_RX = re.compile(r"^(\d{4})_([a-z0-9_]+)\.sql$")
+NO_TX_MARKER = "-- migrate: no-transaction"
+LOCK_KEY = 4_727_011   # chiave pg_advisory_lock riservata alle migrazioni ICA
+
+TABLE_SQL = """
+create table if not exists public.schema_migrations (
+  version     integer primary key,
+  name        text not null,
+  checksum    text not null,
+  applied_at  timestamptz not null default now(),
+  duration_ms integer not null default 0
+);
+alter table public.schema_migrations enable row level security;
+revoke all on public.schema_migrations from anon, authenticated;
+"""
+
+@dataclass(frozen=True)
+class Migration:
+    version: int
+    name: str
+    path: Path
+    sql: str
+    checksum: str
+    transactional: bool
+
+    @property
+    def label(self) -> str:
+        return f"{self.version:04d}_{self.name}"
+
+def load_migrations(directory: Path = MIGRATIONS_DIR) -> list[Migration]:
+    out: dict[int, Migration] = {}
+    if not directory.exists():
+        return []
+    for p in sorted(directory.iterdir()):
+        if p.suffix != ".sql":
+            continue
+        m = FILE_RX.match(p.name)
+        if not m:
+            raise SystemExit(f"[ERR] Nome migrazione non valido: {p.name} (atteso NNNN_nome.sql)")
+        version = int(m.group(1))
+        if version in out:
+            raise SystemExit(f"[ERR] Versione duplicata {version:04d}: {out[version].path.name} / {p.name}")
+        # checksum indipendente da CRLF/LF (repo usato anche da Windows)
+        sql = p.read_text(encoding="utf-8-sig").replace("\r\n", "\n")
+        out[version] = Migration(
+            version, m.group(2), p, sql,
+            hashlib.sha256(sql.encode("utf-8")).hexdigest(),
+            NO_TX_MARKER not in sql,
+        )
+    return [out[v] for v in sorted(out)]
+
+_TOKEN_RX = re.compile(r"--[^\n]*|/\*.*?\*/|'(?:[^']|'')*'|\"[^\"]*\"|\$([A-Za-z_]\w*)?\$|;", re.S)
+_COMMENT_RX = re.compile(r"--[^\n]*|/\*.*?\*/", re.S)
+
+def split_statements(sql: str) -> list[str]:
+    """Divide uno script nei singoli statement (rispetta stringhe, commenti e blocchi $tag$).
+    Serve alle migrazioni no-transaction: uno script multi-statement inviato in una sola
+    query gira comunque in un blocco implicito, e CREATE INDEX CONCURRENTLY lo rifiuta."""
+    out, start, pos = [], 0, 0
+    while True:
+        m = _TOKEN_RX.search(sql, pos)
+        if not m:
+            break
+        tok = m.group(0)
+        if tok == ";":
+            out.append(sql[start:m.start()])
+            start = pos = m.end()
+        elif tok.startswith("$"):
+            end = sql.find(tok, m.end())
+            pos = len(sql) if end == -1 else end + len(tok)
+        else:
+            pos = m.end()
+    out.append(sql[start:])
+    # scarta i frammenti fatti solo di commenti/spazi
+    return [s.strip() for s in out if _COMMENT_RX.sub("", s).strip()]
+
+def load_db_url(explicit: str | None = None) -> str:
+    if explicit:
+        return explicit
+    if os.environ.get("SUPABASE_DB_URL"):
+        return os.environ["SUPABASE_DB_URL"]
+    if ENV_DB.exists():
+        for line in ENV_DB.read_text(encoding="utf-8").splitlines():
+            line = line.strip()
+            if line.startswith("SUPABASE_DB_URL="):
+                return line.split("=", 1)[1].strip()
+    raise SystemExit(f"[ERR] SUPABASE_DB_URL mancante (env, --db-url o {ENV_DB})")
+
+def connect(db_url: str):
+    try:
+        import psycopg2
+    except ImportError:
+        raise SystemExit("[ERR] psycopg2 non installato: pip install psycopg2-binary")
+    conn = psycopg2.connect(db_url)
+    conn.autocommit = True
+    return conn
+
+def fetch_applied(conn) -> dict[int, tuple[str, str]]:
+    with conn.cursor() as cur:
+        cur.execute(TABLE_SQL)
+        cur.execute("select version, name, checksum from public.schema_migrations order by version")
+        return {v: (n, c) for v, n, c in cur.fetchall()}
+
+def plan(migrations: list[Migration], applied: dict[int, tuple[str, str]]):
+    """-> (pendenti, drift[(migrazione, checksum_db)], sconosciute_nel_db[versione])"""
+    local = {m.version: m for m in migrations}
+    pending = [m for m in migrations if m.version not in applied]
+    drift = [(m, applied[m.version][1]) for m in migrations
+             if m.version in applied and applied[m.version][1] != m.checksum]
+    unknown = sorted(v for v in applied if v not in local)
+    return pending, drift, unknown
+
+def apply_one(conn, m: Migration) -> int:
+    t0 = time.perf_counter()
+    record = ("insert into public.schema_migrations (version, name, checksum, duration_ms) "
+              "values (%s, %s, %s, %s)")
+    if m.transactional:
+        conn.autocommit = False
+        try:
+            with conn.cursor() as cur:
+                cur.execute(m.sql)
+                ms = int((time.perf_counter() - t0) * 1000)
+                cur.execute(record, (m.version, m.name, m.checksum, ms))
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.autocommit = True
+    else:
+        with conn.cursor() as cur:
+            for stmt in split_statements(m.sql):
+                cur.execute(stmt)
+            ms = int((time.perf_counter() - t0) * 1000)
+            cur.execute(record, (m.version, m.name, m.checksum, ms))
+    return ms
+
+def print_status(migrations, applied, pending, drift, unknown) -> None:
+    pend = {m.version for m in pending}
+    drifted = {m.version for m, _ in drift}
+    for m in migrations:
+        tag = "PEND" if m.version in pend else ("DRIFT" if m.version in drifted else "OK")
+        print(f"[{tag:<5}] {m.label}{'' if m.transactional else '  (no-transaction)'}")
+    for v in unknown:
+        print(f"[WARN ] {v:04d}_{applied[v][0]} applicata nel DB ma assente in {MIGRATIONS_DIR.relative_to(ROOT)}")
+
+def cmd_new(name: str) -> int:
+    slug = re.sub(r"[^a-z0-9]+", "_", name.lower()).strip("_")
+    if not slug:
+        print("[ERR] Nome migrazione vuoto"); return 2
+    migrations = load_migrations()
+    version = (migrations[-1].version + 1) if migrations else 1
+    MIGRATIONS_DIR.mkdir(parents=True, exist_ok=True)
+    path = MIGRATIONS_DIR / f"{version:04d}_{slug}.sql"
+    path.write_text(f"-- {path.name}\n", encoding="utf-8", newline="\n")
+    print(f"[OK]  creata {path.relative_to(ROOT)}")
+    return 0
+
+def main(argv: list[str] | None = None) -> int:
+    ap = argparse.ArgumentParser(description="Migrazioni versionate (db/migrations)")
+    ap.add_argument("--db-url", help="Connessione Postgres (default: SUPABASE_DB_URL / webapp/.env.db)")
+    # --db-url anche dopo il sottocomando (alias setup_*.py: main(["up", *argv]));
+    # SUPPRESS: se non dato lì, resta il valore dell'opzione globale
+    db = argparse.ArgumentParser(add_help=False)
+    db.add_argument("--db-url", default=argparse.SUPPRESS, help=argparse.SUPPRESS)
+    sub = ap.add_subparsers(dest="cmd")
+    sub.add_parser("status", parents=[db], help="Elenca migrazioni applicate/pendenti")
+    p_up = sub.add_parser("up", parents=[db], help="Applica le migrazioni pendenti")
+    p_up.add_argument("--to", type=int, help="Applica fino alla versione indicata (inclusa)")
+    p_up.add_argument("--dry-run", action="store_true", help="Mostra cosa verrebbe applicato")
+    sub.add_parser("verify", parents=[db], help="Exit 1 se ci sono migrazioni pendenti o checksum diversi")
+    p_new = sub.add_parser("new", help="Crea il prossimo file di migrazione numerato")
+    p_new.add_argument("name")
+    args = ap.parse_args(argv)
+
+    if args.cmd == "new":
+        return cmd_new(args.name)
+    if args.cmd not in ("status", "up", "verify"):
+        ap.print_help(); return 2
+
+    migrations = load_migrations()
+    t0 = time.perf_counter()
+    conn = connect(load_db_url(args.db_url))
+    try:
+        applied = fetch_applied(conn)
+        pending, drift, unknown = plan(migrations, applied)
+
+        if args.cmd == "status":
+            print_status(migrations, applied, pending, drift, unknown)
+            print(f"[INFO] applicate: {len(applied)} | pendenti: {len(pending)} | drift: {len(drift)}")
+            return 0
+
+        if args.cmd == "verify":
+            print_status(migrations, applied, pending, drift, unknown)
+            return 1 if (pending or drift) else 0
+
+        # up
+        for m, db_sum in drift:
+            print(f"[WARN] {m.label}: checksum diverso da quello applicato ({db_sum[:12]}… ≠ {m.checksum[:12]}…)")
+        todo = [m for m in pending if args.to is None or m.version <= args.to]
+        if not todo:
+            print(f"[OK]  Schema aggiornato ({len(applied)} migrazioni) in {(time.perf_counter()-t0)*1000:.0f} ms")
+            return 0
+        if args.dry_run:
+            for m in todo:
+                print(f"[DRY] {m.label}")
+            return 0
+
+        with conn.cursor() as cur:
+            cur.execute("select pg_advisory_lock(%s)", (LOCK_KEY,))
+        try:
+            # rilettura sotto lock: un deploy concorrente potrebbe averle già applicate
+            applied = fetch_applied(conn)
+            for m in todo:
+                if m.version in applied:
+                    print(f"[SKIP] {m.label} (applicata nel frattempo)")
+                    continue
+                try:
+                    ms = apply_one(conn, m)
+                except Exception as e:
+                    print(f"[ERR] {m.label}: {e}")
+                    return 2
+                print(f"[OK]  {m.label} ({ms} ms)")
+        finally:
+            with conn.cursor() as cur:
+                cur.execute("select pg_advisory_unlock(%s)", (LOCK_KEY,))
+        print(f"[DONE] {len(todo)} migrazioni in {(time.perf_counter()-t0)*1000:.0f} ms")
+        return 0
+    finally:
+        conn.close()
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,318 @@
+# -*- coding: utf-8 -*-
+"""
+patch_engine.py
+Motore di patch condiviso dagli script di fase (pl_template e pl*/phase*): i file
+generati si descrivono con FileOp e si applicano in un batch unico.
+- FileOp dichiarativi: "w" riscrive il file, "a" aggiunge in coda solo se il
+  marcatore (default: il testo stesso) non c'è già, quindi rieseguire la fase è idempotente;
+  "x" crea il file solo se manca, "d" lo elimina (al posto dei vecchi rename in .bak-*)
+- Hash del contenuto: un file già identico non viene toccato (mtime invariato, niente
+  HMR/rebuild di Next.js), nessun file .bak-* (la storia è in git)
+- Batch atomico: tutti i file della fase vanno prima in file temporanei, poi
+  os.replace uno dopo l'altro e le eliminazioni; se un passo fallisce quelli già fatti
+  vengono ripristinati dal contenuto originale (letto in memoria)
+- --dry-run: diff unificato per ogni file che cambierebbe
+- Manifest dei file generati (reports/patch_manifest.json): hash, size, mtime_ns, fase
+  e marcatori applicati. Se size+mtime coincidono il file è quello scritto dal motore:
+  `check` lo dimostra con una sola stat() per file e la fase successiva salta le
+  FileOp già applicate senza rileggere il file
+
+Uso:
+  from patch_engine import FileOp, apply
+  apply([FileOp("webapp/lib/x.ts", X_TS), FileOp("webapp/app/globals.css", CSS, mode="a")],
+        phase="PL-5", dry=args.dry_run)
+  python Tools/patch_engine.py check [--deep]
+  python Tools/patch_engine.py bench --files 2000
+"""
+from __future__ import annotations
+import argparse
+import difflib
+import hashlib
+import json
+import os
+import sys
+import tempfile
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+ROOT = Path(__file__).resolve().parents[1]
+MANIFEST = ROOT / "reports" / "patch_manifest.json"
+
+# ========================= operazioni =========================
+
+@dataclass
+class FileOp:
+    path: str                      # relativo alla root del repo
+    content: str = ""
+    mode: str = "w"                # "w" riscrivi, "a" append idempotente, "x" crea se manca, "d" elimina
+    ensure_dir: bool = True
+    marker: Optional[str] = None   # per "a": testo che indica l'append già fatto
+
+    def marker_text(self) -> str:
+        return self.marker or self.content.strip()
+
+@dataclass(slots=True)
+class Change:
+    rel: str
+    path: Path
+    old: Optional[bytes]           # None: il file non esiste
+    new: Optional[bytes]           # None: il file non ci sarà (assente o eliminato)
+    markers: List[str] = field(default_factory=list)
+    cached: bool = False           # già applicato (manifest o stat), file non letto
+
+    @property
+    def changed(self) -> bool:
+        return not self.cached and self.old != self.new
+
+    @property
+    def action(self) -> str:
+        if not self.changed:
+            return "SKIP"
+        if self.new is None:
+            return "DELETE"
+        return "NEW" if self.old is None else "UPDATE"
+
+def digest(data: bytes) -> str:
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+def render(op: FileOp, current: Optional[str]) -> Optional[str]:
+    """Contenuto del file dopo l'operazione (stesso fine riga '\\n' per tutti); None = nessun file."""
+    if op.mode == "d":
+        return None
+    content = op.content.replace("\r\n", "\n")
+    if op.mode == "w":
+        return content
+    if op.mode == "x":
+        return content if current is None else current
+    if op.mode != "a":
+        raise ValueError(f"modo non valido per {op.path}: {op.mode}")
+    base = current or ""
+    if op.marker_text().replace("\r\n", "\n") in base:
+        return base
+    if base and not base.endswith("\n"):
+        base += "\n"
+    return base + content
+
+def _rel(path: Path, root: Path) -> str:
+    try:
+        return path.resolve().relative_to(root.resolve()).as_posix()
+    except ValueError:
+        return path.resolve().as_posix()
+
+# ========================= manifest =========================
+
+def load_manifest(path: Path = MANIFEST) -> Dict[str, dict]:
+    try:
+        return json.loads(path.read_text(encoding="utf-8")).get("files", {})
+    except (OSError, ValueError, AttributeError):
+        return {}
+
+def save_manifest(files: Dict[str, dict], path: Path = MANIFEST) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    data = {"version": 1, "files": dict(sorted(files.items()))}
+    tmp.write_text(json.dumps(data, ensure_ascii=False, indent=1) + "\n", encoding="utf-8")
+    tmp.replace(path)
+
+def _fresh(rec: Optional[dict], path: Path) -> bool:
+    """Il file è ancora quello registrato nel manifest (stessa size e mtime)."""
+    if not rec:
+        return False
+    try:
+        st = path.stat()
+    except OSError:
+        return False
+    return (st.st_size, st.st_mtime_ns) == (rec.get("size"), rec.get("mtime_ns"))
+
+# ========================= piano e applicazione =========================
+
+def _applied(op: FileOp, path: Path, rec: Optional[dict]) -> bool:
+    """L'operazione non cambierebbe nulla, deciso senza leggere il file."""
+    if op.mode == "x":
+        return path.exists()
+    if op.mode == "d":
+        return not path.exists()
+    if not _fresh(rec, path):
+        return False
+    if op.mode == "w":
+        return rec.get("hash") == digest(render(op, None).encode("utf-8"))
+    return op.mode == "a" and digest(op.marker_text().encode("utf-8")) in rec.get("markers", [])
+
+def plan(ops: Iterable[FileOp], *, root: Path = ROOT, manifest: Optional[Dict[str, dict]] = None) -> List[Change]:
+    """Contenuto finale di ogni file toccato dal batch (più operazioni sullo stesso file in ordine)."""
+    manifest = load_manifest() if manifest is None else manifest
+    changes: Dict[Path, Change] = {}
+    for op in ops:
+        path = root / op.path
+        c = changes.get(path)
+        if c is None:
+            rel = _rel(path, root)
+            rec = manifest.get(rel) or {}
+            if _applied(op, path, rec):
+                # scorciatoia: il file non si legge nemmeno
+                changes[path] = Change(rel, path, None, None, list(rec.get("markers", [])), cached=True)
+                continue
+            old = path.read_bytes() if path.exists() else None
+            c = changes[path] = Change(rel, path, old, old)
+        elif c.cached:
+            c.old = c.new = path.read_bytes() if path.exists() else None
+            c.cached = False
+        new = render(op, c.new.decode("utf-8") if c.new is not None else None)
+        c.new = new.encode("utf-8") if new is not None else None
+        if op.mode in ("w", "d"):
+            c.markers = []
+        elif op.mode == "a":
+            c.markers.append(digest(op.marker_text().encode("utf-8")))
+    return list(changes.values())
+
+def unified_diff(c: Change) -> str:
+    old = (c.old or b"").decode("utf-8", "replace").splitlines(keepends=True)
+    new = (c.new or b"").decode("utf-8", "replace").splitlines(keepends=True)
+    return "".join(difflib.unified_diff(old, new, fromfile=f"a/{c.rel}" if c.old is not None else "/dev/null",
+                                        tofile=f"b/{c.rel}" if c.new is not None else "/dev/null"))
+
+def _restore(c: Change) -> None:
+    if c.old is None:
+        c.path.unlink(missing_ok=True)
+        return
+    tmp = c.path.with_name(f".{c.path.name}.{os.getpid()}.rollback")
+    tmp.write_bytes(c.old)
+    os.replace(tmp, c.path)
+
+def commit(changes: List[Change]) -> None:
+    """Tutti i file nuovi su temp file (fsync), poi rename ed eliminazioni; errore = rollback
+    di quelli già fatti."""
+    staged: List[tuple[Change, Path]] = []
+    done: List[Change] = []
+    try:
+        for c in changes:
+            if c.new is None:
+                continue
+            c.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = c.path.with_name(f".{c.path.name}.{os.getpid()}.tmp")
+            staged.append((c, tmp))
+            with tmp.open("wb") as fh:
+                fh.write(c.new)
+                fh.flush()
+                os.fsync(fh.fileno())
+        for c, tmp in staged:
+            os.replace(tmp, c.path)
+            done.append(c)
+        for c in changes:
+            if c.new is None:
+                c.path.unlink()
+                done.append(c)
+    except BaseException:
+        for c in reversed(done):
+            try:
+                _restore(c)
+            except OSError as e:
+                print(f"[ERR] ripristino non riuscito: {c.rel}: {e}")
+        raise
+    finally:
+        for _, tmp in staged:
+            tmp.unlink(missing_ok=True)
+
+def apply(ops: Iterable[FileOp], *, phase: str = "", dry: bool = False, root: Path = ROOT,
+          manifest_path: Optional[Path] = None, quiet: bool = False) -> List[Change]:
+    """Piano + scrittura atomica del batch + aggiornamento del manifest; ritorna i Change."""
+    manifest_path = manifest_path or (MANIFEST if root == ROOT else root / "reports" / MANIFEST.name)
+    manifest = load_manifest(manifest_path)
+    changes = plan(ops, root=root, manifest=manifest)
+    pending = [c for c in changes if c.changed]
+    if dry:
+        for c in changes:
+            print(f"[DRY] {c.action}: {c.rel}")
+            if c.changed:
+                sys.stdout.write(unified_diff(c))
+        return changes
+    commit(pending)
+    for c in changes:
+        if c.cached:
+            continue
+        if c.new is None:
+            manifest.pop(c.rel, None)
+            continue
+        st = c.path.stat()
+        manifest[c.rel] = {"hash": digest(c.new), "size": st.st_size, "mtime_ns": st.st_mtime_ns,
+                           "phase": phase or manifest.get(c.rel, {}).get("phase", ""), "markers": c.markers}
+    save_manifest(manifest, manifest_path)
+    if not quiet:
+        for c in changes:
+            print(f"[{'OK' if c.changed else 'SKIP'}] {c.action if c.changed else 'invariato'}: {c.rel}")
+    return changes
+
+def check(*, deep: bool = False, root: Path = ROOT, manifest_path: Path = MANIFEST) -> List[tuple[str, str]]:
+    """(file, stato) dei file del manifest che non sono più quelli generati.
+    Senza --deep basta una stat(): si rilegge (hash) solo chi ha size/mtime diversi."""
+    out: List[tuple[str, str]] = []
+    for rel, rec in load_manifest(manifest_path).items():
+        path = root / rel
+        if not path.exists():
+            out.append((rel, "mancante"))
+        elif deep or not _fresh(rec, path):
+            if digest(path.read_bytes()) != rec.get("hash"):
+                out.append((rel, "modificato"))
+    return out
+
+# ========================= CLI =========================
+
+def bench(n: int) -> int:
+    """n file: prima applicazione, seconda (tutto saltato dal manifest), check, modifica esterna."""
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        ops = [FileOp(f"webapp/components/gen/C{i}.tsx", f"export const C{i} = () => <div>{i}</div>;\n" * 40)
+               for i in range(n)]
+        ops.append(FileOp("webapp/app/globals.css", "/* === bench === */\n.bench { color: red; }\n", mode="a"))
+        mp = root / "reports" / MANIFEST.name
+        for label in ("prima applicazione", "seconda (invariato)"):
+            t0 = time.perf_counter()
+            ch = apply(ops, phase="BENCH", root=root, manifest_path=mp, quiet=True)
+            dt = (time.perf_counter() - t0) * 1000
+            print(f"[OK] {label:<20} {dt:8.1f} ms | scritti {sum(c.changed for c in ch)} "
+                  f"| saltati dal manifest {sum(c.cached for c in ch)}")
+        t0 = time.perf_counter()
+        drift = check(root=root, manifest_path=mp)
+        print(f"[OK] check (stat)        {(time.perf_counter() - t0) * 1000:8.1f} ms | drift: {len(drift)}")
+        (root / ops[0].path).write_text("// modificato a mano\n", encoding="utf-8")
+        drift = check(root=root, manifest_path=mp)
+        ch = apply(ops, phase="BENCH", root=root, manifest_path=mp, quiet=True)
+        css = (root / "webapp/app/globals.css").read_text(encoding="utf-8")
+        ok = [d[0] for d in drift] == [ops[0].path] and sum(c.changed for c in ch) == 1 \
+            and css.count("/* === bench === */") == 1
+        # "x" non tocca un file esistente, "d" elimina e toglie dal manifest
+        ch = apply([FileOp(ops[1].path, "// altro\n", mode="x"), FileOp(ops[2].path, mode="d")],
+                   root=root, manifest_path=mp, quiet=True)
+        ok = ok and [c.action for c in ch] == ["SKIP", "DELETE"] and not (root / ops[2].path).exists() \
+            and ops[2].path not in load_manifest(mp)
+    print(f"[{'OK' if ok else 'ERR'}] drift rilevato, solo il file modificato riscritto, append una volta, "
+          f"crea/elimina: {ok}")
+    return 0 if ok else 2
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description="Patch engine degli script di fase")
+    sub = ap.add_subparsers(dest="cmd")
+    p_c = sub.add_parser("check", help="Verifica che i file generati non siano cambiati")
+    p_c.add_argument("--deep", action="store_true", help="Rilegge e confronta l'hash di tutti i file")
+    p_b = sub.add_parser("bench", help="Applicazione, skip e check su file sintetici")
+    p_b.add_argument("--files", type=int, default=2000)
+    args = ap.parse_args(argv)
+    if args.cmd == "bench":
+        return bench(args.files)
+    if args.cmd == "check":
+        files = load_manifest()
+        if not files:
+            print(f"[INFO] manifest vuoto o assente: {MANIFEST.relative_to(ROOT)}")
+            return 0
+        drift = check(deep=args.deep)
+        for rel, state in drift:
+            print(f"[WARN] {state}: {rel}")
+        print(f"[{'WARN' if drift else 'OK'}] {len(files)} file generati, {len(drift)} cambiati fuori dal motore")
+        return 1 if drift else 0
+    ap.print_help()
+    return 2
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -3,24 +3,20 @@
 # Esecuzione: .\.venv\Scripts\python.exe Tools\phase2_i18n_home_scaffold.py
 
 from pathlib import Path
-from datetime import datetime
 import json
 
+import patch_engine
+from patch_engine import FileOp
+
 ROOT = Path(__file__).resolve().parents[1]
 WEB = ROOT / "webapp"
 assert WEB.exists(), f"Cartella non trovata: {WEB}"
 
-def backup(p: Path):
-    if p.exists():
-        ts = datetime.now().strftime("%Y%m%d-%H%M%S")
-        p.rename(p.with_suffix(p.suffix + f".bak-{ts}"))
+OPS: list[FileOp] = []
 
-def write(p: Path, content: str, create_dir=True):
-    if create_dir:
-        p.parent.mkdir(parents=True, exist_ok=True)
-    if p.exists():
-        backup(p)
-    p.write_text(content.replace("\r\n", "\n"), encoding="utf-8")
+def write(p: Path, content: str):
+    """Accoda il file: tutti scritti insieme da patch_engine (solo quelli cambiati, niente .bak)."""
+    OPS.append(FileOp(p.relative_to(ROOT).as_posix(), content))
 
 # 1) Aggiorna messages/*.json con chiavi minime
 seed = {
@@ -55,7 +51,6 @@ seed = {
 }
 
 msg_dir = WEB / "messages"
-msg_dir.mkdir(parents=True, exist_ok=True)
 
 def merge_messages(path: Path, add: dict):
     if path.exists():
@@ -73,7 +68,7 @@ def merge_messages(path: Path, add: dict):
                 curr[k].setdefault(kk, vv)
         else:
             curr[k] = v
-    write(path, json.dumps(curr, ensure_ascii=False, indent=2) + "\n", create_dir=False)
+    write(path, json.dumps(curr, ensure_ascii=False, indent=2) + "\n")
 
 for loc, data in seed.items():
     merge_messages(msg_dir / f"{loc}.json", data)
@@ -105,9 +100,10 @@ export default function Page() {
 }
 """
 app_locale_dir = WEB / "app" / "[locale]"
-app_locale_dir.mkdir(parents=True, exist_ok=True)
 write(app_locale_dir / "page.tsx", page_tsx)
 
+patch_engine.apply(OPS, phase="Fase 2")
+
 print("=== Fase 2: Home + messages COMPLETATA ===")
 print(f"- messages/*.json aggiornati: {list(seed.keys())}")
 print(f"- component: {WEB/'components/HomeContent.tsx'}")
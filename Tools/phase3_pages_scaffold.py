@@ -5,21 +5,19 @@
 
 from pathlib import Path
 import json
-from datetime import datetime
+
+import patch_engine
+from patch_engine import FileOp
 
 ROOT = Path(__file__).resolve().parents[1]
 WEB = ROOT / "webapp"
 assert WEB.exists(), f"webapp non trovata in {WEB}"
 
-def backup(p: Path):
-    if p.exists():
-        p.rename(p.with_suffix(p.suffix + f".bak-{datetime.now().strftime('%Y%m%d-%H%M%S')}"))
+OPS: list[FileOp] = []
 
 def write(p: Path, content: str):
-    p.parent.mkdir(parents=True, exist_ok=True)
-    if p.exists():
-        backup(p)
-    p.write_text(content.replace("\r\n", "\n"), encoding="utf-8")
+    """Accoda il file: tutti scritti insieme da patch_engine (solo quelli cambiati, niente .bak)."""
+    OPS.append(FileOp(p.relative_to(ROOT).as_posix(), content))
 
 # --- 1) Component: BasicPage (client, legge namespace con useTranslations) ---
 basic_page = """'use client';
@@ -174,4 +172,6 @@ for loc, add in seed.items():
             existing[k] = v
     write(path, json.dumps(existing, ensure_ascii=False, indent=2) + "\\n")
 
+patch_engine.apply(OPS, phase="Fase 3")
+
 print("=== Fase 3 scaffold COMPLETATA ===")
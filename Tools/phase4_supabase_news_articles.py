@@ -1,24 +1,44 @@
 # Tools/phase4_supabase_news_articles.py
 # Fase 4: integrazione Supabase per liste News e Articles.
-# Esecuzione: .\.venv\Scripts\python.exe Tools\phase4_supabase_news_articles.py
+# Esecuzione: .\.venv\Scripts\python.exe Tools\phase4_supabase_news_articles.py [--cache tags]
+#   --cache none  (default) liste lette a ogni visita (force-dynamic)
+#   --cache tags  liste nella Data Cache di Next con tag news/articles: le API admin
+#                 invalidano con revalidateTag (lib/cacheTags.ts, vedi pl6f --cache tags)
+#   --refresh-schema  rilegge lo schema; select e ordinamento delle liste usano le colonne
+#                 di reports/schema_snapshot.json (schema_snapshot.py)
 
 from pathlib import Path
+import argparse
 import json
-from datetime import datetime
+
+import patch_engine
+from patch_engine import FileOp
+from pl6f_news_index_with_pagination import CACHE_TAGS_TS, SUPABASE_CACHED_TS
+from schema_snapshot import load_schema
+
+ap = argparse.ArgumentParser(description="Fase 4: liste News/Articles da Supabase")
+ap.add_argument("--cache", choices=("none", "tags"), default="none")
+ap.add_argument("--refresh-schema", action="store_true")
+ARGS = ap.parse_args()
+CACHED = ARGS.cache == "tags"
+SCHEMA = load_schema(refresh=ARGS.refresh_schema)
+
+def bake_columns(tsx: str, table: str, wanted: list[str]) -> str:
+    """Select e ordinamento con le colonne presenti nello schema (nessun tentativo a runtime)."""
+    order_col = SCHEMA.pick(table, "published_at", "created_at", "id")
+    return tsx.replace(f".select('{', '.join(wanted)}')",
+                       f".select('{', '.join(SCHEMA.select(table, wanted))}')") \
+              .replace(".order('published_at'", f".order('{order_col}'")
 
 ROOT = Path(__file__).resolve().parents[1]
 WEB = ROOT / "webapp"
 assert WEB.exists(), f"webapp non trovata: {WEB}"
 
-def backup(p: Path):
-    if p.exists():
-        p.rename(p.with_suffix(p.suffix + f".bak-{datetime.now().strftime('%Y%m%d-%H%M%S')}"))
+OPS: list[FileOp] = []
 
 def write(p: Path, content: str):
-    p.parent.mkdir(parents=True, exist_ok=True)
-    if p.exists():
-        backup(p)
-    p.write_text(content.replace("\r\n", "\n"), encoding="utf-8")
+    """Accoda il file: tutti scritti insieme da patch_engine (solo quelli cambiati, niente .bak)."""
+    OPS.append(FileOp(p.relative_to(ROOT).as_posix(), content))
 
 # 1) Supabase client (server)
 client_ts = """import 'server-only';
@@ -38,6 +58,23 @@ export function getSupabaseServer() {
 """
 write(WEB / "lib" / "supabaseServer.ts", client_ts)
 
+if CACHED:
+    write(WEB / "lib" / "cacheTags.ts", CACHE_TAGS_TS)
+    write(WEB / "lib" / "supabaseCached.ts", SUPABASE_CACHED_TS)
+
+def cached_list(tsx: str, table: str) -> str:
+    return tsx.replace(
+        "import { getSupabaseServer } from '@/lib/supabaseServer';",
+        "import { getSupabaseCached } from '@/lib/supabaseCached';\nimport { tableTag } from '@/lib/cacheTags';",
+    ).replace("getSupabaseServer();", f"getSupabaseCached([tableTag('{table}')]);")
+
+def cached_page(tsx: str) -> str:
+    # revalidate deve essere un letterale: stesso valore di REVALIDATE in lib/cacheTags.ts
+    return tsx.replace("export const dynamic = 'force-dynamic'; // per vedere aggiornamenti",
+                       "export const revalidate = 300; // le scritture admin invalidano prima (revalidateTag)") \
+              .replace("export const dynamic = 'force-dynamic';",
+                       "export const revalidate = 300;")
+
 # 2) Componenti server: NewsList / ArticlesList
 news_list = """import { getSupabaseServer } from '@/lib/supabaseServer';
 import {format} from 'date-fns';
@@ -78,7 +115,8 @@ export default async function NewsList() {
   );
 }
 """
-write(WEB / "components" / "NewsList.tsx", news_list)
+news_list = bake_columns(news_list, "news", ["id", "title", "summary", "published_at"])
+write(WEB / "components" / "NewsList.tsx", cached_list(news_list, "news") if CACHED else news_list)
 
 articles_list = """import { getSupabaseServer } from '@/lib/supabaseServer';
 import {format} from 'date-fns';
@@ -119,7 +157,8 @@ export default async function ArticlesList() {
   );
 }
 """
-write(WEB / "components" / "ArticlesList.tsx", articles_list)
+articles_list = bake_columns(articles_list, "articles", ["id", "title", "excerpt", "published_at"])
+write(WEB / "components" / "ArticlesList.tsx", cached_list(articles_list, "articles") if CACHED else articles_list)
 
 # 3) Pagine che usano i componenti
 news_page = """import BasicPage from '@/components/BasicPage';
@@ -132,7 +171,7 @@ export default function Page(){
   </>;
 }
 """
-write(WEB / "app" / "[locale]" / "news" / "page.tsx", news_page)
+write(WEB / "app" / "[locale]" / "news" / "page.tsx", cached_page(news_page) if CACHED else news_page)
 
 articles_page = """import BasicPage from '@/components/BasicPage';
 import ArticlesList from '@/components/ArticlesList';
@@ -144,7 +183,7 @@ export default function Page(){
   </>;
 }
 """
-write(WEB / "app" / "[locale]" / "articles" / "page.tsx", articles_page)
+write(WEB / "app" / "[locale]" / "articles" / "page.tsx", cached_page(articles_page) if CACHED else articles_page)
 
 # 4) Messaggi: garantiamo titoli/intro
 seed = {
@@ -188,6 +227,10 @@ for loc, add in seed.items():
             existing[k] = v
     write(path, json.dumps(existing, ensure_ascii=False, indent=2) + "\\n")
 
+patch_engine.apply(OPS, phase="Fase 4")
+
 print("=== Fase 4: Supabase (News + Articles) COMPLETATA ===")
 print("- Creati: lib/supabaseServer.ts, components/NewsList.tsx, components/ArticlesList.tsx")
 print("- Pagine collegate: /[locale]/news, /[locale]/articles")
+if CACHED:
+    print("- Cache a tag: lib/cacheTags.ts, lib/supabaseCached.ts (revalidate 300 s + revalidateTag dalle API admin)")
@@ -1,6 +1,10 @@
 # Tools/phase5_admin_news.py
+# File scritti da patch_engine in un batch: quelli già identici non vengono toccati.
 from pathlib import Path
 
+import patch_engine
+from patch_engine import FileOp
+
 root = Path(__file__).resolve().parents[1]  # cartella progetto
 webapp = root / "webapp"
 
@@ -96,7 +100,7 @@ export default function AdminNewsForm() {
 """
 }
 
-for path, content in files.items():
-    path.parent.mkdir(parents=True, exist_ok=True)
-    path.write_text(content, encoding="utf-8")
-    print(f"[OK] scritto {path}")
+patch_engine.apply(
+    [FileOp(path.relative_to(root).as_posix(), content) for path, content in files.items()],
+    phase="Fase 5",
+)
@@ -3,8 +3,10 @@
 """
 PL-2 (News pubblico) – setup automatico:
 1) Normalizza i JSON i18n (tollera BOM, commenti // e /* */, virgole finali)
-2) Aggiunge/merge 'news' in messages/it.json e messages/en.json (backup .bak-YYYYMMDD-HHMMSS)
+2) Aggiunge/merge 'news' in messages/it.json e messages/en.json
 3) Crea/aggiorna app/[locale]/news/[slug]/page.tsx (dettaglio pubblico)
+File scritti da patch_engine in un batch (niente .bak: la storia è in git); con un
+JSON non valido non si scrive nulla.
 """
 
 from __future__ import annotations
@@ -12,7 +14,9 @@ import json
 import re
 import sys
 from pathlib import Path
-from datetime import datetime
+
+import patch_engine
+from patch_engine import FileOp
 
 # --- Percorsi ---
 REPO = Path(__file__).resolve().parents[1]
@@ -124,32 +128,21 @@ def _show_json_err(path: Path, text: str, err: json.JSONDecodeError) -> None:
     print("----------------------\n")
 
 # --- IO helpers ---
-def _now_tag() -> str:
-    return datetime.now().strftime("%Y%m%d-%H%M%S")
-
-def backup(path: Path) -> Path:
-    b = path.with_suffix(path.suffix + f".bak-{_now_tag()}")
-    b.write_bytes(path.read_bytes())
-    return b
-
-def write_json(path: Path, data: dict) -> None:
-    path.parent.mkdir(parents=True, exist_ok=True)
-    with path.open("w", encoding="utf-8", newline="\n") as f:
-        json.dump(data, f, ensure_ascii=False, indent=2, sort_keys=True)
-        f.write("\n")
+def rel(path: Path) -> str:
+    return path.relative_to(REPO).as_posix()
 
-def write_text(path: Path, content: str) -> None:
-    path.parent.mkdir(parents=True, exist_ok=True)
-    path.write_text(content, encoding="utf-8", newline="\n")
+def json_op(path: Path, data: dict) -> FileOp:
+    return FileOp(rel(path), json.dumps(data, ensure_ascii=False, indent=2, sort_keys=True) + "\n")
 
 # --- Operazioni ---
-def normalize_and_merge_i18n() -> None:
+def normalize_and_merge_i18n() -> list[FileOp]:
+    ops: list[FileOp] = []
     errors = []
     for loc in LOCALES:
         p = MESSAGES_DIR / f"{loc}.json"
         if not p.exists():
             # crea nuovo file di lingua con solo news
-            write_json(p, {"news": NEWS_I18N[loc]})
+            ops.append(json_op(p, {"news": NEWS_I18N[loc]}))
             print(f"[UP] {p.name} – creato ex novo con 'news'")
             continue
         try:
@@ -164,8 +157,7 @@ def normalize_and_merge_i18n() -> None:
                 news[k] = v
         doc["news"] = news
         added = [k for k in news.keys() if k not in before_keys]
-        backup(p)
-        write_json(p, doc)
+        ops.append(json_op(p, doc))
         if added:
             print(f"[UP] {p.name} – aggiunte: {', '.join(added)} (UTF-8)")
         else:
@@ -175,17 +167,16 @@ def normalize_and_merge_i18n() -> None:
         for p in errors:
             print(f"  - {p}")
         sys.exit(1)
+    return ops
 
-def upsert_detail_page() -> None:
-    write_text(DETAIL_PATH, DETAIL_CODE)
-    print(f"[UP] Dettaglio news scritto: {DETAIL_PATH.relative_to(REPO)}")
+def detail_page() -> FileOp:
+    return FileOp(rel(DETAIL_PATH), DETAIL_CODE)
 
 def main() -> None:
     if not WEBAPP.exists():
         print(f"[ERR] Cartella webapp non trovata: {WEBAPP}")
         sys.exit(1)
-    upsert_detail_page()
-    normalize_and_merge_i18n()
+    patch_engine.apply([detail_page(), *normalize_and_merge_i18n()], phase="PL-2")
     print("[DONE] PL-2 setup completato.")
 
 if __name__ == "__main__":
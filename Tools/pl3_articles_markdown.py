@@ -3,15 +3,28 @@
 """
 PL-3 (Articoli Markdown):
 1) Crea/aggiorna lib/sanitize.ts
-2) Sovrascrive app/[locale]/blog/[slug]/page.tsx per rendering content Markdown
+2) Sovrascrive app/[locale]/blog/[slug]/page.tsx: HTML già renderizzato da
+   article_renders (migrazione 0008: unico renderer Tools/md_render.py, accodato
+   alla pubblicazione dal trigger di 0009 e eseguito da `watch`) se l'hash del
+   sorgente coincide; altrimenti render a runtime con marked + sanitize, caricati
+   solo in quel caso (jsdom resta fuori dal percorso normale); prerender degli
+   slug nel manifest di Tools/static_params_export.py (generateStaticParams); letture
+   con tag slugTag (lib/supabaseCached.ts), invalidate dalle API admin a ogni scrittura
+File scritti da patch_engine in un batch: quelli già identici non vengono toccati.
 """
 
 from pathlib import Path
 
+import patch_engine
+from patch_engine import FileOp
+from pl6f_news_index_with_pagination import CACHE_TAGS_TS, SUPABASE_CACHED_TS
+
 REPO = Path(__file__).resolve().parents[1]
 WEBAPP = REPO / "webapp"
 
 SANITIZE_PATH = WEBAPP / "lib" / "sanitize.ts"
+CACHE_TAGS_PATH = WEBAPP / "lib" / "cacheTags.ts"
+SUPABASE_CACHED_PATH = WEBAPP / "lib" / "supabaseCached.ts"
 ARTICLE_PAGE_PATH = WEBAPP / "app" / "[locale]" / "blog" / "[slug]" / "page.tsx"
 
 SANITIZE_TS = """import { JSDOM } from "jsdom";
@@ -35,21 +48,47 @@ export function sanitizeHtml(dirty: string): string {
 """
 
 ARTICLE_PAGE_TSX = """import { notFound } from "next/navigation";
-import { getSupabasePublicServer } from "@/lib/supabaseServerPublic";
-import { marked } from "marked";
-import { sanitizeHtml } from "@/lib/sanitize";
+import { getSupabaseCached } from "@/lib/supabaseCached";
+import { slugTag } from "@/lib/cacheTags";
+import { staticSlugs } from "@/lib/staticParams";
 import type { Metadata, ResolvingMetadata } from "next";
 
 type Props = { params: { locale: string; slug: string } };
+type TocItem = { level: number; id: string; text: string };
+type Render = { html: string; toc: TocItem[]; reading_minutes: number; excerpt: string | null; source_hash: string };
+
+// Prerender dei più recenti per lingua (Tools/static_params_export.py), gli altri on-demand;
+// le API admin invalidano slugTag a ogni scrittura (revalidateContent), 300 s è la rete di sicurezza
+export const revalidate = 300;
+
+export function generateStaticParams({ params }: { params: { locale: string } }) {
+  return staticSlugs("articles", params.locale);
+}
 
 async function fetchPost(slug: string) {
-  const supa = getSupabasePublicServer();
+  const supa = getSupabaseCached([slugTag("articles", slug)]);
   const { data } = await supa
     .from("articles")
-    .select("id,title,excerpt,content,cover_url,slug,published_at")
+    .select("id,title,excerpt,cover_url,slug,published_at,source_hash,article_renders(html,toc,reading_minutes,excerpt,source_hash)")
     .eq("slug", slug)
     .single();
-  return data || null;
+  if (!data) return null;
+  const post: any = data;
+  const r = Array.isArray(post.article_renders) ? post.article_renders[0] : post.article_renders;
+  // render valido solo se prodotto dal sorgente attuale
+  const render: Render | null = r && r.source_hash === post.source_hash ? r : null;
+  return { ...post, render };
+}
+
+// Fallback per articoli non ancora renderizzati: sorgente e librerie caricati solo qui
+async function renderAtRuntime(id: string, slug: string, excerpt: string | null): Promise<string> {
+  const supa = getSupabaseCached([slugTag("articles", slug)]);
+  const { data } = await supa.from("articles").select("content,body_md,body").eq("id", id).single();
+  const src = (data as any)?.content ?? (data as any)?.body_md ?? (data as any)?.body;
+  const { sanitizeHtml } = await import("@/lib/sanitize");
+  if (!src) return excerpt ? `<p>${sanitizeHtml(excerpt)}</p>` : "";
+  const { marked } = await import("marked");
+  return sanitizeHtml(await marked.parse(src));
 }
 
 export async function generateMetadata(
@@ -59,7 +98,7 @@ export async function generateMetadata(
   const post = await fetchPost(params.slug);
   if (!post) return {};
   const title = post.title;
-  const description = post.excerpt ?? "";
+  const description = post.excerpt ?? post.render?.excerpt ?? "";
   const base = process.env.NEXT_PUBLIC_BASE_URL ?? "http://localhost:3000";
   const url = `${base}/${params.locale}/blog/${post.slug}`;
   const images = post.cover_url ? [{ url: post.cover_url }] : undefined;
@@ -75,9 +114,8 @@ export default async function BlogPostPage({ params }: Props) {
   const post = await fetchPost(params.slug);
   if (!post) return notFound();
 
-  const html = post.content
-    ? sanitizeHtml(await marked.parse(post.content))
-    : (post.excerpt ? `<p>${sanitizeHtml(post.excerpt)}</p>` : "");
+  const html = post.render ? post.render.html : await renderAtRuntime(post.id, post.slug, post.excerpt);
+  const toc = post.render?.toc ?? [];
 
   return (
     <article className="max-w-3xl mx-auto py-10 space-y-6">
@@ -85,9 +123,22 @@ export default async function BlogPostPage({ params }: Props) {
         <h1 className="text-3xl font-bold">{post.title}</h1>
         <p className="text-sm text-gray-500">
           {post.published_at ? new Date(post.published_at).toLocaleString(params.locale) : "—"}
+          {post.render ? ` · ${post.render.reading_minutes} min` : ""}
         </p>
       </header>
 
+      {toc.length > 1 && (
+        <nav aria-label="Indice" className="rounded-lg border p-4 text-sm">
+          <ul className="space-y-1">
+            {toc.map((t: TocItem) => (
+              <li key={t.id} style={{ paddingLeft: `${t.level - 2}rem` }}>
+                <a href={`#${t.id}`} className="hover:underline">{t.text}</a>
+              </li>
+            ))}
+          </ul>
+        </nav>
+      )}
+
       {post.cover_url && (
         <img src={post.cover_url} alt={post.title} className="w-full max-h-[480px] object-cover rounded-lg" />
       )}
@@ -98,17 +149,15 @@ export default async function BlogPostPage({ params }: Props) {
 }
 """
 
-def write(path: Path, content: str) -> None:
-    path.parent.mkdir(parents=True, exist_ok=True)
-    path.write_text(content, encoding="utf-8", newline="\n")
-
 def main() -> None:
     if not WEBAPP.exists():
         raise SystemExit(f"[ERR] Cartella webapp non trovata: {WEBAPP}")
-    write(SANITIZE_PATH, SANITIZE_TS)
-    print(f"[UP] scritto: {SANITIZE_PATH.relative_to(REPO)}")
-    write(ARTICLE_PAGE_PATH, ARTICLE_PAGE_TSX)
-    print(f"[UP] scritto: {ARTICLE_PAGE_PATH.relative_to(REPO)}")
+    patch_engine.apply([
+        FileOp(SANITIZE_PATH.relative_to(REPO).as_posix(), SANITIZE_TS),
+        FileOp(CACHE_TAGS_PATH.relative_to(REPO).as_posix(), CACHE_TAGS_TS),
+        FileOp(SUPABASE_CACHED_PATH.relative_to(REPO).as_posix(), SUPABASE_CACHED_TS),
+        FileOp(ARTICLE_PAGE_PATH.relative_to(REPO).as_posix(), ARTICLE_PAGE_TSX),
+    ], phase="PL-3")
     print("[DONE] PL-3 setup completato. Ricorda: hai già eseguito SQL + npm i.")
 
 if __name__ == "__main__":
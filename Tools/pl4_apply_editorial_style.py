@@ -5,9 +5,13 @@ PL-4 – Applica stile editoriale minimale, sicuro per Tailwind v4:
 - Crea componenti Editorial (CategoryBadge, ArticleHeader, ArticleBody con react-markdown)
 - Aggiorna la pagina News dettaglio per usare i componenti
 - Aggiunge CSS tipografico di base in globals.css (senza @apply / plugin)
+File scritti da patch_engine in un batch; il blocco CSS si aggiunge una volta sola.
 """
 from pathlib import Path
 
+import patch_engine
+from patch_engine import FileOp
+
 ROOT = Path(__file__).resolve().parents[1]
 WEBAPP = ROOT / "webapp"
 
@@ -179,34 +183,26 @@ CSS_SNIPPET = r'''
 }
 '''
 
-def write(path: Path, content: str):
-    path.parent.mkdir(parents=True, exist_ok=True)
-    path.write_text(content, encoding="utf-8", newline="\n")
-    print(f"[UP] {path.relative_to(ROOT)}")
+def rel(path: Path) -> str:
+    return path.relative_to(ROOT).as_posix()
 
-def ensure_css():
+def css_op() -> FileOp:
     if GLOBALS.exists():
-        css = GLOBALS.read_text(encoding="utf-8")
-        if "/* === Editorial basics" not in css:
-            GLOBALS.write_text(css.rstrip() + "\n" + CSS_SNIPPET, encoding="utf-8", newline="\n")
-            print(f"[UP] {GLOBALS.relative_to(ROOT)} (aggiunto blocco editoriale)")
-        else:
-            print(f"[OK] {GLOBALS.relative_to(ROOT)} già contiene il blocco editoriale")
-    else:
-        # crea base + snippet
-        base = "@tailwind base;\n@tailwind components;\n@tailwind utilities;\n"
-        GLOBALS.parent.mkdir(parents=True, exist_ok=True)
-        GLOBALS.write_text(base + CSS_SNIPPET, encoding="utf-8", newline="\n")
-        print(f"[NEW] {GLOBALS.relative_to(ROOT)} creato")
+        return FileOp(rel(GLOBALS), CSS_SNIPPET, mode="a", marker="/* === Editorial basics")
+    # crea base + snippet
+    base = "@tailwind base;\n@tailwind components;\n@tailwind utilities;\n"
+    return FileOp(rel(GLOBALS), base + CSS_SNIPPET)
 
 def main():
     if not WEBAPP.exists():
         raise SystemExit(f"[ERR] cartella webapp non trovata: {WEBAPP}")
 
-    write(EDITORIAL_TSX, EDITORIAL_CODE)
-    write(BADGE_TSX, BADGE_CODE)
-    write(NEWS_PAGE, NEWS_PAGE_CODE)
-    ensure_css()
+    patch_engine.apply([
+        FileOp(rel(EDITORIAL_TSX), EDITORIAL_CODE),
+        FileOp(rel(BADGE_TSX), BADGE_CODE),
+        FileOp(rel(NEWS_PAGE), NEWS_PAGE_CODE),
+        css_op(),
+    ], phase="PL-4")
     print("[DONE] Editorial style applicato alla pagina News.")
 
 if __name__ == "__main__":
@@ -6,10 +6,14 @@ PL-4 – Stile editoriale per News/Blog:
 - Aggiorna le pagine di dettaglio News e Blog con hero image responsive, label, standfirst.
 - Aggiunge stili tipografici in globals.css (lead paragraph, figure, caption).
 Prerequisiti: Tailwind + @tailwindcss/typography già attivi (già fatto in PL-3).
+File scritti da patch_engine in un batch; il CSS extra si aggiunge una volta sola.
 """
 
 from pathlib import Path
 
+import patch_engine
+from patch_engine import FileOp
+
 REPO = Path(__file__).resolve().parents[1]
 WEBAPP = REPO / "webapp"
 
@@ -217,34 +221,16 @@ EXTRA_CSS = """
 }
 """
 
-def write(path: Path, content: str):
-    path.parent.mkdir(parents=True, exist_ok=True)
-    path.write_text(content, encoding="utf-8", newline="\n")
-
-
-def ensure_append(path: Path, snippet: str):
-    path.parent.mkdir(parents=True, exist_ok=True)
-    base = path.read_text(encoding="utf-8") if path.exists() else ""
-    if snippet.strip() not in base:
-        path.write_text(base.rstrip() + "\\n" + snippet, encoding="utf-8", newline="
-")
+def rel(path: Path) -> str:
+    return path.relative_to(REPO).as_posix()
 
 def main():
-    # 1) CategoryTag
-    write(CATEGORY_TAG, CATEGORY_TAG_CODE)
-    print(f"[UP] {CATEGORY_TAG.relative_to(REPO)}")
-
-    # 2) News detail page
-    write(NEWS_PAGE, NEWS_PAGE_CODE)
-    print(f"[UP] {NEWS_PAGE.relative_to(REPO)}")
-
-    # 3) Blog detail page
-    write(BLOG_PAGE, BLOG_PAGE_CODE)
-    print(f"[UP] {BLOG_PAGE.relative_to(REPO)}")
-
-    # 4) Extra CSS
-    ensure_append(GLOBALS, EXTRA_CSS)
-    print(f"[UP] {GLOBALS.relative_to(REPO)} (editorial css appended)")
+    patch_engine.apply([
+        FileOp(rel(CATEGORY_TAG), CATEGORY_TAG_CODE),   # 1) CategoryTag
+        FileOp(rel(NEWS_PAGE), NEWS_PAGE_CODE),         # 2) News detail page
+        FileOp(rel(BLOG_PAGE), BLOG_PAGE_CODE),         # 3) Blog detail page
+        FileOp(rel(GLOBALS), EXTRA_CSS, mode="a"),      # 4) Extra CSS (marcatore: lo snippet stesso)
+    ], phase="PL-4")
 
     print("[DONE] Stile editoriale applicato a News e Blog.")
 
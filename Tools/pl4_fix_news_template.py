@@ -5,10 +5,14 @@ PL-4 – Fix template News dettaglio (safe placeholders):
 - Riscrive webapp/app/[locale]/news/[slug]/page.tsx
 - Mostra titolo, data, cover, standfirst (primo paragrafo) e corpo tipografico.
 - Se esiste components/ui/CategoryTag.tsx lo usa per il badge.
+File scritti da patch_engine in un batch: quelli già identici non vengono toccati.
 """
 
 from pathlib import Path
 
+import patch_engine
+from patch_engine import FileOp
+
 ROOT = Path(__file__).resolve().parents[1]
 WEBAPP = ROOT / "webapp"
 NEWS_PAGE = WEBAPP / "app" / "[locale]" / "news" / "[slug]" / "page.tsx"
@@ -115,22 +119,16 @@ def main() -> None:
         .replace("%%CATEGORY_TAG%%", category_tag)
     )
 
-    NEWS_PAGE.parent.mkdir(parents=True, exist_ok=True)
-    NEWS_PAGE.write_text(page_src, encoding="utf-8", newline="\n")
-    print(f"[UP] {NEWS_PAGE.relative_to(ROOT)}")
+    ops = [FileOp(NEWS_PAGE.relative_to(ROOT).as_posix(), page_src)]
 
     globals_css = WEBAPP / "app" / "globals.css"
+    css_rel = globals_css.relative_to(ROOT).as_posix()
     if globals_css.exists():
-        css = globals_css.read_text(encoding="utf-8")
-        if ".lead" not in css:
-            globals_css.write_text(css.rstrip() + "\n" + EXTRA_CSS, encoding="utf-8", newline="\n")
-            print(f"[UP] {globals_css.relative_to(ROOT)} (aggiunto stile .lead)")
-        else:
-            print(f"[OK] {globals_css.relative_to(ROOT)} già contiene .lead")
+        # append una sola volta: il marcatore è la classe stessa
+        ops.append(FileOp(css_rel, EXTRA_CSS, mode="a", marker=".lead"))
     else:
-        globals_css.parent.mkdir(parents=True, exist_ok=True)
-        globals_css.write_text("@tailwind base;\n@tailwind components;\n@tailwind utilities;\n" + EXTRA_CSS, encoding="utf-8", newline="\n")
-        print(f"[NEW] {globals_css.relative_to(ROOT)} creato con base + .lead")
+        ops.append(FileOp(css_rel, "@tailwind base;\n@tailwind components;\n@tailwind utilities;\n" + EXTRA_CSS, mode="x"))
+    patch_engine.apply(ops, phase="PL-4")
 
     print("[DONE] Template News aggiornato (titolo, data, cover, standfirst, corpo).")
 
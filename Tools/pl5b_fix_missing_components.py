@@ -3,12 +3,17 @@
 """
 Ripristina/crea SiteHeader.tsx e SiteFooter.tsx in webapp/components
 e normalizza gli import in webapp/app/[locale]/layout.tsx
+File scritti da patch_engine in un batch: quelli già identici non vengono toccati.
 """
 
 from pathlib import Path
+from typing import Optional
 import re
 import textwrap
 
+import patch_engine
+from patch_engine import FileOp
+
 ROOT = Path(__file__).resolve().parents[1]
 COMP_DIR = ROOT / "webapp" / "components"
 LAYOUT = ROOT / "webapp" / "app" / "[locale]" / "layout.tsx"
@@ -74,16 +79,17 @@ export default function SiteFooter() {
 }
 """)
 
-def ensure_components():
-    COMP_DIR.mkdir(parents=True, exist_ok=True)
-    (COMP_DIR / "SiteHeader.tsx").write_text(SITE_HEADER, encoding="utf-8", newline="\n")
-    (COMP_DIR / "SiteFooter.tsx").write_text(SITE_FOOTER, encoding="utf-8", newline="\n")
-    print("[OK] Creati/aggiornati: components/SiteHeader.tsx, components/SiteFooter.tsx")
+def rel(path: Path) -> str:
+    return path.relative_to(ROOT).as_posix()
+
+def ensure_components() -> list[FileOp]:
+    return [FileOp(rel(COMP_DIR / "SiteHeader.tsx"), SITE_HEADER),
+            FileOp(rel(COMP_DIR / "SiteFooter.tsx"), SITE_FOOTER)]
 
-def fix_layout_imports():
+def fix_layout_imports() -> Optional[FileOp]:
     if not LAYOUT.exists():
         print(f"[WARN] layout non trovato: {LAYOUT}")
-        return
+        return None
     src = LAYOUT.read_text(encoding="utf-8")
 
     # Aggiungi import se mancanti o normalizza estensione .tsx
@@ -105,12 +111,14 @@ def fix_layout_imports():
     if "<SiteFooter" not in src:
         src = src.replace("</body>", "      <SiteFooter />\n    </body>")
 
-    LAYOUT.write_text(src, encoding="utf-8", newline="\n")
-    print("[OK] layout.tsx normalizzato (import + markup)")
+    return FileOp(rel(LAYOUT), src)
 
 def main():
-    ensure_components()
-    fix_layout_imports()
+    ops = ensure_components()
+    layout = fix_layout_imports()
+    if layout:
+        ops.append(layout)
+    patch_engine.apply(ops, phase="PL-5b")
     print("[DONE] Fix completato. Riavvia/ricarica `npm run dev` se necessario.")
 
 if __name__ == "__main__":
@@ -2,7 +2,7 @@
 # -*- coding: utf-8 -*-
 """
 PL-5b Integration: inserisce automaticamente SiteHeader e SiteFooter
-in webapp/app/[locale]/layout.tsx
+in webapp/app/[locale]/layout.tsx (scritto da patch_engine: invariato se già integrato)
 
 Uso:
   .\.venv\Scripts\python.exe tools\pl5b_integration.py
@@ -11,6 +11,9 @@ Uso:
 import re
 from pathlib import Path
 
+import patch_engine
+from patch_engine import FileOp
+
 ROOT = Path(__file__).resolve().parents[1]
 TARGET = ROOT / "webapp/app/[locale]/layout.tsx"
 
@@ -37,8 +40,7 @@ def main():
     if "<SiteFooter" not in text:
         text = text.replace("</body>", "      <SiteFooter />\n    </body>")
 
-    TARGET.write_text(text, encoding="utf-8", newline="\n")
-    print(f"[OK] layout.tsx aggiornato con SiteHeader + SiteFooter")
+    patch_engine.apply([FileOp(TARGET.relative_to(ROOT).as_posix(), text)], phase="PL-5b")
 
 if __name__ == "__main__":
     main()
@@ -2,9 +2,11 @@
 from __future__ import annotations
 from pathlib import Path
 import re, json, sys
+from project_index import get_index
 
 ROOT = Path(__file__).resolve().parents[1]
 WEBAPP = ROOT / "webapp"
+IDX = get_index(ROOT)   # snapshot condiviso: un walk, letture lazy in cache
 
 FILES = {
     "layout": WEBAPP / "app" / "[locale]" / "layout.tsx",
@@ -39,21 +41,21 @@ def err(msg):  print(f"[ERR] {msg}")
 
 def must_exist(key: str) -> bool:
     p = FILES[key]
-    if p.exists():
+    if IDX.exists(p):
         ok(f"Presente: {p.relative_to(ROOT)}")
         return True
     err(f"Manca: {p.relative_to(ROOT)}")
     return False
 
 def read(p: Path) -> str:
-    return p.read_text(encoding="utf-8", errors="ignore")
+    return IDX.read_text(p, encoding="utf-8", errors="ignore") or ""
 
 def has(pattern: str, text: str, flags=0) -> bool:
     return re.search(pattern, text, flags) is not None
 
 def check_editorial_layout() -> bool:
     p = FILES["editorial_layout"]
-    if not p.exists():
+    if not IDX.exists(p):
         warn("EditorialLayout.tsx non trovato (ok se non usato).")
         return True
     s = read(p)
@@ -70,7 +72,7 @@ def check_editorial_layout() -> bool:
 
 def check_layout_locale() -> bool:
     p = FILES["layout"]
-    if not p.exists():
+    if not IDX.exists(p):
         err("layout.tsx mancante.")
         return False
     s = read(p)
@@ -91,7 +93,7 @@ def check_layout_locale() -> bool:
 
 def check_home_page() -> bool:
     p = FILES["home"]
-    if not p.exists():
+    if not IDX.exists(p):
         err("Home page.tsx mancante.")
         return False
     s = read(p)
@@ -128,7 +130,7 @@ def check_home_page() -> bool:
 
 def check_article_card() -> bool:
     p = FILES["article_card"]
-    if not p.exists():
+    if not IDX.exists(p):
         warn("ArticleCard.tsx non trovato (ok se non usato).")
         return True
     s = read(p)
@@ -150,12 +152,12 @@ def check_i18n() -> bool:
     for lang_key in ("i18n_it", "i18n_en"):
         p = FILES[lang_key]
         lang = "it" if "it" in lang_key else "en"
-        if not p.exists():
+        if not IDX.exists(p):
             err(f"{lang}.json mancante")
             ok_all = False
             continue
         try:
-            doc = json.loads(p.read_text(encoding="utf-8-sig"))
+            doc = json.loads(IDX.read_text(p, encoding="utf-8-sig"))
         except Exception as e:
             err(f"{lang}.json non valido: {e}")
             ok_all = False
@@ -179,7 +181,7 @@ def check_i18n() -> bool:
 
 def check_next_config() -> bool:
     p = FILES["next_config"]
-    if not p.exists():
+    if not IDX.exists(p):
         warn("next.config.mjs non trovato (ok se non usi immagini remote).")
         return True
     s = read(p)
@@ -191,7 +193,7 @@ def check_next_config() -> bool:
 
 def main():
     print(f"[START] Verifica PL-5b in: {ROOT}")
-    if not WEBAPP.exists():
+    if not IDX.exists(WEBAPP):
         err(f"Cartella webapp non trovata: {WEBAPP}")
         sys.exit(2)
 
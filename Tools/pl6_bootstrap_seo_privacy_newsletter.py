@@ -10,6 +10,7 @@ Crea/aggiorna i file "consigliati" per il pre-lancio:
 - integra .env.local con placeholder mancanti
 
 Idempotente: non sovrascrive file esistenti; aggiorna il layout con patch mirate.
+Tutto in un batch di patch_engine: i file invariati non vengono toccati.
 Exit codes: 0 OK, 1 WARNING, 2 ERROR
 """
 
@@ -18,6 +19,9 @@ import re
 import sys
 from pathlib import Path
 
+import patch_engine
+from patch_engine import FileOp
+
 ROOT = Path(".").resolve()
 WEBAPP = ROOT / "webapp"
 ENV_PATH = WEBAPP / ".env.local"
@@ -218,15 +222,14 @@ export default function NewsletterEn() {
 """
 
 # ---------- Helper ----------
-def ensure_file(path: Path, content: str) -> tuple[bool, str]:
-    """Crea il file se non esiste. Ritorna (created, msg)."""
-    if path.exists():
-        return False, f"EXIST {path.relative_to(ROOT)}"
-    path.parent.mkdir(parents=True, exist_ok=True)
-    path.write_text(content, encoding="utf-8")
-    return True, f"CREATE {path.relative_to(ROOT)}"
-
-def patch_layout_add_components(layout_path: Path) -> list[str]:
+def rel(path: Path) -> str:
+    return path.relative_to(ROOT).as_posix()
+
+def ensure_file(path: Path, content: str) -> FileOp:
+    """Crea il file se non esiste (modo "x")."""
+    return FileOp(rel(path), content, mode="x")
+
+def patch_layout_add_components(layout_path: Path, ops: list[FileOp]) -> list[str]:
     """
     Inserisce import e JSX di <Analytics/> e <CookieBanner/> se assenti.
     Funziona su file TSX del layout locale: webapp/app/[locale]/layout.tsx
@@ -274,10 +277,10 @@ def patch_layout_add_components(layout_path: Path) -> list[str]:
             text = text.replace("</body>", "  <CookieBanner />\n      </body>")
         logs.append("PATCH JSX <CookieBanner/>")
 
-    layout_path.write_text(text, encoding="utf-8")
+    ops.append(FileOp(rel(layout_path), text))
     return logs
 
-def ensure_env_placeholders(env_path: Path) -> list[str]:
+def ensure_env_placeholders(env_path: Path, ops: list[FileOp]) -> list[str]:
     logs: list[str] = []
     want = {
         "NEXT_PUBLIC_SITE_URL": "https://www.tuodominio.tld",
@@ -300,35 +303,31 @@ def ensure_env_placeholders(env_path: Path) -> list[str]:
             changed = True
 
     if changed:
-        env_path.parent.mkdir(parents=True, exist_ok=True)
-        env_path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+        ops.append(FileOp(rel(env_path), "\n".join(lines) + "\n"))
     else:
         logs.append("ENV ok (nessun placeholder aggiunto)")
     return logs
 
 # ---------- Main ----------
 def main() -> int:
-    created = 0
     notes: list[str] = []
 
     # 1) File consigliati
-    for path, content in CREATIONS.items():
-        ok, msg = ensure_file(path, content)
-        notes.append(msg)
-        if ok: created += 1
+    ops = [ensure_file(path, content) for path, content in CREATIONS.items()]
 
     # 2) Patch layout locale
     layout_path = WEBAPP / "app" / "[locale]" / "layout.tsx"
-    notes.extend(patch_layout_add_components(layout_path))
+    notes.extend(patch_layout_add_components(layout_path, ops))
 
     # 3) Env placeholders
-    notes.extend(ensure_env_placeholders(ENV_PATH))
+    notes.extend(ensure_env_placeholders(ENV_PATH, ops))
 
     # Output log sintetico
     print("=== PL-6 bootstrap ===")
     for n in notes:
         print(n)
-    print(f"Created files: {created}")
+    changes = patch_engine.apply(ops, phase="PL-6", root=ROOT)
+    print(f"Created files: {sum(c.action == 'NEW' for c in changes)}")
 
     # Exit code
     return 0
@@ -2,18 +2,34 @@
 """
 pl6a_seo_bootstrap.py
 Crea/aggiorna i file per PL-6a: sitemap, robots, hreflang alternates nel layout locale.
-- Crea webapp/app/sitemap.ts
+- Crea la sitemap (vedi modalità sotto)
 - Crea webapp/app/robots.ts
 - Parcha webapp/app/[locale]/layout.tsx per alternates hreflang (generateMetadata) se manca
 - Aggiunge placeholder env NEXT_PUBLIC_SITE_URL se assente
-Idempotente.
+Idempotente: tutti i file in un batch di patch_engine, quelli invariati non vengono toccati.
+
+Modalità sitemap:
+ --mode single   (default) webapp/app/sitemap.ts, un unico file
+ --mode sharded  sitemap index su /sitemap.xml + shard da SHARD_SIZE (50k) URL per
+                 lingua e tipo di contenuto su /sitemaps/<tipo>-<lingua>-<n>.xml:
+                 - lastModified da updated_at (i crawler rileggono solo ciò che cambia)
+                 - righe lette a blocchi da 1000 con cursore sullo slug (indice 0004)
+                 - numero di shard dai contatori content_count (migrazione 0006)
+                 - fetch con tag per shard (sitemap:news:it:0) per revalidateTag mirati
+                 L'eventuale app/sitemap.ts viene eliminato (servirebbe lo stesso URL; la
+                 versione precedente resta in git). Versione statica offline: Tools/sitemap_build.py
+ --force         riscrive i file della modalità scelta (per cambiare modalità)
 Exit: 0 OK, 1 WARN (patch applicate), 2 ERROR (I/O)
 """
 from __future__ import annotations
+import argparse
 import sys
 from pathlib import Path
 import re
 
+import patch_engine
+from patch_engine import FileOp
+
 ROOT = Path(".").resolve()
 WEBAPP = ROOT / "webapp"
 
@@ -21,6 +37,9 @@ ENV_PATH = WEBAPP / ".env.local"
 SITEMAP = WEBAPP / "app" / "sitemap.ts"
 ROBOTS = WEBAPP / "app" / "robots.ts"
 LAYOUT = WEBAPP / "app" / "[locale]" / "layout.tsx"
+SITEMAP_LIB = WEBAPP / "lib" / "sitemap.ts"
+SITEMAP_INDEX_ROUTE = WEBAPP / "app" / "sitemap.xml" / "route.ts"
+SITEMAP_SHARD_ROUTE = WEBAPP / "app" / "sitemaps" / "[shard]" / "route.ts"
 
 SITEMAP_TS = (
     "import type { MetadataRoute } from 'next';\n\n"
@@ -54,6 +73,147 @@ SITEMAP_TS = (
     "}\n"
 )
 
+# --- modalità sharded: logica condivisa tra index e shard (stessi nomi/ordine di sitemap_build.py)
+SITEMAP_LIB_TS = r"""export const LOCALES = ['it', 'en', 'fr', 'es', 'de'] as const;
+export const SHARD_SIZE = 50000;       // limite del protocollo sitemap per file
+export const REVALIDATE = 3600;        // secondi; revalidateTag('sitemap') forza prima
+const CHUNK = 1000;                    // max-rows di default di PostgREST su Supabase
+
+// tabella -> segmento di URL della pagina di dettaglio
+export const KINDS = { news: 'news', articles: 'blog' } as const;
+export type Kind = keyof typeof KINDS;
+export type Shard = { id: string; kind: Kind; lang: string; n: number };
+export type UrlRow = { slug: string; updated_at: string | null };
+
+function env() {
+  return {
+    base: process.env.NEXT_PUBLIC_SUPABASE_URL!,
+    anon: process.env.NEXT_PUBLIC_SUPABASE_ANON_KEY!,
+    site: (process.env.NEXT_PUBLIC_SITE_URL || '').replace(/\/+$/, ''),
+  };
+}
+
+export function siteUrl(): string {
+  return env().site;
+}
+
+export function parseShard(id: string): Shard | null {
+  const m = /^(news|articles)-([a-z]{2})-(\d+)$/.exec(id);
+  if (!m || !(LOCALES as readonly string[]).includes(m[2])) return null;
+  return { id, kind: m[1] as Kind, lang: m[2], n: Number(m[3]) };
+}
+
+// numero di righe pubblicate per (tabella, lingua) dai contatori della migrazione 0006
+async function countPublished(kind: Kind, lang: string): Promise<number> {
+  const { base, anon } = env();
+  const res = await fetch(`${base}/rest/v1/rpc/content_count?p_table=${kind}&p_lang=${lang}`, {
+    headers: { apikey: anon, Authorization: `Bearer ${anon}` },
+    next: { revalidate: REVALIDATE, tags: ['sitemap', 'sitemap:index'] },
+  });
+  if (!res.ok) return 0;
+  return Number(await res.json()) || 0;
+}
+
+export async function listShards(): Promise<Shard[]> {
+  const { base, anon } = env();
+  if (!base || !anon) return [];
+  const pairs = Object.keys(KINDS).flatMap(k => LOCALES.map(l => [k as Kind, l] as const));
+  const counts = await Promise.all(pairs.map(([k, l]) => countPublished(k, l)));
+  return pairs.flatMap(([kind, lang], i) =>
+    Array.from({ length: Math.ceil(counts[i] / SHARD_SIZE) }, (_, n) => ({ id: `${kind}-${lang}-${n}`, kind, lang, n })));
+}
+
+// righe di uno shard in ordine di slug: offset solo sul primo blocco, poi cursore slug > ultimo
+export async function fetchShardRows(shard: Shard): Promise<UrlRow[]> {
+  const { base, anon } = env();
+  const rows: UrlRow[] = [];
+  let after: string | null = null;
+  while (rows.length < SHARD_SIZE) {
+    const limit = Math.min(CHUNK, SHARD_SIZE - rows.length);
+    const cursor: string = after === null
+      ? `slug=not.is.null&offset=${shard.n * SHARD_SIZE}`
+      : `slug=gt.${encodeURIComponent(after)}`;
+    const res: Response = await fetch(
+      `${base}/rest/v1/${shard.kind}?select=slug,updated_at&lang=eq.${shard.lang}&${cursor}&order=slug.asc&limit=${limit}`,
+      {
+        headers: { apikey: anon, Authorization: `Bearer ${anon}` },
+        next: { revalidate: REVALIDATE, tags: ['sitemap', `sitemap:${shard.kind}:${shard.lang}:${shard.n}`] },
+      },
+    );
+    if (!res.ok) throw new Error(`sitemap shard ${shard.id}: HTTP ${res.status}`);
+    const chunk: UrlRow[] = await res.json();
+    rows.push(...chunk);
+    if (chunk.length < limit) break;
+    after = chunk[chunk.length - 1].slug;
+  }
+  return rows;
+}
+
+export function xmlEscape(s: string): string {
+  return s.replace(/&/g, '&amp;').replace(/</g, '&lt;').replace(/>/g, '&gt;').replace(/"/g, '&quot;').replace(/'/g, '&apos;');
+}
+
+export function urlsetXml(entries: { loc: string; lastmod?: string | null }[]): string {
+  const body = entries
+    .map(e => `<url><loc>${xmlEscape(e.loc)}</loc>${e.lastmod ? `<lastmod>${e.lastmod}</lastmod>` : ''}</url>`)
+    .join('\n');
+  return `<?xml version="1.0" encoding="UTF-8"?>\n<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n${body}\n</urlset>\n`;
+}
+
+export function xmlResponse(xml: string): Response {
+  return new Response(xml, {
+    headers: {
+      'Content-Type': 'application/xml; charset=utf-8',
+      'Cache-Control': `public, s-maxage=${REVALIDATE}, stale-while-revalidate=${REVALIDATE}`,
+    },
+  });
+}
+"""
+
+SITEMAP_INDEX_ROUTE_TS = r"""import { listShards, siteUrl, xmlEscape, xmlResponse, REVALIDATE } from '@/lib/sitemap';
+
+export const revalidate = REVALIDATE;
+
+// Sitemap index: uno shard "pages" per le pagine statiche + gli shard dei contenuti
+export async function GET() {
+  const site = siteUrl();
+  const ids = ['pages', ...(await listShards()).map(s => s.id)];
+  const body = ids
+    .map(id => `<sitemap><loc>${xmlEscape(`${site}/sitemaps/${id}.xml`)}</loc></sitemap>`)
+    .join('\n');
+  return xmlResponse(
+    `<?xml version="1.0" encoding="UTF-8"?>\n<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n${body}\n</sitemapindex>\n`,
+  );
+}
+"""
+
+SITEMAP_SHARD_ROUTE_TS = r"""import { notFound } from 'next/navigation';
+import { KINDS, LOCALES, REVALIDATE, fetchShardRows, parseShard, siteUrl, urlsetXml, xmlResponse } from '@/lib/sitemap';
+
+export const revalidate = REVALIDATE;
+
+const STATIC_PAGES = ['', '/privacy', '/newsletter'];
+
+export async function GET(_req: Request, { params }: { params: { shard: string } }) {
+  const id = params.shard.replace(/\.xml$/, '');
+  const site = siteUrl();
+
+  // pagine statiche: nessuna data affidabile, niente lastmod (meglio di un "now" sempre nuovo)
+  if (id === 'pages') {
+    return xmlResponse(urlsetXml(LOCALES.flatMap(l => STATIC_PAGES.map(p => ({ loc: `${site}/${l}${p}` })))));
+  }
+
+  const shard = parseShard(id);
+  if (!shard) notFound();
+  const rows = await fetchShardRows(shard);
+  if (rows.length === 0 && shard.n > 0) notFound();
+  return xmlResponse(urlsetXml(rows.map(r => ({
+    loc: `${site}/${shard.lang}/${KINDS[shard.kind]}/${encodeURIComponent(r.slug)}`,
+    lastmod: r.updated_at ? new Date(r.updated_at).toISOString() : null,
+  }))));
+}
+"""
+
 ROBOTS_TS = (
     "import type { MetadataRoute } from 'next';\n\n"
     "export default function robots(): MetadataRoute.Robots {\n"
@@ -66,14 +226,33 @@ ROBOTS_TS = (
     "}\n"
 )
 
-def ensure_file(path: Path, content: str) -> str:
-    if path.exists():
-        return f"EXIST {path}"
-    path.parent.mkdir(parents=True, exist_ok=True)
-    path.write_text(content, encoding="utf-8")
-    return f"CREATE {path}"
+def rel(path: Path) -> str:
+    return path.relative_to(ROOT).as_posix()
+
+def ensure_file(path: Path, content: str, force: bool = False) -> FileOp:
+    # senza --force un file esistente non si tocca; con --force si riscrive solo se diverso
+    return FileOp(rel(path), content, mode="w" if force else "x")
 
-def ensure_env_site_url(env_path: Path) -> str:
+def retire_file(path: Path) -> FileOp:
+    """Elimina (nello stesso batch) un file che servirebbe lo stesso URL della nuova
+    modalità: la storia è in git, niente copie .bak dentro app/ dove Next.js le vedrebbe."""
+    return FileOp(rel(path), mode="d")
+
+def ensure_sitemap(mode: str, force: bool, ops: list[FileOp]) -> list[str]:
+    if mode == "single":
+        if SITEMAP_INDEX_ROUTE.exists():
+            return [f"WARN {SITEMAP_INDEX_ROUTE} presente (modalità sharded): sitemap.ts non creato"]
+        ops.append(ensure_file(SITEMAP, SITEMAP_TS, force))
+        return []
+    ops.extend([
+        ensure_file(SITEMAP_LIB, SITEMAP_LIB_TS, force),
+        ensure_file(SITEMAP_INDEX_ROUTE, SITEMAP_INDEX_ROUTE_TS, force),
+        ensure_file(SITEMAP_SHARD_ROUTE, SITEMAP_SHARD_ROUTE_TS, force),
+        retire_file(SITEMAP),
+    ])
+    return []
+
+def ensure_env_site_url(env_path: Path, ops: list[FileOp]) -> str:
     lines = []
     if env_path.exists():
         lines = env_path.read_text(encoding="utf-8").splitlines()
@@ -81,11 +260,10 @@ def ensure_env_site_url(env_path: Path) -> str:
     if "NEXT_PUBLIC_SITE_URL" in keys:
         return "ENV OK"
     lines.append("NEXT_PUBLIC_SITE_URL=https://www.tuodominio.tld")
-    env_path.parent.mkdir(parents=True, exist_ok=True)
-    env_path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    ops.append(FileOp(rel(env_path), "\n".join(lines) + "\n"))
     return "ENV+ NEXT_PUBLIC_SITE_URL"
 
-def patch_layout_hreflang(layout_path: Path) -> list[str]:
+def patch_layout_hreflang(layout_path: Path, ops: list[FileOp]) -> list[str]:
     logs: list[str] = []
     if not layout_path.exists():
         return [f"MISS {layout_path}"]
@@ -121,32 +299,29 @@ def patch_layout_hreflang(layout_path: Path) -> list[str]:
             )
             logs.append("PATCH generateMetadata alternates")
 
-    layout_path.write_text(txt, encoding="utf-8")
+    ops.append(FileOp(rel(layout_path), txt))
     return logs if logs else ["OK layout"]
 
 def main() -> int:
-    changes: list[str | list[str]] = []
-    changes.append(ensure_file(SITEMAP, SITEMAP_TS))
-    changes.append(ensure_file(ROBOTS, ROBOTS_TS))
-    changes.extend(patch_layout_hreflang(LAYOUT))
-    changes.append(ensure_env_site_url(ENV_PATH))
+    ap = argparse.ArgumentParser(description="PL-6a: sitemap, robots, hreflang")
+    ap.add_argument("--mode", choices=("single", "sharded"), default="single",
+                    help="single (app/sitemap.ts) oppure sharded (index + shard da 50k URL)")
+    ap.add_argument("--force", action="store_true", help="Riscrive i file della sitemap")
+    args = ap.parse_args()
+
+    ops: list[FileOp] = []
+    logs: list[str] = [f"MODE {args.mode}"]
+    logs.extend(ensure_sitemap(args.mode, args.force, ops))
+    ops.append(ensure_file(ROBOTS, ROBOTS_TS))
+    logs.extend(patch_layout_hreflang(LAYOUT, ops))
+    logs.append(ensure_env_site_url(ENV_PATH, ops))
 
     print("=== pl6a_seo_bootstrap ===")
-    for c in changes:
-        if isinstance(c, list):
-            for i in c:
-                print(i)
-        else:
-            print(c)
-    any_change = False
-    for c in changes:
-        if isinstance(c, str):
-            if c.startswith(("CREATE", "ADD", "PATCH", "ENV+")):
-                any_change = True
-        elif isinstance(c, list):
-            if any(isinstance(i, str) and i.startswith(("CREATE", "ADD", "PATCH", "ENV+")) for i in c):
-                any_change = True
-    return 1 if any_change else 0
+    for line in logs:
+        print(line)
+    # un solo batch: file nuovi/modificati, eliminazione della vecchia sitemap.ts
+    changes = patch_engine.apply(ops, phase="PL-6a", root=ROOT)
+    return 1 if any(c.changed for c in changes) else 0
 
 if __name__ == "__main__":
     try:
@@ -5,12 +5,15 @@ Crea/patcha componenti per Analytics (GA4 base).
 - Crea components/Analytics.tsx
 - Patcha app/[locale]/layout.tsx includendo <Analytics />
 - Assicura NEXT_PUBLIC_GA_ID in .env.local
-Idempotente, sintassi testata.
+Idempotente, sintassi testata: file in un batch di patch_engine, gli invariati non si toccano.
 """
 from __future__ import annotations
 from pathlib import Path
 import sys, re
 
+import patch_engine
+from patch_engine import FileOp
+
 ROOT = Path(".").resolve()
 WEBAPP = ROOT / "webapp"
 CMP = WEBAPP / "components" / "Analytics.tsx"
@@ -43,14 +46,13 @@ export default function Analytics() {
 }
 """
 
-def ensure_component():
-    CMP.parent.mkdir(parents=True, exist_ok=True)
-    if not CMP.exists():
-        CMP.write_text(CMP_TSX, encoding="utf-8")
-        return f"CREATE {CMP.relative_to(ROOT)}"
-    return f"EXIST {CMP.relative_to(ROOT)}"
+def rel(path: Path) -> str:
+    return path.relative_to(ROOT).as_posix()
+
+def ensure_component(ops: list[FileOp]):
+    ops.append(FileOp(rel(CMP), CMP_TSX, mode="x"))
 
-def ensure_env():
+def ensure_env(ops: list[FileOp]):
     if ENV.exists():
         lines = ENV.read_text(encoding="utf-8").splitlines()
     else:
@@ -58,11 +60,11 @@ def ensure_env():
     keys = {ln.split("=",1)[0].strip() for ln in lines if "=" in ln}
     if "NEXT_PUBLIC_GA_ID" not in keys:
         lines.append("NEXT_PUBLIC_GA_ID=G-XXXXXXX")
-        ENV.write_text("\n".join(lines) + "\n", encoding="utf-8")
+        ops.append(FileOp(rel(ENV), "\n".join(lines) + "\n"))
         return "ENV+ NEXT_PUBLIC_GA_ID"
     return "ENV OK"
 
-def patch_layout():
+def patch_layout(ops: list[FileOp]):
     if not LAYOUT.exists():
         return [f"MISS {LAYOUT.relative_to(ROOT)}"]
     txt = LAYOUT.read_text(encoding="utf-8")
@@ -78,26 +80,18 @@ def patch_layout():
         txt = re.sub(r"(\</body\>|\</html\>)", "  <Analytics />\n\\1", txt, count=1)
         logs.append("ADD <Analytics />")
     if logs:
-        LAYOUT.write_text(txt, encoding="utf-8")
+        ops.append(FileOp(rel(LAYOUT), txt))
     return logs if logs else ["OK layout"]
 
 def main():
-    changes = []
-    changes.append(ensure_component())
-    changes.append(ensure_env())
-    changes.extend(patch_layout())
+    ops: list[FileOp] = []
+    ensure_component(ops)
+    logs = [ensure_env(ops), *patch_layout(ops)]
     print("=== pl6b_analytics_bootstrap ===")
-    for c in changes:
-        if isinstance(c, str):
-            print(c)
-        else:
-            print("\n".join(c))
-    any_change = any(
-        (isinstance(c, str) and c.startswith(("CREATE","ENV+","ADD")))
-        or (isinstance(c, list) and any(s.startswith(("ADD")) for s in c))
-        for c in changes
-    )
-    return 1 if any_change else 0
+    for line in logs:
+        print(line)
+    changes = patch_engine.apply(ops, phase="PL-6b", root=ROOT)
+    return 1 if any(c.changed for c in changes) else 0
 
 if __name__ == "__main__":
     sys.exit(main())
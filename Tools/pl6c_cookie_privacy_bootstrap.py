@@ -5,12 +5,15 @@ Crea:
 - components/CookieBanner.tsx
 - app/[locale]/privacy/page.tsx (IT/EN)
 Patcha layout.tsx per includere <CookieBanner />
-Idempotente, sintassi verificata.
+Idempotente, sintassi verificata: file in un batch di patch_engine, gli invariati non si toccano.
 """
 from __future__ import annotations
 from pathlib import Path
 import sys, re
 
+import patch_engine
+from patch_engine import FileOp
+
 ROOT = Path(".").resolve()
 WEBAPP = ROOT / "webapp"
 CMP = WEBAPP / "components" / "CookieBanner.tsx"
@@ -77,14 +80,13 @@ PRIVACY_EN = """export default function PrivacyPage() {
 }
 """
 
-def ensure(path: Path, content: str) -> str:
-    if path.exists():
-        return f"EXIST {path.relative_to(ROOT)}"
-    path.parent.mkdir(parents=True, exist_ok=True)
-    path.write_text(content, encoding="utf-8")
-    return f"CREATE {path.relative_to(ROOT)}"
+def rel(path: Path) -> str:
+    return path.relative_to(ROOT).as_posix()
+
+def ensure(path: Path, content: str) -> FileOp:
+    return FileOp(rel(path), content, mode="x")
 
-def patch_layout(layout: Path) -> list[str]:
+def patch_layout(layout: Path, ops: list[FileOp]) -> list[str]:
     logs = []
     if not layout.exists():
         return [f"MISS {layout.relative_to(ROOT)}"]
@@ -103,22 +105,17 @@ def patch_layout(layout: Path) -> list[str]:
         logs.append("ADD <CookieBanner />")
 
     if logs:
-        layout.write_text(txt, encoding="utf-8")
+        ops.append(FileOp(rel(layout), txt))
 
     return logs if logs else ["OK layout"]
 
 def main() -> int:
-    changes = []
-    changes.append(ensure(CMP, CMP_TSX))
-    changes.append(ensure(PRIV_IT, PRIVACY_IT))
-    changes.append(ensure(PRIV_EN, PRIVACY_EN))
-    changes.extend(patch_layout(LAYOUT))
+    ops = [ensure(CMP, CMP_TSX), ensure(PRIV_IT, PRIVACY_IT), ensure(PRIV_EN, PRIVACY_EN)]
+    logs = patch_layout(LAYOUT, ops)
     print("=== pl6c_cookie_privacy_bootstrap ===")
-    for c in changes:
-        if isinstance(c, list):
-            for x in c: print(x)
-        else:
-            print(c)
+    for line in logs:
+        print(line)
+    patch_engine.apply(ops, phase="PL-6c", root=ROOT)
     return 0
 
 if __name__ == "__main__":
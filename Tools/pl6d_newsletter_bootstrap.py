@@ -5,12 +5,15 @@ Crea pagine newsletter (IT/EN).
 - app/it/newsletter/page.tsx
 - app/en/newsletter/page.tsx
 Form POST a provider esterno (Mailchimp/Brevo).
-Idempotente, sintassi verificata.
+Idempotente, sintassi verificata: crea solo i file mancanti (patch_engine, modo "x").
 """
 from __future__ import annotations
 from pathlib import Path
 import sys
 
+import patch_engine
+from patch_engine import FileOp
+
 ROOT = Path(".").resolve()
 WEBAPP = ROOT / "webapp"
 IT_PAGE = WEBAPP / "app" / "it" / "newsletter" / "page.tsx"
@@ -74,19 +77,12 @@ EN_TSX = """export default function NewsletterPage() {
 }
 """
 
-def ensure(path: Path, content: str) -> str:
-    if path.exists():
-        return f"EXIST {path.relative_to(ROOT)}"
-    path.parent.mkdir(parents=True, exist_ok=True)
-    path.write_text(content, encoding="utf-8")
-    return f"CREATE {path.relative_to(ROOT)}"
+def ensure(path: Path, content: str) -> FileOp:
+    return FileOp(path.relative_to(ROOT).as_posix(), content, mode="x")
 
 def main() -> int:
-    changes = []
-    changes.append(ensure(IT_PAGE, IT_TSX))
-    changes.append(ensure(EN_PAGE, EN_TSX))
     print("=== pl6d_newsletter_bootstrap ===")
-    for c in changes: print(c)
+    patch_engine.apply([ensure(IT_PAGE, IT_TSX), ensure(EN_PAGE, EN_TSX)], phase="PL-6d", root=ROOT)
     return 0
 
 if __name__ == "__main__":
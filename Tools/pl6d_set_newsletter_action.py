@@ -16,6 +16,9 @@ import re
 import sys
 from pathlib import Path
 
+import patch_engine
+from patch_engine import FileOp
+
 ROOT = Path(".").resolve()
 WEBAPP = ROOT / "webapp"
 FILES = [
@@ -23,7 +26,7 @@ FILES = [
     WEBAPP / "app" / "en" / "newsletter" / "page.tsx",
 ]
 
-def set_action(path: Path, url: str) -> str:
+def set_action(path: Path, url: str, ops: list[FileOp]) -> str:
     if not path.exists():
         return f"MISS  {path.relative_to(ROOT)}"
     try:
@@ -48,10 +51,7 @@ def set_action(path: Path, url: str) -> str:
         tag = 'ins'
 
     if new != src:
-        try:
-            path.write_text(new, encoding="utf-8")
-        except Exception as e:
-            return f"ERR   write {path.relative_to(ROOT)}: {e}"
+        ops.append(FileOp(path.relative_to(ROOT).as_posix(), new))
         return f"PATCH {path.relative_to(ROOT)} ({tag})"
 
     return f"OK    {path.relative_to(ROOT)} (già impostato)"
@@ -62,11 +62,17 @@ def main() -> int:
         return 1
 
     url = sys.argv[1].strip()
-    changes = [set_action(p, url) for p in FILES]
+    ops: list[FileOp] = []
+    changes = [set_action(p, url, ops) for p in FILES]
 
     print("=== pl6d_set_newsletter_action ===")
     for line in changes:
         print(line)
+    try:
+        patch_engine.apply(ops, phase="PL-6d", root=ROOT)
+    except OSError as e:
+        print(f"ERR   write: {e}")
+        return 2
 
     # ritorna 0 anche se i file erano già corretti
     return 0
@@ -7,7 +7,7 @@ Crea una guida evergreen (IT/EN) con SEO avanzata:
 Include:
 - export const metadata (title, description, openGraph, alternates hreflang)
 - JSON-LD BreadcrumbList
-Idempotente: non sovrascrive file esistenti.
+Idempotente: non sovrascrive file esistenti (patch_engine, modo "x").
 
 Exit codes: 0=OK, 2=I/O error
 """
@@ -15,6 +15,9 @@ from __future__ import annotations
 from pathlib import Path
 import sys
 
+import patch_engine
+from patch_engine import FileOp
+
 ROOT = Path(".").resolve()
 WEBAPP = ROOT / "webapp"
 
@@ -134,20 +137,13 @@ export default function GuidePage() {
 }
 """
 
-def ensure(path: Path, content: str) -> str:
-    if path.exists():
-        return f"EXIST {path.relative_to(ROOT)}"
-    path.parent.mkdir(parents=True, exist_ok=True)
-    path.write_text(content, encoding="utf-8")
-    return f"CREATE {path.relative_to(ROOT)}"
+def ensure(path: Path, content: str) -> FileOp:
+    return FileOp(path.relative_to(ROOT).as_posix(), content, mode="x")
 
 def main() -> int:
     try:
-        logs = []
-        logs.append(ensure(IT_PAGE, IT_TSX))
-        logs.append(ensure(EN_PAGE, EN_TSX))
         print("=== pl6e_evergreen_bootstrap ===")
-        for l in logs: print(l)
+        patch_engine.apply([ensure(IT_PAGE, IT_TSX), ensure(EN_PAGE, EN_TSX)], phase="PL-6e", root=ROOT)
         return 0
     except Exception as e:
         print("[ERROR]", e)
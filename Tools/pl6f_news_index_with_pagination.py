@@ -6,19 +6,42 @@ Crea la pagina lista News con paginazione server-side:
  - /webapp/components/Pagination.tsx
  - Integra chiavi i18n minime in messages/it.json e en.json (se mancanti)
 
-Idempotente: non sovrascrive file esistenti, patcha i JSON mantenendo la formattazione base.
+Modalità:
+ --mode offset  (default) ?page=N con limit/offset
+ --mode keyset  cursori opachi (created_at, id): ogni pagina costa come la prima
+                (indice news_lang_created_idx, migrazione 0003)
+ In entrambe il totale arriva dalla RPC content_count (contatori mantenuti da
+ trigger, migrazione 0006): una lettura per chiave, nessun count sulla tabella
+ --cache none   (default) fetch con cache: 'no-store', ogni visita interroga Supabase
+ --cache tags   Data Cache di Next: fetch con tag (news, news:<lingua>) e revalidate
+                REVALIDATE; le API admin invalidano con revalidateTag a ogni scrittura.
+                Crea anche webapp/lib/cacheTags.ts
+ --force        riscrive page.tsx e Pagination.tsx (per cambiare modalità)
+ --refresh-schema  rilegge lo schema (reports/schema_snapshot.json, schema_snapshot.py):
+                colonne di select e ordinamento sono scritte nel template, senza
+                richieste di prova a runtime
+
+Idempotente: non sovrascrive file esistenti, patcha i JSON mantenendo la formattazione base;
+tutti i file in un batch di patch_engine (quelli invariati non vengono toccati).
 """
 
 from __future__ import annotations
+import argparse
 import json
 import sys
 from pathlib import Path
+from typing import Optional
+
+import patch_engine
+from patch_engine import FileOp
+from schema_snapshot import Schema, load_schema
 
 ROOT = Path(".").resolve()
 WEBAPP = ROOT / "webapp"
 
 PAGE_FILE = WEBAPP / "app" / "[locale]" / "news" / "page.tsx"
 PAGINATION_CMP = WEBAPP / "components" / "Pagination.tsx"
+CACHE_TAGS_LIB = WEBAPP / "lib" / "cacheTags.ts"
 MSG_IT = WEBAPP / "messages" / "it.json"
 MSG_EN = WEBAPP / "messages" / "en.json"
 
@@ -30,33 +53,23 @@ type NewsRow = { id: number; slug: string; title: string; summary: string; lang:
 
 const PAGE_SIZE = 8;
 
-async function fetchPage(params: { locale: string; page: number }): Promise<{rows: NewsRow[]; total: number; usedOrder: 'created_at'|'id'}> {
+async function fetchPage(params: { locale: string; page: number }): Promise<{rows: NewsRow[]; total: number}> {
   const { locale, page } = params;
   const base = process.env.NEXT_PUBLIC_SUPABASE_URL!;
   const anon = process.env.NEXT_PUBLIC_SUPABASE_ANON_KEY!;
   const from = page * PAGE_SIZE;
-  const to = from + PAGE_SIZE - 1;
-
-  async function run(orderKey: 'created_at'|'id') {
-    const order = orderKey === 'created_at' ? 'created_at.desc' : 'id.desc';
-    const listUrl = `${base}/rest/v1/news?lang=eq.${locale}&select=id,slug,title,summary,lang&order=${order}&limit=${PAGE_SIZE}&offset=${from}`;
-    const countUrl = `${base}/rest/v1/news?lang=eq.${locale}&select=id&limit=1`;
-    const headers = { apikey: anon, Authorization: `Bearer ${anon}` };
 
-    const [lr, cr] = await Promise.all([fetch(listUrl, { headers, cache: 'no-store' }), fetch(countUrl, { headers, cache: 'no-store' })]);
-    if (!lr.ok || !cr.ok) throw new Error('fetch failed');
+  // colonne e ordinamento dallo snapshot dello schema al momento della generazione (schema_snapshot.py)
+  const listUrl = `${base}/rest/v1/news?lang=eq.${locale}&select=__NEWS_SELECT__&order=__NEWS_ORDER__&limit=${PAGE_SIZE}&offset=${from}`;
+  const countUrl = `${base}/rest/v1/rpc/content_count?p_table=news&p_lang=${locale}`; // contatori da trigger (migrazione 0006)
+  const headers = { apikey: anon, Authorization: `Bearer ${anon}` };
 
-    const rows: NewsRow[] = await lr.json();
-    const total = Number(cr.headers.get('content-range')?.split('/')?.[1] ?? '0'); // Supabase REST setta Content-Range: items x-y/total
-    return { rows, total, usedOrder: orderKey as const };
-  }
+  const [lr, cr] = await Promise.all([fetch(listUrl, { headers, cache: 'no-store' }), fetch(countUrl, { headers, cache: 'no-store' })]);
+  if (!lr.ok || !cr.ok) throw new Error('fetch failed');
 
-  // Prova con created_at, fallback a id se la colonna non esiste
-  try {
-    return await run('created_at');
-  } catch {
-    return await run('id');
-  }
+  const rows: NewsRow[] = await lr.json();
+  const total = Number(await cr.json()) || 0;
+  return { rows, total };
 }
 
 export default async function NewsIndex({ params, searchParams } : { params: { locale: string }, searchParams: { page?: string }}) {
@@ -96,6 +109,168 @@ export default async function NewsIndex({ params, searchParams } : { params: { l
 export const dynamic = 'force-dynamic';
 """
 
+PAGE_TSX_KEYSET = r"""import { notFound } from 'next/navigation';
+import ArticleCard from '@/components/ArticleCard';
+import Pagination from '@/components/Pagination';
+
+type NewsRow = { id: string; slug: string; title: string; summary: string; lang: string; created_at: string };
+type Cursor = { t: string; id: string };
+
+const PAGE_SIZE = 8;
+
+// Cursore opaco: base64url di [created_at, id] dell'ultima/prima riga della pagina
+function encodeCursor(r: NewsRow): string {
+  return Buffer.from(JSON.stringify([r.created_at, r.id])).toString('base64url');
+}
+function decodeCursor(s?: string): Cursor | null {
+  if (!s) return null;
+  try {
+    const [t, id] = JSON.parse(Buffer.from(s, 'base64url').toString('utf8'));
+    return typeof t === 'string' && id != null ? { t, id: String(id) } : null;
+  } catch {
+    return null;
+  }
+}
+
+// (created_at, id) < cursore  ->  created_at < t OR (created_at = t AND id < id)
+function keysetFilter(c: Cursor, op: 'lt' | 'gt'): string {
+  const t = `"${c.t}"`; // valori tra virgolette: il timestamp contiene ':' e '+'
+  return `(created_at.${op}.${t},and(created_at.eq.${t},id.${op}.${c.id}))`;
+}
+
+async function fetchPage(locale: string, after: Cursor | null, before: Cursor | null) {
+  const base = process.env.NEXT_PUBLIC_SUPABASE_URL!;
+  const anon = process.env.NEXT_PUBLIC_SUPABASE_ANON_KEY!;
+  const headers = { apikey: anon, Authorization: `Bearer ${anon}` };
+
+  const q = new URLSearchParams({ lang: `eq.${locale}`, select: '__NEWS_SELECT__,created_at' });
+  // una riga in più per sapere se esiste una pagina successiva, senza count
+  q.set('limit', String(PAGE_SIZE + 1));
+  if (before) {
+    q.set('or', keysetFilter(before, 'gt'));
+    q.set('order', 'created_at.asc,id.asc');
+  } else {
+    if (after) q.set('or', keysetFilter(after, 'lt'));
+    q.set('order', 'created_at.desc,id.desc');
+  }
+
+  const res = await fetch(`${base}/rest/v1/news?${q}`, { headers, cache: 'no-store' });
+  if (!res.ok) throw new Error('fetch failed');
+  let rows: NewsRow[] = await res.json();
+  const more = rows.length > PAGE_SIZE;
+  rows = rows.slice(0, PAGE_SIZE);
+  if (before) rows.reverse();
+
+  const first = rows[0];
+  const last = rows[rows.length - 1];
+  return {
+    rows,
+    prev: first && (before ? more : after) ? encodeCursor(first) : null,
+    next: last && (before ? true : more) ? encodeCursor(last) : null,
+  };
+}
+
+// Totale esatto dai contatori mantenuti da trigger (migrazione 0006): lettura per chiave, O(1)
+async function fetchTotal(locale: string): Promise<number | null> {
+  const base = process.env.NEXT_PUBLIC_SUPABASE_URL!;
+  const anon = process.env.NEXT_PUBLIC_SUPABASE_ANON_KEY!;
+  try {
+    const res = await fetch(`${base}/rest/v1/rpc/content_count?p_table=news&p_lang=${locale}`, {
+      headers: { apikey: anon, Authorization: `Bearer ${anon}` },
+      cache: 'no-store',
+    });
+    if (!res.ok) return null;
+    const total = Number(await res.json());
+    return Number.isFinite(total) ? total : null;
+  } catch {
+    return null;
+  }
+}
+
+export default async function NewsIndex({ params, searchParams } : { params: { locale: string }, searchParams: { after?: string; before?: string; p?: string }}) {
+  const locale = params.locale;
+  if (!['it','en'].includes(locale)) notFound();
+
+  const after = decodeCursor(searchParams?.after);
+  const before = after ? null : decodeCursor(searchParams?.before);
+  const page = Math.max(1, parseInt(searchParams?.p ?? '1', 10) || 1); // solo per l'etichetta
+  const [{ rows, prev, next }, total] = await Promise.all([
+    fetchPage(locale, after, before),
+    fetchTotal(locale),
+  ]);
+  const totalPages = total != null ? Math.max(1, Math.ceil(total / PAGE_SIZE)) : null;
+
+  return (
+    <section className="mx-auto max-w-5xl px-4">
+      <h1 className="mb-6 text-3xl font-bold">{locale === 'it' ? 'News' : 'News'}</h1>
+
+      {rows.length === 0 ? (
+        <p className="text-gray-600">{locale === 'it' ? 'Nessuna news disponibile.' : 'No news available.'}</p>
+      ) : (
+        <div className="grid gap-4 sm:grid-cols-2 lg:grid-cols-3">
+          {rows.map((n) => (
+            <ArticleCard
+              key={`${n.lang}:${n.slug}`}
+              href={`/${n.lang}/news/${encodeURIComponent(n.slug)}`}
+              title={n.title}
+              summary={n.summary}
+            />
+          ))}
+        </div>
+      )}
+
+      <div className="mt-8">
+        <Pagination page={page} totalPages={totalPages} prevCursor={prev} nextCursor={next} basePath={`/${locale}/news`} />
+      </div>
+    </section>
+  );
+}
+
+export const dynamic = 'force-dynamic';
+"""
+
+PAGINATION_TSX_KEYSET = r"""'use client';
+import Link from 'next/link';
+
+type Props = {
+  page: number;
+  totalPages: number | null;
+  prevCursor: string | null;
+  nextCursor: string | null;
+  basePath: string;
+};
+
+// Cursori opachi: la pagina non conosce né offset né chiavi di ordinamento
+export default function Pagination({ page, totalPages, prevCursor, nextCursor, basePath }: Props) {
+  const prevHref = prevCursor
+    ? `${basePath}?before=${encodeURIComponent(prevCursor)}&p=${Math.max(1, page - 1)}`
+    : basePath;
+  const nextHref = nextCursor ? `${basePath}?after=${encodeURIComponent(nextCursor)}&p=${page + 1}` : '#';
+
+  return (
+    <nav aria-label="Pagination" className="flex items-center justify-between">
+      <Link
+        aria-disabled={!prevCursor}
+        className={`rounded-xl border px-3 py-2 text-sm ${!prevCursor ? 'pointer-events-none opacity-50' : ''}`}
+        href={prevHref}
+      >
+        ◀ Prev
+      </Link>
+
+      <span className="text-sm">{page}{totalPages != null ? ` / ${totalPages}` : ''}</span>
+
+      <Link
+        aria-disabled={!nextCursor}
+        className={`rounded-xl border px-3 py-2 text-sm ${!nextCursor ? 'pointer-events-none opacity-50' : ''}`}
+        href={nextHref}
+      >
+        Next ▶
+      </Link>
+    </nav>
+  );
+}
+"""
+
 PAGINATION_TSX = r"""'use client';
 import Link from 'next/link';
 
@@ -150,16 +325,15 @@ I18N_KEYS = {
     }
 }
 
-def merge_json_keys(path: Path, addition: dict) -> bool:
-    """Unione superficiale delle chiavi target (non distruttiva). Ritorna True se scritto."""
-    changed = False
+def merge_json_keys(path: Path, addition: dict) -> Optional[FileOp]:
+    """Unione superficiale delle chiavi target (non distruttiva). Ritorna la FileOp se serve scrivere."""
     data = {}
     if path.exists():
         try:
             data = json.loads(path.read_text(encoding="utf-8"))
         except Exception:
             # se il JSON non è valido, non lo tocchiamo
-            return False
+            return None
     else:
         data = {}
 
@@ -175,31 +349,119 @@ def merge_json_keys(path: Path, addition: dict) -> bool:
         return ch
 
     if deep_merge(data, addition):
-        path.parent.mkdir(parents=True, exist_ok=True)
-        path.write_text(json.dumps(data, ensure_ascii=False, indent=2), encoding="utf-8")
-        changed = True
-    return changed
+        return FileOp(path.relative_to(ROOT).as_posix(), json.dumps(data, ensure_ascii=False, indent=2))
+    return None
 
-def ensure_file(path: Path, content: str) -> str:
-    if path.exists():
-        return f"EXIST {path.relative_to(ROOT)}"
-    path.parent.mkdir(parents=True, exist_ok=True)
-    path.write_text(content, encoding="utf-8")
-    return f"CREATE {path.relative_to(ROOT)}"
+# Tag di cache condivisi da pagine e API admin (usato anche da phase4_supabase_news_articles.py)
+CACHE_TAGS_TS = r"""import { revalidateTag } from 'next/cache';
 
-def main() -> int:
-    notes = []
-    notes.append(ensure_file(PAGINATION_CMP, PAGINATION_TSX))
-    notes.append(ensure_file(PAGE_FILE, PAGE_TSX))
+// Tag della Data Cache di Next per news/articles (modalità --cache tags di pl6f e phase4).
+// Le pagine li assegnano alle fetch; le API admin li invalidano a ogni scrittura, così
+// Supabase riceve richieste in proporzione alle modifiche e non alle visite.
+export const REVALIDATE = 300; // secondi: rete di sicurezza se un'invalidazione va persa
 
-    it_changed = merge_json_keys(MSG_IT, I18N_KEYS["it"])
-    en_changed = merge_json_keys(MSG_EN, I18N_KEYS["en"])
-    notes.append(("PATCH messages/it.json" if it_changed else "OK messages/it.json"))
-    notes.append(("PATCH messages/en.json" if en_changed else "OK messages/en.json"))
+export type ContentTable = 'news' | 'articles';
+type ContentRow = { lang?: string | null; slug?: string | null };
+
+export const tableTag = (table: ContentTable) => table;                                  // liste senza lingua
+export const listTag = (table: ContentTable, lang: string) => `${table}:${lang}`;         // liste e totali per lingua
+export const slugTag = (table: ContentTable, slug: string) => `${table}:slug:${slug}`;    // pagine di dettaglio
+
+export function contentTags(table: ContentTable, rows: ContentRow[]): string[] {
+  const tags = new Set<string>([tableTag(table), 'sitemap']);
+  for (const r of rows) {
+    if (r?.lang) tags.add(listTag(table, r.lang));
+    if (r?.slug) tags.add(slugTag(table, r.slug));
+  }
+  return [...tags];
+}
+
+// Da chiamare dopo insert/update/delete: passare le righe prima e dopo la modifica
+// (un cambio di slug o di lingua deve invalidare anche le pagine vecchie)
+export function revalidateContent(table: ContentTable, ...rows: (ContentRow | null | undefined)[]) {
+  for (const tag of contentTags(table, rows.filter(Boolean) as ContentRow[])) revalidateTag(tag);
+}
+"""
+
+# Client Supabase con fetch nella Data Cache (tag + revalidate) per le letture pubbliche
+# (scritto da phase4 --cache tags e da pl3 per le pagine di dettaglio, con slugTag)
+SUPABASE_CACHED_TS = """import 'server-only';
+import { createClient } from '@supabase/supabase-js';
+import { REVALIDATE } from '@/lib/cacheTags';
+
+export function getSupabaseCached(tags: string[], revalidate: number = REVALIDATE) {
+  const url = process.env.NEXT_PUBLIC_SUPABASE_URL;
+  const key = process.env.NEXT_PUBLIC_SUPABASE_ANON_KEY;
+  if (!url || !key) {
+    throw new Error('Missing Supabase env: NEXT_PUBLIC_SUPABASE_URL / NEXT_PUBLIC_SUPABASE_ANON_KEY');
+  }
+  return createClient(url, key, {
+    auth: { persistSession: false },
+    global: { fetch: (input, init) => fetch(input, { ...init, next: { revalidate, tags } }) },
+  });
+}
+"""
+
+NEWS_COLUMNS = ["id", "slug", "title", "summary", "lang"]
+
+def bake_columns(tsx: str, schema: Schema) -> str:
+    """Sostituisce i segnaposto delle colonne con quelle presenti nello schema."""
+    order_col = schema.pick("news", "created_at", "published_at", "id")
+    order = "id.desc" if order_col == "id" else f"{order_col}.desc,id.desc"  # come news_lang_created_idx
+    return (tsx.replace("__NEWS_SELECT__", ",".join(schema.select("news", NEWS_COLUMNS)))
+               .replace("__NEWS_ORDER__", order))
+
+def with_cache_tags(tsx: str, table: str) -> str:
+    """Variante --cache tags di un template pagina: fetch con tag invece di no-store."""
+    tsx = tsx.replace("cache: 'no-store'",
+                      f"next: {{ revalidate: REVALIDATE, tags: [tableTag('{table}'), listTag('{table}', locale)] }}")
+    # force-dynamic renderebbe no-store ogni fetch: la pagina resta dinamica per searchParams
+    tsx = tsx.replace("export const dynamic = 'force-dynamic';\n", "")
+    return "import { REVALIDATE, listTag, tableTag } from '@/lib/cacheTags';\n" + tsx
+
+def ensure_file(path: Path, content: str, force: bool = False) -> FileOp:
+    # senza --force un file esistente non si tocca; con --force si riscrive solo se diverso
+    return FileOp(path.relative_to(ROOT).as_posix(), content, mode="w" if force else "x")
+
+TEMPLATES = {
+    "offset": (PAGE_TSX, PAGINATION_TSX),
+    "keyset": (PAGE_TSX_KEYSET, PAGINATION_TSX_KEYSET),
+}
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="PL-6f: lista News con paginazione")
+    ap.add_argument("--mode", choices=sorted(TEMPLATES), default="offset",
+                    help="offset (?page=N) oppure keyset (cursori created_at,id)")
+    ap.add_argument("--cache", choices=("none", "tags"), default="none",
+                    help="none (no-store) oppure tags (Data Cache con revalidateTag)")
+    ap.add_argument("--force", action="store_true", help="Riscrive page.tsx e Pagination.tsx")
+    ap.add_argument("--refresh-schema", action="store_true", help="Rilegge lo schema invece dello snapshot")
+    args = ap.parse_args()
+
+    schema = load_schema(refresh=args.refresh_schema)
+    if args.mode == "keyset" and not (schema.has("news", "created_at") and schema.has("news", "id")):
+        print("[ERR] la modalità keyset richiede news.created_at e news.id (migrazione 0001)")
+        return 2
+    page_tsx, pagination_tsx = TEMPLATES[args.mode]
+    page_tsx = bake_columns(page_tsx, schema)
+    notes = [f"MODE {args.mode} | CACHE {args.cache} | SCHEMA {schema.source}"]
+    ops: list[FileOp] = []
+    if args.cache == "tags":
+        page_tsx = with_cache_tags(page_tsx, "news")
+        ops.append(ensure_file(CACHE_TAGS_LIB, CACHE_TAGS_TS, args.force))
+    ops.append(ensure_file(PAGINATION_CMP, pagination_tsx, args.force))
+    ops.append(ensure_file(PAGE_FILE, page_tsx, args.force))
+
+    for name, path, lang in (("it", MSG_IT, "it"), ("en", MSG_EN, "en")):
+        op = merge_json_keys(path, I18N_KEYS[lang])
+        notes.append(f"PATCH messages/{name}.json" if op else f"OK messages/{name}.json")
+        if op:
+            ops.append(op)
 
     print("=== PL-6f (news index) ===")
     for n in notes:
         print(n)
+    patch_engine.apply(ops, phase="PL-6f", root=ROOT)
     return 0
 
 if __name__ == "__main__":
@@ -2,54 +2,44 @@
 """
 pl6g_seed_news_minimum.py
 Semina news minime per il pre-lancio tramite Supabase REST.
-- Inserisce 2 news IT e 2 news EN (solo se mancanti).
+- Inserisce 2 news IT e 2 news EN (solo se mancanti), con un unico upsert.
+  Senza l'indice unico (slug, lang) della migrazione 0004 ripiega sul controllo
+  di esistenza (una GET + una POST) e suggerisce `python Tools/migrate.py up`.
+- Import massivi da file: Tools/bulk_import.py.
 - Campi usati: slug, title, summary, body, lang (nessuna dipendenza da created_at).
 - Legge SUPABASE URL e SERVICE ROLE da webapp/.env.local o env di sistema.
 
 Exit codes: 0 OK, 2 errore I/O/HTTP.
 """
 from __future__ import annotations
+import json
 from pathlib import Path
-import os, json, urllib.request, urllib.error
+from supabase_rest import SupabaseRest, RestError, load_env
 
 ROOT = Path(".").resolve()
 WEBAPP = ROOT / "webapp"
 ENV_FILE = WEBAPP / ".env.local"
 
-def load_env() -> dict:
-    env = dict(os.environ)
-    if ENV_FILE.exists():
-        for line in ENV_FILE.read_text(encoding="utf-8").splitlines():
-            line = line.strip()
-            if not line or line.startswith("#") or "=" not in line:
-                continue
-            k, v = line.split("=", 1)
-            env.setdefault(k.strip(), v.strip())
-    return env
+# "there is no unique or exclusion constraint matching the ON CONFLICT specification"
+NO_CONFLICT_TARGET = "42P10"
 
-def supabase_headers(anon_or_service_key: str) -> dict:
-    return {
-        "apikey": anon_or_service_key,
-        "Authorization": f"Bearer {anon_or_service_key}",
-        "Content-Type": "application/json",
-        "Prefer": "return=representation",
-    }
+def missing_conflict_target(e: RestError) -> bool:
+    """Errore PostgREST per on_conflict senza indice unico corrispondente (0004 non applicata)."""
+    try:
+        return e.status == 400 and json.loads(e.body.decode("utf-8")).get("code") == NO_CONFLICT_TARGET
+    except (ValueError, AttributeError):
+        return False
 
-def rest_get(url: str, headers: dict) -> list:
-    req = urllib.request.Request(url, headers=headers, method="GET")
-    with urllib.request.urlopen(req) as resp:
-        data = resp.read()
-        return json.loads(data.decode("utf-8"))
-
-def rest_insert(url: str, headers: dict, rows: list[dict]) -> list:
-    body = json.dumps(rows).encode("utf-8")
-    req = urllib.request.Request(url, data=body, headers=headers, method="POST")
-    with urllib.request.urlopen(req) as resp:
-        data = resp.read()
-        return json.loads(data.decode("utf-8"))
+def insert_missing(rest: SupabaseRest, seeds: list) -> list:
+    """Come prima della 0004: legge quelle già presenti e inserisce le altre."""
+    slugs = ",".join(sorted({r["slug"] for r in seeds}))
+    found = rest.get_json("news", {"select": "slug,lang", "slug": f"in.({slugs})"}) or []
+    existing = {(r.get("lang"), r.get("slug")) for r in found}
+    missing = [r for r in seeds if (r["lang"], r["slug"]) not in existing]
+    return (rest.insert("news", missing) or []) if missing else []
 
 def main() -> int:
-    env = load_env()
+    env = load_env(ENV_FILE)
     base = env.get("NEXT_PUBLIC_SUPABASE_URL", "").rstrip("/")
     service_key = env.get("SUPABASE_SERVICE_ROLE_KEY") or env.get("ADMIN_TOKEN") or ""
 
@@ -59,8 +49,7 @@ def main() -> int:
         print(" - SUPABASE_SERVICE_ROLE_KEY (o ADMIN_TOKEN)")
         return 2
 
-    headers = supabase_headers(service_key)
-    table_url = f"{base}/rest/v1/news"
+    rest = SupabaseRest(base, service_key)
 
     # dataset: 2 IT + 2 EN
     seeds = [
@@ -94,33 +83,26 @@ def main() -> int:
         },
     ]
 
-    created = []
-    skipped = []
-
-    for row in seeds:
-        slug, lang = row["slug"], row["lang"]
-        # verifica se esiste già
-        q = f"{table_url}?select=slug,lang&slug=eq.{urllib.parse.quote(slug)}&lang=eq.{urllib.parse.quote(lang)}"
+    # una sola POST: on_conflict=slug,lang + ignore-duplicates inserisce solo le mancanti
+    # (indice unico della migrazione 0004); la risposta contiene solo le righe create
+    with rest:
         try:
-            found = rest_get(q, headers)
-        except urllib.error.HTTPError as e:
-            print(f"[ERROR] GET {slug}/{lang}: {e.code} {e.reason}")
+            try:
+                resp = rest.insert("news", seeds, on_conflict="slug,lang", ignore=True) or []
+            except RestError as e:
+                if not missing_conflict_target(e):
+                    raise
+                print("[WARN] indice unico news(slug, lang) assente: esegui `python Tools/migrate.py up` "
+                      "(migrazione 0004). Uso il controllo di esistenza.")
+                resp = insert_missing(rest, seeds)
+        except RestError as e:
+            msg = e.body.decode("utf-8", errors="ignore")
+            print(f"[ERROR] UPSERT news: {e.status} {e.reason} -> {msg}")
             return 2
 
-        if found:
-            skipped.append(f"{lang}:{slug}")
-            continue
-
-        try:
-            resp = rest_insert(table_url, headers, [row])
-            if resp:
-                created.append(f"{lang}:{slug}")
-            else:
-                print(f"[WARN] Inserimento vuoto per {lang}:{slug}")
-        except urllib.error.HTTPError as e:
-            msg = e.read().decode("utf-8", errors="ignore")
-            print(f"[ERROR] INSERT {lang}:{slug}: {e.code} {e.reason} -> {msg}")
-            return 2
+    created_keys = {(r.get("lang"), r.get("slug")) for r in resp}
+    created = [f"{r['lang']}:{r['slug']}" for r in seeds if (r["lang"], r["slug"]) in created_keys]
+    skipped = [f"{r['lang']}:{r['slug']}" for r in seeds if (r["lang"], r["slug"]) not in created_keys]
 
     print("=== pl6g_seed_news_minimum ===")
     print(f"CREATED: {', '.join(created) if created else 'none'}")
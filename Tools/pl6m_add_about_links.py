@@ -7,7 +7,8 @@ Aggiunge il link "Chi siamo / About us" al SiteHeader e SiteFooter in modo robus
 - inserisce <li><Link href="/[locale]/chi-siamo" locale>{t("about")}</Link></li> nel primo <ul> del menu header (o crea un <ul>)
 - inserisce <Link ...>{t("about")}</Link> nel primo <nav> del footer (o crea una mini-nav)
 - aggiorna it.json / en.json con nav.about
-Idempotente: non duplica se esiste già un link a "chi-siamo" o {t("about")}
+Idempotente: non duplica se esiste già un link a "chi-siamo" o {t("about")};
+file scritti da patch_engine in un batch, gli invariati non vengono toccati.
 Esegui dalla ROOT del repo:
   .\.venv\Scripts\python.exe Tools\pl6m_add_about_links.py
 """
@@ -17,6 +18,9 @@ import re
 import json
 from pathlib import Path
 
+import patch_engine
+from patch_engine import FileOp
+
 ROOT = Path(__file__).resolve().parents[1]
 WEBAPP = ROOT / "webapp"
 HEADER = WEBAPP / "components" / "SiteHeader.tsx"
@@ -30,8 +34,10 @@ ABOUT_A  = '<Link href="/[locale]/chi-siamo" locale>{t("about")}</Link>'
 def read(path: Path) -> str:
     return path.read_text(encoding="utf-8", errors="replace") if path.exists() else ""
 
+OPS: list[FileOp] = []
+
 def write(path: Path, text: str) -> None:
-    path.write_text(text, encoding="utf-8")
+    OPS.append(FileOp(path.relative_to(ROOT).as_posix(), text))
 
 def ensure_import(text: str, spec: str, source: str) -> str:
     """
@@ -151,7 +157,7 @@ def ensure_i18n_key(path: Path, value: str) -> None:
     nav = data.setdefault("nav", {})
     if "about" not in nav:
         nav["about"] = value
-        path.write_text(json.dumps(data, ensure_ascii=False, indent=2), encoding="utf-8")
+        write(path, json.dumps(data, ensure_ascii=False, indent=2))
         print(f"[PATCH] {path.name}: aggiunta nav.about = {value}")
     else:
         print(f"[OK] {path.name}: nav.about già presente")
@@ -188,6 +194,7 @@ def main():
     patch_tsx(FOOTER, is_header=False)
     ensure_i18n_key(IT_JSON, "Chi siamo")
     ensure_i18n_key(EN_JSON, "About us")
+    patch_engine.apply(OPS, phase="PL-6m")
 
 if __name__ == "__main__":
     main()
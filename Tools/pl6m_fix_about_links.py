@@ -2,11 +2,16 @@
 """
 PL-6m – Fix EU links in About/Chi siamo pages
 Aggiorna i link "Digital Education Action Plan" e "Funding programmes"
-con URL stabili della Commissione Europea.
+con URL stabili della Commissione Europea (patch_engine: invariati se già aggiornati).
 """
 
 from pathlib import Path
 
+import patch_engine
+from patch_engine import FileOp
+
+ROOT = Path(".").resolve()
+
 PATCHES = {
     "webapp/app/en/about/page.tsx": [
         (
@@ -38,7 +43,7 @@ PATCHES = {
     ],
 }
 
-def patch_file(path: Path, rules):
+def patch_file(path: Path, rules) -> FileOp:
     text = path.read_text(encoding="utf-8")
     for label, url in rules:
         # cerca <a ...>{label}</a> e sostituisci href
@@ -48,17 +53,17 @@ def patch_file(path: Path, rules):
             rf'\1{url}\2',
             text,
         )
-    path.write_text(text, encoding="utf-8")
-    print(f"[OK] Patch applicata a {path}")
+    return FileOp(path.relative_to(ROOT).as_posix(), text)
 
 def main():
-    root = Path(".")
+    ops = []
     for rel, rules in PATCHES.items():
-        path = root / rel
+        path = ROOT / rel
         if path.exists():
-            patch_file(path, rules)
+            ops.append(patch_file(path, rules))
         else:
             print(f"[WARN] File non trovato: {rel}")
+    patch_engine.apply(ops, phase="PL-6m", root=ROOT)
 
 if __name__ == "__main__":
     main()
@@ -1,22 +1,29 @@
 # Tools/pl7_blog_categories_bootstrap.py
 # PL-7: Blog categorie + singolo post pronto per indice/categoria (idempotente)
+# File scritti da patch_engine in un batch: quelli invariati non vengono toccati.
 
 from __future__ import annotations
 import json, re
 from pathlib import Path
 
+import patch_engine
+from patch_engine import FileOp
+
 ROOT = Path(__file__).resolve().parents[1]
 WEB = ROOT / "webapp"
 
+OPS: list[FileOp] = []
+
+def write(path: Path, content: str):
+    OPS.append(FileOp(path.relative_to(ROOT).as_posix(), content))
+
 def ensure_file(path: Path, content: str):
-    path.parent.mkdir(parents=True, exist_ok=True)
     if path.exists():
         # patch only if missing essential markers
         text = path.read_text(encoding="utf-8", errors="replace")
-        if content.strip() not in text:
-            path.write_text(content, encoding="utf-8")
-    else:
-        path.write_text(content, encoding="utf-8")
+        if content.strip() in text:
+            return
+    write(path, content)
 
 def upsert_i18n(locale: str, patch: dict):
     p = WEB / "messages" / f"{locale}.json"
@@ -26,7 +33,17 @@ def upsert_i18n(locale: str, patch: dict):
     data.setdefault("blog", {})
     for k, v in patch.get("blog", {}).items():
         data["blog"].setdefault(k, v)
-    p.write_text(json.dumps(data, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
+    write(p, json.dumps(data, ensure_ascii=False, indent=2) + "\n")
+
+CATEGORIES_BLOCK = (
+    "{post?.categories?.length ? (\n"
+    "  <CategoryBadges locale={params.locale} categories={post.categories} />{/* __PL7_CATEGORIES__ */}\n"
+    ") : null}\n"
+)
+# blocco delle versioni precedenti: badge senza conteggio, sostituito da CategoryBadges
+OLD_CATEGORIES_RX = re.compile(
+    r"\{post\?\.categories\?\.length \? \(\n\s*<div[^\n]*__PL7_CATEGORIES__.*?\) : null\}\n", re.S)
+BADGES_IMPORT = "import CategoryBadges from \"@/components/ui/CategoryBadges\";"
 
 def patch_single_post_page():
     p = WEB / "app" / "[locale]" / "blog" / "[slug]" / "page.tsx"
@@ -34,35 +51,22 @@ def patch_single_post_page():
         return  # lasciamo così, non forziamo se non esiste ancora
     src = p.read_text(encoding="utf-8", errors="replace")
 
-    # 1) import CategoryBadge se manca
-    if "CategoryBadge" not in src:
+    # 1) import CategoryBadges (al posto del vecchio CategoryBadge) se manca
+    if BADGES_IMPORT not in src:
+        src = src.replace("import CategoryBadge from \"@/components/ui/CategoryBadge\";\n", "")
         src = src.replace(
             "from \"next/navigation\";",
-            "from \"next/navigation\";\nimport CategoryBadge from \"@/components/ui/CategoryBadge\";",
-        )
-
-    # 2) blocco categorie sopra al titolo (se manca)
-    if "/* __PL7_CATEGORIES__ */" not in src:
-        src = src.replace(
-            "<article",
-            "<article",
+            "from \"next/navigation\";\n" + BADGES_IMPORT,
             1,
         )
-        # Inseriamo un blocco cerca h1 e prima del titolo aggiungiamo i badge
-        src = re.sub(
-            r"(<h1[^>]*>)",
-            (
-                "{post?.categories?.length ? (\n"
-                "  <div className=\"mb-3 flex gap-2\">{/* __PL7_CATEGORIES__ */}\n"
-                "    {post.categories.map((c:any)=> (\n"
-                "      <CategoryBadge key={c.id} locale={params.locale} slug={c.slug} label={c.name || c.slug} />\n"
-                "    ))}\n"
-                "  </div>\n"
-                ") : null}\n\\1"
-            ),
-            src,
-            count=1,
-        )
+
+    # 2) badge con conteggio sopra al titolo (se mancano)
+    if "<CategoryBadges" not in src:
+        if OLD_CATEGORIES_RX.search(src):
+            src = OLD_CATEGORIES_RX.sub(lambda _m: CATEGORIES_BLOCK, src, count=1)
+        else:
+            # Inseriamo un blocco cerca h1 e prima del titolo aggiungiamo i badge
+            src = re.sub(r"(<h1[^>]*>)", lambda m: CATEGORIES_BLOCK + m.group(1), src, count=1)
 
     # 3) metadata base se manca alternates/opengraph minimi
     if "generateMetadata" in src and "openGraph" not in src:
@@ -73,15 +77,15 @@ def patch_single_post_page():
             count=1,
         )
 
-    p.write_text(src, encoding="utf-8")
+    write(p, src)
 
 def write_badge():
     path = WEB / "components" / "ui" / "CategoryBadge.tsx"
     ensure_file(path, """\
 import Link from "next/link";
 
-export default function CategoryBadge({ locale, slug, label }:{
-  locale: string; slug: string; label: string;
+export default function CategoryBadge({ locale, slug, label, count }:{
+  locale: string; slug: string; label: string; count?: number | null;
 }) {
   return (
     <Link
@@ -89,11 +93,41 @@ export default function CategoryBadge({ locale, slug, label }:{
       className="inline-flex items-center rounded-full px-2.5 py-0.5 text-xs font-medium bg-slate-100 hover:bg-slate-200 text-slate-700"
     >
       {label}
+      {count != null && <span className="ml-1.5 text-slate-500">{count}</span>}
     </Link>
   );
 }
 """)
 
+def write_badges():
+    # badge delle categorie di un post con il totale dai contatori (migrazione 0006)
+    path = WEB / "components" / "ui" / "CategoryBadges.tsx"
+    ensure_file(path, """\
+import CategoryBadge from "@/components/ui/CategoryBadge";
+import { getSupabasePublicServer } from "@/lib/supabaseServerPublic";
+
+type Category = { id: string; slug: string; name?: string | null };
+
+// Server component: un content_count per categoria, ognuno una lettura per PK sui contatori
+// mantenuti da trigger (migrazione 0006), non un count sulla tabella
+export default async function CategoryBadges({ locale, categories }:{
+  locale: string; categories: Category[];
+}) {
+  const sb = getSupabasePublicServer();
+  const counts = await Promise.all(categories.map(async (c) => {
+    const { data } = await sb.rpc("content_count", { p_table: "articles", p_lang: locale, p_category: c.slug });
+    return data == null ? null : Number(data);
+  }));
+  return (
+    <div className="mb-3 flex gap-2">
+      {categories.map((c, i) => (
+        <CategoryBadge key={c.id} locale={locale} slug={c.slug} label={c.name || c.slug} count={counts[i]} />
+      ))}
+    </div>
+  );
+}
+""")
+
 def write_category_page():
     path = WEB / "app" / "[locale]" / "blog" / "category" / "[slug]" / "page.tsx"
     ensure_file(path, """\
@@ -106,13 +140,17 @@ export default async function CategoryPage({ params:{ locale, slug } }:{
   params:{ locale:string; slug:string }
 }) {
   const sb = supabaseBrowser();
-  // usa una view se ce l'hai; altrimenti adatta con la tua tabella traduzioni
-  const { data, error } = await sb
-    .from("posts_by_category_view")
-    .select("slug, title, summary, cover_url, published_at")
-    .eq("locale", locale)
-    .eq("category_slug", slug)
-    .order("published_at", { ascending:false });
+  // vista materializzata (migrazione 0007), aggiornata con refresh_posts_by_category_view
+  // totale dai contatori mantenuti da trigger (migrazione 0006), non da un count per richiesta
+  const [{ data, error }, { data: total }] = await Promise.all([
+    sb
+      .from("posts_by_category_view")
+      .select("slug, title, summary, cover_url, published_at")
+      .eq("locale", locale)
+      .eq("category_slug", slug)
+      .order("published_at", { ascending:false }),
+    sb.rpc("content_count", { p_table: "articles", p_lang: locale, p_category: slug }),
+  ]);
 
   if (error) {
     console.error(error);
@@ -120,7 +158,10 @@ export default async function CategoryPage({ params:{ locale, slug } }:{
 
   return (
     <main className="mx-auto max-w-5xl px-4 py-8">
-      <h1 className="text-3xl font-bold mb-6">{slug}</h1>
+      <h1 className="text-3xl font-bold mb-6">
+        {slug}
+        {total != null && <span className="ml-3 text-base font-normal text-slate-500">({Number(total)})</span>}
+      </h1>
       <ul className="grid gap-8 md:grid-cols-2">
         {(data ?? []).map((p:any)=>(
           <li key={p.slug} className="group">
@@ -141,6 +182,7 @@ export default async function CategoryPage({ params:{ locale, slug } }:{
 
 def main():
     write_badge()
+    write_badges()
     write_category_page()
     patch_single_post_page()
 
@@ -148,7 +190,8 @@ def main():
     upsert_i18n("it", {"blog": {"category": "Categoria", "readMore": "Leggi di più", "allArticles": "Tutti gli articoli"}})
     upsert_i18n("en", {"blog": {"category": "Category", "readMore": "Read more", "allArticles": "All articles"}})
 
-    print("[OK] PL-7 scaffold applicato (badge, pagina categoria, patch singolo post, i18n)")
+    patch_engine.apply(OPS, phase="PL-7")
+    print("[OK] PL-7 scaffold applicato (badge con conteggio, pagina categoria, patch singolo post, i18n) – richiede le migrazioni 0006-0007")
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,202 @@
+# Tools/pl8_search_bootstrap.py
+# PL-8: pagina /[locale]/search sulla RPC search_content (migrazione 0005) + lente
+# dell'header collegata alla ricerca (idempotente)
+# File scritti da patch_engine in un batch: quelli invariati non vengono toccati.
+
+from __future__ import annotations
+import json, re
+from pathlib import Path
+
+import patch_engine
+from patch_engine import FileOp
+
+ROOT = Path(__file__).resolve().parents[1]
+WEB = ROOT / "webapp"
+SEARCH_PAGE = WEB / "app" / "[locale]" / "search" / "page.tsx"
+SITE_HEADER = WEB / "components" / "SiteHeader.tsx"
+
+OPS: list[FileOp] = []
+
+def write(path: Path, content: str):
+    OPS.append(FileOp(path.relative_to(ROOT).as_posix(), content))
+
+def ensure_file(path: Path, content: str):
+    if path.exists():
+        text = path.read_text(encoding="utf-8", errors="replace")
+        if content.strip() in text:
+            return
+    write(path, content)
+
+def upsert_i18n(locale: str, patch: dict):
+    p = WEB / "messages" / f"{locale}.json"
+    if not p.exists():
+        return
+    data = json.loads(p.read_text(encoding="utf-8", errors="replace") or "{}")
+    data.setdefault("search", {})
+    for k, v in patch.get("search", {}).items():
+        data["search"].setdefault(k, v)
+    write(p, json.dumps(data, ensure_ascii=False, indent=2) + "\n")
+
+SEARCH_PAGE_TSX = """\
+import Link from "next/link";
+import { notFound } from "next/navigation";
+
+export const dynamic = "force-dynamic";
+
+const LOCALES = ["it", "en", "fr", "es", "de"];
+const PAGE_SIZE = 10;
+const MAX_CANDIDATES = 500; // come p_max_candidates di search_content
+
+type Hit = {
+  kind: "news" | "articles";
+  id: string;
+  slug: string;
+  lang: string;
+  title: string;
+  snippet: string;
+  published_at: string | null;
+  rank: number;
+  total: number;
+};
+
+const LABELS: Record<string, { title: string; placeholder: string; submit: string; empty: string; results: string; prev: string; next: string }> = {
+  it: { title: "Cerca", placeholder: "Cerca news e articoli…", submit: "Cerca", empty: "Nessun risultato.", results: "risultati", prev: "Precedente", next: "Successiva" },
+  en: { title: "Search", placeholder: "Search news and articles…", submit: "Search", empty: "No results.", results: "results", prev: "Prev", next: "Next" },
+  fr: { title: "Rechercher", placeholder: "Rechercher actualités et articles…", submit: "Rechercher", empty: "Aucun résultat.", results: "résultats", prev: "Précédent", next: "Suivant" },
+  es: { title: "Buscar", placeholder: "Buscar noticias y artículos…", submit: "Buscar", empty: "Sin resultados.", results: "resultados", prev: "Anterior", next: "Siguiente" },
+  de: { title: "Suche", placeholder: "News und Artikel durchsuchen…", submit: "Suchen", empty: "Keine Ergebnisse.", results: "Ergebnisse", prev: "Zurück", next: "Weiter" },
+};
+
+async function search(q: string, locale: string, page: number): Promise<Hit[]> {
+  const base = process.env.NEXT_PUBLIC_SUPABASE_URL!;
+  const anon = process.env.NEXT_PUBLIC_SUPABASE_ANON_KEY!;
+  const res = await fetch(`${base}/rest/v1/rpc/search_content`, {
+    method: "POST",
+    headers: { apikey: anon, Authorization: `Bearer ${anon}`, "Content-Type": "application/json" },
+    body: JSON.stringify({ q, p_lang: locale, p_limit: PAGE_SIZE, p_offset: page * PAGE_SIZE, p_max_candidates: MAX_CANDIDATES }),
+    cache: "no-store",
+  });
+  if (!res.ok) throw new Error("search failed");
+  return res.json();
+}
+
+// lo snippet delimita i match con [[ ]]: niente HTML dal database
+function Snippet({ text }: { text: string }) {
+  const parts = text.split(/\\[\\[|\\]\\]/);
+  return <>{parts.map((p, i) => (i % 2 ? <mark key={i}>{p}</mark> : <span key={i}>{p}</span>))}</>;
+}
+
+export default async function SearchPage({ params, searchParams }: {
+  params: { locale: string };
+  searchParams: { q?: string; page?: string };
+}) {
+  const locale = params.locale;
+  if (!LOCALES.includes(locale)) notFound();
+  const t = LABELS[locale];
+
+  const q = (searchParams?.q ?? "").trim().slice(0, 100);
+  const page = Math.max(0, parseInt(searchParams?.page ?? "0", 10) || 0);
+  const hits = q.length >= 2 ? await search(q, locale, page) : [];
+  const total = hits[0]?.total ?? 0;
+  const totalPages = Math.max(1, Math.ceil(total / PAGE_SIZE));
+  const href = (p: number) => `/${locale}/search?q=${encodeURIComponent(q)}&page=${p}`;
+
+  return (
+    <main className="mx-auto max-w-3xl px-4 py-8">
+      <h1 className="mb-6 text-3xl font-bold">{t.title}</h1>
+
+      <form action={`/${locale}/search`} method="get" role="search" className="mb-8 flex gap-2">
+        <input
+          type="search"
+          name="q"
+          defaultValue={q}
+          placeholder={t.placeholder}
+          autoFocus
+          className="flex-1 rounded-xl border px-4 py-2"
+        />
+        <button type="submit" className="rounded-xl border px-4 py-2">{t.submit}</button>
+      </form>
+
+      {q.length >= 2 && (
+        hits.length === 0 ? (
+          <p className="text-gray-600">{t.empty}</p>
+        ) : (
+          <>
+            <p className="mb-4 text-sm text-gray-500">
+              {total >= MAX_CANDIDATES ? `${MAX_CANDIDATES}+` : total} {t.results}
+            </p>
+            <ul className="space-y-6">
+              {hits.map((h) => (
+                <li key={`${h.kind}:${h.id}`}>
+                  <Link
+                    href={h.kind === "news" ? `/${h.lang}/news/${encodeURIComponent(h.slug)}` : `/${h.lang}/blog/${encodeURIComponent(h.slug)}`}
+                    className="text-lg font-semibold hover:underline"
+                  >
+                    {h.title}
+                  </Link>
+                  {h.snippet && <p className="mt-1 text-gray-700"><Snippet text={h.snippet} /></p>}
+                </li>
+              ))}
+            </ul>
+
+            <nav aria-label="Pagination" className="mt-8 flex items-center justify-between">
+              <Link
+                aria-disabled={page === 0}
+                className={`rounded-xl border px-3 py-2 text-sm ${page === 0 ? "pointer-events-none opacity-50" : ""}`}
+                href={href(Math.max(0, page - 1))}
+              >
+                ◀ {t.prev}
+              </Link>
+              <span className="text-sm">{page + 1} / {totalPages}</span>
+              <Link
+                aria-disabled={page + 1 >= totalPages}
+                className={`rounded-xl border px-3 py-2 text-sm ${page + 1 >= totalPages ? "pointer-events-none opacity-50" : ""}`}
+                href={href(page + 1)}
+              >
+                {t.next} ▶
+              </Link>
+            </nav>
+          </>
+        )
+      )}
+    </main>
+  );
+}
+"""
+
+# bottone lente inattivo -> link alla pagina di ricerca (stesse classi e contenuto)
+HEADER_BUTTON_RX = re.compile(r'<button(\s+aria-label="(?:Search|Cerca)")([^>]*)>(.*?)</button>', re.S)
+
+def link_header_search() -> str:
+    if not SITE_HEADER.exists():
+        return "SKIP components/SiteHeader.tsx (assente)"
+    src = SITE_HEADER.read_text(encoding="utf-8", errors="replace")
+    if "/search`}" in src:
+        return "OK   components/SiteHeader.tsx"
+    new, n = HEADER_BUTTON_RX.subn(
+        lambda m: f'<Link href={{`/${{locale || "it"}}/search`}}{m.group(1)}{m.group(2)}>{m.group(3)}</Link>',
+        src, count=1,
+    )
+    if not n:
+        return "WARN components/SiteHeader.tsx: bottone di ricerca non trovato"
+    if 'from "next/link"' not in new and "from 'next/link'" not in new:
+        # dopo l'eventuale direttiva "use client", che deve restare la prima istruzione
+        m = re.search(r"""^\s*(?://[^\n]*\n\s*)*["']use client["'];?\n""", new)
+        at = m.end() if m else 0
+        new = new[:at] + 'import Link from "next/link";\n' + new[at:]
+    write(SITE_HEADER, new)
+    return "PATCH components/SiteHeader.tsx"
+
+def main():
+    ensure_file(SEARCH_PAGE, SEARCH_PAGE_TSX)
+    header = link_header_search()
+
+    # i18n minime
+    upsert_i18n("it", {"search": {"title": "Cerca", "placeholder": "Cerca news e articoli…", "empty": "Nessun risultato."}})
+    upsert_i18n("en", {"search": {"title": "Search", "placeholder": "Search news and articles…", "empty": "No results."}})
+    print(f"[INFO] {header}")
+    patch_engine.apply(OPS, phase="PL-8")
+    print("[OK] PL-8 scaffold applicato (pagina search, lente header, i18n) – richiede la migrazione 0005")
+
+if __name__ == "__main__":
+    main()
@@ -9,7 +9,10 @@ Template standard per fasi PL-* con TIMER integrato.
 - --apply        : scrive/aggiorna file + worklog
 - --use-timer    : calcola durata dal timer e sovrascrive CONFIG.duration
 - --git          : esegue git add/commit automatico
-- --dry-run      : anteprima senza modifiche
+- --dry-run      : anteprima senza modifiche (diff unificato dei file)
+
+I file della fase passano da patch_engine: batch atomico, file identici non
+toccati, append idempotenti per marcatore, manifest in reports/patch_manifest.json.
 
 USO TIPICO:
   1) .\.venv\Scripts\python.exe tools\pl_template.py --start
@@ -27,14 +30,11 @@ import subprocess
 import sys
 import textwrap
 
-# ========================= CONFIG FASE (personalizza qui) ===================
+import patch_engine
+import worklog_model
+from patch_engine import FileOp   # FileOp(path, content, mode="w"|"a", marker=None)
 
-@dataclass
-class FileOp:
-    path: str
-    content: str
-    mode: str = "w"        # "w" = riscrivi, "a" = append
-    ensure_dir: bool = True
+# ========================= CONFIG FASE (personalizza qui) ===================
 
 @dataclass
 class Config:
@@ -88,7 +88,7 @@ export default function SiteHeader() {
     <div className="sticky top-0 z-40 w-full bg-white/90 backdrop-blur border-b border-gray-100">
       <div className="mx-auto max-w-6xl px-4 md:px-6">
         <div className="h-16 md:h-20 flex items-center justify-between">
-          <button aria-label="Search" className="p-2 rounded hover:bg-gray-100"><IconSearch /></button>
+          <Link href={`/${locale || "it"}/search`} aria-label="Search" className="p-2 rounded hover:bg-gray-100"><IconSearch /></Link>
           <Link href={`/${locale || ""}`} className="inline-flex items-center">
             <span className="sr-only">Home</span>
             <Image src="/logo-edunova.png" alt="Edunovà" width={200} height={48} className="h-8 md:h-10 w-auto" priority />
@@ -133,7 +133,8 @@ CONFIG = Config(
     files=[
         FileOp(path="webapp/components/SiteHeader.tsx", content=SITE_HEADER),
         FileOp(path="webapp/components/SiteFooter.tsx", content=SITE_FOOTER),
-        FileOp(path="webapp/app/globals.css", content=EDITORIAL_CSS, mode="a"),
+        FileOp(path="webapp/app/globals.css", content=EDITORIAL_CSS, mode="a",
+               marker="/* === PL-5 header/footer basics"),
     ],
     json_patterns=["webapp/messages/*.json"],
     worklog_path="worklog.md",
@@ -152,20 +153,16 @@ def glob_many(patterns: list[str]) -> list[Path]:
             uniq.append(p); seen.add(p)
     return uniq
 
+def phase_of(cfg: Config) -> str:
+    return worklog_model.parse_header(f"{cfg.date}{worklog_model.SEP}{cfg.title}")[1]
+
+def write_files(cfg: Config, *, dry: bool=False) -> list[str]:
+    """Tutti i file della fase in un batch; ritorna i path effettivamente cambiati."""
+    changes = patch_engine.apply(cfg.files, phase=phase_of(cfg), dry=dry)
+    return [c.rel for c in changes if c.changed]
+
 def write_file(op: FileOp, *, dry: bool=False) -> None:
-    path = ROOT / op.path
-    if op.ensure_dir:
-        path.parent.mkdir(parents=True, exist_ok=True)
-    action = "APPEND" if op.mode == "a" and path.exists() else "WRITE"
-    if dry:
-        print(f"[DRY] {action}: {path}")
-        return
-    if op.mode == "a" and path.exists():
-        with path.open("a", encoding="utf-8", newline="\n") as f:
-            f.write(op.content)
-    else:
-        path.write_text(op.content, encoding="utf-8", newline="\n")
-    print(f"[OK]  {action}: {path.relative_to(ROOT)}")
+    patch_engine.apply([op], dry=dry)
 
 def validate_json(patterns: list[str]) -> None:
     errs = []
@@ -181,18 +178,12 @@ def validate_json(patterns: list[str]) -> None:
 
 def update_worklog(cfg: Config, *, dry: bool=False) -> None:
     wl = ROOT / cfg.worklog_path
-    lines = [
-        f"### 📌 {cfg.date} – {cfg.title}",
-        *[f"- {b}" for b in cfg.bullets],
-        f"⏱ {cfg.duration}",
-    ]
-    entry = "\n".join(lines) + "\n"
+    d, phase, title = worklog_model.parse_header(f"{cfg.date}{worklog_model.SEP}{cfg.title}")
+    entry = worklog_model.Entry(d, phase, title, list(cfg.bullets), worklog_model.parse_minutes(cfg.duration) or 0)
     if dry:
-        print("[DRY] worklog append:\n" + entry); return
-    if not wl.exists():
-        wl.write_text("# Worklog – ICA Next.js + Supabase\n", encoding="utf-8", newline="\n")
-    with wl.open("a", encoding="utf-8", newline="\n") as f:
-        f.write("\n" + entry)
+        print("[DRY] worklog append:\n" + worklog_model.dumps(worklog_model.Worklog([entry]))); return
+    # append sotto lock: altri script del worklog possono scrivere nella stessa fase
+    worklog_model.submit(wl, [entry], "append")
     print(f"[OK]  worklog aggiornato: {wl.relative_to(ROOT)}")
 
 def run(cmd: list[str]) -> int:
@@ -274,10 +265,7 @@ def main() -> None:
     else:
         print(f"[INFO] Durata da config: {cfg.duration}")
 
-    touched = []
-    for op in cfg.files:
-        write_file(op, dry=args.dry_run)
-        touched.append(op.path)
+    touched = write_files(cfg, dry=args.dry_run)
 
     if not args.dry_run:
         validate_json(cfg.json_patterns)
@@ -1,13 +1,20 @@
 # tools/preflight.py
 from __future__ import annotations
-import os, sys, json, re, urllib.request, urllib.error, ssl
+import os, sys, json, re, time, argparse
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Tuple, List, Dict
+from typing import Callable, Tuple, List, Dict, Optional
 from base64 import b64encode
 from pl_gitignore_check import ensure_gitignore
+from supabase_rest import SupabaseRest, RestError
+from check_cache import CheckCache
+from project_index import get_index
 
 ROOT = Path(__file__).resolve().parents[1]    # repo root
 WEBAPP = ROOT / "webapp"
+CACHE_FILE = ROOT / "reports" / "preflight_cache.json"
+IDX = get_index(ROOT)   # snapshot condiviso di webapp/ (un solo walk)
 
 REQUIRED_ENV = [
     "NEXT_PUBLIC_SUPABASE_URL",
@@ -32,9 +39,107 @@ def ok(msg):   print(f"[OK]  {msg}")
 def warn(msg): print(f"[WARN]{msg}")
 def err(msg):  print(f"[ERR] {msg}")
 
+# -------------------- Registro dei check --------------------
+# Ogni check dichiara da quali altri check dipende; quelli indipendenti
+# girano in parallelo su un thread pool. L'output di ogni check è
+# bufferizzato in un Report e stampato alla fine nell'ordine di registrazione.
+# I check che dichiarano `inputs` (file locali) sono in cache: se nessun input
+# è cambiato dall'ultima esecuzione si riusa il verdetto salvato in reports/.
+
+class Report:
+    def __init__(self) -> None:
+        self.lines: List[str] = []
+        self.nocache = False   # il check ha modificato qualcosa: non salvare il verdetto
+    def ok(self, msg):   self.lines.append(f"[OK]  {msg}")
+    def warn(self, msg): self.lines.append(f"[WARN]{msg}")
+    def err(self, msg):  self.lines.append(f"[ERR] {msg}")
+    def info(self, msg): self.lines.append(msg)
+
+@dataclass
+class Check:
+    name: str
+    fn: Callable[[Report, Dict], bool]
+    deps: Tuple[str, ...] = ()
+    inputs: Optional[Callable[[], List[Path]]] = None
+
+@dataclass
+class CheckResult:
+    name: str
+    ok: bool
+    lines: List[str] = field(default_factory=list)
+    seconds: float = 0.0
+    skipped: bool = False
+    cached: bool = False
+
+CHECKS: List[Check] = []
+
+def check(name: str, deps: Tuple[str, ...] = (), inputs: Optional[Callable[[], List[Path]]] = None):
+    """Decoratore: registra fn(rep, ctx) -> bool come check `name`.
+    `inputs` ritorna i file letti dal check (abilita la cache)."""
+    def deco(fn):
+        CHECKS.append(Check(name, fn, tuple(deps), inputs))
+        return fn
+    return deco
+
+def _run_one(c: Check, ctx: Dict, cache: Optional[CheckCache] = None) -> CheckResult:
+    t0 = time.perf_counter()
+    # il sorgente del check fa parte degli input: cambiare la logica invalida la cache
+    inputs = (c.inputs() + [Path(__file__)]) if (cache and c.inputs) else None
+    if inputs:
+        hit = cache.get(c.name, inputs)
+        if hit is not None:
+            return CheckResult(c.name, hit["ok"], hit["lines"], time.perf_counter() - t0, cached=True)
+    rep = Report()
+    try:
+        passed = bool(c.fn(rep, ctx))
+    except Exception as e:
+        rep.err(f"{c.name}: eccezione {type(e).__name__}: {e}")
+        passed = False
+        rep.nocache = True
+    if inputs and not rep.nocache:
+        cache.put(c.name, inputs, {"ok": passed, "lines": rep.lines})
+    return CheckResult(c.name, passed, rep.lines, time.perf_counter() - t0)
+
+def run_checks(checks: List[Check], ctx: Dict, workers: int = 8,
+               cache: Optional[CheckCache] = None) -> Dict[str, CheckResult]:
+    """Esegue i check rispettando le dipendenze; un check la cui dipendenza fallisce viene saltato."""
+    names = {c.name for c in checks}
+    for c in checks:
+        unknown = [d for d in c.deps if d not in names]
+        if unknown:
+            raise ValueError(f"Check '{c.name}': dipendenze sconosciute {unknown}")
+
+    results: Dict[str, CheckResult] = {}
+    pending = {c.name: c for c in checks}
+    running = {}
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        while pending or running:
+            progressed = True
+            while progressed:
+                progressed = False
+                for name, c in list(pending.items()):
+                    if not all(d in results for d in c.deps):
+                        continue
+                    del pending[name]
+                    progressed = True
+                    failed = [d for d in c.deps if not results[d].ok]
+                    if failed:
+                        results[name] = CheckResult(name, False, [f"[SKIP] {name}: dipende da {', '.join(failed)}"], skipped=True)
+                    else:
+                        running[pool.submit(_run_one, c, ctx, cache)] = c
+            if not running:
+                if pending:
+                    raise ValueError(f"Dipendenze cicliche tra i check: {', '.join(pending)}")
+                break
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for fut in done:
+                c = running.pop(fut)
+                results[c.name] = fut.result()
+    return results
+
+# -------------------- Helper --------------------
 def read_env_local(path: Path) -> Dict[str, str]:
     if not path.exists():
-        err(f".env.local non trovato: {path}")
         return {}
     out = {}
     for line in path.read_text(encoding="utf-8").splitlines():
@@ -56,100 +161,183 @@ def validate_env(env: Dict[str,str]) -> Tuple[bool, str]:
         return False, "Anon key troppo corta"
     return True, "Env ok"
 
-def http_get(url: str, headers: Dict[str,str], timeout=6) -> Tuple[int, bytes]:
-    req = urllib.request.Request(url, headers=headers)
-    ctx = ssl.create_default_context()
-    try:
-        with urllib.request.urlopen(req, timeout=timeout, context=ctx) as r:
-            return r.getcode(), r.read()
-    except urllib.error.HTTPError as e:
-        return e.code, e.read() if e.fp else b""
-    except Exception:
-        return 0, b""
-
-def check_supabase(env: Dict[str,str]) -> Tuple[bool,str,List[str]]:
-    url  = env["NEXT_PUBLIC_SUPABASE_URL"].rstrip("/")
-    key  = env["NEXT_PUBLIC_SUPABASE_ANON_KEY"]
-    hdrs = {
-        "apikey": key,
-        "Authorization": f"Bearer {key}",
-        "Accept": "application/json",
-    }
-    # semplice ping REST
-    code,_ = http_get(f"{url}/rest/v1/", hdrs)
-    if code in (200, 401, 404):  # 401/404 è ok: endpoint esiste
-        ok("Connessione Supabase REST raggiungibile")
-    else:
-        return False, f"Impossibile raggiungere REST (code={code})", []
+# -------------------- Check --------------------
+@check("env")
+def check_env(rep: Report, ctx: Dict) -> bool:
+    path = WEBAPP / ".env.local"
+    if not path.exists():
+        rep.err(f".env.local non trovato: {path}")
+    env = read_env_local(path)
+    ctx["env"] = env
+    ok_env, msg = validate_env(env)
+    if ok_env:
+        rep.ok(msg)
+        # client keep-alive condiviso dai check di rete (thread-safe)
+        ctx["rest"] = SupabaseRest.from_env(env, timeout=6)
+    else: rep.err(msg)
+    return ok_env
 
-    # Leggo gli slug per cercare duplicati (serve SELECT pubblica sulla tabella news)
-    code, body = http_get(f"{url}/rest/v1/news?select=slug", hdrs)
-    if code not in (200, 206):
-        return False, f"SELECT news fallita (code={code}). RLS/permessi?", []
-    try:
-        rows = json.loads(body.decode("utf-8"))
-    except Exception:
-        return False, "Risposta REST non JSON", []
-    slugs = [r.get("slug","") for r in rows if isinstance(r, dict)]
-    dups = sorted({s for s in slugs if s and slugs.count(s) > 1})
-    return True, "SELECT ok", dups
-
-def check_files():
+@check("files", inputs=lambda: list(CRITICAL_FILES))
+def check_files(rep: Report, ctx: Dict) -> bool:
     all_ok = True
     for p in CRITICAL_FILES:
-        if p.exists():
-            ok(f"File presente: {p.relative_to(ROOT)}")
+        if IDX.exists(p):
+            rep.ok(f"File presente: {p.relative_to(ROOT)}")
         else:
-            err(f"File mancante: {p.relative_to(ROOT)}"); all_ok = False
+            rep.err(f"File mancante: {p.relative_to(ROOT)}"); all_ok = False
     return all_ok
 
-def check_i18n():
+@check("i18n", inputs=lambda: list(I18N_FILES))
+def check_i18n(rep: Report, ctx: Dict) -> bool:
     all_ok = True
     for p in I18N_FILES:
         try:
-            json.loads(p.read_text(encoding="utf-8-sig"))
-            ok(f"JSON valido: {p.relative_to(ROOT)}")
+            txt = IDX.read_text(p, encoding="utf-8-sig")
+            if txt is None:
+                raise FileNotFoundError("file mancante")
+            json.loads(txt)
+            rep.ok(f"JSON valido: {p.relative_to(ROOT)}")
         except Exception as e:
-            err(f"JSON non valido: {p.relative_to(ROOT)} – {e}"); all_ok=False
+            rep.err(f"JSON non valido: {p.relative_to(ROOT)} – {e}"); all_ok=False
     return all_ok
 
-def check_next_config():
+@check("next_config", inputs=lambda: [WEBAPP / "next.config.mjs"])
+def check_next_config(rep: Report, ctx: Dict) -> bool:
     path = WEBAPP / "next.config.mjs"
-    if not path.exists():
-        warn("next.config.mjs non trovato (ok se non usi next/image esterni)")
+    if not IDX.exists(path):
+        rep.warn("next.config.mjs non trovato (ok se non usi next/image esterni)")
         return True
-    s = path.read_text(encoding="utf-8", errors="ignore")
+    s = IDX.read_text(path, encoding="utf-8", errors="ignore")
     if "placehold.co" in s or "remotePatterns" in s or "images:" in s:
-        ok("next.config.mjs: configurazione immagini esterne presente")
+        rep.ok("next.config.mjs: configurazione immagini esterne presente")
         return True
-    warn("next.config.mjs: non vedo host immagini esterni (es. placehold.co)")
+    rep.warn("next.config.mjs: non vedo host immagini esterni (es. placehold.co)")
     return True
 
+# gitignore: ex blocco "auto-added by pl6h_gitignore_integration.py", ora check registrato
+@check("gitignore", inputs=lambda: [ROOT / ".gitignore", Path(__file__).with_name("pl_gitignore_check.py")])
+def check_gitignore(rep: Report, ctx: Dict) -> bool:
+    status, added = ensure_gitignore(auto_fix=True)
+    if status == "OK":
+        rep.ok(".gitignore completo")
+    elif status == "PATCH":
+        rep.info(f"[PATCH] .gitignore aggiornato (+{added})")
+        rep.nocache = True
+    else:
+        rep.warn(f"Mancano {added} regole in .gitignore (no auto-fix)")
+    return True
+
+@check("supabase_rest", deps=("env",))
+def check_supabase_rest(rep: Report, ctx: Dict) -> bool:
+    # semplice ping REST
+    code = ctx["rest"].ping()
+    if code in (200, 401, 404):  # 401/404 è ok: endpoint esiste
+        rep.ok("Connessione Supabase REST raggiungibile")
+        return True
+    rep.err(f"Impossibile raggiungere REST (code={code})")
+    return False
+
+# Modalità server: Postgres raggruppa (slug, lang) e restituisce solo i gruppi duplicati.
+DUP_SLUGS_RPC = "news_duplicate_slugs"
+DUP_SLUGS_MIGRATION = ROOT / "db" / "migrations" / "0002_news_duplicate_slugs.sql"
+
+def scan_duplicate_slugs(rows) -> Dict[Tuple[str, str], int]:
+    """Conteggio lineare con hash map su un iterabile di righe {slug, lang} (anche in streaming)."""
+    counts: Dict[Tuple[str, str], int] = {}
+    for r in rows:
+        if not isinstance(r, dict):
+            continue
+        slug = r.get("slug") or ""
+        if not slug:
+            continue
+        k = (slug, r.get("lang") or "")
+        counts[k] = counts.get(k, 0) + 1
+    return {k: n for k, n in counts.items() if n > 1}
+
+def duplicate_slugs_stream(rest: SupabaseRest, page_size: int) -> Dict[Tuple[str, str], int]:
+    # iter_rows pagina via Range e decodifica in streaming: in memoria solo la pagina corrente.
+    # Ordine totale (id chiude i pari): senza order le pagine a offset non sono stabili tra
+    # una richiesta e l'altra e una riga può comparire in due pagine o in nessuna
+    params = {"select": "slug,lang", "order": "slug.asc,lang.asc,id.asc"}
+    return scan_duplicate_slugs(rest.iter_rows("news", params, page_size=page_size))
+
+def duplicate_slugs_server(rest: SupabaseRest) -> Dict[Tuple[str, str], int]:
+    code, _, body = rest.request("POST", f"rpc/{DUP_SLUGS_RPC}", json_body={})
+    if code == 404:
+        raise LookupError(f"RPC {DUP_SLUGS_RPC} assente: applica le migrazioni con `python Tools/migrate.py up`")
+    if code >= 400:
+        raise RuntimeError(f"RPC {DUP_SLUGS_RPC} fallita (code={code})")
+    return {(r["slug"], r.get("lang") or ""): int(r["n"]) for r in json.loads(body.decode("utf-8") or "[]")}
+
+@check("supabase_slugs", deps=("env",))
+def check_supabase_slugs(rep: Report, ctx: Dict) -> bool:
+    # Cerco slug duplicati per (slug, lang): serve SELECT pubblica sulla tabella news (o la RPC in modalità server)
+    mode = ctx.get("dup_mode", "stream")
+    try:
+        if mode == "server":
+            dups = duplicate_slugs_server(ctx["rest"])
+        else:
+            dups = duplicate_slugs_stream(ctx["rest"], ctx.get("page_size", 1000))
+    except LookupError as e:
+        rep.err(str(e))
+        return False
+    except RestError as e:
+        rep.err(f"SELECT news fallita (code={e.status}). RLS/permessi?")
+        return False
+    except ValueError:
+        rep.err("Risposta REST non JSON")
+        return False
+    except Exception as e:
+        rep.err(f"Scansione slug fallita: {e}")
+        return False
+    rep.ok(f"SELECT ok (duplicati slug, modalità {mode})")
+    if dups:
+        rep.err("Slug duplicati in news: " + ", ".join(f"{lang}:{slug} (x{n})" for (slug, lang), n in sorted(dups.items())))
+        rep.info("Suggerimento: rinomina/normalizza gli slug o applica il fix SQL proposto.")
+        return False
+    return True
+
+# -------------------- Main --------------------
 def main():
+    ap = argparse.ArgumentParser(description="Preflight ICA (check paralleli)")
+    ap.add_argument("--workers", type=int, default=8, help="Thread per i check indipendenti")
+    ap.add_argument("--dup-mode", choices=("stream", "server"), default="stream",
+                    help="Duplicati slug: scansione paginata lato client o RPC Postgres")
+    ap.add_argument("--page-size", type=int, default=1000, help="Righe per pagina nella scansione slug")
+    ap.add_argument("--dup-sql", action="store_true", help="Stampa l'SQL della RPC news_duplicate_slugs ed esce")
+    ap.add_argument("--force", action="store_true", help="Ignora la cache dei check (reports/preflight_cache.json)")
+    args = ap.parse_args()
+
+    if args.dup_sql:
+        print(DUP_SLUGS_MIGRATION.read_text(encoding="utf-8")); return
+
     print(f"[START] Preflight in: {ROOT}")
     if not WEBAPP.exists():
         err(f"Cartella webapp non trovata: {WEBAPP}"); sys.exit(2)
 
-    env = read_env_local(WEBAPP/".env.local")
-    ok_env, msg = validate_env(env)
-    if ok_env: ok(msg)
-    else: err(msg)
-
-    files_ok = check_files()
-    i18n_ok  = check_i18n()
-    cfg_ok   = check_next_config()
+    ctx: Dict = {"dup_mode": args.dup_mode, "page_size": args.page_size}
+    cache = CheckCache(CACHE_FILE, force=args.force, root=ROOT, index=IDX)
+    t0 = time.perf_counter()
+    try:
+        results = run_checks(CHECKS, ctx, workers=args.workers, cache=cache)
+    finally:
+        if "rest" in ctx: ctx["rest"].close()
+    wall = time.perf_counter() - t0
+    cache.save()
 
-    supa_ok, supa_msg, dups = (False,"skip (env KO)",[])
-    if ok_env:
-        supa_ok, supa_msg, dups = check_supabase(env)
-        if supa_ok: ok(supa_msg)
-        else: err(supa_msg)
+    for c in CHECKS:
+        for line in results[c.name].lines:
+            print(line)
 
-    if dups:
-        err(f"Slug duplicati in news: {', '.join(dups)}")
-        print("Suggerimento: rinomina/normalizza gli slug o applica il fix SQL proposto.")
+    print("\n===== TEMPI =====")
+    for c in CHECKS:
+        r = results[c.name]
+        state = "SKIP" if r.skipped else ("OK" if r.ok else "KO")
+        print(f"  {c.name:<16} {state:<4} {r.seconds*1000:8.1f} ms{'  (cache)' if r.cached else ''}")
+    print(f"  {'totale (wall)':<16} {'':<4} {wall*1000:8.1f} ms")
+    print(f"  cache: {cache.hits} hit / {cache.misses} miss{' (--force)' if args.force else ''}")
 
-    all_green = ok_env and files_ok and i18n_ok and cfg_ok and supa_ok and not dups
+    all_green = all(r.ok for r in results.values())
     print("\n===== RISULTATO =====")
     if all_green:
         print("✅ Preflight VERDE: puoi procedere.")
@@ -160,18 +348,3 @@ def main():
 
 if __name__ == "__main__":
     main()
-
-# --- auto-added by pl6h_gitignore_integration.py ---
-if __name__ == "__main__":
-    try:
-        from pl_gitignore_check import ensure_gitignore
-        status, added = ensure_gitignore(auto_fix=True)
-        if status == "OK":
-            print("[OK] .gitignore completo")
-        elif status == "PATCH":
-            print(f"[PATCH] .gitignore aggiornato (+{added})")
-        else:
-            print(f"[WARN] Mancano {added} regole in .gitignore (no auto-fix)")
-    except Exception as e:
-        print("[WARN] .gitignore check failed:", e)
-# --- end auto-added ---
@@ -0,0 +1,171 @@
+# -*- coding: utf-8 -*-
+"""
+project_index.py
+Indice in memoria del progetto, condiviso da tutti i verificatori.
+- Un solo walk di webapp/ con os.scandir (pota node_modules, .next, .git)
+- Per ogni file: path relativo, size, mtime (dallo stat del walk)
+- Contenuti letti in modo lazy, una volta sola, e tenuti in cache
+- Path fuori da webapp/ (tools/, worklog.md…) risolti con uno stat singolo, anch'esso in cache
+
+Uso:
+  from project_index import get_index
+  idx = get_index(ROOT)
+  idx.exists(WEBAPP / "app" / "globals.css")
+  idx.read_text(WEBAPP / "messages" / "it.json", encoding="utf-8-sig")
+  for e in idx.files(".tsx"): ...
+"""
+from __future__ import annotations
+import os
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Union
+
+PRUNE_DIRS = {"node_modules", ".next", ".git"}
+
+@dataclass(slots=True)
+class Entry:
+    rel: str          # path relativo alla root, separatore "/"
+    path: Path
+    size: int
+    mtime_ns: int
+    is_dir: bool
+
+class ProjectIndex:
+    def __init__(self, root: Path, base: str = "webapp", prune: set[str] = PRUNE_DIRS):
+        self.root = Path(root).resolve()
+        self.base = base
+        self.prune = set(prune)
+        self._entries: Optional[Dict[str, Entry]] = None
+        self._extra: Dict[str, Optional[Entry]] = {}
+        self._bytes: Dict[str, Optional[bytes]] = {}
+        self._lock = threading.RLock()
+        self.stats = {"walks": 0, "scanned": 0, "reads": 0, "extra_stats": 0}
+
+    # ---------- walk ----------
+    def _walk(self) -> Dict[str, Entry]:
+        entries: Dict[str, Entry] = {}
+        base = self.root / self.base
+        stack = [(str(base), self.base)]
+        while stack:
+            d, rel_d = stack.pop()
+            try:
+                it = os.scandir(d)
+            except OSError:
+                continue
+            with it:
+                for de in it:
+                    rel = f"{rel_d}/{de.name}"
+                    try:
+                        is_dir = de.is_dir(follow_symlinks=False)
+                        st = de.stat(follow_symlinks=False)
+                    except OSError:
+                        continue
+                    self.stats["scanned"] += 1
+                    entries[rel] = Entry(rel, Path(de.path), st.st_size, st.st_mtime_ns, is_dir)
+                    if is_dir and de.name not in self.prune:
+                        stack.append((de.path, rel))
+        self.stats["walks"] += 1
+        if base.is_dir():
+            st = base.stat()
+            entries[self.base] = Entry(self.base, base, st.st_size, st.st_mtime_ns, True)
+        return entries
+
+    @property
+    def entries(self) -> Dict[str, Entry]:
+        if self._entries is None:
+            with self._lock:
+                if self._entries is None:
+                    self._entries = self._walk()
+        return self._entries
+
+    def refresh(self) -> None:
+        """Invalida lo snapshot (da usare dopo che uno script ha scritto file)."""
+        with self._lock:
+            self._entries = None
+            self._extra.clear()
+            self._bytes.clear()
+
+    # ---------- lookup ----------
+    def rel(self, p: Union[str, Path]) -> str:
+        p = Path(p)
+        if p.is_absolute():
+            try:
+                p = p.relative_to(self.root)
+            except ValueError:
+                return p.as_posix()
+        return p.as_posix()
+
+    def _in_base(self, rel: str) -> bool:
+        if not (rel == self.base or rel.startswith(self.base + "/")):
+            return False
+        # i path dentro directory potate non sono nello snapshot
+        return not any(part in self.prune for part in rel.split("/")[1:-1])
+
+    def stat(self, p: Union[str, Path]) -> Optional[Entry]:
+        rel = self.rel(p)
+        if self._in_base(rel):
+            return self.entries.get(rel)
+        with self._lock:
+            if rel not in self._extra:
+                full = self.root / rel
+                try:
+                    st = full.stat()
+                    self._extra[rel] = Entry(rel, full, st.st_size, st.st_mtime_ns, full.is_dir())
+                except OSError:
+                    self._extra[rel] = None
+                self.stats["extra_stats"] += 1
+            return self._extra[rel]
+
+    def exists(self, p: Union[str, Path]) -> bool:
+        return self.stat(p) is not None
+
+    def is_file(self, p: Union[str, Path]) -> bool:
+        e = self.stat(p)
+        return e is not None and not e.is_dir
+
+    def read_bytes(self, p: Union[str, Path]) -> Optional[bytes]:
+        rel = self.rel(p)
+        with self._lock:
+            if rel in self._bytes:
+                return self._bytes[rel]
+        e = self.stat(rel)
+        data: Optional[bytes] = None
+        if e is not None and not e.is_dir:
+            try:
+                data = e.path.read_bytes()
+                self.stats["reads"] += 1
+            except OSError:
+                data = None
+        with self._lock:
+            self._bytes[rel] = data
+        return data
+
+    def read_text(self, p: Union[str, Path], encoding: str = "utf-8", errors: str = "strict") -> Optional[str]:
+        """Contenuto decodificato (None se assente); solleva UnicodeDecodeError come Path.read_text."""
+        data = self.read_bytes(p)
+        if data is None:
+            return None
+        return data.decode(encoding, errors)
+
+    def files(self, suffix: str = "", under: Optional[Union[str, Path]] = None) -> List[Entry]:
+        prefix = (self.rel(under).rstrip("/") + "/") if under is not None else ""
+        return sorted(
+            (e for e in self.entries.values()
+             if not e.is_dir and e.rel.endswith(suffix) and e.rel.startswith(prefix)),
+            key=lambda e: e.rel,
+        )
+
+    def __iter__(self) -> Iterator[Entry]:
+        return iter(self.entries.values())
+
+_INDEXES: Dict[Path, ProjectIndex] = {}
+_INDEXES_LOCK = threading.Lock()
+
+def get_index(root: Path, base: str = "webapp") -> ProjectIndex:
+    """Indice condiviso per processo: più verificatori nella stessa sessione fanno un solo walk."""
+    key = Path(root).resolve() / base
+    with _INDEXES_LOCK:
+        if key not in _INDEXES:
+            _INDEXES[key] = ProjectIndex(root, base)
+        return _INDEXES[key]
@@ -0,0 +1,226 @@
+# -*- coding: utf-8 -*-
+"""
+schema_snapshot.py
+Colonne delle tabelle/viste di public lette una volta sola e salvate in
+reports/schema_snapshot.json, per generare query con le colonne giuste già scritte
+nei template (niente richieste di prova a runtime con fallback su altre colonne).
+- Fonte "db":   catalogo Postgres (tabelle, viste e viste materializzate) via SUPABASE_DB_URL
+- Fonte "rest": OpenAPI di PostgREST (GET /rest/v1/) via webapp/.env.local
+- "auto":       db se configurato, altrimenti rest
+- Fonte "migrations": colonne ricostruite da db/migrations/*.sql (create table,
+  alter table add/drop/rename column), senza DB; le viste restano "non note"
+Se nessuna fonte è raggiungibile gli scaffold usano lo snapshot in cache o, in
+mancanza, le colonne delle migrazioni (non salvate come snapshot: alla prossima
+esecuzione si ritenta l'introspezione). Senza nemmeno le migrazioni si esce con
+errore invece di generare query con colonne non verificate.
+
+Uso:
+  python Tools/schema_snapshot.py                 # mostra lo snapshot (lo crea se manca)
+  python Tools/schema_snapshot.py --refresh       # rilegge lo schema
+  from schema_snapshot import load_schema
+  schema = load_schema()
+  schema.pick("news", "created_at", "id")         # prima colonna esistente
+  schema.select("news", ["id", "slug", "summary"])  # solo quelle esistenti
+"""
+from __future__ import annotations
+import argparse
+import json
+import re
+import sys
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+ROOT = Path(__file__).resolve().parents[1]
+SNAPSHOT = ROOT / "reports" / "schema_snapshot.json"
+
+CATALOG_SQL = """
+select c.relname, a.attname
+from pg_attribute a
+join pg_class c on c.oid = a.attrelid
+join pg_namespace n on n.oid = c.relnamespace
+where n.nspname = 'public' and c.relkind in ('r', 'p', 'v', 'm')
+  and a.attnum > 0 and not a.attisdropped
+order by c.relname, a.attnum
+"""
+
+class Schema:
+    """Mappa tabella -> colonne; una tabella assente significa "non so", non "non esiste"."""
+
+    def __init__(self, tables: Dict[str, List[str]], source: str = "none", created: str = ""):
+        self.tables = tables
+        self.source = source
+        self.created = created
+
+    def columns(self, table: str) -> Optional[List[str]]:
+        return self.tables.get(table)
+
+    def has(self, table: str, column: str) -> bool:
+        cols = self.tables.get(table)
+        return cols is None or column in cols
+
+    def pick(self, table: str, *candidates: str) -> str:
+        for c in candidates:
+            if self.has(table, c):
+                return c
+        raise KeyError(f"{table}: nessuna delle colonne {', '.join(candidates)}")
+
+    def select(self, table: str, wanted: List[str]) -> List[str]:
+        return [c for c in wanted if self.has(table, c)]
+
+def from_db(db_url: str) -> Dict[str, List[str]]:
+    import migrate
+    conn = migrate.connect(db_url)
+    try:
+        with conn.cursor() as cur:
+            cur.execute(CATALOG_SQL)
+            rows = cur.fetchall()
+    finally:
+        conn.close()
+    tables: Dict[str, List[str]] = {}
+    for rel, col in rows:
+        tables.setdefault(rel, []).append(col)
+    return tables
+
+def from_rest(env: Dict[str, str]) -> Dict[str, List[str]]:
+    from supabase_rest import SupabaseRest
+    with SupabaseRest.from_env(env, service=True) as rest:
+        spec = rest.get_json("")
+    return {name: list((d or {}).get("properties", {}))
+            for name, d in (spec.get("definitions") or {}).items()}
+
+# -------------------- schema dalle migrazioni --------------------
+
+DOLLAR_RX = re.compile(r"\$(\w*)\$.*?\$\1\$", re.S)          # corpi di funzione $$ ... $$
+NAME = r'(?:"?\w+"?\.)?"?(\w+)"?'
+CREATE_RX = re.compile(rf"^create\s+(?:unlogged\s+)?table\s+(?:if\s+not\s+exists\s+)?{NAME}\s*\((.*)\)", re.S | re.I)
+ALTER_RX = re.compile(rf"^alter\s+table\s+(?:if\s+exists\s+)?(?:only\s+)?{NAME}\s+(.*)$", re.S | re.I)
+ADD_RX = re.compile(r'^add\s+(?:column\s+)?(?:if\s+not\s+exists\s+)?"?(\w+)"?', re.I)
+DROP_RX = re.compile(r'^drop\s+(?:column\s+)?(?:if\s+exists\s+)?"?(\w+)"?', re.I)
+RENAME_RX = re.compile(r'^rename\s+(?:column\s+)?"?(\w+)"?\s+to\s+"?(\w+)"?', re.I)
+NOT_COLUMNS = {"constraint", "primary", "unique", "foreign", "check", "exclude", "like"}
+
+def _split_top(text: str, sep: str) -> List[str]:
+    """Split su `sep` fuori da parentesi e stringhe."""
+    out, buf, depth, quote = [], [], 0, False
+    for ch in text:
+        if ch == "'":
+            quote = not quote
+        elif not quote and ch == "(":
+            depth += 1
+        elif not quote and ch == ")":
+            depth -= 1
+        elif not quote and depth == 0 and ch == sep:
+            out.append("".join(buf).strip()); buf = []
+            continue
+        buf.append(ch)
+    out.append("".join(buf).strip())
+    return [x for x in out if x]
+
+def from_migrations(directory: Optional[Path] = None) -> Dict[str, List[str]]:
+    """Colonne delle tabelle applicando in ordine le migrazioni (stesso ordine di migrate.py up)."""
+    import migrate
+    tables: Dict[str, List[str]] = {}
+    for mig in migrate.load_migrations(directory or migrate.MIGRATIONS_DIR):
+        sql = re.sub(r"--[^\n]*", "", DOLLAR_RX.sub("''", mig.sql))
+        for stmt in _split_top(sql, ";"):
+            stmt = stmt.strip()
+            m = CREATE_RX.match(stmt)
+            if m:
+                cols = tables.setdefault(m.group(1).lower(), [])
+                for item in _split_top(m.group(2), ","):
+                    name = item.split()[0].strip('"').lower()
+                    if name not in NOT_COLUMNS and name not in cols:
+                        cols.append(name)
+                continue
+            m = ALTER_RX.match(stmt)
+            if not m or m.group(1).lower() not in tables:
+                continue
+            cols = tables[m.group(1).lower()]
+            for action in _split_top(m.group(2), ","):
+                if re.match(r"^(add|drop)\s+(constraint|primary|unique|foreign|check)\b", action, re.I):
+                    continue
+                if a := ADD_RX.match(action):
+                    if a.group(1).lower() not in cols:
+                        cols.append(a.group(1).lower())
+                elif a := DROP_RX.match(action):
+                    if a.group(1).lower() in cols:
+                        cols.remove(a.group(1).lower())
+                elif a := RENAME_RX.match(action):
+                    if a.group(1).lower() in cols:
+                        cols[cols.index(a.group(1).lower())] = a.group(2).lower()
+    return tables
+
+def introspect(source: str = "auto") -> tuple[Dict[str, List[str]], str]:
+    import migrate
+    from supabase_rest import load_env
+    if source == "migrations":
+        return from_migrations(), "migrations"
+    if source in ("auto", "db"):
+        try:
+            return from_db(migrate.load_db_url(None)), "db"
+        except (Exception, SystemExit) as e:   # URL mancante o psycopg2 assente: SystemExit
+            if source == "db":
+                raise RuntimeError(str(e))
+    return from_rest(load_env()), "rest"
+
+def save(schema: Schema, path: Path = SNAPSHOT) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    data = {"created": schema.created, "source": schema.source, "tables": schema.tables}
+    path.write_text(json.dumps(data, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
+
+def load_cached(path: Path = SNAPSHOT) -> Optional[Schema]:
+    if not path.exists():
+        return None
+    data = json.loads(path.read_text(encoding="utf-8"))
+    return Schema(data.get("tables") or {}, data.get("source", "?"), data.get("created", ""))
+
+def load_schema(refresh: bool = False, source: str = "auto", quiet: bool = False) -> Schema:
+    """Snapshot in cache; introspezione solo se manca o con refresh=True."""
+    cached = None if refresh else load_cached()
+    if cached is not None:
+        return cached
+    try:
+        tables, used = introspect(source)
+    except (Exception, SystemExit) as e:
+        fallback = load_cached()
+        if fallback is None:
+            tables = from_migrations()
+            if not tables:
+                raise SystemExit(f"[ERR] introspezione schema non riuscita ({e}) e nessuna migrazione in "
+                                 f"db/migrations: configura il DB/REST e rilancia con --refresh "
+                                 f"(python Tools/schema_snapshot.py --refresh)")
+            fallback = Schema(tables, "migrations", datetime.now().strftime("%Y%m%d-%H%M%S"))
+        if not quiet:
+            what = "snapshot precedente" if fallback.source != "migrations" else "colonne delle migrazioni"
+            print(f"[WARN] introspezione schema non riuscita ({e}): uso {what}; "
+                  f"aggiorna con `python Tools/schema_snapshot.py --refresh`")
+        return fallback
+    schema = Schema(tables, used, datetime.now().strftime("%Y%m%d-%H%M%S"))
+    if used != "migrations":
+        save(schema)
+    if not quiet:
+        where = SNAPSHOT.relative_to(ROOT) if used != "migrations" else "non salvato come snapshot"
+        print(f"[OK] schema da {used}: {len(tables)} relazioni -> {where}")
+    return schema
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description="Snapshot delle colonne dello schema public")
+    ap.add_argument("--refresh", action="store_true", help="Rilegge lo schema anche se lo snapshot esiste")
+    ap.add_argument("--source", choices=("auto", "db", "rest", "migrations"), default="auto")
+    ap.add_argument("--tables", nargs="*", help="Mostra solo queste tabelle")
+    args = ap.parse_args(argv)
+
+    schema = load_schema(args.refresh, args.source)
+    if not schema.tables:
+        print("[ERR] nessuno snapshot disponibile")
+        return 2
+    print(f"[INFO] fonte: {schema.source} | creato: {schema.created}")
+    for name in sorted(schema.tables):
+        if args.tables and name not in args.tables:
+            continue
+        print(f"  {name}: {', '.join(schema.tables[name])}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,181 @@
+# -*- coding: utf-8 -*-
+"""
+sitemap_build.py
+Sitemap statica a shard, stesso layout della modalità sharded di pl6a_seo_bootstrap.py:
+  <out>/sitemap.xml                       sitemap index (con lastmod per shard)
+  <out>/sitemaps/pages.xml                pagine statiche per lingua
+  <out>/sitemaps/<tabella>-<lingua>-<n>.xml  max 50k URL, ordinati per slug
+- Righe lette in streaming da Postgres (cursore lato server, memoria costante)
+- lastmod da updated_at, nello stesso formato della route Next (toISOString)
+- Riscrive solo gli shard cambiati e rimuove quelli non più prodotti
+
+Uso:
+  python Tools/sitemap_build.py --site https://www.example.org
+  python Tools/sitemap_build.py --out dist/sitemap --gzip
+Opzioni:
+  --db-url   default: SUPABASE_DB_URL / webapp/.env.db (come migrate.py)
+  --site     default: NEXT_PUBLIC_SITE_URL (env o webapp/.env.local)
+Exit codes: 0 OK, 2 errore.
+"""
+from __future__ import annotations
+import argparse
+import gzip
+import os
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+from urllib.parse import quote
+from xml.sax.saxutils import escape
+
+import migrate
+
+ROOT = Path(__file__).resolve().parents[1]
+ENV_LOCAL = ROOT / "webapp" / ".env.local"
+DEFAULT_OUT = ROOT / "dist" / "sitemap"
+
+LOCALES = ("it", "en", "fr", "es", "de")
+KINDS = {"news": "news", "articles": "blog"}   # tabella -> segmento di URL
+SHARD_SIZE = 50_000
+STATIC_PAGES = ("", "/privacy", "/newsletter")
+FETCH_SIZE = 5_000
+
+XML_HEAD = '<?xml version="1.0" encoding="UTF-8"?>\n'
+NS = "http://www.sitemaps.org/schemas/sitemap/0.9"
+
+def load_site_url(explicit: Optional[str]) -> str:
+    site = explicit or os.environ.get("NEXT_PUBLIC_SITE_URL")
+    if not site and ENV_LOCAL.exists():
+        for line in ENV_LOCAL.read_text(encoding="utf-8").splitlines():
+            if line.strip().startswith("NEXT_PUBLIC_SITE_URL="):
+                site = line.split("=", 1)[1].strip()
+    if not site:
+        raise SystemExit(f"[ERR] NEXT_PUBLIC_SITE_URL mancante (env, --site o {ENV_LOCAL})")
+    return site.rstrip("/")
+
+def iso_ms(ts: Optional[datetime]) -> Optional[str]:
+    """Come Date.toISOString(): UTC, millisecondi, suffisso Z."""
+    if ts is None:
+        return None
+    if ts.tzinfo is None:
+        ts = ts.replace(tzinfo=timezone.utc)
+    ts = ts.astimezone(timezone.utc)
+    return ts.strftime("%Y-%m-%dT%H:%M:%S.") + f"{ts.microsecond // 1000:03d}Z"
+
+def encode_component(s: str) -> str:
+    """Come encodeURIComponent di JavaScript."""
+    return quote(s, safe="!~*'()")
+
+def urlset_xml(entries: Iterable[Tuple[str, Optional[str]]]) -> str:
+    body = "\n".join(
+        f"<url><loc>{escape(loc)}</loc>" + (f"<lastmod>{lastmod}</lastmod>" if lastmod else "") + "</url>"
+        for loc, lastmod in entries
+    )
+    return f'{XML_HEAD}<urlset xmlns="{NS}">\n{body}\n</urlset>\n'
+
+def index_xml(site: str, shards: List[Tuple[str, Optional[str]]], ext: str = ".xml") -> str:
+    body = "\n".join(
+        f"<sitemap><loc>{escape(f'{site}/sitemaps/{sid}{ext}')}</loc>"
+        + (f"<lastmod>{lastmod}</lastmod>" if lastmod else "") + "</sitemap>"
+        for sid, lastmod in shards
+    )
+    return f'{XML_HEAD}<sitemapindex xmlns="{NS}">\n{body}\n</sitemapindex>\n'
+
+def stream_rows(conn, table: str) -> Iterator[Tuple[str, str, Optional[datetime]]]:
+    """(lang, slug, updated_at) dei contenuti pubblicati, in ordine di lingua e slug."""
+    with conn.cursor(name=f"sitemap_{table}") as cur:
+        cur.itersize = FETCH_SIZE
+        cur.execute(
+            f"select lang, slug, updated_at from public.{table} "
+            f"where published and slug is not null and lang = any(%s) order by lang, slug",
+            (list(LOCALES),),
+        )
+        yield from cur
+
+def shards_for(rows: Iterator[Tuple[str, str, Optional[datetime]]], table: str
+               ) -> Iterator[Tuple[str, List[Tuple[str, Optional[datetime]]]]]:
+    """Raggruppa lo stream in shard (tabella-lingua-n) da al massimo SHARD_SIZE righe."""
+    cur_lang, n, buf = None, 0, []
+    for lang, slug, updated in rows:
+        if lang != cur_lang or len(buf) >= SHARD_SIZE:
+            if buf:
+                yield f"{table}-{cur_lang}-{n}", buf
+            n = n + 1 if lang == cur_lang else 0
+            cur_lang, buf = lang, []
+        buf.append((slug, updated))
+    if buf:
+        yield f"{table}-{cur_lang}-{n}", buf
+
+def write_if_changed(path: Path, text: str, gz: bool) -> bool:
+    data = text.encode("utf-8")
+    if gz:
+        path = path.with_name(path.name + ".gz")
+        data = gzip.compress(data, mtime=0)   # mtime fisso: stesso contenuto -> stessi byte
+    if path.exists() and path.read_bytes() == data:
+        return False
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_bytes(data)
+    tmp.replace(path)
+    return True
+
+def build(conn, site: str, out: Path, gz: bool = False) -> Dict[str, int]:
+    shard_dir = out / "sitemaps"
+    stats = {"shards": 0, "urls": 0, "written": 0, "removed": 0}
+    produced: List[Tuple[str, Optional[str]]] = []
+
+    pages = urlset_xml((f"{site}/{l}{p}", None) for l in LOCALES for p in STATIC_PAGES)
+    stats["written"] += write_if_changed(shard_dir / "pages.xml", pages, gz)
+    produced.append(("pages", None))
+
+    for table, segment in KINDS.items():
+        for sid, rows in shards_for(stream_rows(conn, table), table):
+            lang = sid.split("-")[1]
+            xml = urlset_xml(
+                (f"{site}/{lang}/{segment}/{encode_component(slug)}", iso_ms(updated))
+                for slug, updated in rows
+            )
+            stats["written"] += write_if_changed(shard_dir / f"{sid}.xml", xml, gz)
+            latest = max((u for _, u in rows if u is not None), default=None)
+            produced.append((sid, iso_ms(latest)))
+            stats["urls"] += len(rows)
+
+    # shard non più prodotti (es. contenuti depubblicati): via, o il crawler li rileggerebbe
+    keep = {f"{sid}.xml" + (".gz" if gz else "") for sid, _ in produced}
+    for old in shard_dir.glob("*.xml.gz" if gz else "*.xml"):
+        if old.name not in keep:
+            old.unlink()
+            stats["removed"] += 1
+
+    stats["written"] += write_if_changed(out / "sitemap.xml", index_xml(site, produced, ".xml.gz" if gz else ".xml"), gz)
+    stats["shards"] = len(produced)
+    return stats
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description="Sitemap statica a shard da Postgres")
+    ap.add_argument("--db-url", help="Connessione Postgres (default: SUPABASE_DB_URL / webapp/.env.db)")
+    ap.add_argument("--site", help="URL pubblico del sito (default: NEXT_PUBLIC_SITE_URL)")
+    ap.add_argument("--out", type=Path, default=DEFAULT_OUT, help="Cartella di output")
+    ap.add_argument("--gzip", action="store_true", help="Scrive .xml.gz")
+    args = ap.parse_args(argv)
+
+    site = load_site_url(args.site)
+    t0 = time.perf_counter()
+    conn = migrate.connect(migrate.load_db_url(args.db_url))
+    conn.autocommit = False   # i cursori lato server vivono in una transazione
+    try:
+        stats = build(conn, site, args.out, args.gzip)
+    except Exception as e:
+        print(f"[ERR] {e}")
+        return 2
+    finally:
+        conn.rollback()
+        conn.close()
+    print(f"[OK] sitemap in {args.out}: {stats['shards']} shard, {stats['urls']} URL | "
+          f"scritti {stats['written']} | rimossi {stats['removed']} | "
+          f"{(time.perf_counter()-t0)*1000:.0f} ms")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,173 @@
+# -*- coding: utf-8 -*-
+"""
+static_params_export.py
+Manifest degli slug da prerenderizzare al build: i più recenti --top contenuti
+pubblicati per lingua, letti da generateStaticParams delle pagine di dettaglio
+(news/[slug], blog/[slug] tramite webapp/lib/staticParams.ts).
+  webapp/data/static-params/news.json
+  webapp/data/static-params/articles.json
+  { "exported_at": ..., "top": N, "locales": { "it": [{"slug", "updated_at"}, …] } }
+- Export completo: righe in streaming da un cursore lato server (ordinate per updated_at)
+- Export incrementale (default se il manifest esiste): solo le righe con updated_at
+  successivo all'ultimo export, unite al manifest (una depubblicazione aggiorna
+  updated_at e toglie lo slug; se una lingua resta sotto --top si rilegge tutta la
+  tabella per riempire il posto). Le cancellazioni fisiche le vede solo --full
+- Riscrive un manifest solo se cambia; il diff (aggiunti/aggiornati/rimossi e i path
+  da ricostruire) va in reports/static_params_diff.json
+
+Uso:
+  python Tools/static_params_export.py                 # incrementale
+  python Tools/static_params_export.py --full --top 200
+Opzioni:
+  --db-url   default: SUPABASE_DB_URL / webapp/.env.db (come migrate.py)
+Exit codes: 0 OK (anche senza modifiche), 2 errore.
+"""
+from __future__ import annotations
+import argparse
+import json
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import migrate
+
+ROOT = Path(__file__).resolve().parents[1]
+MANIFEST_DIR = ROOT / "webapp" / "data" / "static-params"
+DIFF_REPORT = ROOT / "reports" / "static_params_diff.json"
+
+LOCALES = ("it", "en", "fr", "es", "de")
+KINDS = {"news": "news", "articles": "blog"}   # tabella -> segmento di URL
+DEFAULT_TOP = 100
+FETCH_SIZE = 2_000
+CLOCK_SKEW = timedelta(seconds=5)   # transazioni ancora aperte all'export precedente
+
+Entry = Dict[str, str]              # {"slug", "updated_at"}
+Manifest = Dict[str, List[Entry]]   # lingua -> voci, updated_at decrescente
+
+def iso(ts: datetime) -> str:
+    if ts.tzinfo is None:
+        ts = ts.replace(tzinfo=timezone.utc)
+    return ts.astimezone(timezone.utc).isoformat(timespec="microseconds")
+
+def stream(conn, sql: str, params: tuple, name: str) -> Iterator[tuple]:
+    with conn.cursor(name=name) as cur:
+        cur.itersize = FETCH_SIZE
+        cur.execute(sql, params)
+        yield from cur
+
+def export_full(conn, table: str, top: int) -> Manifest:
+    """I `top` più recenti per lingua: un indice per lingua, poi solo le prime righe di ciascuna."""
+    out: Manifest = {l: [] for l in LOCALES}
+    sql = (f"select l.lang, t.slug, t.updated_at from unnest(%s::text[]) as l(lang) "
+           f"cross join lateral (select slug, updated_at from public.{table} "
+           f"where published and lang = l.lang and slug is not null "
+           f"order by updated_at desc, slug limit %s) t")
+    for lang, slug, updated in stream(conn, sql, (list(LOCALES), top), f"params_{table}"):
+        out[lang].append({"slug": slug, "updated_at": iso(updated)})
+    return out
+
+def export_incremental(conn, table: str, top: int, current: Manifest, since: datetime) -> Manifest:
+    """Unisce al manifest le righe modificate dopo `since` (pubblicate o no)."""
+    index = {l: {e["slug"]: dict(e) for e in current.get(l, [])} for l in LOCALES}
+    sql = (f"select lang, slug, updated_at, published from public.{table} "
+           f"where updated_at > %s and lang = any(%s) and slug is not null order by updated_at")
+    for lang, slug, updated, published in stream(conn, sql, (since - CLOCK_SKEW, list(LOCALES)),
+                                                 f"params_inc_{table}"):
+        # lo slug esce dal manifest; rientra solo se ancora pubblicato
+        index[lang].pop(slug, None)
+        if published:
+            index[lang][slug] = {"slug": slug, "updated_at": iso(updated)}
+    return {l: sorted(index[l].values(), key=lambda e: (e["updated_at"], e["slug"]), reverse=True)[:top]
+            for l in LOCALES}
+
+def diff(old: Manifest, new: Manifest, segment: str) -> Dict[str, object]:
+    added, updated, removed, paths = [], [], [], []
+    for l in LOCALES:
+        before = {e["slug"]: e["updated_at"] for e in old.get(l, [])}
+        after = {e["slug"]: e["updated_at"] for e in new.get(l, [])}
+        for slug, ts in after.items():
+            if slug not in before:
+                added.append(f"{l}:{slug}")
+            elif before[slug] != ts:
+                updated.append(f"{l}:{slug}")
+            else:
+                continue
+            paths.append(f"/{l}/{segment}/{slug}")
+        for slug in before.keys() - after.keys():
+            removed.append(f"{l}:{slug}")
+            paths.append(f"/{l}/{segment}/{slug}")
+    return {"added": added, "updated": updated, "removed": sorted(removed), "paths": paths}
+
+def load_manifest(path: Path) -> Tuple[Optional[datetime], int, Manifest]:
+    if not path.exists():
+        return None, 0, {}
+    data = json.loads(path.read_text(encoding="utf-8"))
+    exported = datetime.fromisoformat(data["exported_at"]) if data.get("exported_at") else None
+    return exported, int(data.get("top") or 0), data.get("locales") or {}
+
+def write_manifest(path: Path, exported_at: datetime, top: int, locales: Manifest) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    data = {"exported_at": iso(exported_at), "top": top, "locales": locales}
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_text(json.dumps(data, ensure_ascii=False, indent=1) + "\n", encoding="utf-8")
+    tmp.replace(path)
+
+def db_now(conn) -> datetime:
+    with conn.cursor() as cur:
+        cur.execute("select now()")
+        return cur.fetchone()[0]
+
+def run(conn, top: int, full: bool) -> Dict[str, Dict[str, object]]:
+    report: Dict[str, Dict[str, object]] = {}
+    for table, segment in KINDS.items():
+        path = MANIFEST_DIR / f"{table}.json"
+        exported, old_top, current = load_manifest(path)
+        started = db_now(conn)   # prima della lettura: il prossimo incrementale riparte da qui
+        incremental = not full and exported is not None and old_top == top
+        new = export_incremental(conn, table, top, current, exported) if incremental else None
+        if new is not None and any(len(new[l]) < len(current.get(l, [])) for l in LOCALES):
+            new, incremental = None, False   # slug depubblicati: il posto libero va al N+1-esimo
+        if new is None:
+            new = export_full(conn, table, top)
+        d = diff(current, new, segment)
+        d["mode"] = "incrementale" if incremental else "completo"
+        # senza voci cambiate il file resta com'è: il prossimo incrementale riparte
+        # dal vecchio exported_at (rilegge qualche riga in più, niente rebuild inutili)
+        d["written"] = bool(d["paths"]) or exported is None or old_top != top
+        if d["written"]:
+            write_manifest(path, started, top, new)
+        report[table] = d
+    return report
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description="Manifest degli slug per generateStaticParams")
+    ap.add_argument("--db-url", help="Connessione Postgres (default: SUPABASE_DB_URL / webapp/.env.db)")
+    ap.add_argument("--top", type=int, default=DEFAULT_TOP, help="Contenuti più recenti per lingua")
+    ap.add_argument("--full", action="store_true", help="Rilegge tutto invece dell'incrementale")
+    args = ap.parse_args(argv)
+
+    t0 = time.perf_counter()
+    conn = migrate.connect(migrate.load_db_url(args.db_url))
+    conn.autocommit = False   # i cursori lato server vivono in una transazione
+    try:
+        report = run(conn, args.top, args.full)
+    except Exception as e:
+        print(f"[ERR] {e}")
+        return 2
+    finally:
+        conn.rollback()
+        conn.close()
+
+    DIFF_REPORT.parent.mkdir(parents=True, exist_ok=True)
+    DIFF_REPORT.write_text(json.dumps({"created": datetime.now().strftime("%Y%m%d-%H%M%S"), "tables": report},
+                                      ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
+    for table, d in report.items():
+        print(f"[OK] {table} ({d['mode']}): +{len(d['added'])} ~{len(d['updated'])} -{len(d['removed'])} | "
+              f"path da ricostruire: {len(d['paths'])}")
+    print(f"[INFO] diff: {DIFF_REPORT.relative_to(ROOT)} | {(time.perf_counter()-t0)*1000:.0f} ms")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,338 @@
+# -*- coding: utf-8 -*-
+"""
+supabase_rest.py
+Client REST (PostgREST) condiviso per i tool Python.
+- Pool di connessioni HTTP/1.1 keep-alive (niente handshake TLS per ogni chiamata)
+- Header di autenticazione (apikey + Bearer) impostati una volta sola
+- Retry su 429/5xx ed errori di connessione con backoff esponenziale + jitter
+- Paginazione automatica via Range / Content-Range
+- Decodifica JSON in streaming degli array (una riga alla volta, pagina per pagina)
+
+Uso:
+  from supabase_rest import SupabaseRest, load_env
+  with SupabaseRest.from_env(load_env(), service=True) as rest:
+      for row in rest.iter_rows("news", {"select": "slug,lang"}):
+          ...
+"""
+from __future__ import annotations
+import codecs
+import http.client
+import json
+import os
+import queue
+import random
+import re
+import ssl
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional, Tuple
+from urllib.parse import urlencode, urlsplit
+
+ROOT = Path(__file__).resolve().parents[1]
+ENV_FILE = ROOT / "webapp" / ".env.local"
+
+RETRY_STATUS = {429, 500, 502, 503, 504}
+CONTENT_RANGE_RX = re.compile(r"^\s*(?:items\s+)?(\*|(\d+)-(\d+))/(\*|\d+)\s*$")
+
+def load_env(path: Path = ENV_FILE) -> Dict[str, str]:
+    """Variabili di sistema + webapp/.env.local (il sistema ha la precedenza)."""
+    env = dict(os.environ)
+    if path.exists():
+        for line in path.read_text(encoding="utf-8").splitlines():
+            line = line.strip()
+            if not line or line.startswith("#") or "=" not in line:
+                continue
+            k, v = line.split("=", 1)
+            env.setdefault(k.strip(), v.strip())
+    return env
+
+def parse_content_range(value: Optional[str]) -> Tuple[Optional[int], Optional[int], Optional[int]]:
+    """'0-999/5000' -> (0, 999, 5000); '*/0' -> (None, None, 0); totale '*' -> None."""
+    m = CONTENT_RANGE_RX.match(value or "")
+    if not m:
+        return None, None, None
+    start = int(m.group(2)) if m.group(2) else None
+    end = int(m.group(3)) if m.group(3) else None
+    total = int(m.group(4)) if m.group(4) != "*" else None
+    return start, end, total
+
+def iter_json_array(stream, chunk_size: int = 64 * 1024) -> Iterator[Any]:
+    """Decodifica incrementale di un array JSON top-level letto da `stream` (.read(n)).
+    Tiene in memoria solo il chunk corrente + l'elemento in decodifica."""
+    dec = json.JSONDecoder()
+    utf8 = codecs.getincrementaldecoder("utf-8")()
+    buf = ""
+    pos = 0
+    eof = False
+
+    def fill() -> bool:
+        nonlocal buf, pos, eof
+        if eof:
+            return False
+        chunk = stream.read(chunk_size)
+        eof = not chunk
+        # il decoder incrementale non spezza i caratteri multibyte tra due chunk
+        buf = buf[pos:] + utf8.decode(chunk or b"", final=eof)
+        pos = 0
+        return not eof
+
+    def skip_ws() -> bool:
+        nonlocal pos
+        while True:
+            while pos < len(buf) and buf[pos] in " \t\r\n":
+                pos += 1
+            if pos < len(buf):
+                return True
+            if not fill():
+                return False
+
+    if not skip_ws():
+        return
+    if buf[pos] != "[":
+        # non è un array: decodifica l'intero documento
+        while fill():
+            pass
+        yield json.loads(buf[pos:])
+        return
+    pos += 1
+    while True:
+        if not skip_ws():
+            raise ValueError("JSON troncato: array non chiuso")
+        if buf[pos] == "]":
+            return
+        if buf[pos] == ",":
+            pos += 1
+            if not skip_ws():
+                raise ValueError("JSON troncato dopo ','")
+        while True:
+            try:
+                obj, end = dec.raw_decode(buf, pos)
+            except json.JSONDecodeError:
+                if not fill():
+                    raise
+                continue
+            if not eof and (end == len(buf) or buf[end] not in " \t\r\n,]"):
+                # un numero a fine buffer (es. "1." di "1.5") può continuare nel chunk successivo
+                fill()
+                continue
+            break
+        pos = end
+        yield obj
+
+class RestError(Exception):
+    def __init__(self, status: int, reason: str, body: bytes = b""):
+        self.status = status
+        self.reason = reason
+        self.body = body
+        super().__init__(f"HTTP {status} {reason}: {body[:300].decode('utf-8', errors='ignore')}")
+
+class SupabaseRest:
+    def __init__(self, base_url: str, key: str, *, pool_size: int = 4, timeout: float = 10.0,
+                 retries: int = 4, backoff: float = 0.3, max_backoff: float = 8.0):
+        parts = urlsplit(base_url.rstrip("/"))
+        if parts.scheme not in ("http", "https") or not parts.hostname:
+            raise ValueError(f"URL Supabase non valido: {base_url}")
+        self.scheme = parts.scheme
+        self.host = parts.hostname
+        self.port = parts.port
+        self.prefix = parts.path.rstrip("/") + "/rest/v1"
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.headers = {
+            "apikey": key,
+            "Authorization": f"Bearer {key}",
+            "Accept": "application/json",
+            "Connection": "keep-alive",
+        }
+        self._ssl = ssl.create_default_context() if self.scheme == "https" else None
+        self._pool: "queue.LifoQueue[http.client.HTTPConnection]" = queue.LifoQueue(maxsize=pool_size)
+        self._lock = threading.Lock()
+        self.stats = {"requests": 0, "connections": 0, "retries": 0}
+
+    @classmethod
+    def from_env(cls, env: Dict[str, str], *, service: bool = False, **kw) -> "SupabaseRest":
+        base = env.get("NEXT_PUBLIC_SUPABASE_URL", "")
+        key = (env.get("SUPABASE_SERVICE_ROLE_KEY") or env.get("ADMIN_TOKEN")) if service else None
+        key = key or env.get("NEXT_PUBLIC_SUPABASE_ANON_KEY", "")
+        if not base or not key:
+            raise ValueError("Mancano NEXT_PUBLIC_SUPABASE_URL e/o la chiave Supabase")
+        return cls(base, key, **kw)
+
+    # ---------- pool ----------
+    def _new_conn(self) -> http.client.HTTPConnection:
+        with self._lock:
+            self.stats["connections"] += 1
+        if self.scheme == "https":
+            return http.client.HTTPSConnection(self.host, self.port, timeout=self.timeout, context=self._ssl)
+        return http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+
+    def _acquire(self) -> http.client.HTTPConnection:
+        try:
+            return self._pool.get_nowait()
+        except queue.Empty:
+            return self._new_conn()
+
+    def _release(self, conn: http.client.HTTPConnection) -> None:
+        try:
+            self._pool.put_nowait(conn)
+        except queue.Full:
+            conn.close()
+
+    def close(self) -> None:
+        while True:
+            try:
+                self._pool.get_nowait().close()
+            except queue.Empty:
+                return
+
+    def __enter__(self) -> "SupabaseRest":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    # ---------- richieste ----------
+    def url(self, path: str, params: Optional[Dict[str, Any]] = None) -> str:
+        target = f"{self.prefix}/{path.lstrip('/')}"
+        if params:
+            target += "?" + urlencode(params, safe=",.()*:")
+        return target
+
+    def _sleep(self, attempt: int, retry_after: Optional[str]) -> None:
+        delay = min(self.max_backoff, self.backoff * (2 ** attempt))
+        if retry_after and retry_after.isdigit():
+            delay = max(delay, float(retry_after))
+        time.sleep(random.uniform(0, delay))  # full jitter
+
+    def _open(self, method: str, target: str, body: Optional[bytes], headers: Dict[str, str]):
+        """Invia la richiesta con retry; ritorna (conn, response) con il body ancora da leggere."""
+        hdrs = {**self.headers, **headers}
+        if body is not None:
+            hdrs.setdefault("Content-Type", "application/json")
+        last_exc: Optional[Exception] = None
+        for attempt in range(self.retries + 1):
+            conn = self._acquire()
+            try:
+                conn.request(method, target, body=body, headers=hdrs)
+                resp = conn.getresponse()
+            except (http.client.HTTPException, OSError) as e:
+                # connessione keep-alive chiusa dal server o errore di rete: nuova connessione
+                conn.close()
+                last_exc = e
+                if attempt < self.retries:
+                    with self._lock:
+                        self.stats["retries"] += 1
+                    self._sleep(attempt, None)
+                    continue
+                raise
+            with self._lock:
+                self.stats["requests"] += 1
+            if resp.status in RETRY_STATUS and attempt < self.retries:
+                resp.read()
+                self._finish(conn, resp)
+                with self._lock:
+                    self.stats["retries"] += 1
+                self._sleep(attempt, resp.getheader("Retry-After"))
+                continue
+            return conn, resp
+        raise last_exc or RuntimeError("retry esauriti")
+
+    def _finish(self, conn: http.client.HTTPConnection, resp: http.client.HTTPResponse) -> None:
+        if resp.will_close:
+            conn.close()
+        else:
+            self._release(conn)
+
+    def request(self, method: str, path: str, *, params: Optional[Dict[str, Any]] = None,
+                json_body: Any = None, headers: Optional[Dict[str, str]] = None) -> Tuple[int, Dict[str, str], bytes]:
+        """Richiesta completa: ritorna (status, headers, body). Non solleva su 4xx/5xx."""
+        body = json.dumps(json_body).encode("utf-8") if json_body is not None else None
+        conn, resp = self._open(method, self.url(path, params), body, headers or {})
+        try:
+            data = resp.read()
+        except Exception:
+            conn.close()
+            raise
+        self._finish(conn, resp)
+        return resp.status, {k.lower(): v for k, v in resp.getheaders()}, data
+
+    def ping(self) -> int:
+        try:
+            status, _, _ = self.request("GET", "")
+            return status
+        except Exception:
+            return 0
+
+    def _json(self, method: str, path: str, **kw) -> Any:
+        status, _, data = self.request(method, path, **kw)
+        if status >= 400:
+            raise RestError(status, http.client.responses.get(status, ""), data)
+        return json.loads(data.decode("utf-8")) if data else None
+
+    def get_json(self, path: str, params: Optional[Dict[str, Any]] = None) -> Any:
+        return self._json("GET", path, params=params)
+
+    def insert(self, table: str, rows: list, *, on_conflict: Optional[str] = None,
+               merge: bool = False, ignore: bool = False, returning: bool = True) -> Any:
+        """POST bulk. Con on_conflict: merge=True aggiorna le righe esistenti (upsert),
+        ignore=True le lascia invariate (con return=representation tornano solo le nuove)."""
+        prefer = ["return=representation" if returning else "return=minimal"]
+        if merge:
+            prefer.append("resolution=merge-duplicates")
+        elif ignore:
+            prefer.append("resolution=ignore-duplicates")
+        params = {"on_conflict": on_conflict} if on_conflict else None
+        return self._json("POST", table, params=params, json_body=rows, headers={"Prefer": ",".join(prefer)})
+
+    def count(self, table: str, params: Optional[Dict[str, Any]] = None, *, method: str = "exact") -> Optional[int]:
+        """Totale righe da Content-Range (count=exact|planned|estimated), senza scaricare righe."""
+        q = {"select": "*", **(params or {})}
+        status, hdrs, data = self.request("HEAD", table, params=q, headers={
+            "Prefer": f"count={method}", "Range-Unit": "items", "Range": "0-0",
+        })
+        if status >= 400 and status != 416:
+            raise RestError(status, http.client.responses.get(status, ""), data)
+        return parse_content_range(hdrs.get("content-range"))[2]
+
+    def iter_rows(self, table: str, params: Optional[Dict[str, Any]] = None, *,
+                  page_size: int = 1000) -> Iterator[dict]:
+        """Scorre tutte le righe pagina per pagina (Range), decodificando ogni pagina in streaming."""
+        start = 0
+        while True:
+            end = start + page_size - 1
+            conn, resp = self._open("GET", self.url(table, params), None, {
+                "Range-Unit": "items", "Range": f"{start}-{end}",
+            })
+            if resp.status == 416:  # range oltre la fine
+                resp.read(); self._finish(conn, resp)
+                return
+            if resp.status >= 400:
+                data = resp.read(); self._finish(conn, resp)
+                raise RestError(resp.status, resp.reason, data)
+            _, _, total = parse_content_range(resp.getheader("Content-Range"))
+            n = 0
+            done = False
+            try:
+                for row in iter_json_array(resp):
+                    n += 1
+                    yield row
+                done = True
+            finally:
+                # il body va consumato per intero prima di riusare la connessione: dopo la ']'
+                # resta da leggere almeno il chunk terminale (transfer-encoding chunked).
+                # Uscita anticipata (break del chiamante, eccezione): connessione chiusa, non nel pool
+                if done:
+                    try:
+                        resp.read()
+                    except (http.client.HTTPException, OSError):
+                        conn.close()
+                    else:
+                        self._finish(conn, resp)
+                else:
+                    conn.close()
+            start += n
+            if n < page_size or (total is not None and start >= total):
+                return
@@ -12,6 +12,7 @@ Opzioni:
   --root "C:\\Users\\Alessandro\\ica-Next.js + Supabase"
   --no-env    -> salta lettura .env.local
   --tree      -> stampa albero directory essenziali
+  --force     -> ignora la cache dei check in reports/verify_stack_cache.json
 Exit codes: 0=OK, 1=WARNING, 2=ERROR
 """
 from __future__ import annotations
@@ -21,6 +22,8 @@ import os
 import re
 from pathlib import Path
 from datetime import datetime
+from check_cache import CheckCache
+from project_index import ProjectIndex, get_index
 
 ROOT_DEFAULT = Path(".").resolve()
 WEBAPP = Path("webapp")
@@ -63,15 +66,15 @@ RECOMMENDED_FILES = [
     WEBAPP / "app" / "en" / "newsletter" / "page.tsx",
 ]
 
-def read_text_safe(p: Path) -> str | None:
+def read_text_safe(p: Path, idx: ProjectIndex | None = None) -> str | None:
     try:
-        return p.read_text(encoding="utf-8")
+        return idx.read_text(p) if idx is not None else p.read_text(encoding="utf-8")
     except Exception:
         return None
 
-def is_json_valid(p: Path) -> bool:
+def is_json_valid(p: Path, idx: ProjectIndex | None = None) -> bool:
     try:
-        json.loads(p.read_text(encoding="utf-8"))
+        json.loads(read_text_safe(p, idx) if idx is not None else p.read_text(encoding="utf-8"))
         return True
     except Exception:
         return False
@@ -140,11 +143,109 @@ def print_tree(root: Path, rels: list[Path], max_depth: int = 4) -> None:
     for base in sorted({(root / WEBAPP), (root / "tools"), (root / "reports")}):
         walk(base, 0)
 
+# -------------------- Step di verifica (con cache) --------------------
+# Ogni step ritorna {"lines", "data", "ok", "warn", "err"}; gli step che
+# dipendono solo da file locali sono in cache (reports/verify_stack_cache.json).
+
+def _out() -> dict:
+    return {"lines": [], "data": None, "ok": 0, "warn": 0, "err": 0}
+
+def _count(out: dict, status: str) -> None:
+    out[{"OK": "ok", "WARN": "warn", "ERR": "err"}[status]] += 1
+
+def step_files(idx: ProjectIndex, root: Path, paths: list[Path], missing_status: str, missing_label: str) -> dict:
+    out = _out()
+    out["data"] = []
+    for p in paths:
+        if idx.exists(root / p):
+            out["lines"].append(f"[OK]  {p}")
+            out["data"].append({"path": str(p), "status": "OK"})
+            _count(out, "OK")
+        else:
+            tag = "ERR" if missing_status == "ERR" else "WRN"
+            out["lines"].append(f"[{tag}] {p} ({missing_label})")
+            out["data"].append({"path": str(p), "status": missing_status})
+            _count(out, missing_status)
+    return out
+
+def step_messages(idx: ProjectIndex, root: Path) -> dict:
+    out = _out()
+    out["data"] = {}
+    for lang in LOCALES:
+        p = root / WEBAPP / "messages" / f"{lang}.json"
+        if idx.exists(p):
+            ok = is_json_valid(p, idx)
+            out["lines"].append(f"[{'OK' if ok else 'ERR'}] messages/{lang}.json JSON")
+            out["data"][lang] = "OK" if ok else "ERR"
+            _count(out, "OK" if ok else "ERR")
+        else:
+            out["lines"].append(f"[ERR] messages/{lang}.json mancante")
+            out["data"][lang] = "ERR"
+            _count(out, "ERR")
+    return out
+
+def step_layout(idx: ProjectIndex, root: Path) -> dict:
+    out = _out()
+    layout = root / WEBAPP / "app" / "[locale]" / "layout.tsx"
+    layout_txt = read_text_safe(layout, idx) or ""
+    lc = find_in_layout_for_components(layout_txt) if layout_txt else {}
+    for k, v in lc.items():
+        out["lines"].append(f"[{'OK' if v else 'WRN'}] layout: {k}")
+        _count(out, "OK" if v else "WARN")
+    out["data"] = lc
+    return out
+
+def step_next_config(idx: ProjectIndex, root: Path) -> dict:
+    out = _out()
+    cfg_txt = read_text_safe(root / WEBAPP / "next.config.mjs", idx) or ""
+    has_images = "images:" in cfg_txt and "remotePatterns" in cfg_txt
+    out["lines"].append(f"[{'OK' if has_images else 'WRN'}] next.config.mjs immagini remotePatterns")
+    _count(out, "OK" if has_images else "WARN")
+    out["data"] = {"images_remotePatterns": bool(has_images)}
+    return out
+
+def step_aliases(idx: ProjectIndex, tsx_files: list[Path]) -> dict:
+    out = _out()
+    alias_detected = False
+    ts_files_checked = 0
+    for p in tsx_files:
+        ts_files_checked += 1
+        txt = read_text_safe(p, idx) or ""
+        if txt and detect_import_alias_in_ts(txt):
+            alias_detected = True
+            break
+    out["lines"].append(f"[{'OK' if alias_detected else 'WRN'}] alias '@/components' rilevato (scan {ts_files_checked} file)")
+    _count(out, "OK" if alias_detected else "WARN")
+    out["data"] = {"at_alias_detected": alias_detected}
+    return out
+
+def step_ts_exports(idx: ProjectIndex, root: Path) -> dict:
+    # Sitemap/robots sintassi rapida (se presenti)
+    out = _out()
+    for p in [WEBAPP / "app" / "sitemap.ts", WEBAPP / "app" / "robots.ts"]:
+        abs_p = root / p
+        if idx.exists(abs_p):
+            ok = "export default" in (read_text_safe(abs_p, idx) or "")
+            out["lines"].append(f"[{'OK' if ok else 'ERR'}] {p} export default")
+            _count(out, "OK" if ok else "ERR")
+    return out
+
+def run_step(cache: CheckCache, name: str, inputs: list[Path], fn) -> dict:
+    # il sorgente di questo script fa parte degli input: cambiare i check invalida la cache
+    inputs = list(inputs) + [Path(__file__).resolve()]
+    hit = cache.get(name, inputs)
+    if hit is not None:
+        return hit
+    out = fn()
+    cache.put(name, inputs, out)
+    return out
+
 def main():
     ap = argparse.ArgumentParser()
     ap.add_argument("--root", type=str, default=str(ROOT_DEFAULT), help="Root repo")
     ap.add_argument("--no-env", action="store_true", help="Salta lettura .env.local")
     ap.add_argument("--tree", action="store_true", help="Stampa albero essenziale")
+    ap.add_argument("--force", action="store_true", help="Ignora la cache dei check (reports/verify_stack_cache.json)")
     args = ap.parse_args()
 
     root = Path(args.root).resolve()
@@ -166,37 +267,32 @@ def main():
     }
 
     print(f"[START] Verifica stack in: {root}")
+    # un solo walk di webapp/ condiviso da tutti gli step (e dalla cache)
+    idx = get_index(root)
+    cache = CheckCache(root / "reports" / "verify_stack_cache.json", force=args.force, root=root, index=idx)
+
+    def apply(out: dict, key: str | None = None) -> None:
+        for line in out["lines"]:
+            print(line)
+        for k in ("ok", "warn", "err"):
+            result["summary"][k] += out[k]
+        if key is not None:
+            result["checks"][key] = out["data"]
 
     # 1) File richiesti
-    for p in REQUIRED_FILES:
-        abs_p = (root / p)
-        if abs_p.exists():
-            print(f"[OK]  {p}")
-            result["checks"]["files_required"].append({"path": str(p), "status": "OK"})
-            result["summary"]["ok"] += 1
-        else:
-            print(f"[ERR] {p} (mancante)")
-            result["checks"]["files_required"].append({"path": str(p), "status": "ERR"})
-            result["summary"]["err"] += 1
+    apply(run_step(cache, "files_required", [root / p for p in REQUIRED_FILES],
+                   lambda: step_files(idx, root, REQUIRED_FILES, "ERR", "mancante")), "files_required")
 
     # 2) File raccomandati (SEO/Privacy/Newsletter/Analytics/Cookie)
-    for p in RECOMMENDED_FILES:
-        abs_p = (root / p)
-        if abs_p.exists():
-            print(f"[OK]  {p}")
-            result["checks"]["files_recommended"].append({"path": str(p), "status": "OK"})
-            result["summary"]["ok"] += 1
-        else:
-            print(f"[WRN] {p} (consigliato)")
-            result["checks"]["files_recommended"].append({"path": str(p), "status": "WARN"})
-            result["summary"]["warn"] += 1
+    apply(run_step(cache, "files_recommended", [root / p for p in RECOMMENDED_FILES],
+                   lambda: step_files(idx, root, RECOMMENDED_FILES, "WARN", "consigliato")), "files_recommended")
 
     # 3) Env
     env_path = root / WEBAPP / ".env.local"
     env_read = {}
     if not args.no_env:
-        if env_path.exists():
-            text = read_text_safe(env_path) or ""
+        if idx.exists(env_path):
+            text = read_text_safe(env_path, idx) or ""
             env_read = parse_env_lines(text)
             missing = [k for k in REQUIRED_ENV if k not in env_read or not env_read[k]]
             for k in REQUIRED_ENV:
@@ -213,59 +309,25 @@ def main():
     result["checks"]["env"] = env_read
 
     # 4) i18n JSON
-    for lang in LOCALES:
-        p = root / WEBAPP / "messages" / f"{lang}.json"
-        if p.exists():
-            ok = is_json_valid(p)
-            print(f"[{'OK' if ok else 'ERR'}] messages/{lang}.json JSON")
-            result["checks"]["messages_json"][lang] = "OK" if ok else "ERR"
-            result["summary"]["ok" if ok else "err"] += 1
-        else:
-            print(f"[ERR] messages/{lang}.json mancante")
-            result["checks"]["messages_json"][lang] = "ERR"
-            result["summary"]["err"] += 1
+    msg_files = [root / WEBAPP / "messages" / f"{lang}.json" for lang in LOCALES]
+    apply(run_step(cache, "messages_json", msg_files, lambda: step_messages(idx, root)), "messages_json")
 
     # 5) Layout locale – controlli basilari
-    layout = root / WEBAPP / "app" / "[locale]" / "layout.tsx"
-    layout_txt = read_text_safe(layout) or ""
-    lc = find_in_layout_for_components(layout_txt) if layout_txt else {}
-    for k, v in lc.items():
-        print(f"[{'OK' if v else 'WRN'}] layout: {k}")
-        result["summary"]["ok" if v else "warn"] += 1
-    result["checks"]["layout_locale"] = lc
+    apply(run_step(cache, "layout_locale", [root / WEBAPP / "app" / "[locale]" / "layout.tsx"],
+                   lambda: step_layout(idx, root)), "layout_locale")
 
     # 6) next.config.mjs – images.remotePatterns presente?
-    next_cfg = root / WEBAPP / "next.config.mjs"
-    cfg_txt = read_text_safe(next_cfg) or ""
-    has_images = "images:" in cfg_txt and "remotePatterns" in cfg_txt
-    print(f"[{'OK' if has_images else 'WRN'}] next.config.mjs immagini remotePatterns")
-    result["summary"]["ok" if has_images else "warn"] += 1
-    result["checks"]["next_config"]["images_remotePatterns"] = bool(has_images)
+    apply(run_step(cache, "next_config", [root / WEBAPP / "next.config.mjs"],
+                   lambda: step_next_config(idx, root)), "next_config")
 
     # 7) Alias import "@/"
-    alias_detected = False
-    ts_files_checked = 0
-    for p in (root / WEBAPP).rglob("*.tsx"):
-        ts_files_checked += 1
-        txt = read_text_safe(p) or ""
-        if txt and detect_import_alias_in_ts(txt):
-            alias_detected = True
-            break
-    print(f"[{'OK' if alias_detected else 'WRN'}] alias '@/components' rilevato (scan {ts_files_checked} file)")
-    result["summary"]["ok" if alias_detected else "warn"] += 1
-    result["checks"]["aliases"]["at_alias_detected"] = alias_detected
+    tsx_files = [e.path for e in idx.files(".tsx")]   # node_modules/.next già potati
+    apply(run_step(cache, "aliases", tsx_files, lambda: step_aliases(idx, tsx_files)), "aliases")
 
     # 8) Sitemap/robots sintassi rapida (se presenti)
-    def quick_ts_export_default_ok(path: Path) -> bool:
-        txt = read_text_safe(path) or ""
-        return "export default" in txt
-
-    for p in [WEBAPP / "app" / "sitemap.ts", WEBAPP / "app" / "robots.ts"]:
-        abs_p = root / p
-        if abs_p.exists():
-            ok = quick_ts_export_default_ok(abs_p)
-            print(f"[{'OK' if ok else 'ERR'}] {p} export default")
-            result["summary"]["ok" if ok else "err"] += 1
+    apply(run_step(cache, "ts_exports", [root / WEBAPP / "app" / "sitemap.ts", root / WEBAPP / "app" / "robots.ts"],
+                   lambda: step_ts_exports(idx, root)))
+    cache.save()
 
     # Report
     reports_dir = root / "reports"
@@ -290,7 +352,8 @@ def main():
             print(f"[WRN] tree: {e}")
 
     status = {0: "OK", 1: "WARNING", 2: "ERROR"}[code]
-    print(f"\n[END] Status: {status} | OK:{result['summary']['ok']} WARN:{result['summary']['warn']} ERR:{result['summary']['err']}")
+    print(f"\n[END] Status: {status} | OK:{result['summary']['ok']} WARN:{result['summary']['warn']} ERR:{result['summary']['err']}"
+          f" | cache {cache.hits} hit / {cache.misses} miss")
     raise SystemExit(code)
 
 if __name__ == "__main__":
@@ -0,0 +1,236 @@
+# -*- coding: utf-8 -*-
+"""
+worklog_analytics.py
+Worklog in un database SQLite indicizzato (reports/worklog.sqlite) per le statistiche
+di `ica_toolchain.py stats`: ore per fase, settimana, mese e parola chiave, velocity
+settimanale con media mobile, stime contro tempo reale.
+- Sync incrementale: riparte dall'offset (byte) dell'ultima sezione importata e
+  rilegge solo da lì; se il file prima dell'offset è cambiato (hash del prefisso,
+  es. dopo normalize o una sezione unita da worklog_autolog) reimporta tutto
+- Parse con worklog_model (stesso parser degli script del worklog)
+- Stima: bullet '- stima: 1h 30m' nella sezione (ica_toolchain log --estimate)
+- Parole chiave: indice FTS5 su titolo e bullet (LIKE se FTS5 non disponibile)
+
+Uso:
+  python Tools/ica_toolchain.py stats --by phase
+  python Tools/worklog_analytics.py bench --entries 100000
+"""
+from __future__ import annotations
+import argparse
+import hashlib
+import re
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import date
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import worklog_model
+from worklog_model import Entry
+
+ROOT = Path(__file__).resolve().parents[1]
+DB = ROOT / "reports" / "worklog.sqlite"
+
+DIMENSIONS = ("phase", "week", "month", "day")
+ESTIMATE_RX = re.compile(r"^stima\s*[:=]?\s*(.+)$", re.I)
+HASH_CHUNK = 1 << 20
+
+SCHEMA = """
+create table if not exists entries (
+  id       integer primary key,
+  pos      integer not null,          -- offset (byte) dell'intestazione in worklog.md
+  day      text    not null,          -- YYYY-MM-DD, '' se la sezione non ha data
+  week     text    not null,          -- YYYY-Www (ISO)
+  month    text    not null,          -- YYYY-MM
+  phase    text    not null,
+  title    text    not null,
+  bullets  text    not null,
+  minutes  integer not null,
+  estimate integer                    -- minuti stimati, se indicati
+);
+create index if not exists entries_pos_idx   on entries (pos);
+-- indici coprenti: group by (e filtro su day) senza leggere la tabella
+create index if not exists entries_phase_idx on entries (phase, day, minutes);
+create index if not exists entries_week_idx  on entries (week, day, minutes);
+create index if not exists entries_month_idx on entries (month, day, minutes);
+create index if not exists entries_day_idx   on entries (day, minutes);
+create index if not exists entries_estimate_idx on entries (estimate, minutes) where estimate is not null;
+create table if not exists sync_state (k text primary key, v text not null);
+"""
+
+def connect(path: Path = DB) -> sqlite3.Connection:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(path)
+    conn.executescript(SCHEMA)
+    try:
+        conn.execute("create virtual table if not exists entries_fts using fts5(title, bullets)")
+    except sqlite3.OperationalError:
+        pass   # sqlite senza FTS5: keyword() usa LIKE
+    return conn
+
+def has_fts(conn: sqlite3.Connection) -> bool:
+    return conn.execute("select 1 from sqlite_master where name = 'entries_fts'").fetchone() is not None
+
+# -------------------- sync --------------------
+
+def _prefix_hash(path: Path, upto: int) -> "hashlib._Hash":
+    h = hashlib.blake2b(digest_size=16)
+    left = upto
+    with path.open("rb") as fh:
+        while left > 0:
+            chunk = fh.read(min(HASH_CHUNK, left))
+            if not chunk:
+                break
+            h.update(chunk)
+            left -= len(chunk)
+    return h
+
+def row_of(e: Entry, pos: int) -> tuple:
+    week = month = ""
+    if e.date:
+        try:
+            y, w, _ = date.fromisoformat(e.date).isocalendar()
+            week, month = f"{y}-W{w:02d}", e.date[:7]
+        except ValueError:
+            pass
+    estimate = None
+    for b in e.bullets:
+        m = ESTIMATE_RX.match(b)
+        if m:
+            estimate = worklog_model.parse_minutes(m.group(1))
+    return (pos, e.date, week, month, e.phase, e.title, "\n".join(e.bullets), e.minutes or 0, estimate)
+
+def sync(conn: sqlite3.Connection, worklog: Path = worklog_model.WORKLOG, full: bool = False) -> Dict[str, object]:
+    """Importa le sezioni nuove; ritorna modo, righe importate e tempo."""
+    t0 = time.perf_counter()
+    state = dict(conn.execute("select k, v from sync_state"))
+    size = worklog.stat().st_size if worklog.exists() else 0
+    pos = int(state.get("pos", 0))
+    h = _prefix_hash(worklog, pos) if pos and size >= pos and not full else None
+    incremental = h is not None and h.hexdigest() == state.get("prefix_hash")
+    if not incremental:
+        pos, h = 0, hashlib.blake2b(digest_size=16)
+
+    heads: List[int] = []
+    chunks: List[bytes] = []
+
+    def lines(fh) -> Iterator[str]:
+        off = pos
+        for raw in fh:
+            chunks.append(raw)
+            line = raw.decode("utf-8", "replace")
+            if off == 0:
+                line = line.lstrip("\ufeff")
+            if line.startswith(worklog_model.SECTION):
+                heads.append(off)
+            off += len(raw)
+            yield line
+
+    wl = worklog_model.Worklog()
+    if size:
+        with worklog.open("rb") as fh:
+            fh.seek(pos)
+            wl = worklog_model.parse(lines(fh))
+    rows = [row_of(e, p) for e, p in zip(wl.entries(), heads)]
+
+    with conn:
+        fts = has_fts(conn)
+        if incremental:   # l'ultima sezione importata può essere cresciuta: si reimporta da lì
+            if fts:
+                conn.execute("delete from entries_fts where rowid in (select id from entries where pos >= ?)", (pos,))
+            conn.execute("delete from entries where pos >= ?", (pos,))
+        else:
+            if fts:
+                conn.execute("delete from entries_fts")
+            conn.execute("delete from entries")
+        conn.executemany("insert into entries (pos, day, week, month, phase, title, bullets, minutes, estimate) "
+                         "values (?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+        if fts and rows:
+            conn.execute("insert into entries_fts (rowid, title, bullets) "
+                         "select id, title, bullets from entries where pos >= ?", (heads[0],))
+        new_pos = heads[-1] if heads else pos
+        h.update(b"".join(chunks)[:new_pos - pos])
+        conn.executemany("insert or replace into sync_state (k, v) values (?, ?)",
+                         [("pos", str(new_pos)), ("prefix_hash", h.hexdigest()), ("size", str(size))])
+    return {"mode": "incrementale" if incremental else "completo", "rows": len(rows),
+            "ms": (time.perf_counter() - t0) * 1000}
+
+# -------------------- query --------------------
+
+def by(conn: sqlite3.Connection, dim: str, since: str = "") -> List[Tuple[str, int, int]]:
+    """(chiave, sezioni, minuti) per fase/settimana/mese/giorno; `since`: data minima YYYY-MM-DD."""
+    if dim not in DIMENSIONS:
+        raise ValueError(f"dimensione non valida: {dim}")
+    where, args = ("where day >= ?", (since,)) if since else ("", ())
+    rows = conn.execute(f"select {dim}, count(*), sum(minutes) from entries {where} "
+                        f"group by {dim} order by {dim}", args).fetchall()
+    return sorted(rows, key=lambda r: -r[2]) if dim == "phase" else rows
+
+def keyword(conn: sqlite3.Connection, word: str, limit: int = 20) -> Tuple[int, int, List[tuple]]:
+    """(sezioni, minuti, ultime sezioni) che contengono `word` nel titolo o nei bullet."""
+    if has_fts(conn):
+        match = " ".join('"' + t.replace('"', '""') + '"*' for t in word.split())
+        where, args = "id in (select rowid from entries_fts where entries_fts match ?)", (match,)
+    else:
+        where, args = "(title like ? or bullets like ?)", (f"%{word}%", f"%{word}%")
+    n, mins = conn.execute(f"select count(*), coalesce(sum(minutes), 0) from entries where {where}", args).fetchone()
+    rows = conn.execute(f"select day, phase, title, minutes from entries where {where} "
+                        f"order by day desc, pos desc limit ?", (*args, limit)).fetchall()
+    return n, mins, rows
+
+def velocity(conn: sqlite3.Connection, weeks: int = 12, window: int = 4) -> List[Tuple[str, int, float]]:
+    """(settimana, minuti, media mobile su `window` settimane), dalla più recente."""
+    return conn.execute(
+        "with w as (select week, sum(minutes) as m from entries where week != '' group by week) "
+        "select week, m, avg(m) over (order by week rows between ? preceding and current row) "
+        "from w order by week desc limit ?", (max(0, window - 1), weeks)).fetchall()
+
+def estimates(conn: sqlite3.Connection, limit: int = 20) -> Tuple[tuple, List[tuple]]:
+    """Totali (sezioni, stimato, reale) e le sezioni con lo scostamento maggiore."""
+    totals = conn.execute("select count(*), coalesce(sum(estimate), 0), coalesce(sum(minutes), 0) "
+                          "from entries where estimate is not null").fetchone()
+    rows = conn.execute("select day, phase, title, estimate, minutes from entries where estimate is not null "
+                        "order by abs(minutes - estimate) desc limit ?", (limit,)).fetchall()
+    return totals, rows
+
+# -------------------- benchmark --------------------
+
+def bench(n: int) -> int:
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "worklog.md"
+        path.write_text(worklog_model.synthetic(n), encoding="utf-8", newline="\n")
+        conn = connect(Path(tmp) / "worklog.sqlite")
+        s = sync(conn, path)
+        print(f"[OK] sync {s['mode']}: {s['rows']} sezioni in {s['ms']:.0f} ms")
+        worklog_model.append_entry(path, Entry("2030-01-07", "PL-9z", "sezione nuova", ["stima: 1h"], 75))
+        s = sync(conn, path)
+        print(f"[OK] sync {s['mode']}: {s['rows']} sezioni in {s['ms']:.1f} ms")
+        for label, fn in (("per fase", lambda: by(conn, "phase")),
+                          ("per settimana", lambda: by(conn, "week")),
+                          ("per mese", lambda: by(conn, "month")),
+                          ("parola chiave", lambda: keyword(conn, "sintetica 4242")),
+                          ("velocity", lambda: velocity(conn)),
+                          ("stime", lambda: estimates(conn))):
+            t0 = time.perf_counter(); fn(); dt = (time.perf_counter() - t0) * 1000
+            print(f"[OK] {label:<14} {dt:7.2f} ms")
+        total = conn.execute("select sum(minutes) from entries").fetchone()[0]
+        ok = total == worklog_model.totals_of(worklog_model.read(path)).minutes
+        conn.close()
+    print(f"[{'OK' if ok else 'ERR'}] totale SQLite = totale del worklog: {ok}")
+    return 0 if ok else 2
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description="Statistiche del worklog su SQLite")
+    sub = ap.add_subparsers(dest="cmd")
+    p_b = sub.add_parser("bench", help="Sync e query su un worklog sintetico")
+    p_b.add_argument("--entries", type=int, default=100_000)
+    args = ap.parse_args(argv)
+    if args.cmd == "bench":
+        return bench(args.entries)
+    ap.print_help()
+    return 2
+
+if __name__ == "__main__":
+    sys.exit(main())
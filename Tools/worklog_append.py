@@ -3,52 +3,151 @@
 worklog_append.py
 - Legge l'ultimo commit git
 - Estrae fase (PL-6b), descrizione e tempo (es: 1h 20m o 30m)
-- Aggiunge in worklog.md nella sezione corretta
-- NON duplica se la voce esiste già
+- Aggiunge in worklog.md una sezione '### 📌 <data> – <fase> – <descrizione>'
+- NON duplica se la voce esiste già (stessa fase e descrizione)
+- --backfill [RANGE]: tutta la storia (o un range, es. v1.0..HEAD) con un solo
+  `git log` in streaming, duplicati scartati con un hash set di (fase, descrizione),
+  sezioni mancanti scritte in un'unica scrittura (data = data del commit)
+
+Uso:
+  python Tools/worklog_append.py
+  python Tools/worklog_append.py --backfill [--dry-run]
+  python Tools/worklog_append.py --bench 50000      # throughput su un repo sintetico
 """
+import argparse
 import re
 import subprocess
+import tempfile
+import time
+from datetime import date
 from pathlib import Path
+from typing import Iterator
+
+import worklog_model
+from worklog_model import Entry
 
 ROOT = Path(__file__).resolve().parent.parent
 WORKLOG = ROOT / "worklog.md"
 
+MARKER = "tempo registrato"
+COMMIT_RX = re.compile(r"(PL-\d+\w*): (.+?) – tempo registrato (.+)")
+
 def get_last_commit() -> str:
     return subprocess.check_output(
         ["git", "log", "-1", "--pretty=%s"], cwd=ROOT, text=True
     ).strip()
 
 def parse_commit(msg: str):
-    m = re.match(r"(PL-\d+\w*): (.+?) – tempo registrato (.+)", msg)
+    m = COMMIT_RX.match(msg)
     if not m:
         raise ValueError(f"Commit message non valido: {msg}")
     phase, desc, duration = m.groups()
     return phase, desc.strip(), duration.strip()
 
-def append_worklog(phase: str, desc: str, duration: str):
-    lines = WORKLOG.read_text(encoding="utf-8").splitlines()
-    header = f"### 📌 {phase}"
-
-    # Se esiste già, non duplicare
-    joined = "\n".join(lines)
-    if desc in joined and duration in joined:
+def append_worklog(phase: str, desc: str, duration: str, day: str | None = None):
+    entry = Entry(date=day or str(date.today()), phase=phase, title=desc,
+                  minutes=worklog_model.parse_minutes(duration) or 0)
+    # Se esiste già (come titolo o bullet di una sezione della fase), non duplicare:
+    # controllo e scrittura sotto lock, anche con altri script in esecuzione
+    [added] = worklog_model.submit(WORKLOG, [entry], "unique")
+    if not added:
         print(f"[SKIP] {phase}: già registrato")
         return False
+    print(f"[APPEND] {phase}: {desc} ({duration})")
+    return True
 
-    # Sezione fase non trovata → aggiungila in fondo
-    if header not in lines:
-        lines.append("")
-        lines.append(header)
+# -------------------- backfill dalla storia --------------------
 
-    # Aggiungi voce
-    lines.append(f"- {desc}")
-    lines.append(f"⏱ {duration}")
+def iter_commits(rev: str = "HEAD", cwd: Path = ROOT) -> Iterator[tuple[str, str]]:
+    """(data, subject) dal commit più vecchio, da un solo processo git; git stesso
+    scarta i commit senza il marcatore."""
+    cmd = ["git", "log", "--reverse", "--date=short", "--format=%ad%x1f%s",
+           "--fixed-strings", f"--grep={MARKER}", rev]
+    with subprocess.Popen(cmd, cwd=cwd, stdout=subprocess.PIPE, text=True,
+                          encoding="utf-8", errors="replace", bufsize=1 << 16) as proc:
+        for line in proc.stdout:
+            day, _, subject = line.rstrip("\n").partition("\x1f")
+            yield day, subject
+    if proc.returncode:
+        raise subprocess.CalledProcessError(proc.returncode, cmd)
 
-    WORKLOG.write_text("\n".join(lines) + "\n", encoding="utf-8")
-    print(f"[APPEND] {phase}: {desc} ({duration})")
-    return True
+def backfill(rev: str = "HEAD", dry_run: bool = False, cwd: Path = ROOT, worklog: Path = WORKLOG) -> dict:
+    t0 = time.perf_counter()
+    seen = worklog_model.unique_keys(worklog_model.read(worklog))
+    batch: list[Entry] = []
+    scanned = invalid = dup = 0
+    for day, subject in iter_commits(rev, cwd):
+        scanned += 1
+        m = COMMIT_RX.match(subject)
+        if not m:
+            invalid += 1
+            continue
+        phase, desc, duration = m.group(1), m.group(2).strip(), m.group(3).strip()
+        if (phase, desc) in seen:
+            dup += 1
+            continue
+        seen.add((phase, desc))
+        batch.append(Entry(date=day, phase=phase, title=desc, minutes=worklog_model.parse_minutes(duration) or 0))
+    t1 = time.perf_counter()
+    added = 0
+    if batch and not dry_run:
+        # una sola scrittura; il modo unique ricontrolla sotto lock (scritture arrivate nel frattempo)
+        added = sum(worklog_model.submit(worklog, batch, "unique"))
+    t2 = time.perf_counter()
+    return {"scanned": scanned, "invalid": invalid, "dup": dup, "new": len(batch), "added": added,
+            "scan_s": t1 - t0, "write_s": t2 - t1}
+
+def report(st: dict, dry_run: bool) -> None:
+    print(f"[INFO] commit con '{MARKER}': {st['scanned']} | non validi: {st['invalid']} | "
+          f"già registrati: {st['dup']} | nuovi: {st['new']}")
+    print(f"[OK] {'(dry-run) ' if dry_run else ''}aggiunte: {st['added']} | scansione {st['scan_s'] * 1000:.0f} ms "
+          f"({st['scanned'] / max(st['scan_s'], 1e-9):,.0f} commit/s) | scrittura {st['write_s'] * 1000:.0f} ms")
+
+def bench(n: int) -> int:
+    """Repo temporaneo con n commit (git fast-import), poi due backfill: tutto nuovo, tutto duplicato."""
+    with tempfile.TemporaryDirectory() as tmp:
+        repo = Path(tmp)
+        subprocess.run(["git", "init", "-q", str(repo)], check=True)
+        t0 = time.perf_counter()
+        proc = subprocess.Popen(["git", "fast-import", "--quiet"], cwd=repo, stdin=subprocess.PIPE)
+        for i in range(1, n + 1):
+            msg = (f"PL-{i % 40}{'abcdef'[i % 6]}: attività {i} – {MARKER} {i % 5 + 1}h {i % 60}m"
+                   if i % 10 else f"chore: commit {i} senza tempo").encode("utf-8")
+            head = (f"commit refs/heads/main\nmark :{i}\n"
+                    f"committer Bench <bench@example.com> {1_600_000_000 + i * 600} +0000\n"
+                    f"data {len(msg)}\n").encode("utf-8")
+            tail = f"\nfrom :{i - 1}\n\n" if i > 1 else "\n\n"
+            proc.stdin.write(head + msg + tail.encode("utf-8"))
+        proc.stdin.close()
+        if proc.wait():
+            print("[ERR] git fast-import non riuscito")
+            return 2
+        print(f"[INFO] repo sintetico: {n} commit in {time.perf_counter() - t0:.1f} s")
+        wl = repo / "worklog.md"
+        st = backfill("main", cwd=repo, worklog=wl)
+        report(st, False)
+        st2 = backfill("main", cwd=repo, worklog=wl)
+        report(st2, False)
+        expected = n - n // 10
+        ok = st["added"] == expected and st2["added"] == 0 and st2["dup"] == expected \
+            and sum(1 for _ in worklog_model.read(wl).entries()) == expected
+    print(f"[{'OK' if ok else 'ERR'}] {expected} sezioni, nessun duplicato al secondo passaggio: {ok}")
+    return 0 if ok else 2
 
 def main():
+    ap = argparse.ArgumentParser(description="Worklog dai messaggi di commit")
+    ap.add_argument("--backfill", nargs="?", const="HEAD", metavar="RANGE",
+                    help="Importa tutta la storia (default HEAD) o un range")
+    ap.add_argument("--dry-run", action="store_true", help="Con --backfill: conta senza scrivere")
+    ap.add_argument("--bench", type=int, metavar="N", help="Throughput su un repo sintetico di N commit")
+    args = ap.parse_args()
+
+    if args.bench:
+        return bench(args.bench)
+    if args.backfill:
+        report(backfill(args.backfill, args.dry_run), args.dry_run)
+        return 0
+
     msg = get_last_commit()
     print(f"[COMMIT] {msg}")
     try:
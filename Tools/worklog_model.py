@@ -0,0 +1,642 @@
+# -*- coding: utf-8 -*-
+"""
+worklog_model.py
+Modello strutturato di worklog.md, unico parser/serializzatore per gli script del
+worklog (ica_toolchain, worklog_autolog, update_worklog, worklog_normalize_sections,
+worklog_append).
+- Una passata in streaming (riga per riga, anche da file aperto) in record compatti
+  (dataclass con __slots__):
+    Entry  '### 📌 <data> – <fase> – <titolo>' con bullet, note e minuti
+    Total  intestazione 'Totale' ('### Totale', '🔹 Totale', …) e la sua riga '⏱'
+    Block  righe libere (titolo del file, '## Totale ore registrate', tabelle legacy)
+- Un solo formato di durata per le righe '⏱': "1h 20m", "2h", "45m", "1:20", "30"
+- Serializzatore canonico: '⏱' sempre in fondo alla sezione (più righe sommate),
+  una riga vuota tra i blocchi; un file già canonico esce identico
+- Totali incrementali in reports/<nome>_index.json (minuti, sezioni, minuti per fase),
+  legati a size+mtime del worklog: append_entry scrive solo la sezione nuova in coda
+  e aggiorna il sidecar; se il file è stato riscritto da altri il sidecar si ricostruisce
+- Scritture concorrenti: submit() (spool + lock consultivo + rename atomico, le operazioni
+  in attesa di più processi applicate in una sola scrittura) ed edit() per le riscritture
+
+Uso:
+  from worklog_model import read, write, Entry
+  wl = read(WORKLOG)
+  wl.total_minutes()
+  wl.append(Entry("2025-09-20", "PL-6h", "Gitignore", ["patch preflight"], 15))
+  write(WORKLOG, wl)
+  append_entry(WORKLOG, Entry(...))    # solo append + totali nel sidecar, O(1)
+  load_totals(WORKLOG).minutes         # O(1) se il sidecar è allineato al file
+  python Tools/worklog_model.py stats
+  python Tools/worklog_model.py bench --entries 100000
+  python Tools/worklog_model.py stress --workers 16 --per-worker 25
+"""
+from __future__ import annotations
+import argparse
+import itertools
+import json
+import os
+import random
+import re
+import sys
+import tempfile
+import time
+import tracemalloc
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Union
+
+ROOT = Path(__file__).resolve().parents[1]
+WORKLOG = ROOT / "worklog.md"
+TITLE = "# Worklog – ICA Next.js + Supabase"
+
+SECTION = "### 📌 "
+SEP = " – "
+TIMER = "⏱"
+DATE_RX = re.compile(r"^\d{4}-\d{2}-\d{2}$")
+PHASE_RX = re.compile(r"^PL-\d+\w*$")    # intestazione con la sola fase (worklog_append)
+CLOCK_RX = re.compile(r"(\d{1,3}):([0-5]\d)\b")
+HOURS_RX = re.compile(r"(\d+)\s*h", re.I)
+MINS_RX = re.compile(r"(\d+)\s*m", re.I)
+
+# -------------------- durate --------------------
+
+def parse_minutes(text: Optional[str]) -> Optional[int]:
+    """Minuti da '1h 20m', '2h', '45m', '1:20' o '30' (anche con '⏱' davanti); None se non è una durata."""
+    s = (text or "").strip().lstrip(TIMER).strip()
+    m = CLOCK_RX.search(s)
+    if m:
+        return int(m.group(1)) * 60 + int(m.group(2))
+    h = HOURS_RX.search(s)
+    mm = MINS_RX.search(s)
+    if h or mm:
+        return (int(h.group(1)) if h else 0) * 60 + (int(mm.group(1)) if mm else 0)
+    return int(s) if s.isdigit() else None
+
+def fmt_minutes(n: int) -> str:
+    h, m = divmod(n, 60)
+    if h and m: return f"{h}h {m}m"
+    if h: return f"{h}h"
+    return f"{m}m"
+
+def is_total_header(line: str) -> bool:
+    """'Totale', '🔹 Totale', '### Totale:', '* Totale' (non '## Totale ore registrate: …')."""
+    s = line.strip().lower().lstrip("#*-•🔹 ").strip()
+    return (s[:-1] if s.endswith(":") else s) == "totale"
+
+# -------------------- record --------------------
+
+@dataclass(slots=True)
+class Entry:
+    date: str = ""
+    phase: str = ""
+    title: str = ""
+    bullets: List[str] = field(default_factory=list)
+    minutes: Optional[int] = None                       # None: sezione senza riga '⏱'
+    notes: List[str] = field(default_factory=list)      # altre righe del corpo, invariate
+
+    @property
+    def header(self) -> str:
+        return SECTION + SEP.join(p for p in (self.date, self.phase, self.title) if p)
+
+    def add_minutes(self, n: int) -> None:
+        self.minutes = (self.minutes or 0) + n
+
+    def add_bullets(self, items: Iterable[str]) -> int:
+        """Aggiunge i bullet non ancora presenti; ritorna quanti."""
+        seen = set(self.bullets)
+        added = 0
+        for b in items:
+            b = b.strip()
+            if b and b not in seen:
+                self.bullets.append(b)
+                seen.add(b)
+                added += 1
+        return added
+
+@dataclass(slots=True)
+class Total:
+    label: str
+    minutes: Optional[int] = None
+
+@dataclass(slots=True)
+class Block:
+    lines: List[str] = field(default_factory=list)
+
+Item = Union[Entry, Total, Block]
+
+def parse_header(rest: str) -> tuple[str, str, str]:
+    """'<data> – <fase> – <titolo>' con data e fase opzionali -> (data, fase, titolo)."""
+    parts = rest.strip().split(SEP)
+    date = parts.pop(0) if parts and DATE_RX.match(parts[0]) else ""
+    if len(parts) >= 2:
+        return date, parts[0], SEP.join(parts[1:])
+    only = parts[0] if parts else ""
+    if not date and PHASE_RX.match(only):
+        return "", only, ""
+    return date, "", only
+
+@dataclass(slots=True)
+class Worklog:
+    items: List[Item] = field(default_factory=list)
+
+    @classmethod
+    def new(cls, title: str = TITLE) -> "Worklog":
+        return cls([Block([title])])
+
+    def entries(self) -> Iterator[Entry]:
+        return (it for it in self.items if type(it) is Entry)
+
+    def totals(self) -> Iterator[Total]:
+        return (it for it in self.items if type(it) is Total)
+
+    def total_minutes(self, upto: Optional[int] = None) -> int:
+        """Somma delle sezioni (i blocchi 'Totale' esclusi), fino all'indice `upto` escluso."""
+        items = self.items if upto is None else self.items[:upto]
+        return sum(it.minutes or 0 for it in items if type(it) is Entry)
+
+    def find(self, date: str = "", phase: str = "", title: str = "") -> Optional[Entry]:
+        """Ultima sezione con questi campi (quelli vuoti non filtrano)."""
+        for it in reversed(self.items):
+            if type(it) is Entry and (not date or it.date == date) \
+                    and (not phase or it.phase == phase) and (not title or it.title == title):
+                return it
+        return None
+
+    def append(self, entry: Entry) -> Entry:
+        """In fondo, ma prima degli eventuali blocchi 'Totale' finali."""
+        i = len(self.items)
+        while i and type(self.items[i - 1]) is Total:
+            i -= 1
+        self.items.insert(i, entry)
+        return entry
+
+    def set_line(self, prefix: str, line: str) -> None:
+        """Sostituisce la riga libera che inizia con `prefix`, o la mette dopo il titolo."""
+        for it in self.items:
+            if type(it) is Block:
+                for i, ln in enumerate(it.lines):
+                    if ln.startswith(prefix):
+                        it.lines[i] = line
+                        return
+        if self.items and type(self.items[0]) is Block:
+            self.items[0].lines.insert(1, line)
+        else:
+            self.items.insert(0, Block([TITLE, line]))
+
+# -------------------- parse / serializza --------------------
+
+def parse(lines: Iterable[str]) -> Worklog:
+    """Una passata; `lines` può essere un file aperto (righe con o senza '\\n')."""
+    wl = Worklog()
+    items = wl.items
+    cur: Optional[Item] = None
+    for raw in lines:
+        line = raw.rstrip("\r\n")
+        if line.startswith(SECTION):
+            cur = Entry(*parse_header(line[len(SECTION):]))
+            items.append(cur)
+            continue
+        s = line.strip()
+        if type(cur) is Entry:
+            if s.startswith("- "):
+                cur.bullets.append(s[2:].strip())
+                continue
+            if s.startswith(TIMER):
+                cur.minutes = (cur.minutes or 0) + (parse_minutes(s) or 0)
+                continue
+            if not s:
+                continue
+        if ("otale" in s or "OTALE" in s) and is_total_header(s):
+            cur = Total(line)
+            items.append(cur)
+            continue
+        if type(cur) is Entry:
+            if not (s.startswith("#") or s == "---"):
+                cur.notes.append(line)
+                continue
+            cur = None   # altro titolo o separatore: fine sezione
+        elif type(cur) is Total and cur.minutes is None:
+            if not s:
+                continue
+            if s.startswith(TIMER):
+                cur.minutes = parse_minutes(s) or 0
+                continue
+        if type(cur) is not Block:
+            if not s:
+                continue   # righe vuote tra i blocchi: le rimette il serializzatore
+            cur = Block()
+            items.append(cur)
+        cur.lines.append(line)
+    return wl
+
+def iter_lines(wl: Worklog) -> Iterator[str]:
+    for it in wl.items:
+        if type(it) is Entry:
+            yield it.header
+            for b in it.bullets:
+                yield f"- {b}"
+            yield from it.notes
+            if it.minutes is not None:
+                yield f"{TIMER} {fmt_minutes(it.minutes)}"
+        elif type(it) is Total:
+            yield it.label
+            if it.minutes is not None:
+                yield f"{TIMER} {fmt_minutes(it.minutes)}"
+        else:
+            lines = it.lines
+            end = len(lines)
+            while end and not lines[end - 1].strip():
+                end -= 1
+            yield from lines[:end]
+        yield ""
+
+def dumps(wl: Worklog) -> str:
+    return "\n".join(iter_lines(wl))
+
+def read(path: Path = WORKLOG) -> Worklog:
+    if not path.exists():
+        return Worklog.new()
+    with path.open(encoding="utf-8-sig", errors="replace") as fh:
+        return parse(fh)
+
+def write(path: Path, wl: Worklog) -> None:
+    """File temporaneo nella stessa cartella + rename atomico: chi legge vede il vecchio o il nuovo."""
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    with tmp.open("w", encoding="utf-8", newline="\n") as fh:
+        fh.write(dumps(wl))
+        fh.flush()
+        os.fsync(fh.fileno())
+    os.replace(tmp, path)
+
+# -------------------- totali incrementali --------------------
+
+@dataclass(slots=True)
+class Totals:
+    size: int = -1               # size e mtime del worklog a cui si riferiscono
+    mtime_ns: int = 0
+    entries: int = 0
+    minutes: int = 0
+    phases: Dict[str, int] = field(default_factory=dict)   # fase ("" = senza fase) -> minuti
+
+    def add(self, entry: Entry) -> None:
+        self.entries += 1
+        self.minutes += entry.minutes or 0
+        self.phases[entry.phase] = self.phases.get(entry.phase, 0) + (entry.minutes or 0)
+
+def state_dir(path: Path) -> Path:
+    """Sidecar, lock e spool del worklog (reports/ accanto al file)."""
+    return path.parent / "reports"
+
+def totals_path(path: Path = WORKLOG) -> Path:
+    return state_dir(path) / f"{path.stem}_index.json"
+
+def totals_of(wl: Worklog) -> Totals:
+    totals = Totals()
+    for e in wl.entries():
+        totals.add(e)
+    return totals
+
+def _stamp(path: Path) -> tuple[int, int]:
+    st = path.stat()
+    return st.st_size, st.st_mtime_ns
+
+def save_totals(path: Path, totals: Totals) -> None:
+    """Salva i totali legandoli a size+mtime attuali del worklog."""
+    totals.size, totals.mtime_ns = _stamp(path)
+    idx = totals_path(path)
+    idx.parent.mkdir(parents=True, exist_ok=True)
+    data = {"size": totals.size, "mtime_ns": totals.mtime_ns, "entries": totals.entries,
+            "minutes": totals.minutes, "phases": totals.phases}
+    tmp = idx.with_name(idx.name + ".tmp")
+    tmp.write_text(json.dumps(data, ensure_ascii=False, indent=1) + "\n", encoding="utf-8")
+    tmp.replace(idx)
+
+def rebuild_totals(path: Path = WORKLOG) -> Totals:
+    """Un parse completo; solo se il sidecar manca o il file è cambiato fuori da append_entry."""
+    if not path.exists():
+        return Totals(size=0)
+    totals = totals_of(read(path))
+    save_totals(path, totals)
+    return totals
+
+def load_totals(path: Path = WORKLOG) -> Totals:
+    if not path.exists():
+        return Totals(size=0)
+    try:
+        data = json.loads(totals_path(path).read_text(encoding="utf-8"))
+        totals = Totals(**data)
+        if (totals.size, totals.mtime_ns) == _stamp(path):
+            return totals
+    except (OSError, ValueError, TypeError):
+        pass
+    return rebuild_totals(path)
+
+def _append_text(path: Path, entries: List[Entry]) -> None:
+    """Solo le sezioni nuove in coda al file, senza rileggerlo."""
+    size = path.stat().st_size if path.exists() else 0
+    if size == 0:
+        prefix = TITLE + "\n\n"
+    else:
+        with path.open("rb") as fh:
+            fh.seek(max(0, size - 2))
+            tail = fh.read()
+        prefix = "" if tail.endswith(b"\n\n") else ("\n" if tail.endswith(b"\n") else "\n\n")
+    with path.open("a", encoding="utf-8", newline="\n") as fh:
+        fh.write(prefix + "\n".join(iter_lines(Worklog(list(entries)))))
+        fh.flush()
+        os.fsync(fh.fileno())
+
+def append_entry(path: Path, entry: Entry) -> Totals:
+    """Sezione nuova in coda (sotto lock, vedi submit) e totali aggiornati in O(1)."""
+    submit(path, [entry], "append")
+    return load_totals(path)
+
+# -------------------- scrittura concorrente --------------------
+# Più processi (ica-phase-all.ps1 -> worklog_autolog, worklog_append, pl_template, log)
+# possono scrivere nella stessa fase. Ogni scrittura passa da submit():
+# 1) le operazioni vanno in reports/<nome>_spool/<ns>-<pid>-<n>.json (temp + rename)
+# 2) lock consultivo esclusivo su reports/<nome>.lock (fcntl / msvcrt)
+# 3) chi ottiene il lock applica TUTTE le operazioni in attesa, anche degli altri processi,
+#    con una sola scrittura (rename atomico, o append in coda se sono solo append), e lascia
+#    l'esito agli altri in <file>.res; chi trova la propria operazione già applicata legge l'esito
+
+LOCK_TIMEOUT = 60.0
+MODES = ("append", "merge", "unique")
+_seq = itertools.count()
+
+if os.name == "nt":
+    import msvcrt
+
+    def _lock(fh) -> None:
+        fh.seek(0)
+        msvcrt.locking(fh.fileno(), msvcrt.LK_NBLCK, 1)
+
+    def _unlock(fh) -> None:
+        fh.seek(0)
+        msvcrt.locking(fh.fileno(), msvcrt.LK_UNLCK, 1)
+else:
+    import fcntl
+
+    def _lock(fh) -> None:
+        fcntl.flock(fh.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+
+    def _unlock(fh) -> None:
+        fcntl.flock(fh.fileno(), fcntl.LOCK_UN)
+
+def lock_path(path: Path) -> Path:
+    return state_dir(path) / f"{path.stem}.lock"
+
+def spool_dir(path: Path) -> Path:
+    return state_dir(path) / f"{path.stem}_spool"
+
+@contextmanager
+def file_lock(path: Path = WORKLOG, timeout: float = LOCK_TIMEOUT) -> Iterator[None]:
+    lp = lock_path(path)
+    lp.parent.mkdir(parents=True, exist_ok=True)
+    deadline = time.monotonic() + timeout
+    with lp.open("a+b") as fh:
+        while True:
+            try:
+                _lock(fh)
+                break
+            except OSError:
+                if time.monotonic() > deadline:
+                    raise TimeoutError(f"lock del worklog non ottenuto entro {timeout:.0f}s: {lp}")
+                time.sleep(0.005)
+        try:
+            yield
+        finally:
+            _unlock(fh)
+
+class NoChange(Exception):
+    """Da sollevare dentro edit() per uscire senza scrivere."""
+
+@contextmanager
+def edit(path: Path = WORKLOG) -> Iterator[Worklog]:
+    """Lettura-modifica-scrittura sotto lock (normalizzazione, totali): nessuna scrittura se il blocco fallisce."""
+    with file_lock(path):
+        wl = read(path)
+        try:
+            yield wl
+        except NoChange:
+            return
+        write(path, wl)
+        save_totals(path, totals_of(wl))
+
+def unique_keys(wl: Worklog) -> set:
+    """(fase, voce) già registrate: titoli e bullet di ogni sezione (controllo del modo unique)."""
+    keys = set()
+    for e in wl.entries():
+        keys.add((e.phase, e.title))
+        keys.update((e.phase, b) for b in e.bullets)
+    return keys
+
+def apply_op(wl: Worklog, entry: Entry, mode: str, seen: Optional[set] = None) -> bool:
+    """append: sempre una sezione nuova; merge: bullet e minuti nella sezione con stessa
+    data/fase/titolo (come worklog_autolog); unique: niente se la fase ha già quella voce.
+    `seen` (da unique_keys) evita di riscandire il worklog a ogni voce di un batch."""
+    if mode == "unique":
+        if seen is None:
+            seen = unique_keys(wl)
+        if (entry.phase, entry.title) in seen:
+            return False
+    target = wl.find(entry.date, entry.phase, entry.title) if mode == "merge" else None
+    if target is not None:
+        target.add_bullets(entry.bullets)
+        if entry.minutes is not None:
+            target.add_minutes(entry.minutes)
+    else:
+        wl.append(entry)
+    if seen is not None:
+        seen.add((entry.phase, entry.title))
+        seen.update((entry.phase, b) for b in entry.bullets)
+    return True
+
+def _drain(path: Path) -> Dict[str, List[bool]]:
+    """Applica tutte le operazioni nello spool con una sola scrittura; esiti per file."""
+    batches: List[tuple[Path, list]] = []
+    for f in sorted(spool_dir(path).glob("*.json")):
+        ops = json.loads(f.read_text(encoding="utf-8"))
+        batches.append((f, [(Entry(**o["entry"]), o["mode"]) for o in ops]))
+    if not batches:
+        return {}
+    ops = [op for _, b in batches for op in b]
+    if all(mode == "append" for _, mode in ops):
+        totals = load_totals(path)          # prima dell'append: il sidecar è ancora allineato
+        _append_text(path, [e for e, _ in ops])
+        for e, _ in ops:
+            totals.add(e)
+        results = [True] * len(ops)
+    else:
+        wl = read(path)
+        seen = unique_keys(wl) if any(m == "unique" for _, m in ops) else None
+        results = [apply_op(wl, e, m, seen) for e, m in ops]
+        if any(results):
+            write(path, wl)
+        totals = totals_of(wl)
+    save_totals(path, totals)
+    out: Dict[str, List[bool]] = {}
+    i = 0
+    for f, b in batches:
+        out[f.stem] = results[i:i + len(b)]
+        i += len(b)
+    return out
+
+def submit(path: Path, entries: List[Entry], mode: str = "append") -> List[bool]:
+    """Scrittura sicura con più processi; ritorna per ogni voce se è stata applicata."""
+    if mode not in MODES:
+        raise ValueError(f"modo non valido: {mode} (attesi: {', '.join(MODES)})")
+    spool = spool_dir(path)
+    spool.mkdir(parents=True, exist_ok=True)
+    name = f"{time.time_ns():020d}-{os.getpid()}-{next(_seq)}"
+    tmp = spool / f"{name}.tmp"
+    tmp.write_text(json.dumps([{"mode": mode, "entry": asdict(e)} for e in entries], ensure_ascii=False),
+                   encoding="utf-8")
+    os.replace(tmp, spool / f"{name}.json")
+    with file_lock(path):
+        if (spool / f"{name}.json").exists():
+            results = _drain(path)
+            for stem, res in results.items():
+                if stem != name:
+                    (spool / f"{stem}.res").write_text(json.dumps(res), encoding="utf-8")
+                (spool / f"{stem}.json").unlink()
+            return results[name]
+        res = spool / f"{name}.res"   # applicata da un altro processo nella stessa scrittura
+        out = json.loads(res.read_text(encoding="utf-8"))
+        res.unlink()
+        return out
+
+# -------------------- benchmark --------------------
+
+def synthetic(n: int, seed: int = 42) -> str:
+    """Worklog canonico con n sezioni e un blocco Totale finale."""
+    rnd = random.Random(seed)
+    lines = [TITLE, ""]
+    total = 0
+    for i in range(n):
+        d = f"{2020 + i // 40000}-{(i // 3000) % 12 + 1:02d}-{(i // 100) % 28 + 1:02d}"
+        mins = rnd.choice((5, 10, 15, 20, 30, 45, 60, 75, 90, 120, 135, 180))
+        total += mins
+        lines.append(f"{SECTION}{d}{SEP}PL-{i % 9 + 1}{'abcdefgh'[i % 8]}{SEP}Attività sintetica {i}")
+        lines.extend(f"- passo {j} della sessione {i}" for j in range(rnd.randint(1, 4)))
+        lines.extend((f"{TIMER} {fmt_minutes(mins)}", ""))
+    lines.extend(("### Totale", f"{TIMER} {fmt_minutes(total)}", ""))
+    return "\n".join(lines)
+
+def bench(n: int, rounds: int) -> int:
+    text = synthetic(n)
+    src = text.splitlines(keepends=True)
+    print(f"[INFO] worklog sintetico: {n} sezioni, {len(src)} righe, {len(text.encode('utf-8')) / 1e6:.1f} MB")
+    best = {"parse": float("inf"), "dumps": float("inf"), "total": float("inf")}
+    wl = None
+    for _ in range(rounds):
+        t0 = time.perf_counter(); wl = parse(src)
+        t1 = time.perf_counter(); out = dumps(wl)
+        t2 = time.perf_counter(); total = wl.total_minutes()
+        t3 = time.perf_counter()
+        for k, dt in (("parse", t1 - t0), ("dumps", t2 - t1), ("total", t3 - t2)):
+            best[k] = min(best[k], dt)
+    tracemalloc.start()
+    parse(src)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    ok = out == text and total == next(wl.totals()).minutes
+    for k, dt in best.items():
+        print(f"[OK] {k:<6} {dt * 1000:8.1f} ms  ({n / max(dt, 1e-9):,.0f} sezioni/s)")
+    print(f"[INFO] memoria di picco del parse: {peak / 1e6:.1f} MB ({peak / n:.0f} B/sezione)")
+    print(f"[{'OK' if ok else 'ERR'}] round-trip identico e totale coerente: {ok}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "worklog.md"
+        path.write_text(text, encoding="utf-8", newline="\n")
+        t0 = time.perf_counter(); rebuild_totals(path)
+        t1 = time.perf_counter(); load_totals(path)
+        t2 = time.perf_counter(); totals = append_entry(path, Entry("2030-01-01", "PL-X", "bench", [], 15))
+        t3 = time.perf_counter()
+        ok_idx = totals.minutes == total + 15 and totals.entries == n + 1
+        print(f"[OK] sidecar: ricostruzione {(t1 - t0) * 1000:.1f} ms | sum {(t2 - t1) * 1000:.2f} ms | "
+              f"append {(t3 - t2) * 1000:.2f} ms")
+        print(f"[{'OK' if ok_idx else 'ERR'}] totali incrementali coerenti: {ok_idx}")
+    return 0 if ok and ok_idx else 2
+
+def _stress_worker(args: tuple[str, int, int]) -> int:
+    path, wid, k = args
+    for i in range(k):
+        submit(Path(path), [Entry("2025-01-01", f"W{wid}", f"voce {wid}-{i}", [f"passo {i}"], 5)], "append")
+        submit(Path(path), [Entry("2025-01-01", "SHARED", "sezione comune", [f"w{wid}-{i}"], 1)], "merge")
+        submit(Path(path), [Entry("2025-01-01", "ONCE", f"unica {i % 3}", [], 2)], "unique")
+    return wid
+
+def stress(workers: int, per_worker: int) -> int:
+    """Molti processi scrivono insieme: nessuna voce persa o duplicata, sidecar coerente."""
+    from collections import Counter
+    from concurrent.futures import ProcessPoolExecutor
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "worklog.md"
+        path.write_text(TITLE + "\n", encoding="utf-8")
+        t0 = time.perf_counter()
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            list(pool.map(_stress_worker, [(str(path), w, per_worker) for w in range(workers)]))
+        dt = time.perf_counter() - t0
+        wl = read(path)
+        titles = Counter(e.title for e in wl.entries())
+        errors: List[str] = []
+        for w in range(workers):
+            for i in range(per_worker):
+                if titles[f"voce {w}-{i}"] != 1:
+                    errors.append(f"voce {w}-{i}: {titles[f'voce {w}-{i}']} volte")
+        shared = [e for e in wl.entries() if e.title == "sezione comune"]
+        expected = {f"w{w}-{i}" for w in range(workers) for i in range(per_worker)}
+        if len(shared) != 1 or set(shared[0].bullets) != expected or shared[0].minutes != len(expected):
+            errors.append(f"sezione comune: {len(shared)} sezioni, "
+                          f"{len(shared[0].bullets) if shared else 0}/{len(expected)} bullet")
+        for i in range(min(3, per_worker)):
+            if titles[f"unica {i}"] != 1:
+                errors.append(f"unica {i}: {titles[f'unica {i}']} volte")
+        side = json.loads(totals_path(path).read_text(encoding="utf-8"))
+        ref = totals_of(wl)
+        if (side["minutes"], side["entries"], side["size"]) != (ref.minutes, ref.entries, path.stat().st_size):
+            errors.append(f"sidecar: {side['minutes']}m/{side['entries']} sezioni, atteso {ref.minutes}m/{ref.entries}")
+        leftovers = list(spool_dir(path).iterdir())
+        if leftovers:
+            errors.append(f"spool non vuoto: {len(leftovers)} file")
+    writes = workers * per_worker * 3
+    print(f"[INFO] {workers} processi x {per_worker} x 3 scritture = {writes} in {dt:.1f} s "
+          f"({writes / max(dt, 1e-9):.0f} scritture/s)")
+    for e in errors[:20]:
+        print(f"[ERR] {e}")
+    print(f"[{'OK' if not errors else 'ERR'}] nessuna voce persa o duplicata: {not errors}")
+    return 0 if not errors else 2
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description="Modello strutturato di worklog.md")
+    sub = ap.add_subparsers(dest="cmd")
+    p_st = sub.add_parser("stats", help="Sezioni, minuti e forma canonica del worklog")
+    p_st.add_argument("--file", type=Path, default=WORKLOG)
+    p_b = sub.add_parser("bench", help="Parse/serializzazione su un worklog sintetico")
+    p_b.add_argument("--entries", type=int, default=100_000)
+    p_b.add_argument("--rounds", type=int, default=3)
+    p_s = sub.add_parser("stress", help="Scrittori concorrenti su un worklog temporaneo")
+    p_s.add_argument("--workers", type=int, default=16)
+    p_s.add_argument("--per-worker", type=int, default=25)
+    args = ap.parse_args(argv)
+
+    if args.cmd == "bench":
+        return bench(args.entries, max(1, args.rounds))
+    if args.cmd == "stress":
+        return stress(max(1, args.workers), max(1, args.per_worker))
+    if args.cmd == "stats":
+        if not args.file.exists():
+            print(f"[ERR] File non trovato: {args.file}")
+            return 2
+        wl = read(args.file)
+        canonical = dumps(wl) == args.file.read_text(encoding="utf-8-sig")
+        print(f"[INFO] sezioni: {sum(1 for _ in wl.entries())} | totale: {fmt_minutes(wl.total_minutes())} | "
+              f"blocchi Totale: {sum(1 for _ in wl.totals())} | forma canonica: {'sì' if canonical else 'no'}")
+        return 0
+    ap.print_help()
+    return 2
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,165 @@
+-- 0001_base_schema.sql
+-- Schema base unificato (sostituisce i blob DDL di setup_supabase_schema.py e setup_schema_news.py).
+-- Idempotente rispetto ai DB creati da uno dei due script: crea le tabelle se mancano e
+-- aggiunge le colonne che l'altro script non aveva, così news/articles convergono.
+
+create extension if not exists pgcrypto;  -- gen_random_uuid()
+
+---------------------------
+-- Tabelle di dominio
+---------------------------
+create table if not exists public.news (
+  id            uuid primary key default gen_random_uuid(),
+  title         text not null
+);
+alter table public.news
+  add column if not exists slug         text,
+  add column if not exists lang         text not null default 'it',
+  add column if not exists summary      text,
+  add column if not exists body         text,
+  add column if not exists category     text,
+  add column if not exists cover_url    text,
+  add column if not exists image_url    text,
+  add column if not exists source       text,
+  add column if not exists source_url   text,
+  add column if not exists source_date  date,
+  add column if not exists published    boolean not null default true,
+  add column if not exists published_at timestamptz default now(),
+  add column if not exists created_at   timestamptz not null default now(),
+  add column if not exists updated_at   timestamptz not null default now();
+
+create table if not exists public.articles (
+  id            uuid primary key default gen_random_uuid(),
+  title         text not null
+);
+alter table public.articles
+  add column if not exists slug         text,
+  add column if not exists lang         text not null default 'it',
+  add column if not exists subtitle     text,
+  add column if not exists excerpt      text,
+  add column if not exists body         text,
+  add column if not exists body_md      text,      -- contenuto markdown
+  add column if not exists content      text,
+  add column if not exists category     text,
+  add column if not exists cover_url    text,
+  add column if not exists image_url    text,
+  add column if not exists published    boolean not null default true,
+  add column if not exists published_at timestamptz default now(),
+  add column if not exists created_at   timestamptz not null default now(),
+  add column if not exists updated_at   timestamptz not null default now();
+
+-- Documenti scaricabili (PDF ecc.)
+create table if not exists public.documents (
+  id            uuid primary key default gen_random_uuid(),
+  title         text not null,
+  description   text,
+  file_path     text not null,  -- es: documents/xxx.pdf (Storage)
+  lang          text check (char_length(lang) between 2 and 5) default 'it',
+  created_at    timestamptz default now()
+);
+
+-- Tracking download
+create table if not exists public.downloads (
+  id           uuid primary key default gen_random_uuid(),
+  document_id  uuid not null references public.documents(id) on delete cascade,
+  user_id      uuid,
+  ip           inet,
+  created_at   timestamptz default now()
+);
+
+---------------------------
+-- RLS + policy tabelle
+---------------------------
+alter table public.news       enable row level security;
+alter table public.articles   enable row level security;
+alter table public.documents  enable row level security;
+alter table public.downloads  enable row level security;
+
+-- policy dei vecchi script (nomi diversi, regole in conflitto): sostituite da quelle sotto
+drop policy if exists "Public read news"      on public.news;
+drop policy if exists "Auth write news"       on public.news;
+drop policy if exists "public select news"    on public.news;
+drop policy if exists "auth insert news"      on public.news;
+drop policy if exists "Public read articles"  on public.articles;
+drop policy if exists "Auth write articles"   on public.articles;
+drop policy if exists "public select articles" on public.articles;
+drop policy if exists "auth insert articles"  on public.articles;
+
+-- Lettura pubblica solo contenuti pubblicati, scrittura agli autenticati
+drop policy if exists "news public read" on public.news;
+create policy "news public read" on public.news
+  for select to anon, authenticated using (published = true);
+drop policy if exists "news auth write" on public.news;
+create policy "news auth write" on public.news
+  for all to authenticated using (true) with check (true);
+
+drop policy if exists "articles public read" on public.articles;
+create policy "articles public read" on public.articles
+  for select to anon, authenticated using (published = true);
+drop policy if exists "articles auth write" on public.articles;
+create policy "articles auth write" on public.articles
+  for all to authenticated using (true) with check (true);
+
+drop policy if exists "public select documents" on public.documents;
+create policy "public select documents" on public.documents
+  for select to anon, authenticated using (true);
+drop policy if exists "auth insert documents" on public.documents;
+create policy "auth insert documents" on public.documents
+  for insert to authenticated with check (true);
+
+drop policy if exists "log downloads" on public.downloads;
+create policy "log downloads" on public.downloads
+  for insert to anon, authenticated with check (true);
+drop policy if exists "read downloads auth" on public.downloads;
+create policy "read downloads auth" on public.downloads
+  for select to authenticated using (true);
+
+---------------------------
+-- updated_at automatico
+---------------------------
+create or replace function public.set_updated_at()
+returns trigger language plpgsql as $$
+begin
+  new.updated_at = now();
+  return new;
+end $$;
+
+drop trigger if exists set_updated_at_news on public.news;
+create trigger set_updated_at_news
+  before update on public.news
+  for each row execute procedure public.set_updated_at();
+
+drop trigger if exists set_updated_at_articles on public.articles;
+create trigger set_updated_at_articles
+  before update on public.articles
+  for each row execute procedure public.set_updated_at();
+
+---------------------------
+-- Storage: buckets + policy
+---------------------------
+-- images pubblico (le pagine usano getPublicUrl), documents privato
+insert into storage.buckets (id, name, public) values ('images', 'images', true)
+on conflict (id) do update set public = excluded.public;
+insert into storage.buckets (id, name, public) values ('documents', 'documents', false)
+on conflict (id) do nothing;
+
+drop policy if exists "Public select images"   on storage.objects;
+drop policy if exists "Auth insert images"     on storage.objects;
+drop policy if exists "Auth update own images" on storage.objects;
+
+drop policy if exists "Public read images" on storage.objects;
+create policy "Public read images" on storage.objects
+  for select to anon, authenticated using (bucket_id = 'images');
+drop policy if exists "Auth write images" on storage.objects;
+create policy "Auth write images" on storage.objects
+  for insert to authenticated with check (bucket_id = 'images');
+drop policy if exists "Auth update images" on storage.objects;
+create policy "Auth update images" on storage.objects
+  for update to authenticated using (bucket_id = 'images') with check (bucket_id = 'images');
+
+drop policy if exists "Auth read documents" on storage.objects;
+create policy "Auth read documents" on storage.objects
+  for select to authenticated using (bucket_id = 'documents');
+drop policy if exists "Auth write documents" on storage.objects;
+create policy "Auth write documents" on storage.objects
+  for insert to authenticated with check (bucket_id = 'documents');
@@ -0,0 +1,14 @@
+-- 0002_news_duplicate_slugs.sql
+-- RPC usata da `preflight.py --dup-mode server`: Postgres raggruppa (slug, lang)
+-- e restituisce solo i gruppi duplicati, invece di scaricare tutti gli slug.
+create or replace function public.news_duplicate_slugs()
+returns table (slug text, lang text, n bigint)
+language sql stable security definer set search_path = public as $$
+  select slug, lang, count(*) as n
+  from public.news
+  where slug is not null and slug <> ''
+  group by slug, lang
+  having count(*) > 1
+  order by slug, lang
+$$;
+grant execute on function public.news_duplicate_slugs() to anon, authenticated;
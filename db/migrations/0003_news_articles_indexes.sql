@@ -0,0 +1,42 @@
+-- 0003_news_articles_indexes.sql
+-- migrate: no-transaction
+-- Indici per le query reali delle pagine generate (CONCURRENTLY: niente lock in scrittura
+-- sulle tabelle in produzione, quindi fuori transazione).
+--
+-- Le letture anon passano dalla policy "… public read" (published = true): gli indici
+-- parziali "where published" coprono listing e paginazione senza le righe in bozza.
+-- Verifica dei piani: python Tools/db_explain.py
+
+-- Listing /[locale]/news (pl6f, overwrite_newslist_clean): lang = ? order by created_at desc.
+-- id in coda rende l'ordinamento totale (cursori (created_at, id) per la paginazione keyset).
+create index concurrently if not exists news_lang_created_idx
+  on public.news (lang, created_at desc, id desc) where published;
+
+-- Scaffold news (create_pages_scaffold): lang = ? order by source_date desc
+create index concurrently if not exists news_lang_source_date_idx
+  on public.news (lang, source_date desc) where published;
+
+-- Home/admin (phase4): order by published_at desc limit N, senza filtro lingua
+create index concurrently if not exists news_published_at_idx
+  on public.news (published_at desc) where published;
+
+-- Dettaglio /[locale]/news/[slug] (slug = ?, con o senza lang) e sitemap (slug, lang).
+-- Non parziale: serve anche alle query service-role che non passano dalla RLS.
+create index concurrently if not exists news_slug_lang_idx
+  on public.news (slug, lang);
+
+create index concurrently if not exists articles_lang_created_idx
+  on public.articles (lang, created_at desc, id desc) where published;
+
+create index concurrently if not exists articles_published_at_idx
+  on public.articles (published_at desc) where published;
+
+create index concurrently if not exists articles_slug_lang_idx
+  on public.articles (slug, lang);
+
+-- FK dei download (delete cascade da documents e conteggi per documento)
+create index concurrently if not exists downloads_document_id_idx
+  on public.downloads (document_id);
+
+analyze public.news;
+analyze public.articles;
@@ -0,0 +1,19 @@
+-- 0004_slug_lang_unique.sql
+-- migrate: no-transaction
+-- Chiave naturale (slug, lang) per news e articles: serve agli upsert
+-- PostgREST on_conflict=slug,lang (Tools/bulk_import.py, pl6g_seed_news_minimum.py)
+-- e a ON CONFLICT (slug, lang) del backend COPY.
+--
+-- Se esistono duplicati la creazione fallisce: elencarli prima con
+--   python Tools/preflight.py --dup-mode server
+-- Le righe con slug NULL non entrano in conflitto tra loro.
+-- Se la creazione fallisce resta un indice INVALID: rimuoverlo (drop index …) prima di riprovare.
+
+create unique index concurrently if not exists news_slug_lang_key
+  on public.news (slug, lang);
+create unique index concurrently if not exists articles_slug_lang_key
+  on public.articles (slug, lang);
+
+-- sostituiscono gli indici non unici della 0003 (stesse colonne)
+drop index concurrently if exists public.news_slug_lang_idx;
+drop index concurrently if exists public.articles_slug_lang_idx;
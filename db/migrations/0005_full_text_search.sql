@@ -0,0 +1,108 @@
+-- 0005_full_text_search.sql
+-- Ricerca full-text su news e articles.
+-- - search_tsv: colonna tsvector generata (stored) con la configurazione della lingua
+--   della riga: titolo peso A, sommario/estratto B, corpo C
+-- - indici GIN parziali (where published), come le altre letture pubbliche
+-- - RPC search_content(q, lang, …): match per prefisso sull'ultima parola (ricerca
+--   "mentre scrivi"), ranking ts_rank_cd, snippet dal solo sommario (ts_headline sul
+--   corpo intero costerebbe più della ricerca stessa); i match sono delimitati da [[ ]]
+--   e la pagina li trasforma in <mark> senza HTML grezzo
+--
+-- Il ranking è calcolato su al massimo p_max_candidates match (i più recenti): con termini
+-- molto comuni il costo resta limitato invece di crescere con il numero di righe.
+-- Verifica: python Tools/db_bench.py --only search_news search_articles
+
+create or replace function public.ica_ts_config(p_lang text)
+returns regconfig language sql immutable parallel safe as $$
+  select case p_lang
+    when 'it' then 'pg_catalog.italian'
+    when 'en' then 'pg_catalog.english'
+    when 'fr' then 'pg_catalog.french'
+    when 'es' then 'pg_catalog.spanish'
+    when 'de' then 'pg_catalog.german'
+    else 'pg_catalog.simple'
+  end::regconfig
+$$;
+
+-- "risparmio fam" -> 'risparmio' & 'fam':*  (null se non resta nessuna parola)
+create or replace function public.ica_prefix_tsquery(p_cfg regconfig, p_q text)
+returns tsquery language sql immutable parallel safe as $$
+  with words as (
+    select w, n, max(n) over () as last
+    from regexp_split_to_table(lower(coalesce(p_q, '')), '[^[:alnum:]]+') with ordinality as t(w, n)
+    where w <> ''
+  )
+  select case when count(*) = 0 then null else
+    to_tsquery(p_cfg, string_agg(
+      quote_literal(w) || case when n = last then ':*' else '' end, ' & ' order by n))
+  end
+  from words
+$$;
+
+alter table public.news
+  add column if not exists search_tsv tsvector generated always as (
+    setweight(to_tsvector(public.ica_ts_config(lang), coalesce(title, '')), 'A') ||
+    setweight(to_tsvector(public.ica_ts_config(lang), coalesce(summary, '')), 'B') ||
+    setweight(to_tsvector(public.ica_ts_config(lang), coalesce(body, '')), 'C')
+  ) stored;
+
+alter table public.articles
+  add column if not exists search_tsv tsvector generated always as (
+    setweight(to_tsvector(public.ica_ts_config(lang), coalesce(title, '')), 'A') ||
+    setweight(to_tsvector(public.ica_ts_config(lang),
+      coalesce(subtitle, '') || ' ' || coalesce(excerpt, '')), 'B') ||
+    setweight(to_tsvector(public.ica_ts_config(lang), coalesce(content, body_md, body, '')), 'C')
+  ) stored;
+
+create index if not exists news_search_idx on public.news using gin (search_tsv) where published;
+create index if not exists articles_search_idx on public.articles using gin (search_tsv) where published;
+
+-- security invoker (default): per anon valgono le policy RLS di lettura
+create or replace function public.search_content(
+  q text,
+  p_lang text,
+  p_kind text default null,            -- 'news' | 'articles' | null = entrambi
+  p_limit int default 10,
+  p_offset int default 0,
+  p_max_candidates int default 500
+)
+returns table (
+  kind text, id uuid, slug text, lang text, title text, snippet text,
+  published_at timestamptz, rank real, total bigint
+)
+language sql stable as $$
+  with query as (
+    select public.ica_prefix_tsquery(public.ica_ts_config(p_lang), q) as tsq
+  ),
+  candidates as (
+    (select 'news'::text as kind, n.id, n.slug, n.lang, n.title, n.summary as teaser,
+            n.published_at, n.search_tsv
+       from public.news n, query
+      where query.tsq is not null and coalesce(p_kind, 'news') = 'news'
+        and n.published and n.lang = p_lang and n.search_tsv @@ query.tsq
+      order by n.published_at desc   -- stesso ordine di news_published_at_idx
+      limit p_max_candidates)
+    union all
+    (select 'articles', a.id, a.slug, a.lang, a.title, coalesce(a.excerpt, a.subtitle),
+            a.published_at, a.search_tsv
+       from public.articles a, query
+      where query.tsq is not null and coalesce(p_kind, 'articles') = 'articles'
+        and a.published and a.lang = p_lang and a.search_tsv @@ query.tsq
+      order by a.published_at desc
+      limit p_max_candidates)
+  ),
+  ranked as (
+    select c.*, ts_rank_cd(c.search_tsv, query.tsq, 32) as rank, count(*) over () as total
+    from candidates c, query
+    order by rank desc, c.published_at desc nulls last
+    limit greatest(1, least(p_limit, 50)) offset greatest(0, p_offset)
+  )
+  select r.kind, r.id, r.slug, r.lang, r.title,
+         ts_headline(public.ica_ts_config(p_lang), coalesce(r.teaser, ''), query.tsq,
+                     'MaxFragments=1, MaxWords=30, MinWords=10, StartSel=[[, StopSel=]]'),
+         r.published_at, r.rank, r.total
+  from ranked r, query
+  order by r.rank desc, r.published_at desc nulls last
+$$;
+
+grant execute on function public.search_content(text, text, text, int, int, int) to anon, authenticated;
@@ -0,0 +1,116 @@
+-- 0006_content_counters.sql
+-- Contatori esatti per (tabella, lingua, categoria, pubblicato), mantenuti da trigger.
+-- Le pagine leggono i totali con la RPC content_count (una lettura per PK) invece di
+-- un count sulla tabella a ogni richiesta.
+--
+-- Trigger per statement con transition table: un import massivo (bulk_import.py, COPY)
+-- aggiorna ogni contatore una volta per statement, non una volta per riga.
+
+create table if not exists public.content_counters (
+  table_name text    not null,
+  lang       text    not null,
+  category   text    not null default '',   -- '' = senza categoria (la PK non ammette NULL)
+  published  boolean not null,
+  n          bigint  not null default 0,
+  primary key (table_name, lang, category, published)
+);
+
+alter table public.content_counters enable row level security;
+drop policy if exists "content_counters public read" on public.content_counters;
+create policy "content_counters public read" on public.content_counters
+  for select to anon, authenticated using (true);
+revoke insert, update, delete on public.content_counters from anon, authenticated;
+
+-- security definer: chi scrive news/articles non ha (e non deve avere) accesso ai contatori
+create or replace function public.content_counters_apply()
+returns trigger language plpgsql security definer set search_path = public as $$
+begin
+  if tg_op = 'INSERT' then
+    insert into content_counters as c (table_name, lang, category, published, n)
+    select tg_table_name, coalesce(lang, ''), coalesce(category, ''), coalesce(published, false), count(*)
+    from new_rows group by 2, 3, 4
+    on conflict (table_name, lang, category, published) do update set n = c.n + excluded.n;
+  elsif tg_op = 'DELETE' then
+    insert into content_counters as c (table_name, lang, category, published, n)
+    select tg_table_name, coalesce(lang, ''), coalesce(category, ''), coalesce(published, false), -count(*)
+    from old_rows group by 2, 3, 4
+    on conflict (table_name, lang, category, published) do update set n = c.n + excluded.n;
+  else
+    -- UPDATE: solo le chiavi che cambiano davvero (bilancio netto per gruppo)
+    insert into content_counters as c (table_name, lang, category, published, n)
+    select tg_table_name, l, cat, pub, sum(d)
+    from (
+      select coalesce(lang, '') l, coalesce(category, '') cat, coalesce(published, false) pub, 1 d from new_rows
+      union all
+      select coalesce(lang, ''), coalesce(category, ''), coalesce(published, false), -1 from old_rows
+    ) delta
+    group by l, cat, pub
+    having sum(d) <> 0
+    on conflict (table_name, lang, category, published) do update set n = c.n + excluded.n;
+  end if;
+  return null;
+end $$;
+
+create or replace function public.content_counters_truncate()
+returns trigger language plpgsql security definer set search_path = public as $$
+begin
+  delete from content_counters where table_name = tg_table_name;
+  return null;
+end $$;
+
+-- una transition table per trigger: un trigger per evento
+drop trigger if exists content_counters_ins on public.news;
+create trigger content_counters_ins after insert on public.news
+  referencing new table as new_rows for each statement execute function public.content_counters_apply();
+drop trigger if exists content_counters_upd on public.news;
+create trigger content_counters_upd after update on public.news
+  referencing old table as old_rows new table as new_rows for each statement execute function public.content_counters_apply();
+drop trigger if exists content_counters_del on public.news;
+create trigger content_counters_del after delete on public.news
+  referencing old table as old_rows for each statement execute function public.content_counters_apply();
+drop trigger if exists content_counters_trunc on public.news;
+create trigger content_counters_trunc after truncate on public.news
+  for each statement execute function public.content_counters_truncate();
+
+drop trigger if exists content_counters_ins on public.articles;
+create trigger content_counters_ins after insert on public.articles
+  referencing new table as new_rows for each statement execute function public.content_counters_apply();
+drop trigger if exists content_counters_upd on public.articles;
+create trigger content_counters_upd after update on public.articles
+  referencing old table as old_rows new table as new_rows for each statement execute function public.content_counters_apply();
+drop trigger if exists content_counters_del on public.articles;
+create trigger content_counters_del after delete on public.articles
+  referencing old table as old_rows for each statement execute function public.content_counters_apply();
+drop trigger if exists content_counters_trunc on public.articles;
+create trigger content_counters_trunc after truncate on public.articles
+  for each statement execute function public.content_counters_truncate();
+
+-- Totale per le pagine: somma delle (poche) righe di categoria della lingua.
+-- GET /rest/v1/rpc/content_count?p_table=news&p_lang=it[&p_category=fisco]
+create or replace function public.content_count(
+  p_table text, p_lang text, p_category text default null, p_published boolean default true
+)
+returns bigint language sql stable as $$
+  select coalesce(sum(n), 0)::bigint
+  from public.content_counters
+  where table_name = p_table and lang = p_lang and published = p_published
+    and (p_category is null or category = p_category)
+$$;
+grant execute on function public.content_count(text, text, text, boolean) to anon, authenticated;
+
+-- Riallineamento completo (backfill iniziale o verifica): scrittori bloccati durante il ricalcolo
+create or replace function public.content_counters_rebuild()
+returns void language plpgsql security definer set search_path = public as $$
+begin
+  lock table news, articles in share row exclusive mode;
+  delete from content_counters where table_name in ('news', 'articles');
+  insert into content_counters (table_name, lang, category, published, n)
+  select 'news', coalesce(lang, ''), coalesce(category, ''), coalesce(published, false), count(*)
+  from news group by 2, 3, 4
+  union all
+  select 'articles', coalesce(lang, ''), coalesce(category, ''), coalesce(published, false), count(*)
+  from articles group by 2, 3, 4;
+end $$;
+revoke execute on function public.content_counters_rebuild() from public, anon, authenticated;
+
+select public.content_counters_rebuild();
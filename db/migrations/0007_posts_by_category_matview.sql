@@ -0,0 +1,136 @@
+-- 0007_posts_by_category_matview.sql
+-- posts_by_category_view (letta dalla pagina categoria di pl7) diventa una vista
+-- materializzata: la pagina legge righe già pronte invece di ricalcolare la query
+-- a ogni richiesta.
+-- - indice unico su id: consente REFRESH MATERIALIZED VIEW CONCURRENTLY (letture mai bloccate)
+-- - indice (locale, category_slug, published_at desc): stesso filtro/ordine della pagina
+-- - refresh con debounce: i trigger su articles segnano la vista come "sporca" in
+--   matview_refresh_state; refresh_posts_by_category_view() la ricalcola solo quando
+--   le scritture si sono calmate (p_quiet) o al massimo dopo p_max_delay
+-- - pg_cron, se installato, chiama il refresh ogni minuto; altrimenti
+--   python Tools/matview_refresh.py watch
+-- Stato e ritardo: python Tools/matview_refresh.py status
+--
+-- Le categorie sono la colonna articles.category (non c'è una tabella categorie):
+-- un cambio di categoria è un UPDATE su articles e passa dagli stessi trigger.
+
+-- una eventuale view normale creata a mano al posto di questa
+do $$
+begin
+  if exists (select 1 from pg_class c join pg_namespace n on n.oid = c.relnamespace
+             where n.nspname = 'public' and c.relname = 'posts_by_category_view' and c.relkind = 'v') then
+    execute 'drop view public.posts_by_category_view';
+  end if;
+end $$;
+
+-- solo contenuti pubblicati: la vista materializzata non ha RLS, filtra come la policy di lettura
+create materialized view if not exists public.posts_by_category_view as
+  select a.id,
+         a.lang                                as locale,
+         a.category                            as category_slug,
+         a.slug,
+         a.title,
+         coalesce(a.excerpt, a.subtitle)       as summary,
+         coalesce(a.cover_url, a.image_url)    as cover_url,
+         a.published_at,
+         a.updated_at
+  from public.articles a
+  where a.published and a.category is not null and a.slug is not null
+with data;
+
+create unique index if not exists posts_by_category_view_id_key
+  on public.posts_by_category_view (id);
+create index if not exists posts_by_category_view_locale_cat_idx
+  on public.posts_by_category_view (locale, category_slug, published_at desc);
+
+grant select on public.posts_by_category_view to anon, authenticated;
+
+---------------------------
+-- Stato del refresh (una riga per vista materializzata)
+---------------------------
+create table if not exists public.matview_refresh_state (
+  view_name         text primary key,
+  changes           bigint      not null default 0,  -- statement di scrittura visti dai trigger
+  refreshed_changes bigint      not null default 0,  -- valore di changes incluso nell'ultimo refresh
+  dirty_since       timestamptz,                     -- prima modifica non ancora nella vista
+  last_change_at    timestamptz,
+  last_refresh_at   timestamptz,
+  last_refresh_ms   double precision
+);
+alter table public.matview_refresh_state enable row level security;
+revoke all on public.matview_refresh_state from anon, authenticated;
+
+insert into public.matview_refresh_state (view_name, last_refresh_at)
+values ('posts_by_category_view', now())
+on conflict (view_name) do nothing;
+
+-- per statement: un import massivo segna la vista una volta sola
+create or replace function public.posts_by_category_mark_dirty()
+returns trigger language plpgsql security definer set search_path = public as $$
+begin
+  update matview_refresh_state
+     set changes = changes + 1,
+         last_change_at = now(),
+         dirty_since = coalesce(dirty_since, now())
+   where view_name = 'posts_by_category_view';
+  return null;
+end $$;
+
+drop trigger if exists posts_by_category_dirty on public.articles;
+create trigger posts_by_category_dirty
+  after insert or update or delete on public.articles
+  for each statement execute function public.posts_by_category_mark_dirty();
+drop trigger if exists posts_by_category_dirty_trunc on public.articles;
+create trigger posts_by_category_dirty_trunc
+  after truncate on public.articles
+  for each statement execute function public.posts_by_category_mark_dirty();
+
+-- Esito: 'clean' | 'debounced' (scritture troppo recenti) | 'busy' (refresh già in corso) | 'refreshed'
+create or replace function public.refresh_posts_by_category_view(
+  p_quiet interval default '10 seconds',
+  p_max_delay interval default '2 minutes',
+  p_force boolean default false
+)
+returns text language plpgsql security definer set search_path = public as $$
+declare
+  st     matview_refresh_state;
+  t0     timestamptz;
+begin
+  select * into st from matview_refresh_state where view_name = 'posts_by_category_view';
+  if not p_force then
+    if st.changes = st.refreshed_changes then
+      return 'clean';
+    end if;
+    if now() - st.last_change_at < p_quiet and now() - st.dirty_since < p_max_delay then
+      return 'debounced';
+    end if;
+  end if;
+  -- un solo refresh alla volta (cron + watch + manuale)
+  if not pg_try_advisory_xact_lock(hashtext('posts_by_category_view')) then
+    return 'busy';
+  end if;
+
+  -- il refresh parte con uno snapshot successivo alla lettura di st.changes:
+  -- tutto ciò che è stato contato è incluso, quello che arriva dopo resta "sporco"
+  t0 := clock_timestamp();
+  refresh materialized view concurrently public.posts_by_category_view;
+
+  update matview_refresh_state
+     set refreshed_changes = st.changes,
+         dirty_since = case when changes > st.changes then last_change_at end,
+         last_refresh_at = clock_timestamp(),
+         last_refresh_ms = extract(epoch from clock_timestamp() - t0) * 1000
+   where view_name = 'posts_by_category_view';
+  return 'refreshed';
+end $$;
+revoke execute on function public.refresh_posts_by_category_view(interval, interval, boolean)
+  from public, anon, authenticated;
+
+-- job pg_cron (solo se l'estensione è disponibile, es. Supabase con pg_cron abilitato)
+do $$
+begin
+  if exists (select 1 from pg_extension where extname = 'pg_cron') then
+    perform cron.schedule('posts_by_category_refresh', '* * * * *',
+                          'select public.refresh_posts_by_category_view()');
+  end if;
+end $$;
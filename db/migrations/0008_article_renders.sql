@@ -0,0 +1,33 @@
+-- 0008_article_renders.sql
+-- Markdown degli articoli renderizzato una volta (alla pubblicazione / backfill) invece
+-- che a ogni richiesta con marked + dompurify + jsdom.
+-- - articles.source_hash: md5 del sorgente (stessa precedenza content > body_md > body
+--   della ricerca full-text), calcolato dal database
+-- - article_renders: HTML sanificato, indice dei titoli, minuti di lettura ed estratto,
+--   con l'hash del sorgente da cui sono stati prodotti. Render valido solo se
+--   article_renders.source_hash = articles.source_hash: un corpo invariato non viene
+--   mai renderizzato di nuovo, uno modificato torna "da fare" da solo
+-- Tabella a parte e non colonne su articles: scrivere il render non deve toccare
+-- updated_at (lastmod della sitemap), contatori, vista per categoria né ricalcolare search_tsv.
+-- Render/backfill: python Tools/md_render.py backfill
+
+alter table public.articles
+  add column if not exists source_hash text
+  generated always as (md5(coalesce(content, body_md, body, ''))) stored;
+
+create table if not exists public.article_renders (
+  article_id      uuid primary key references public.articles(id) on delete cascade,
+  source_hash     text        not null,
+  html            text        not null,
+  toc             jsonb       not null default '[]'::jsonb,   -- [{level, id, text}]
+  reading_minutes int         not null default 1,
+  excerpt         text,
+  rendered_at     timestamptz not null default now()
+);
+
+alter table public.article_renders enable row level security;
+drop policy if exists "article_renders public read" on public.article_renders;
+create policy "article_renders public read" on public.article_renders
+  for select to anon, authenticated
+  using (exists (select 1 from public.articles a where a.id = article_id and a.published));
+revoke insert, update, delete on public.article_renders from anon, authenticated;
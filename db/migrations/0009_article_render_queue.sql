@@ -0,0 +1,39 @@
+-- 0009_article_render_queue.sql
+-- Un solo renderer per article_renders: Tools/md_render.py (Python-Markdown + nh3).
+-- Quando il sorgente di un articolo cambia (API admin, bulk_import.py, SQL a mano) il
+-- database accoda il render con una notifica sul canale article_render;
+-- `python Tools/md_render.py watch` ascolta il canale e renderizza gli articoli da fare.
+-- La coda vera resta il confronto degli hash (article_renders.source_hash diverso da
+-- articles.source_hash): una notifica persa con il worker fermo si recupera al riavvio.
+--
+-- Trigger per statement con transition table, come 0006: un import massivo manda una
+-- notifica per statement, non una per riga (e Postgres unisce le notifiche uguali della
+-- stessa transazione).
+
+create or replace function public.articles_render_enqueue()
+returns trigger language plpgsql as $$
+begin
+  if tg_op = 'INSERT' then
+    if exists (select 1 from new_rows) then
+      perform pg_notify('article_render', '');
+    end if;
+  elsif exists (
+    select 1 from new_rows n join old_rows o on o.id = n.id
+    where n.source_hash is distinct from o.source_hash
+  ) then
+    perform pg_notify('article_render', '');
+  end if;
+  return null;
+end $$;
+
+drop trigger if exists articles_render_enqueue_ins on public.articles;
+create trigger articles_render_enqueue_ins
+  after insert on public.articles
+  referencing new table as new_rows
+  for each statement execute function public.articles_render_enqueue();
+
+drop trigger if exists articles_render_enqueue_upd on public.articles;
+create trigger articles_render_enqueue_upd
+  after update on public.articles
+  referencing old table as old_rows new table as new_rows
+  for each statement execute function public.articles_render_enqueue();
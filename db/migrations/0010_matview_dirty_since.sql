@@ -0,0 +1,48 @@
+-- 0010_matview_dirty_since.sql
+-- refresh_posts_by_category_view (0007) salvava in dirty_since, se durante il refresh
+-- arrivavano scritture, l'ora dell'ultima (last_change_at): il ritardo riportato da
+-- matview_refresh.py status risultava più basso del vero. Le modifiche non incluse nel
+-- refresh sono successive al suo avvio: dirty_since = t0. Resto della funzione invariato.
+
+-- Esito: 'clean' | 'debounced' (scritture troppo recenti) | 'busy' (refresh già in corso) | 'refreshed'
+create or replace function public.refresh_posts_by_category_view(
+  p_quiet interval default '10 seconds',
+  p_max_delay interval default '2 minutes',
+  p_force boolean default false
+)
+returns text language plpgsql security definer set search_path = public as $$
+declare
+  st     matview_refresh_state;
+  t0     timestamptz;
+begin
+  select * into st from matview_refresh_state where view_name = 'posts_by_category_view';
+  if not p_force then
+    if st.changes = st.refreshed_changes then
+      return 'clean';
+    end if;
+    if now() - st.last_change_at < p_quiet and now() - st.dirty_since < p_max_delay then
+      return 'debounced';
+    end if;
+  end if;
+  -- un solo refresh alla volta (cron + watch + manuale)
+  if not pg_try_advisory_xact_lock(hashtext('posts_by_category_view')) then
+    return 'busy';
+  end if;
+
+  -- il refresh parte con uno snapshot successivo alla lettura di st.changes:
+  -- tutto ciò che è stato contato è incluso, quello che arriva dopo resta "sporco"
+  t0 := clock_timestamp();
+  refresh materialized view concurrently public.posts_by_category_view;
+
+  update matview_refresh_state
+     set refreshed_changes = st.changes,
+         -- scritture contate durante il refresh: fuori dalla vista e tutte successive al
+         -- suo avvio, il ritardo si misura da t0 (non dall'ultima arrivata, last_change_at)
+         dirty_since = case when changes > st.changes then t0 end,
+         last_refresh_at = clock_timestamp(),
+         last_refresh_ms = extract(epoch from clock_timestamp() - t0) * 1000
+   where view_name = 'posts_by_category_view';
+  return 'refreshed';
+end $$;
+revoke execute on function public.refresh_posts_by_category_view(interval, interval, boolean)
+  from public, anon, authenticated;
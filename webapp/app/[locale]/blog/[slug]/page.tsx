@@ -1,6 +1,8 @@
 import { notFound } from "next/navigation";
-import CategoryBadge from "@/components/ui/CategoryBadge";
-import { getSupabasePublicServer } from "@/lib/supabaseServerPublic";
+import CategoryBadges from "@/components/ui/CategoryBadges";
+import { getSupabaseCached } from "@/lib/supabaseCached";
+import { slugTag } from "@/lib/cacheTags";
+import { staticSlugs } from "@/lib/staticParams";
 import { marked } from "marked";
 import { sanitizeHtml } from "@/lib/sanitize";
 import Image from "next/image";
@@ -9,8 +11,16 @@ import type { Metadata, ResolvingMetadata } from "next";
 
 type Props = { params: { locale: string; slug: string } };
 
+// Prerender dei più recenti per lingua (Tools/static_params_export.py), gli altri on-demand;
+// le API admin invalidano slugTag a ogni scrittura (revalidateContent), 300 s è la rete di sicurezza
+export const revalidate = 300;
+
+export function generateStaticParams({ params }: { params: { locale: string } }) {
+  return staticSlugs("articles", params.locale);
+}
+
 async function fetchPost(slug: string) {
-  const supa = getSupabasePublicServer();
+  const supa = getSupabaseCached([slugTag("articles", slug)]);
   const { data } = await supa
     .from("articles")
     .select("id,title,excerpt,content,cover_url,slug,published_at")
@@ -59,11 +69,7 @@ export default async function BlogPostPage({ params }: Props) {
       <header className="space-y-3">
         <CategoryTag>Blog</CategoryTag>
         {post?.categories?.length ? (
-  <div className="mb-3 flex gap-2">{/* __PL7_CATEGORIES__ */}
-    {post.categories.map((c:any)=> (
-      <CategoryBadge key={c.id} locale={params.locale} slug={c.slug} label={c.name || c.slug} />
-    ))}
-  </div>
+  <CategoryBadges locale={params.locale} categories={post.categories} />{/* __PL7_CATEGORIES__ */}
 ) : null}
 <h1 className="text-3xl md:text-4xl font-extrabold leading-tight">{post.title}</h1>
         <p className="text-sm text-gray-500">{dateStr}</p>
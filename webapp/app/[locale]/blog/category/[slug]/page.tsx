@@ -7,13 +7,17 @@ export default async function CategoryPage({ params:{ locale, slug } }:{
   params:{ locale:string; slug:string }
 }) {
   const sb = supabaseBrowser();
-  // usa una view se ce l'hai; altrimenti adatta con la tua tabella traduzioni
-  const { data, error } = await sb
-    .from("posts_by_category_view")
-    .select("slug, title, summary, cover_url, published_at")
-    .eq("locale", locale)
-    .eq("category_slug", slug)
-    .order("published_at", { ascending:false });
+  // vista materializzata (migrazione 0007), aggiornata con refresh_posts_by_category_view
+  // totale dai contatori mantenuti da trigger (migrazione 0006), non da un count per richiesta
+  const [{ data, error }, { data: total }] = await Promise.all([
+    sb
+      .from("posts_by_category_view")
+      .select("slug, title, summary, cover_url, published_at")
+      .eq("locale", locale)
+      .eq("category_slug", slug)
+      .order("published_at", { ascending:false }),
+    sb.rpc("content_count", { p_table: "articles", p_lang: locale, p_category: slug }),
+  ]);
 
   if (error) {
     console.error(error);
@@ -21,7 +25,10 @@ export default async function CategoryPage({ params:{ locale, slug } }:{
 
   return (
     <main className="mx-auto max-w-5xl px-4 py-8">
-      <h1 className="text-3xl font-bold mb-6">{slug}</h1>
+      <h1 className="text-3xl font-bold mb-6">
+        {slug}
+        {total != null && <span className="ml-3 text-base font-normal text-slate-500">({Number(total)})</span>}
+      </h1>
       <ul className="grid gap-8 md:grid-cols-2">
         {(data ?? []).map((p:any)=>(
           <li key={p.slug} className="group">
@@ -2,15 +2,25 @@
 import Image from "next/image";
 import EditorialLayout from "@/components/EditorialLayout";
 import ArticleBody from "@/components/ArticleBody";
-import { createClient } from "@/lib/supabaseServerPublic";
+import { getSupabaseCached } from "@/lib/supabaseCached";
+import { slugTag } from "@/lib/cacheTags";
+import { staticSlugs } from "@/lib/staticParams";
 
 type Props = {
   params: { locale: string; slug: string };
 };
 
+// Prerender dei più recenti per lingua (Tools/static_params_export.py), gli altri on-demand;
+// le API admin invalidano slugTag a ogni scrittura (revalidateContent), 300 s è la rete di sicurezza
+export const revalidate = 300;
+
+export function generateStaticParams({ params }: { params: { locale: string } }) {
+  return staticSlugs("news", params.locale);
+}
+
 export default async function NewsDetail({ params }: Props) {
   const { locale, slug } = params;
-  const supabase = createClient();
+  const supabase = getSupabaseCached([slugTag("news", slug)]);
 
   const { data, error } = await supabase
     .from("news")
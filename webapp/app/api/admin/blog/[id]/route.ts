@@ -1,12 +1,14 @@
 import { NextResponse } from "next/server";
 import { z } from "zod";
 import { getSupabaseService } from "@/lib/supabaseServer";
+import { revalidateContent } from "@/lib/cacheTags";
 
 const UpdateSchema = z.object({
   title: z.string().min(1).optional(),
   excerpt: z.string().min(1).optional(),
   cover_url: z.string().url().nullable().optional(),
   slug: z.string().min(1).optional(),
+  content: z.string().nullable().optional(),   // Markdown
 });
 
 export async function PUT(
@@ -32,6 +34,13 @@ export async function PUT(
       }
     }
 
+    // slug/lingua prima della modifica: anche le pagine vecchie vanno invalidate
+    const { data: before } = await supa
+      .from("articles")
+      .select("lang, slug")
+      .eq("id", params.id)
+      .maybeSingle();
+
     const { data, error } = await supa
       .from("articles")
       .update(parsed)
@@ -40,6 +49,8 @@ export async function PUT(
       .single();
 
     if (error) return NextResponse.json({ error: error.message }, { status: 500 });
+    // se il sorgente è cambiato il database accoda il nuovo render (trigger di 0009)
+    revalidateContent("articles", before, data);
     return NextResponse.json({ item: data });
   } catch (e: any) {
     return NextResponse.json({ error: e?.message ?? "Invalid request" }, { status: 400 });
@@ -51,7 +62,8 @@ export async function DELETE(
   { params }: { params: { id: string } }
 ) {
   const supa = getSupabaseService();
-  const { error } = await supa.from("articles").delete().eq("id", params.id);
+  const { data, error } = await supa.from("articles").delete().eq("id", params.id).select("lang, slug");
   if (error) return NextResponse.json({ error: error.message }, { status: 500 });
+  revalidateContent("articles", ...(data ?? []));
   return NextResponse.json({ ok: true });
 }
@@ -1,12 +1,14 @@
 import { NextResponse } from "next/server";
 import { z } from "zod";
 import { getSupabaseService } from "@/lib/supabaseServer";
+import { revalidateContent } from "@/lib/cacheTags";
 
 const CreateSchema = z.object({
   title: z.string().min(1),
   excerpt: z.string().min(1),
   cover_url: z.string().url().optional().nullable(),
   slug: z.string().min(1),
+  content: z.string().optional().nullable(),   // Markdown
 });
 
 export async function GET() {
@@ -44,12 +46,15 @@ export async function POST(req: Request) {
         excerpt: parsed.excerpt,
         cover_url: parsed.cover_url ?? null,
         slug: parsed.slug,
+        content: parsed.content ?? null,
         published_at: new Date().toISOString(),
       })
       .select()
       .single();
 
     if (error) return NextResponse.json({ error: error.message }, { status: 500 });
+    // render accodato dal database (trigger di 0009, worker: Tools/md_render.py watch)
+    revalidateContent("articles", data);
     return NextResponse.json({ item: data }, { status: 201 });
   } catch (e: any) {
     return NextResponse.json({ error: e?.message ?? "Invalid request" }, { status: 400 });
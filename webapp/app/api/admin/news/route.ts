@@ -1,5 +1,6 @@
 ﻿import {NextResponse} from 'next/server';
 import {createClient} from '@supabase/supabase-js';
+import {revalidateContent} from '@/lib/cacheTags';
 
 const url = process.env.NEXT_PUBLIC_SUPABASE_URL!;
 const service = process.env.SUPABASE_SERVICE_ROLE!;
@@ -23,9 +24,10 @@ export async function POST(req: Request) {
   }
 
   const supabase = createClient(url, service);
-  const {error} = await supabase.from('news').insert({title, summary});
+  const {data, error} = await supabase.from('news').insert({title, summary}).select('lang, slug').single();
   if (error) {
     return NextResponse.json({ok:false, error: error.message}, {status:400});
   }
+  revalidateContent('news', data);
   return NextResponse.json({ok:true});
 }
@@ -1,7 +1,7 @@
 import Link from "next/link";
 
-export default function CategoryBadge({ locale, slug, label }:{
-  locale: string; slug: string; label: string;
+export default function CategoryBadge({ locale, slug, label, count }:{
+  locale: string; slug: string; label: string; count?: number | null;
 }) {
   return (
     <Link
@@ -9,6 +9,7 @@ export default function CategoryBadge({ locale, slug, label }:{
       className="inline-flex items-center rounded-full px-2.5 py-0.5 text-xs font-medium bg-slate-100 hover:bg-slate-200 text-slate-700"
     >
       {label}
+      {count != null && <span className="ml-1.5 text-slate-500">{count}</span>}
     </Link>
   );
 }
@@ -0,0 +1,23 @@
+import CategoryBadge from "@/components/ui/CategoryBadge";
+import { getSupabasePublicServer } from "@/lib/supabaseServerPublic";
+
+type Category = { id: string; slug: string; name?: string | null };
+
+// Server component: un content_count per categoria, ognuno una lettura per PK sui contatori
+// mantenuti da trigger (migrazione 0006), non un count sulla tabella
+export default async function CategoryBadges({ locale, categories }:{
+  locale: string; categories: Category[];
+}) {
+  const sb = getSupabasePublicServer();
+  const counts = await Promise.all(categories.map(async (c) => {
+    const { data } = await sb.rpc("content_count", { p_table: "articles", p_lang: locale, p_category: c.slug });
+    return data == null ? null : Number(data);
+  }));
+  return (
+    <div className="mb-3 flex gap-2">
+      {categories.map((c, i) => (
+        <CategoryBadge key={c.id} locale={locale} slug={c.slug} label={c.name || c.slug} count={counts[i]} />
+      ))}
+    </div>
+  );
+}
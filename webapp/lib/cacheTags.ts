@@ -0,0 +1,28 @@
+import { revalidateTag } from 'next/cache';
+
+// Tag della Data Cache di Next per news/articles (modalità --cache tags di pl6f e phase4).
+// Le pagine li assegnano alle fetch; le API admin li invalidano a ogni scrittura, così
+// Supabase riceve richieste in proporzione alle modifiche e non alle visite.
+export const REVALIDATE = 300; // secondi: rete di sicurezza se un'invalidazione va persa
+
+export type ContentTable = 'news' | 'articles';
+type ContentRow = { lang?: string | null; slug?: string | null };
+
+export const tableTag = (table: ContentTable) => table;                                  // liste senza lingua
+export const listTag = (table: ContentTable, lang: string) => `${table}:${lang}`;         // liste e totali per lingua
+export const slugTag = (table: ContentTable, slug: string) => `${table}:slug:${slug}`;    // pagine di dettaglio
+
+export function contentTags(table: ContentTable, rows: ContentRow[]): string[] {
+  const tags = new Set<string>([tableTag(table), 'sitemap']);
+  for (const r of rows) {
+    if (r?.lang) tags.add(listTag(table, r.lang));
+    if (r?.slug) tags.add(slugTag(table, r.slug));
+  }
+  return [...tags];
+}
+
+// Da chiamare dopo insert/update/delete: passare le righe prima e dopo la modifica
+// (un cambio di slug o di lingua deve invalidare anche le pagine vecchie)
+export function revalidateContent(table: ContentTable, ...rows: (ContentRow | null | undefined)[]) {
+  for (const tag of contentTags(table, rows.filter(Boolean) as ContentRow[])) revalidateTag(tag);
+}
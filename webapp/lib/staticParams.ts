@@ -0,0 +1,31 @@
+import { readFileSync } from 'fs';
+import path from 'path';
+
+// Slug da prerenderizzare al build: manifest scritto da Tools/static_params_export.py
+// (i più recenti --top contenuti pubblicati per lingua). Gli altri slug restano
+// dinamici (dynamicParams) e finiscono in cache alla prima visita. Le pagine
+// dichiarano `export const revalidate = 300` (letterale: Next lo legge staticamente,
+// stesso valore di REVALIDATE in lib/cacheTags.ts).
+
+type ManifestTable = 'news' | 'articles';
+type Manifest = { exported_at: string; top: number; locales: Record<string, { slug: string; updated_at: string }[]> };
+
+const cache = new Map<ManifestTable, Manifest | null>();
+
+function readManifest(table: ManifestTable): Manifest | null {
+  if (!cache.has(table)) {
+    try {
+      const file = path.join(process.cwd(), 'data', 'static-params', `${table}.json`);
+      cache.set(table, JSON.parse(readFileSync(file, 'utf-8')));
+    } catch {
+      cache.set(table, null); // manifest assente: nessun prerender, build comunque valida
+    }
+  }
+  return cache.get(table) ?? null;
+}
+
+// Per generateStaticParams di [locale]/…/[slug]: il layout fornisce già { locale }
+export function staticSlugs(table: ManifestTable, locale: string): { slug: string }[] {
+  const entries = readManifest(table)?.locales?.[locale] ?? [];
+  return entries.map((e) => ({ slug: e.slug }));
+}
@@ -0,0 +1,15 @@
+import 'server-only';
+import { createClient } from '@supabase/supabase-js';
+import { REVALIDATE } from '@/lib/cacheTags';
+
+export function getSupabaseCached(tags: string[], revalidate: number = REVALIDATE) {
+  const url = process.env.NEXT_PUBLIC_SUPABASE_URL;
+  const key = process.env.NEXT_PUBLIC_SUPABASE_ANON_KEY;
+  if (!url || !key) {
+    throw new Error('Missing Supabase env: NEXT_PUBLIC_SUPABASE_URL / NEXT_PUBLIC_SUPABASE_ANON_KEY');
+  }
+  return createClient(url, key, {
+    auth: { persistSession: false },
+    global: { fetch: (input, init) => fetch(input, { ...init, next: { revalidate, tags } }) },
+  });
+}